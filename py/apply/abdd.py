@@ -7,15 +7,21 @@
 import copy
 import itertools
 import os
+import random
 import re
+import numpy as np
 
 from typing import Generator, Optional
 from apply.abdd_node_cache import ABDDNodeCache, ABDDNodeCacheClass
+from apply.box_compilation import get_compiled_box
+from apply.batch_evaluation import DEFAULT_BATCH_SIZE, CompiledABDD, generate_assignments
+from apply.model_counting import count_models, iterate_models, sample_model
 from helpers.string_manipulation import create_string_from_name_set
 from helpers.utils import eprint, box_catalogue, box_arities
 from tree_automata.automaton import TTreeAut, iterate_edges, iterate_key_edge_tuples
 from tree_automata.transition import TEdge, TTransition
 from apply.abdd_node import ABDDNode
+from formats.dd_reader import DDReaderStats, read_dd
 
 
 class ABDD:
@@ -141,30 +147,73 @@ class ABDD:
             result += 1
         return result
 
-    def check_brute_force_equivalence(self, other: "ABDD") -> bool:
+    def check_brute_force_equivalence(self, other: "ABDD", batch_size: int = DEFAULT_BATCH_SIZE) -> bool:
         """
         For debugging and testing.
         Note: more robust version from 'evaluation.py' is used, which can even handle UBDAs as inputs.
+
+        All 2^n assignments are evaluated in batches of 'batch_size' assignments using evaluate_batch().
         """
         if self.variable_count != other.variable_count:
             raise ValueError("unequal number of variables for equivalence checking")
-        for assign_tuple in itertools.product([False, True], repeat=self.variable_count):
-            assignment = list(assign_tuple)
-            res1 = self.evaluate_for(assignment)
-            res2 = other.evaluate_for(assignment)
-            if res1 != res2:
+        compiled1 = CompiledABDD(self)
+        compiled2 = CompiledABDD(other)
+        total = 2**self.variable_count
+        for start in range(0, total, batch_size):
+            assignments = generate_assignments(self.variable_count, start, min(start + batch_size, total))
+            res1 = compiled1.evaluate(assignments)
+            res2 = compiled2.evaluate(assignments)
+            mismatch = np.flatnonzero(res1 != res2)
+            if len(mismatch) != 0:
+                i = mismatch[0]
+                assignment = [bool(val) for val in assignments[i]]
                 eprint(
-                    f"check_brute_force_equivalence({self.name}, {other.name}): not equal for {assignment} -> results: ({res1}, {res2})"
+                    f"check_brute_force_equivalence({self.name}, {other.name}): not equal for {assignment} -> results: ({res1[i]}, {res2[i]})"
                 )
-                # eprint(f"not equal for {{{','.join([f'{i}' for i, val in enumerate(assignment) if val])}}}")
                 return False
         return True
 
-    def evaluate_for(self, assignment: list[bool], verbose=False) -> int:
+    def evaluate_batch(self, assignments: np.ndarray) -> np.ndarray:
+        """
+        Vectorized version of evaluate_for(). 'assignments' is a 2D matrix (one assignment per row,
+        column i holds the value of variable i+1), the result is an array of 0/1 values, one per row.
+
+        The ABDD and the used boxes are compiled into flat transition tables (see 'batch_evaluation.py')
+        and all assignments are then pushed through the diagram level by level.
+        """
+        assignments = np.asarray(assignments)
+        if assignments.ndim != 2 or assignments.shape[1] < self.variable_count:
+            raise ValueError(f"evaluate_batch(): expected a matrix with {self.variable_count} columns")
+        return CompiledABDD(self).evaluate((assignments != 0).astype(np.intp))
+
+    def count_models(self) -> int:
+        """
+        Number of assignments for which the ABDD evaluates to 1, counted on the boxed representation
+        (without enumerating the assignments or unfolding the ABDD, see 'model_counting.py').
+        """
+        return count_models(self)
+
+    def iter_models(self) -> Generator[list[bool], None, None]:
+        """
+        Lazily generate all assignments for which the ABDD evaluates to 1 (in the order of itertools.product()).
+        """
+        return iterate_models(self)
+
+    def sample_model(self, rng: Optional[random.Random] = None) -> Optional[list[bool]]:
+        """
+        Uniformly random assignment for which the ABDD evaluates to 1, None if the ABDD represents constant 0.
+        """
+        return sample_model(self, rng)
+
+    def evaluate_for(self, assignment: list[bool], verbose=False, compiled=True) -> int:
         """
         Given an assignment of Boolean values
         (ordered based on the order of variables in the ABDD, assuming they start at 1),
-        evaluate the ABDD by traversing the structure -- in case of reduction rules, traverse the box's transition relation.
+        evaluate the ABDD by traversing the structure -- in case of reduction rules, evaluate the box.
+
+        'compiled' = True -> boxes are evaluated by the compiled (closed-form) evaluators from 'box_compilation.py',
+        'compiled' = False -> the box's transition relation is traversed (reference implementation, for debugging).
+        Verbose output always traces the box transitions.
         """
 
         def evaluate_box(box: TTreeAut, assignment: list[bool], node_map: dict[str, ABDDNode]) -> bool | ABDDNode:
@@ -235,12 +284,18 @@ class ABDD:
                 current_node = target[0]
             else:
                 target_var = max([self.variable_count + 1 if t.is_leaf else t.var for t in target])
-                port_map = {port: target[i] for i, (port, state) in enumerate(box_catalogue[rule].get_port_order())}
                 subassign = (
                     assignment[current_var + 1 : target_var - 1]
                     if not using_root_rule
                     else assignment[current_var : target_var - 1]
                 )
+                if compiled and not verbose:
+                    terminal, port = get_compiled_box(rule).evaluate(subassign)
+                    if terminal != -1:
+                        return terminal
+                    current_node = target[port]
+                    continue
+                port_map = {port: target[i] for i, (port, state) in enumerate(box_catalogue[rule].get_port_order())}
                 if verbose:
                     print(
                         f"var={current_var+1}, rule={rule}, target={','.join(f"{t.node}" for t in target)}, target_var={target_var}, ports={[f"{i} -> {n.node}" for i, (p, n) in enumerate(port_map.items())]}, sub={subassign}"
@@ -348,22 +403,31 @@ class ABDD:
     #     pass
 
 
-def obtain_child_node_info(target_str: str, leafnode_count: int = 2) -> list[int]:
+def obtain_child_node_info(target_str: str | bytes, leafnode_count: int = 2) -> list[int]:
+    """
+    Parse the target(s) of an edge: '<0>' (leaf), '5' (node) or '(2, 3)' (ports of a box) into node indices
+    (leaves are indexed 0 and 1, node indices are shifted by 'leafnode_count').
+    """
+    target_str = target_str.decode() if isinstance(target_str, bytes) else target_str
     if target_str.startswith("<"):
-        leaf = int(target_str.lstrip("<").rstrip(">").strip())
-        return [leaf]
+        return [int(target_str[1:-1])]
     if target_str.startswith("("):
-        nodes = target_str.lstrip("(").rstrip(")").split(",")
-        result = []
-        for n in nodes:
-            result.append(int(n) + leafnode_count)
-        return result if len(result) > 1 else result[0]
+        return [int(n) + leafnode_count for n in target_str[1:-1].split(",")]
     return [int(target_str) + leafnode_count]
 
 
-def import_abdd_from_abdd_file(path: str, ncache: Optional[ABDDNodeCacheClass] = None) -> ABDD:
+def import_abdd_from_abdd_file(
+    path: str,
+    ncache: Optional[ABDDNodeCacheClass] = None,
+    use_mmap: bool = False,
+    stats: Optional[DDReaderStats] = None,
+) -> ABDD:
     """
     Create an ABDD by importing from a .dd file (or .abdd or similar).
+
+    The file is streamed in one pass (see 'formats/dd_reader.py'). Nodes referenced before their own line
+    are created as placeholders and filled in once their line is read, so no second linking pass is needed.
+    'use_mmap' = True -> the file is memory-mapped, 'stats' (if given) collects the number of lines and the time.
     """
     if ncache is None:
         ncache = ABDDNodeCacheClass()
@@ -372,97 +436,71 @@ def import_abdd_from_abdd_file(path: str, ncache: Optional[ABDDNodeCacheClass] =
 
     dd_name: Optional[str] = None
     var_count: Optional[int] = None
-    root_idxs: Optional[list[int]] = None
-    root_node: list[ABDDNode] = []
-    node_cache: dict[int, tuple[ABDDNode, int | list[int], int | list[int]]] = {}
+    root_idxs: list[int] = []
     root_rule: Optional[str] = None
-
-    zero = ncache.terminal_0
-    one = ncache.terminal_1
-    node_cache[0] = (zero, [], [])
-    node_cache[1] = (one, [], [])
-    rootsmap: dict[int, ABDDNode] = {}
     leafnode_count = 2
 
-    with open(path, "r") as file:
-        for linenum, line in enumerate(file, start=1):
-            # remove comments, leading, trailing whitespaces
-            line = line.split("#")[0].strip()
-            if line == "":
-                continue
-            if line.startswith("@"):
-                if line not in ["@ABDD"]:
-                    eprint("Warning: Not @ABDD in the preamble")
-                continue
-            if line.startswith("%"):
-                parts = line.lstrip("%").split(maxsplit=1)
-                attribute = parts[0]
-                value = parts[1]
-                if attribute == "Name":
-                    dd_name = value
-                elif attribute == "Vars":
-                    var_count = int(value)
-                elif attribute == "Root":
-                    roots = value.split()
-                    root_idxs = [int(r) for r in roots]
-                elif attribute == "Rootrule":
-                    if value in box_arities:
-                        root_rule = value
-                    else:
-                        raise ValueError("Warning: Unknown root rule")
-                else:
-                    eprint(f"Warning: Unknown metadata attribute '{attribute}'")
-                continue
-
-            idxr = "([0-9]+)"
-            varr = "\[([0-9]*)\]"
-            tgtr = "(\([0-9\s\,]+\)|\<[0-9]+\>|[0-9]+)"
-            redr = "(?:\[(\w+)\])?"
-            node_record_regex = idxr + "\s*" + varr + "\s*" + tgtr + "\s*" + redr + "\s*" + tgtr + "\s*" + redr
-            node_record_match = re.search(node_record_regex, line)
-            node, var, low, lowr, high, highr = node_record_match.group(1, 2, 3, 4, 5, 6)
-
-            if any([s is None or s == "" for s in [node, var, low, high]]):
-                raise ValueError(f"Missing important node information at line {linenum}")
-
-            node_idx = int(node) + leafnode_count
-            if node_idx in node_cache:
-                raise ValueError(f"Duplicate entry for node {node}")
-            var = int(var)
-
-            if lowr is not None and lowr not in box_catalogue:
-                raise ValueError(f"Unknown low reduction rule '{lowr}' from node '{node}'")
-            if highr is not None and highr not in box_catalogue:
-                raise Exception(f"Unknown high reduction rule '{highr}' from node '{node}'")
-
-            try:
-                low_tgt: list[int] = obtain_child_node_info(low)
-            except:
-                raise ValueError(f"Invalid low child information for node '{node}'")
-            try:
-                high_tgt: list[int] = obtain_child_node_info(high)
-            except:
-                raise ValueError(f"Invalid high child information for node '{node}'")
-
-            newnode = ABDDNode(node_idx)
-
-            if int(node) in root_idxs:
-                rootsmap[int(node)] = newnode
-            newnode.var = var
-            newnode.is_leaf = False
-            newnode.low_box = lowr
-            newnode.high_box = highr
-            # only internal nodes are in the cache
-            node_cache[node_idx] = (newnode, low_tgt, high_tgt)
-
-    for node_idx, (node, low, high) in node_cache.items():
-        for i in low:
-            lownode, _, _ = node_cache[i]
-            node.connect_to_low_child(lownode)
-        for i in high:
-            highnode, _, _ = node_cache[i]
-            node.connect_to_high_child(highnode)
-    abddresult = ABDD(dd_name, var_count, [rootsmap[idx] for idx in root_idxs])
+    # node index (shifted by leafnode_count) -> node, including placeholders
+    nodes: dict[int, ABDDNode] = {0: ncache.terminal_0, 1: ncache.terminal_1}
+    defined: set[int] = set()
+
+    def get_node(idx: int) -> ABDDNode:
+        node = nodes.get(idx)
+        if node is None:
+            node = ABDDNode(idx)
+            nodes[idx] = node
+        return node
+
+    def on_header(line: str) -> None:
+        if line not in ["@ABDD", "@BDD"]:
+            eprint("Warning: Not @ABDD in the preamble")
+
+    def on_meta(attribute: str, value: str) -> None:
+        nonlocal dd_name, var_count, root_idxs, root_rule
+        if attribute == "Name":
+            dd_name = value
+        elif attribute == "Vars":
+            var_count = int(value)
+        elif attribute == "Root":
+            root_idxs = [int(r) for r in value.split()]
+        elif attribute == "Rootrule":
+            if value not in box_arities:
+                raise ValueError("Warning: Unknown root rule")
+            root_rule = value
+        else:
+            eprint(f"Warning: Unknown metadata attribute '{attribute}'")
+
+    def on_node(match: re.Match, linenum: int) -> None:
+        node, var, low, lowr, high, highr = match.groups()
+        if var == b"":
+            raise ValueError(f"Missing important node information at line {linenum}")
+        node_idx = int(node) + leafnode_count
+        if node_idx in defined:
+            raise ValueError(f"Duplicate entry for node {int(node)}")
+        defined.add(node_idx)
+        lowr = lowr.decode() if lowr is not None else None
+        highr = highr.decode() if highr is not None else None
+        if lowr is not None and lowr not in box_catalogue:
+            raise ValueError(f"Unknown low reduction rule '{lowr}' from node '{int(node)}'")
+        if highr is not None and highr not in box_catalogue:
+            raise ValueError(f"Unknown high reduction rule '{highr}' from node '{int(node)}'")
+
+        newnode = get_node(node_idx)
+        newnode.var = int(var)
+        newnode.is_leaf = False
+        newnode.low_box = lowr
+        newnode.high_box = highr
+        newnode.low = [get_node(i) for i in obtain_child_node_info(low, leafnode_count)]
+        newnode.high = [get_node(i) for i in obtain_child_node_info(high, leafnode_count)]
+
+    read_dd(path, on_header, on_meta, on_node, use_mmap, stats)
+
+    undefined = [idx - leafnode_count for idx in nodes.keys() if idx >= leafnode_count and idx not in defined]
+    if undefined != []:
+        raise ValueError(f"import_abdd_from_abdd_file(): nodes {undefined} are referenced, but not defined")
+    if any([idx + leafnode_count not in defined for idx in root_idxs]):
+        raise ValueError(f"import_abdd_from_abdd_file(): undefined root node in {root_idxs}")
+    abddresult = ABDD(dd_name, var_count, [nodes[idx + leafnode_count] for idx in root_idxs])
     abddresult.root_rule = root_rule
     return abddresult
 
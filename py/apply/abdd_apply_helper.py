@@ -7,7 +7,7 @@
 from typing import Optional
 from apply.abdd import ABDD
 from apply.abdd_node import ABDDNode
-from apply.abdd_call_cache import ABDDCallCacheClass
+from apply.abdd_call_cache import ABDDCallCacheClass, DEFAULT_CALL_CACHE_SIZE
 from apply.abdd_node_cache import ABDDNodeCacheClass
 
 
@@ -16,7 +16,8 @@ class ABDDApplyHelper:
     Helper class with necessary cache and information
     needed during the recursive apply function.
 
-    'call_cache' - Stores results of recursive apply calls.
+    'call_cache' - Stores results of recursive apply calls. Bounded (lossy), 'call_cache_size' sets the number of
+    slots. An existing call cache can be passed in to share the computed results across multiple Apply calls.
 
     'node_cache' - Makes sure that identical nodes are not duplicated.
     This differs from ApplyCallCache in the sense that two different apply
@@ -36,11 +37,21 @@ class ABDDApplyHelper:
     negation_cache: dict[int, ABDDNode]
 
     def __init__(
-        self, in1: ABDD, in2: Optional[ABDD], maxvar: Optional[int] = None, cache: Optional[ABDDNodeCacheClass] = None
+        self,
+        in1: ABDD,
+        in2: Optional[ABDD],
+        maxvar: Optional[int] = None,
+        cache: Optional[ABDDNodeCacheClass] = None,
+        call_cache: Optional[ABDDCallCacheClass] = None,
+        call_cache_size: int = DEFAULT_CALL_CACHE_SIZE,
     ):
-        self.call_cache = ABDDCallCacheClass()
+        self.call_cache = call_cache if call_cache is not None else ABDDCallCacheClass(call_cache_size)
         self.node_cache = cache if cache is not None else ABDDNodeCacheClass()
-        self.negation_cache = {id(cache.terminal_0): cache.terminal_1, id(cache.terminal_1): cache.terminal_0}
+        self.node_cache.register_call_cache(self.call_cache)
+        self.negation_cache = {
+            id(self.node_cache.terminal_0): self.node_cache.terminal_1,
+            id(self.node_cache.terminal_1): self.node_cache.terminal_0,
+        }
 
         self.abdd1: ABDD = in1
         self.abdd2: Optional[ABDD] = in2
@@ -71,7 +82,7 @@ def insert_abdd_in_node_cache(ncache: ABDDNodeCacheClass, abdd1: ABDD) -> None:
         if n.is_leaf:
             continue
         hit = ncache.find_node(n)
-        if hit is not None:
+        if hit is None:
             ncache.insert_node(n)
 
 
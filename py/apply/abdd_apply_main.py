@@ -4,13 +4,17 @@
 [description] Top-level implementation of Apply() on ABDDs (Automata-based Binary Decision Diagrams).
 """
 
-from typing import Optional
+from typing import Generator, Optional
 
 from apply.abdd import ABDD
 from apply.abdd_node import ABDDNode
 from apply.apply_edge import ApplyEdge
 from apply.abdd_apply_helper import ABDDApplyHelper
 from apply.abdd_node_cache import ABDDNodeCacheClass
+from apply.abdd_call_cache import ABDDCallCacheClass, DEFAULT_CALL_CACHE_SIZE
+from apply.abdd_canonization import ABDDCanonizationHelper, abdd_canonize
+from helpers.conjunction_scheduling import ConjunctionScheduleStats, schedule_conjunction
+from helpers.utils import box_orders
 
 from apply.box_algebra.apply_intersectoid import BooleanOperation
 from apply.box_algebra.box_trees import BoxTreeNode
@@ -31,15 +35,27 @@ def abdd_apply(
     in2: Optional[ABDD] = None,
     cache: Optional[ABDDNodeCacheClass] = None,
     maxvar: Optional[int] = None,
+    call_cache: Optional[ABDDCallCacheClass] = None,
+    call_cache_size: int = DEFAULT_CALL_CACHE_SIZE,
+    canonize: Optional[list[str]] = None,
 ) -> ABDD:
     """
-    This serves as a wrapper to the recursive abdd_apply_from(), where actual apply takes place.
+    This serves as a wrapper to abdd_apply_from(), where actual apply takes place.
 
     Herein, we just precompute and create some initial information and then call abdd_apply_from() on root nodes
     of the two given ABDDs.
 
     Apply can change/modify the structures of initial inputs (materialization), so it is advised to always create
     copies before apply calls.
+
+    'call_cache_size' bounds the number of slots of the (lossy) call cache created for this Apply call.
+    Alternatively, 'call_cache' can be used to share one call cache across a chain of Apply calls
+    (together with a shared node cache 'cache', which invalidates it after garbage collection).
+
+    If 'canonize' (a box order, e.g. box_orders["full"]) is set, the result is canonized directly
+    in the node cache (see abdd_canonization.py), otherwise it is returned as produced by Apply.
+    Note that except for the BDD box order, this normal form (and its node count) differs from the result
+    of the folding pipeline (ubda_folding()).
     """
     # some preliminary typecasting and checking
     if maxvar is None:
@@ -53,7 +69,9 @@ def abdd_apply(
     if not (maxvar is not None and type(in1) == ABDD and (type(in2) == ABDD or in2 is None)):
         raise ValueError("invalid parameters")
 
-    helper = ABDDApplyHelper(in1, in2, maxvar=maxvar, cache=cache)
+    helper = ABDDApplyHelper(
+        in1, in2, maxvar=maxvar, cache=cache, call_cache=call_cache, call_cache_size=call_cache_size
+    )
     e1 = ApplyEdge(in1, None, None)
 
     # special handling for negation
@@ -62,7 +80,7 @@ def abdd_apply(
         print(f"negation result = {roots}")
         abdd = ABDD(f"{op.name} {in1.name}", maxvar, roots)
         abdd.root_rule = negate_box_label[in1.root_rule]
-        return abdd
+        return abdd if canonize is None else abdd_canonize(abdd, canonize, helper.node_cache)
 
     if not (op.name != "NOT" and type(in2) == ABDD):
         raise ValueError("invalid parameters")
@@ -72,7 +90,70 @@ def abdd_apply(
     rule, roots = abdd_apply_from(op, None, e1, e2, helper)
     abdd = ABDD(f"({in1.name} {op.name} {in2.name})", maxvar, roots)
     abdd.root_rule = rule
-    return abdd
+    return abdd if canonize is None else abdd_canonize(abdd, canonize, helper.node_cache)
+
+
+def abdd_support(abdd: ABDD) -> set[int]:
+    """
+    Variables the function of the ABDD depends on. The box chains of the edges (and of the root rule) can cover
+    levels above the topmost node, so the support is taken from the decoded reduced BDD, not from the node variables.
+    """
+    helper = ABDDCanonizationHelper(abdd.variable_count, box_orders["bdd"], ABDDNodeCacheClass())
+    result: set[int] = set()
+    seen: set[int] = set()
+    stack: list[int] = [helper.decode(abdd)]
+    while stack != []:
+        fn = stack.pop()
+        if fn < 2 or fn in seen:
+            continue
+        seen.add(fn)
+        result.add(helper.var[fn])
+        stack.extend([helper.low[fn], helper.high[fn]])
+    return result
+
+
+def abdd_apply_many(
+    op: BooleanOperation,
+    abdds: list[ABDD],
+    strategy: str = "balanced",
+    cache: Optional[ABDDNodeCacheClass] = None,
+    maxvar: Optional[int] = None,
+    call_cache: Optional[ABDDCallCacheClass] = None,
+    collect_garbage: bool = False,
+    stats: Optional[ConjunctionScheduleStats] = None,
+) -> ABDD:
+    """
+    Combine all 'abdds' with the (associative and commutative) operation 'op', the order of the Apply calls
+    is given by the 'strategy' (see conjunction_scheduling.py).
+
+    All Apply calls share the node cache 'cache' and the call cache 'call_cache' (new ones by default).
+    With 'collect_garbage', the node cache is swept once it doubles in size (since the last sweep),
+    only the ABDDs still needed by the schedule (and the registered live roots) are kept.
+    """
+    cache = cache if cache is not None else ABDDNodeCacheClass()
+    call_cache = call_cache if call_cache is not None else ABDDCallCacheClass()
+    limit = 2 * cache.size()
+
+    def combine(abdd1: ABDD, abdd2: ABDD) -> ABDD:
+        return abdd_apply(op, abdd1, abdd2, cache=cache, maxvar=maxvar, call_cache=call_cache)
+
+    def collect(live: list[ABDD]) -> None:
+        nonlocal limit
+        if cache.size() >= limit:
+            cache.collect_garbage(live)
+            limit = 2 * cache.size()
+
+    return schedule_conjunction(
+        abdds, combine, ABDD.count_nodes, strategy, abdd_support, collect if collect_garbage else None, stats
+    )
+
+
+# Apply request (one 'call' of the Apply recursion) - op, var, e1, e2
+ApplyCall = tuple[BooleanOperation, Optional[int], ApplyEdge, ApplyEdge]
+
+# Apply frame - a suspended Apply call, which yields requests for the results of its sub-calls (ApplyCall)
+# and receives them back through send(), finally returning its own result (rule, targets)
+ApplyFrame = Generator[ApplyCall, tuple[Optional[str], list[ABDDNode]], tuple[Optional[str], list[ABDDNode]]]
 
 
 # NOTE: we probably need to have rule1, rule2 as operands too, since we need the
@@ -80,7 +161,33 @@ def abdd_apply_from(
     op: BooleanOperation, var: Optional[int], e1: ApplyEdge, e2: ApplyEdge, helper: ABDDApplyHelper
 ) -> tuple[Optional[str], list[ABDDNode]]:
     """
-    The main recursive Apply() function for ABDDs.
+    The main Apply() function for ABDDs.
+
+    The recursion of Apply is not performed on the Python call stack (which limits the depth by the recursion limit
+    and is slow for hundreds of variables), but on an explicit stack of suspended Apply frames (see apply_frame()).
+    Each frame yields requests for its recursive sub-calls, which are then pushed onto the stack, and once
+    a sub-call finishes, its result is sent back to the waiting parent frame.
+    The order of evaluation is the same as in the recursive formulation.
+    """
+    stack: list[ApplyFrame] = [apply_frame(op, var, e1, e2, helper)]
+    result: Optional[tuple[Optional[str], list[ABDDNode]]] = None
+    while stack != []:
+        try:
+            request = stack[-1].send(result)
+        except StopIteration as finished:
+            stack.pop()
+            result = finished.value
+            continue
+        stack.append(apply_frame(*request, helper))
+        result = None
+    return result
+
+
+def apply_frame(
+    op: BooleanOperation, var: Optional[int], e1: ApplyEdge, e2: ApplyEdge, helper: ABDDApplyHelper
+) -> ApplyFrame:
+    """
+    One (recursive) call of Apply() for ABDDs, see abdd_apply_from() for how the recursive calls are handled.
     Utilizes node cache (unique table), call cache (dynamic programming), short-circuit evaluation.
 
     First, materialization happens if needed (introducing a node to synchronize the source node variables).
@@ -121,13 +228,13 @@ def abdd_apply_from(
         if predicates1 != frozenset() and e1.rule:
             pattern = cached_materialization_recipes[e1.rule][predicates1]
             e1 = materialize_abdd_pattern(e1, pattern, matlevel, helper)
-            return abdd_apply_from(op, matlevel, e1, e2, helper)
+            return (yield (op, matlevel, e1, e2))
     if matlevel != max2:
         predicates2 = obtain_predicates(helper.abdd2, e2.source, e2.direction, matlevel)
         if predicates2 != frozenset() and e2.rule:
             pattern = cached_materialization_recipes[e2.rule][predicates2]
             e2 = materialize_abdd_pattern(e2, pattern, matlevel, helper)
-            return abdd_apply_from(op, matlevel, e1, e2, helper)
+            return (yield (op, matlevel, e1, e2))
 
     # edges to leaves -> this might not be needed if short-circuit evaluation happens before materialization
     # however, it seems necessary
@@ -143,7 +250,7 @@ def abdd_apply_from(
 
     boxtree = boxtree_cache[(e1.rule, op, e2.rule)]
     treelevel = min(e1.source.var if e1.source is not None else 1, e2.source.var if e2.source is not None else 1) + 1
-    rule, nodes = process_boxtree_innercase(boxtree, e1, e2, op, helper, matlevel, treelevel)
+    rule, nodes = yield from process_boxtree_innercase(boxtree, e1, e2, op, helper, matlevel, treelevel)
     helper.call_cache.insert_call(op, matlevel, e1, e2, rule, nodes)
     return rule, nodes
 
@@ -156,7 +263,7 @@ def process_boxtree_innercase(
     helper: ABDDApplyHelper,
     varlevel: int,
     rootlevel: int,
-) -> tuple[Optional[str], list[ABDDNode]]:
+) -> ApplyFrame:
     """
     [description]
     Combine two edge objects (their reduction rules) while traversing an structure (boxtree), which has
@@ -171,6 +278,8 @@ def process_boxtree_innercase(
         var should be the same for all edge targets)
     'rootlevel': variable of the root node of the boxtree (important in case the boxtree contains non-leaf nodes)
 
+    This is a generator (part of the Apply frame), recursive Apply calls are yielded, see abdd_apply_from().
+
     [return]
     The edge pointing to the root node of the boxtree
         - either a short edge in case boxtree has non-leaf nodes
@@ -199,8 +308,8 @@ def process_boxtree_innercase(
                 edge2low = ApplyEdge(e2.abdd, e2.target[pc.target2], False)
                 edge1high = ApplyEdge(e1.abdd, e1.target[pc.target1], True)
                 edge2high = ApplyEdge(e2.abdd, e2.target[pc.target2], True)
-                l_rule, l_target = abdd_apply_from(op, varlevel + 1, edge1low, edge2low, helper)
-                h_rule, h_target = abdd_apply_from(op, varlevel + 1, edge1high, edge2high, helper)
+                l_rule, l_target = yield (op, varlevel + 1, edge1low, edge2low)
+                h_rule, h_target = yield (op, varlevel + 1, edge1high, edge2high)
                 node = ABDDNode(helper.counter)
                 node.var = varlevel
                 node.low_box = l_rule
@@ -227,12 +336,12 @@ def process_boxtree_innercase(
         return rule, nodes
 
     low_rule, low_targets = (
-        process_boxtree_innercase(boxtree.low, e1, e2, op, helper, varlevel, rootlevel + 1)
+        (yield from process_boxtree_innercase(boxtree.low, e1, e2, op, helper, varlevel, rootlevel + 1))
         if boxtree.low
         else (None, [])
     )
     high_rule, high_targets = (
-        process_boxtree_innercase(boxtree.high, e1, e2, op, helper, varlevel, rootlevel + 1)
+        (yield from process_boxtree_innercase(boxtree.high, e1, e2, op, helper, varlevel, rootlevel + 1))
         if boxtree.high
         else (None, [])
     )
@@ -9,25 +9,51 @@ from typing import NewType, Optional
 from apply.apply_edge import ApplyEdge
 from apply.box_algebra.apply_tables import BooleanOperation
 from apply.abdd_node import ABDDNode
+from helpers.utils import box_codes
 
+# cache[ op, var, box_a, nodes_a, box_b, nodes_b ] -> rule, nodes
+ABDDCallKey = tuple[
+    int,  # operation used in the apply call (BooleanOperation value)
+    Optional[int],  # at which variable level is apply called
+    int | str,  # box code used on the first operand edge
+    tuple[int, ...],  # node uids of the first operand edge
+    int | str,  # box code used on the second operand edge
+    tuple[int, ...],  # node uids of the second operand edge
+]
 
-# cache[ op, var, nodes_a, box_a, nodes_b, box_b ] -> rule, nodes
+# one slot of the computed table, None if empty
 ABDDCallCache = NewType(
     "ABDDCallCache",
-    dict[
-        tuple[
-            BooleanOperation,  # operation used in the apply call
-            int,  # at which variable level is apply called
-            Optional[str],  # box used on the first operand edge
-            tuple[int],  # node list of the first operand edge
-            Optional[str],  # box used on the second operand edge
-            tuple[int],  # node list of the second operand edge
-        ],
-        # returning a rule and target nodes
-        tuple[Optional[str], list[ABDDNode]],
+    list[
+        Optional[
+            tuple[
+                ABDDCallKey,
+                # returning a rule and target nodes
+                Optional[str],
+                list[ABDDNode],
+            ]
+        ]
     ],
 )
 
+# default number of slots of the computed table
+DEFAULT_CALL_CACHE_SIZE = 2**16
+
+
+def get_call_key(op: BooleanOperation, var: Optional[int], edge1: ApplyEdge, edge2: ApplyEdge) -> ABDDCallKey:
+    """
+    The key only consists of integers (and None), which are hashed the same way in every run
+    (unlike strings and enums), so the slots of the lossy cache, and therefore the results, are reproducible.
+    """
+    return (
+        op.value,
+        var,
+        box_codes.get(edge1.rule, edge1.rule),
+        tuple([n.uid for n in edge1.target]),
+        box_codes.get(edge2.rule, edge2.rule),
+        tuple([n.uid for n in edge2.target]),
+    )
+
 
 class ABDDCallCacheClass:
     """
@@ -41,36 +67,88 @@ class ABDDCallCacheClass:
     worst case scenario is that every edge will be applied with every edge,
     because we don't have to evaluate the same pair of edges twice, as during
     the second time we retrieve it from the cache immediately.
+
+    The cache is a lossy computed table (in the style of CUDD/Sylvan) with a fixed number of slots
+    (rounded up to a power of two). Each call is hashed into exactly one slot and a colliding insertion
+    simply overwrites the previous entry (eviction), so the memory usage stays bounded.
+    Losing an entry only means that the call will be computed again.
+    Node references are stored as ABDDNode uids, which (unlike id()) are never reused.
+
+    Statistics are counted per operation: 'hits', 'misses', 'evictions'.
     """
 
-    def __init__(self):
-        self.cache: ABDDCallCache = {}
+    def __init__(self, size: int = DEFAULT_CALL_CACHE_SIZE):
+        if size < 1:
+            raise ValueError(f"ABDDCallCacheClass(): invalid cache size {size}")
+        self.size: int = 1 << (size - 1).bit_length()
+        self.mask: int = self.size - 1
+        self.cache: ABDDCallCache = [None] * self.size
+        self.hits: dict[BooleanOperation, int] = {}
+        self.misses: dict[BooleanOperation, int] = {}
+        self.evictions: dict[BooleanOperation, int] = {}
 
     def insert_call(
         self,
         op: BooleanOperation,
-        var: int,
+        var: Optional[int],
         edge1: ApplyEdge,
         edge2: ApplyEdge,
         rule: Optional[str],
         targets: list[ABDDNode],
     ) -> None:
-        tgt1 = tuple([id(n) for n in edge1.target])
-        tgt2 = tuple([id(n) for n in edge2.target])
-        lookup = (op, var, edge1.rule, tgt1, edge2.rule, tgt2)
-        self.cache[lookup] = (rule, targets)
+        lookup = get_call_key(op, var, edge1, edge2)
+        slot = hash(lookup) & self.mask
+        entry = self.cache[slot]
+        if entry is not None and entry[0] != lookup:
+            self.evictions[op] = self.evictions.get(op, 0) + 1
+        self.cache[slot] = (lookup, rule, targets)
 
     def find_call(
-        self, op: BooleanOperation, var: int, edge1: ApplyEdge, edge2: ApplyEdge
+        self, op: BooleanOperation, var: Optional[int], edge1: ApplyEdge, edge2: ApplyEdge
     ) -> Optional[tuple[Optional[str], list[ABDDNode]]]:
-        tgt1 = tuple([id(n) for n in edge1.target])
-        tgt2 = tuple([id(n) for n in edge2.target])
-        lookup = (op, var, edge1.rule, tgt1, edge2.rule, tgt2)
-        if lookup in self.cache:
-            rule, nodes = self.cache[lookup]
-            return rule, nodes
+        lookup = get_call_key(op, var, edge1, edge2)
+        entry = self.cache[hash(lookup) & self.mask]
+        if entry is not None and entry[0] == lookup:
+            self.hits[op] = self.hits.get(op, 0) + 1
+            return entry[1], entry[2]
+        self.misses[op] = self.misses.get(op, 0) + 1
         return None
 
+    def invalidate(self, dead_uids: set[int]) -> int:
+        """
+        Remove all entries which reference (as operands or as results) some of the nodes from 'dead_uids'.
+        This is called by the node cache after garbage collection, returns the number of removed entries.
+        """
+        removed = 0
+        for slot, entry in enumerate(self.cache):
+            if entry is None:
+                continue
+            _, _, _, tgt1, _, tgt2 = entry[0]
+            if any(uid in dead_uids for uid in tgt1 + tgt2) or any(n.uid in dead_uids for n in entry[2]):
+                self.cache[slot] = None
+                removed += 1
+        return removed
+
+    def clear(self) -> None:
+        self.cache = [None] * self.size
+
+    def occupied(self) -> int:
+        return sum(1 for entry in self.cache if entry is not None)
+
+    def get_stats(self) -> dict[str, dict[str, int]]:
+        """
+        Returns {operation name: {'hits': int, 'misses': int, 'evictions': int}}.
+        """
+        ops = set(self.hits.keys()) | set(self.misses.keys()) | set(self.evictions.keys())
+        return {
+            op.name: {
+                "hits": self.hits.get(op, 0),
+                "misses": self.misses.get(op, 0),
+                "evictions": self.evictions.get(op, 0),
+            }
+            for op in sorted(ops, key=lambda o: o.name)
+        }
+
     def __repr__(self) -> str:
         result = "%-*s %-*s %-*s %-*s %-*s %-*s %-*s -> %-*s\n" % (
             4,
@@ -91,24 +169,25 @@ class ABDDCallCacheClass:
             "resNodes",
         )
         result += "-" * 80 + "\n"
-        for tup, node in self.cache.items():
-            op: BooleanOperation
-            op, var, rule1, tgt1, rule2, tgt2 = tup
+        for entry in self.cache:
+            if entry is None:
+                continue
+            (opval, var, rule1, tgt1, rule2, tgt2), rule, nodes = entry
             result += "%-*s %-*s %-*s %-*s %-*s %-*s %-*s -> %-*s\n" % (
                 4,
-                op.name,
+                BooleanOperation(opval).name,
                 4,
                 var,
                 5,
-                "-" if rule1 is None else rule1,
+                "-" if rule1 == 0 else rule1,
                 10,
                 "[" + ",".join([str(l) for l in tgt1]) + "]",
                 5,
-                "-" if rule2 is None else rule2,
+                "-" if rule2 == 0 else rule2,
                 10,
                 "[" + ",".join([str(l) for l in tgt2]) + "]",
                 50,
-                node,
+                (rule, nodes),
             )
         return result
 
@@ -0,0 +1,287 @@
+"""
+[file] abdd_canonization.py
+[author] Jany26  (Jan Matufka)  <xmatuf00@stud.fit.vutbr.cz>
+[description] Canonization of ABDDs directly on the ABDDNode graph (without the TTreeAut round-trip
+through unfolding, normalization and folding).
+"""
+
+from typing import Optional
+
+from apply.abdd import ABDD, construct_node
+from apply.abdd_node import ABDDNode
+from apply.abdd_node_cache import ABDDNodeCacheClass
+from helpers.utils import box_arities, box_orders
+
+"""
+The canonization works in two passes:
+
+1) decoding - the input ABDD is traversed bottom-up and each node is hashed into a (fully) reduced BDD,
+   represented by integer IDs (0 and 1 are the terminals) and a unique table (var, low, high) -> ID.
+   Reduction rules on the edges are expanded according to the semantics of the boxes (the same as after
+   unfolding, i.e. the ports of LPort/HPort can be on different levels), so two nodes representing the same Boolean function (over the variables from their level down)
+   always get the same ID, regardless of how they were reduced in the input.
+
+2) encoding - the reduced BDD is folded top-down. The function 'f' at level 'i' is represented by the ABDD node
+   of variable 'i' (a don't-care node, if 'f' does not depend on 'i'). Each of its edges is reduced by the first
+   box (in the order of 'boxes') that covers at least one variable level from the target level down.
+   L0/L1/H0/H1 and LPort/HPort chains are always taken maximal, all port nodes of a box are on the same level
+   (the level right after the box), and if no box can be used, the edge is short (the target is materialized
+   on the next level). Nodes are created through the unique table (construct_node()), so isomorphic nodes
+   are merged, also with the nodes already present in the node cache (e.g. other Apply results).
+
+Both passes process each (function, level) pair once, the chains of the boxes are memoized,
+so the canonization runs in time (almost) linear in the size of the input and output diagrams.
+The result only depends on the represented function and the box order, so equivalent ABDDs canonized
+with the same box order into the same node cache have identical root nodes.
+
+Note: this is a different normal form than the one produced by the TTreeAut pipeline (unfolding, normalization,
+ubda_folding()), the node counts only agree for the BDD box order:
+- ubda_folding() works on the UBDA, where a range of don't-care levels is one state with a self-loop,
+  an ABDD node has exactly one variable, so here a node is materialized on each don't-care level
+  not covered by a box (e.g. the 'zbdd' order gives much larger diagrams here),
+- ubda_folding() applies one box at a time to all edges (in the order of the boxes) and takes any port mapping
+  found by box_finding() (the ports stay on the levels of their states), here each edge takes the first box
+  covering at least one level, with maximal chains and all ports on the level right after the box.
+The node counts of the other box orders differ in both directions (see test_abdd_canonization.py).
+"""
+
+# side of the box chain with the constant (or the common port), the chain continues on the other side
+# and the constant (terminal ID) or None for the port boxes
+box_chain_sides: dict[str, tuple[int, Optional[int]]] = {
+    "L0": (0, 0),
+    "L1": (0, 1),
+    "H0": (1, 0),
+    "H1": (1, 1),
+    "LPort": (0, None),
+    "HPort": (1, None),
+}
+
+# reduction rule + list of (function ID, level) pairs for each port
+EdgePlan = tuple[Optional[str], list[tuple[int, int]]]
+
+
+class ABDDCanonizationHelper:
+    """
+    Reduced BDD built from the decoded ABDD, together with the memoized box chains and created nodes.
+
+    'var', 'low', 'high' - levels and children of the reduced BDD nodes (indexed by ID),
+    terminals are on the level 'variable_count + 1',
+    'unique' - unique table of the reduced BDD, (var, low, high) -> ID,
+    'chains' - memoized ends of box chains starting in a node on its own level,
+    'nodes' - created ABDD nodes, (ID, level) -> ABDDNode.
+    """
+
+    def __init__(self, variable_count: int, boxes: list[str], ncache: ABDDNodeCacheClass):
+        for box in boxes:
+            if box not in box_arities or box is None:
+                raise ValueError(f"ABDDCanonizationHelper(): unsupported box '{box}'")
+        self.variable_count: int = variable_count
+        self.boxes: list[str] = boxes
+        self.ncache: ABDDNodeCacheClass = ncache
+        self.var: list[int] = [variable_count + 1, variable_count + 1]
+        self.low: list[int] = [-1, -1]
+        self.high: list[int] = [-1, -1]
+        self.unique: dict[tuple[int, int, int], int] = {}
+        self.chains: dict[tuple, tuple[int, int]] = {}
+        self.nodes: dict[tuple[int, int], ABDDNode] = {}
+
+    def make_node(self, var: int, low: int, high: int) -> int:
+        if low == high:
+            return low
+        key = (var, low, high)
+        result = self.unique.get(key)
+        if result is None:
+            result = len(self.var)
+            self.var.append(var)
+            self.low.append(low)
+            self.high.append(high)
+            self.unique[key] = result
+        return result
+
+    def get_children(self, fn: int, level: int) -> tuple[int, int]:
+        """
+        Low and high child of the function 'fn' on the 'level' (both are 'fn' if it does not depend on 'level').
+        """
+        if self.var[fn] == level:
+            return self.low[fn], self.high[fn]
+        return fn, fn
+
+    # decoding (ABDD -> reduced BDD)
+
+    def decode_edge(self, box: Optional[str], targets: list[ABDDNode], ids: dict[int, int], level: int) -> int:
+        """
+        Function represented by the edge with the reduction rule 'box' and the 'targets', where 'level'
+        is the first variable covered by the box (one below the source node, or 1 for the root rule).
+        'ids' maps the uids of the (already decoded) target nodes to the IDs of their functions.
+        """
+        if box not in box_arities:
+            raise ValueError(f"decode_edge(): unsupported box '{box}'")
+        if len(targets) != box_arities[box]:
+            raise ValueError(f"decode_edge(): box '{box}' with {len(targets)} targets")
+        if box is None or box == "X":
+            return ids[targets[0].uid]
+        levels = [self.variable_count + 1 if t.is_leaf else t.var for t in targets]
+        side, constant = box_chain_sides[box]
+        # the chain of the box ends above the port it continues with,
+        # the common port of LPort/HPort (reached through don't-care levels) can be further below
+        end = levels[0] if constant is not None else levels[1 - side]
+        if constant is None:
+            if levels[side] < end:
+                raise ValueError(f"decode_edge(): common port of '{box}' above the end of the chain")
+            common = ids[targets[side].uid]
+            result = ids[targets[1 - side].uid]
+        else:
+            common = constant
+            result = ids[targets[0].uid]
+        for var in range(end - 1, level - 1, -1):
+            result = self.make_node(var, common, result) if side == 0 else self.make_node(var, result, common)
+        return result
+
+    def decode(self, abdd: ABDD) -> int:
+        """
+        Hash all nodes of the ABDD into the reduced BDD (bottom-up), return the ID of the whole function.
+        """
+        ids: dict[int, int] = {}  # ABDDNode uid -> ID
+        stack: list[tuple[ABDDNode, bool]] = [(root, False) for root in abdd.roots]
+        while stack != []:
+            node, expanded = stack.pop()
+            if node.uid in ids:
+                continue
+            if node.is_leaf:
+                ids[node.uid] = int(node.leaf_val)
+                continue
+            if not expanded:
+                stack.append((node, True))
+                stack.extend([(child, False) for child in node.low + node.high if child.uid not in ids])
+                continue
+            if not 1 <= node.var <= self.variable_count:
+                raise ValueError(f"decode(): node {node.node} with variable {node.var} out of range")
+            for child in node.low + node.high:
+                if not child.is_leaf and child.var <= node.var:
+                    raise ValueError(f"decode(): edge from node {node.node} to node {child.node} against the order")
+            low = self.decode_edge(node.low_box, node.low, ids, node.var + 1)
+            high = self.decode_edge(node.high_box, node.high, ids, node.var + 1)
+            ids[node.uid] = self.make_node(node.var, low, high)
+        return self.decode_edge(abdd.root_rule, abdd.roots, ids, 1)
+
+    # encoding (reduced BDD -> canonical ABDD)
+
+    def get_chain_end(self, box: str, fn: int, level: int, common: Optional[int] = None) -> tuple[int, int]:
+        """
+        Follow the chain of the 'box' from the function 'fn' on the 'level' as far as possible.
+        Returns the level after the chain and the function the chain continues with on that level.
+
+        For L0/L1/H0/H1, the constant side of each node has to be the terminal, for LPort/HPort, the function
+        'common', the chain of the port boxes cannot continue past the level of 'common'.
+        """
+        side, constant = box_chain_sides[box]
+        if constant is not None:
+            common = constant
+            limit = self.variable_count + 1
+        else:
+            limit = self.var[common]
+        path: list[int] = []
+        while True:
+            if level >= limit:
+                result = (level, fn)
+                break
+            if self.var[fn] > level:
+                # 'fn' does not depend on variables up to its own level, the chain continues only if it is 'common'
+                result = (limit, fn) if fn == common else (level, fn)
+                break
+            key = (box, fn, common)
+            if key in self.chains:
+                result = self.chains[key]
+                break
+            children = (self.low[fn], self.high[fn])
+            if children[side] != common:
+                result = (level, fn)
+                break
+            path.append(fn)
+            fn = children[1 - side]
+            level += 1
+        for node in path:
+            self.chains[(box, node, common)] = result
+        return result
+
+    def get_edge_plan(self, fn: int, level: int) -> EdgePlan:
+        """
+        Reduction rule and ports of the edge to the function 'fn', where 'level' is the level after the source.
+        """
+        if level > self.variable_count:
+            return None, [(fn, level)]
+        for box in self.boxes:
+            if box == "X":
+                if self.var[fn] > level:
+                    return "X", [(fn, self.var[fn])]
+                continue
+            side, constant = box_chain_sides[box]
+            common = None if constant is not None else self.get_children(fn, level)[side]
+            end, port = self.get_chain_end(box, fn, level, common)
+            if end == level:
+                continue
+            if constant is not None:
+                return box, [(port, end)]
+            if self.var[common] != end:
+                continue
+            return box, [(common, end), (port, end)] if side == 0 else [(port, end), (common, end)]
+        return None, [(fn, level)]
+
+    def get_node(self, fn: int, level: int) -> ABDDNode:
+        """
+        Create (or find) the canonical ABDD node for the function 'fn' on the 'level' together with
+        all nodes below it. The traversal uses an explicit stack instead of recursion.
+        """
+        pending: dict[tuple[int, int], tuple[EdgePlan, EdgePlan]] = {}
+        stack: list[tuple[int, int]] = [(fn, level)]
+        while stack != []:
+            key = stack[-1]
+            if key in self.nodes:
+                stack.pop()
+                continue
+            current, current_level = key
+            if current_level > self.variable_count:
+                self.nodes[key] = self.ncache.terminal_1 if current == 1 else self.ncache.terminal_0
+                stack.pop()
+                continue
+            if key not in pending:
+                low, high = self.get_children(current, current_level)
+                pending[key] = (self.get_edge_plan(low, current_level + 1), self.get_edge_plan(high, current_level + 1))
+            missing = [port for _, ports in pending[key] for port in ports if port not in self.nodes]
+            if missing != []:
+                stack.extend(missing)
+                continue
+            stack.pop()
+            (low_box, low_ports), (high_box, high_ports) = pending.pop(key)
+            self.nodes[key] = construct_node(
+                current_level,
+                low_box,
+                [self.nodes[port] for port in low_ports],
+                high_box,
+                [self.nodes[port] for port in high_ports],
+                self.ncache,
+            )
+        return self.nodes[(fn, level)]
+
+
+def abdd_canonize(abdd: ABDD, boxes: Optional[list[str]] = None, ncache: Optional[ABDDNodeCacheClass] = None) -> ABDD:
+    """
+    Create a canonical ABDD representing the same function as 'abdd', reduced by the 'boxes'
+    (a box order, e.g. box_orders["cesr"], the full box order by default).
+    Except for the BDD box order, the normal form differs from the result of ubda_folding() (see above).
+    Nodes are created in the node cache 'ncache' (e.g. the one used by Apply), or in a new one.
+    The input ABDD is not modified.
+    """
+    boxes = boxes if boxes is not None else box_orders["full"]
+    ncache = ncache if ncache is not None else ABDDNodeCacheClass()
+    helper = ABDDCanonizationHelper(abdd.variable_count, boxes, ncache)
+    fn = helper.decode(abdd)
+    rule, ports = helper.get_edge_plan(fn, 1)
+    result = ABDD(abdd.name, abdd.variable_count, [helper.get_node(port, level) for port, level in ports], rule)
+    result.terminal_0 = ncache.terminal_0
+    result.terminal_1 = ncache.terminal_1
+    result.node_count = result.count_nodes()
+    return result
+
+
+# End of file abdd_canonization.py
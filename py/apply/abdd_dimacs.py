@@ -0,0 +1,208 @@
+"""
+[file] abdd_dimacs.py
+[author] Jany26  (Jan Matufka)  <xmatuf00@stud.fit.vutbr.cz>
+[description] Compilation of DIMACS CNF files into ABDDs (clause by clause, in batches).
+"""
+
+import os
+import time
+
+from typing import Optional
+
+from apply.abdd import ABDD
+from apply.abdd_apply_main import abdd_apply_many
+from apply.abdd_call_cache import ABDDCallCacheClass
+from apply.abdd_canonization import ABDDCanonizationHelper, abdd_canonize
+from apply.abdd_node_cache import ABDDNodeCacheClass
+from apply.box_algebra.apply_tables import BooleanOperation
+from helpers.conjunction_scheduling import ConjunctionScheduleStats
+from helpers.utils import box_orders
+
+"""
+Each clause is compiled into its ABDD directly (without Apply): the clause l1 | ... | lk with the variables
+v1 < ... < vk is the chain of BDD nodes 'vi ? (li satisfied -> 1, else next node)', which is hashed into
+the reduced BDD of ABDDCanonizationHelper and encoded as the canonical ABDD for the given box order
+(see abdd_canonization.py), so the clause is built in time linear in its width, for any width and any number
+of variables. Tautologies (x | -x) are the constant 1, the empty clause is the constant 0.
+The clauses use the BDD box order (only 'X') by default - the same form as the literal ABDDs combined by Apply
+before. The final result can be canonized into any box order ('canonize').
+
+The clauses are then processed in batches of 'batch_size' clauses. The ABDD of each batch together with
+the result of the previous batches is combined by abdd_apply_many() in the order given by the conjunction schedule
+(see conjunction_scheduling.py), e.g. 'cluster' combines the clauses over the bottom variables first.
+All Apply calls share one node cache and one call cache, the garbage is collected during the schedule.
+The helper used to encode the clauses of one batch is dropped after the batch, so it never refers to nodes
+removed by the garbage collection.
+
+Intermediate results (after every 'export_every' batches) can be exported into .dd files, nodes are renumbered
+(ABDDNodeCacheClass.refresh_nodes()) only before an export.
+"""
+
+# number of clauses combined by one conjunction schedule
+DEFAULT_CLAUSE_BATCH_SIZE = 512
+
+
+class DimacsCompileStats:
+    """
+    Statistics of one DIMACS compilation: number of variables and clauses (tautologies are skipped),
+    batches, exported intermediate results, statistics of the conjunction schedules and the total time.
+    """
+
+    def __init__(self):
+        self.variables: int = 0
+        self.clauses: int = 0
+        self.tautologies: int = 0
+        self.batches: int = 0
+        self.exports: int = 0
+        self.schedule = ConjunctionScheduleStats()
+        self.seconds: float = 0.0
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(variables={self.variables}, clauses={self.clauses}, "
+            f"tautologies={self.tautologies}, batches={self.batches}, exports={self.exports}, "
+            f"schedule={self.schedule}, seconds={self.seconds:.4f})"
+        )
+
+
+def read_dimacs_clauses(path: str, max_clauses: Optional[int] = None) -> tuple[int, list[list[int]]]:
+    """
+    Number of variables and the clauses (lists of literals) of the CNF in the DIMACS file.
+    Clauses are terminated by 0 and can span multiple lines, the file can end with '%' (SATLIB benchmarks).
+    Without the 'p cnf' line, the number of variables is the largest variable used.
+    """
+    variable_count: Optional[int] = None
+    clauses: list[list[int]] = []
+    clause: list[int] = []
+    with open(path, "r") as file:
+        for line in file:
+            words = line.split()
+            if words == [] or words[0] == "c":
+                continue
+            if words[0] == "p":
+                if len(words) < 4 or words[1] != "cnf":
+                    raise ValueError(f"read_dimacs_clauses(): unsupported problem line '{line.strip()}'")
+                variable_count = int(words[2])
+                continue
+            if words[0] == "%":
+                break
+            for word in words:
+                literal = int(word)
+                if literal != 0:
+                    clause.append(literal)
+                    continue
+                clauses.append(clause)
+                clause = []
+            if max_clauses is not None and len(clauses) >= max_clauses:
+                break
+    if clause != []:
+        clauses.append(clause)
+    clauses = clauses[:max_clauses] if max_clauses is not None else clauses
+    largest = max([abs(literal) for clause in clauses for literal in clause], default=0)
+    if variable_count is None:
+        variable_count = largest
+    if largest > variable_count:
+        raise ValueError(f"read_dimacs_clauses(): variable {largest} out of range (at most {variable_count})")
+    return variable_count, clauses
+
+
+def create_clause_abdd(literals: list[int], name: str, helper: ABDDCanonizationHelper) -> ABDD:
+    """
+    Canonical ABDD of the disjunction of the DIMACS 'literals' (the box order and the node cache are
+    the ones of the 'helper').
+    """
+    polarity: dict[int, bool] = {}
+    for literal in literals:
+        if polarity.get(abs(literal), literal > 0) != (literal > 0):
+            polarity = None  # tautology
+            break
+        polarity[abs(literal)] = literal > 0
+    if polarity is None:
+        fn = 1
+    else:
+        fn = 0
+        for var in sorted(polarity, reverse=True):
+            fn = helper.make_node(var, fn, 1) if polarity[var] else helper.make_node(var, 1, fn)
+    rule, ports = helper.get_edge_plan(fn, 1)
+    result = ABDD(name, helper.variable_count, [helper.get_node(port, level) for port, level in ports], rule)
+    result.terminal_0 = helper.ncache.terminal_0
+    result.terminal_1 = helper.ncache.terminal_1
+    return result
+
+
+def dimacs_to_abdd(
+    path: str,
+    schedule: str = "cluster",
+    batch_size: int = DEFAULT_CLAUSE_BATCH_SIZE,
+    boxes: Optional[list[str]] = None,
+    ncache: Optional[ABDDNodeCacheClass] = None,
+    call_cache: Optional[ABDDCallCacheClass] = None,
+    max_clauses: Optional[int] = None,
+    export_dir: Optional[str] = None,
+    export_every: int = 0,
+    canonize: Optional[list[str]] = None,
+    stats: Optional[DimacsCompileStats] = None,
+) -> ABDD:
+    """
+    ABDD of the CNF in the DIMACS file 'path'.
+    - 'schedule'     ... conjunction schedule of each batch (see conjunction_strategies),
+    - 'batch_size'   ... number of clauses of one batch,
+    - 'boxes'        ... box order used for the clause ABDDs (box_orders["bdd"] by default),
+    - 'ncache', 'call_cache' ... node cache and call cache of all Apply calls (new ones by default),
+    - 'max_clauses'  ... only the first 'max_clauses' clauses are used,
+    - 'export_dir'   ... directory for the .dd files of the intermediate results (<name>-c<clauses>.dd)
+                         after every 'export_every' batches (0 = only the final result <name>.dd),
+    - 'canonize'     ... box order, into which the final result is canonized (see abdd_canonize()),
+    - 'stats'        ... filled with the statistics of the compilation.
+    """
+    if batch_size < 1:
+        raise ValueError(f"dimacs_to_abdd(): invalid batch size {batch_size}")
+    start = time.perf_counter()
+    boxes = boxes if boxes is not None else box_orders["bdd"]
+    ncache = ncache if ncache is not None else ABDDNodeCacheClass()
+    call_cache = call_cache if call_cache is not None else ABDDCallCacheClass()
+    stats = stats if stats is not None else DimacsCompileStats()
+    name = os.path.basename(path).split(".")[0]
+    variable_count, clauses = read_dimacs_clauses(path, max_clauses)
+    stats.variables = variable_count
+
+    result: Optional[ABDD] = None
+    for first in range(0, len(clauses), batch_size):
+        helper = ABDDCanonizationHelper(variable_count, boxes, ncache)
+        batch = [] if result is None else [result]
+        for i, literals in enumerate(clauses[first : first + batch_size], start=first + 1):
+            clause = create_clause_abdd(literals, f"{name}-{i}", helper)
+            if clause.roots[0] is ncache.terminal_1:
+                stats.tautologies += 1
+                continue
+            batch.append(clause)
+            stats.clauses += 1
+        if batch != []:
+            result = abdd_apply_many(
+                BooleanOperation.AND, batch, schedule, ncache, variable_count, call_cache, True, stats.schedule
+            )
+            result.name = name  # Apply results are named by the whole expression
+        stats.batches += 1
+        processed = min(first + batch_size, len(clauses))
+        if result is not None and export_dir is not None and export_every > 0 and stats.batches % export_every == 0:
+            export_abdd(result, f"{name}-c{processed}", export_dir, ncache)
+            stats.exports += 1
+
+    if result is None:
+        result = ABDD(name, variable_count, [ncache.terminal_1], "X")
+    if canonize is not None:
+        result = abdd_canonize(result, canonize, ncache)
+    result.name = name
+    if export_dir is not None:
+        export_abdd(result, name, export_dir, ncache)
+    stats.seconds += time.perf_counter() - start
+    return result
+
+
+def export_abdd(abdd: ABDD, name: str, directory: str, ncache: ABDDNodeCacheClass) -> None:
+    abdd.name = name
+    ncache.refresh_nodes()
+    abdd.export_to_abdd_file(os.path.join(directory, f"{name}.dd"))
+
+
+# End of file abdd_dimacs.py
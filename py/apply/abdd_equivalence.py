@@ -0,0 +1,98 @@
+"""
+[file] abdd_equivalence.py
+[author] Jany26  (Jan Matufka)  <xmatuf00@stud.fit.vutbr.cz>
+[description] Symbolic (non-enumerative) equivalence checking of ABDDs using Apply(XOR).
+"""
+
+from typing import Optional
+
+from apply.abdd import ABDD
+from apply.abdd_apply_main import abdd_apply
+from apply.abdd_node import ABDDNode
+from apply.abdd_node_cache import ABDDNodeCacheClass
+from apply.box_algebra.apply_tables import BooleanOperation
+from apply.box_compilation import get_compiled_box
+from canonization.unfolding import ubda_unfolding
+from tree_automata.functions.emptiness import non_empty_bottom_up
+
+
+def abdd_is_false(abdd: ABDD) -> bool:
+    """
+    Decide whether the ABDD represents the constant 0 (false) function, i.e. whether no assignment evaluates to 1.
+
+    Every variable is read at most once along a path and the variables spanned by the boxes on a path are disjoint,
+    so a path is taken by some assignment as long as each box on it can reach the used output (terminal/port)
+    for the number of variables it spans (see CompiledBox.reachable_results()).
+    The search is therefore linear in the size of the ABDD, it only checks if some such path ends in terminal 1.
+    """
+    # short-circuit: result of Apply reduced to the terminal node 0
+    if abdd.root_rule is None and abdd.roots[0].is_leaf:
+        return abdd.roots[0].leaf_val == 0
+
+    def target_var(targets: list[ABDDNode]) -> int:
+        return max([abdd.variable_count + 1 if t.is_leaf else t.var for t in targets])
+
+    def edge_targets(rule: Optional[str], targets: list[ABDDNode], length: int) -> Optional[list[ABDDNode]]:
+        """
+        Nodes reachable through the edge, None if the edge itself can reach terminal 1.
+        """
+        if rule is None:
+            return [targets[0]]
+        result = []
+        for terminal, port in get_compiled_box(rule).reachable_results(length):
+            if terminal == 1:
+                return None
+            if port != -1:
+                result.append(targets[port])
+        return result
+
+    stack = edge_targets(abdd.root_rule, abdd.roots, target_var(abdd.roots) - 1)
+    visited: set[ABDDNode] = set()
+    while stack is not None and stack != []:
+        node = stack.pop()
+        if node in visited:
+            continue
+        visited.add(node)
+        if node.is_leaf:
+            if node.leaf_val == 1:
+                return False
+            continue
+        for rule, targets in [(node.low_box, node.low), (node.high_box, node.high)]:
+            reachable = edge_targets(rule, targets, target_var(targets) - node.var - 1)
+            if reachable is None:
+                return False
+            stack.extend(reachable)
+    return stack is not None
+
+
+def abdd_is_false_unfolded(abdd: ABDD) -> bool:
+    """
+    Alternative check (for debugging/cross-checking): unfold the ABDD into a UBDA, which accepts exactly one tree
+    (the full decision tree of the function), and remove output transitions with terminal 1.
+    The language of the resulting UBDA is non-empty if and only if the function is constant 0.
+    Unfolding makes this exponential in the worst case.
+    """
+    unfolded = ubda_unfolding(abdd.convert_to_treeaut_obj(), abdd.variable_count + 1)
+    for edges in unfolded.transitions.values():
+        for key in [key for key, edge in edges.items() if edge.children == [] and edge.info.label == "1"]:
+            edges.pop(key)
+    witness, _ = non_empty_bottom_up(unfolded)
+    return witness is not None
+
+
+def abdd_equivalent(abdd1: ABDD, abdd2: ABDD, cache: Optional[ABDDNodeCacheClass] = None, unfold=False) -> bool:
+    """
+    Symbolic equivalence check of two ABDDs: abdd1 == abdd2 if and only if (abdd1 XOR abdd2) is the constant 0.
+    Apply is polynomial in the sizes of the ABDDs, and so is the emptiness check of the result (see abdd_is_false()),
+    thus it can be used even for ABDDs with many variables, where brute-force enumeration is impossible.
+
+    'cache' should be the node cache both ABDDs were created with (so that the shared nodes are recognized).
+    'unfold' = True -> decide emptiness on the unfolded UBDA instead (see abdd_is_false_unfolded()).
+    """
+    if abdd1.variable_count != abdd2.variable_count:
+        raise ValueError("abdd_equivalent(): unequal number of variables")
+    xor = abdd_apply(BooleanOperation.XOR, abdd1, abdd2, cache, maxvar=abdd1.variable_count)
+    return abdd_is_false_unfolded(xor) if unfold else abdd_is_false(xor)
+
+
+# End of file abdd_equivalence.py
@@ -4,11 +4,16 @@
 [description] Class for representing nodes of ABDDs.
 """
 
+import itertools
+
 from typing import Generator, Iterator, Optional, Union
 
 from tree_automata.transition import TTransition
 from helpers.utils import box_arities, eprint
 
+# source of stable node identifiers, see ABDDNode.uid
+_uid_generator = itertools.count()
+
 
 class ABDDNode:
     """
@@ -18,13 +23,25 @@ class ABDDNode:
     In case of boxes with higher port arity than one, the child nodes will
     be represented as lists of integers (positions in the ordered list of
     ports will correspond to positions in this child list).
+
+    The attributes are stored in slots (no per-instance __dict__), which considerably reduces the memory
+    footprint of large ABDDs. Hashing is based on the node 'uid', so it is O(1) and does not change
+    when the node is renamed or its children are modified.
     """
 
+    __slots__ = ("node", "uid", "var", "is_leaf", "leaf_val", "low_box", "high_box", "low", "high")
+
     # node name / index for lookup
     # the structure is NOT sorted like a binary search tree !
     # node idx is also used for reference in parent sets
     node: int
 
+    # unique identifier of the node object, assigned once at creation and never changed,
+    # unlike 'node', which is only a display name and can be renumbered (refresh_nodes, reformat_node_names).
+    # Unique table and computed table keys are built from these instead of id(), which can be reused
+    # by CPython after a node is garbage collected.
+    uid: int
+
     # variable index, 0 is reserved for leaves and error checking, variables start from 1
     # TODO: perhaps it would be better to actually use normal index to store variable level,
     # and not always reference the overall abdd's level
@@ -53,6 +70,7 @@ class ABDDNode:
             self.node = int(name[state_prefix_len:])
         if type(name) == int:
             self.node = name
+        self.uid = next(_uid_generator)
         self.var = 0  # normally, we start indexing variables from 1, but is set to 0 for nodes with unset data
 
         self.is_leaf = True
@@ -78,17 +96,7 @@ class ABDDNode:
         return f"{self.__class__.__name__}({', '.join([i for i in attrib if i != ""])})"
 
     def __hash__(self):
-        return hash(
-            (
-                self.node,
-                self.var,
-                self.leaf_val if self.is_leaf else "",
-                ",".join([str(i.node) for i in self.low]),
-                self.low_box,
-                ",".join([str(i.node) for i in self.high]),
-                self.high_box,
-            )
-        )
+        return self.uid
 
     def __eq__(self, other: "ABDDNode"):
         if any(
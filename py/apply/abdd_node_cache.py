@@ -4,55 +4,102 @@
 [description] Class encapsulating node cache (unique table).
 """
 
-from typing import NewType, Optional
+import weakref
+
+from typing import Iterable, Iterator, NewType, Optional, TYPE_CHECKING
 
 from apply.abdd_node import ABDDNode
+from helpers.utils import box_codes
+
+if TYPE_CHECKING:
+    from apply.abdd import ABDD
 
 """
 An ABDD node is uniquely identified by a tuple
 < var, leaf, low-edge = <box, targets>, high-edge = <box, targets> >, where:
-    - variable is None in case the node is terminal/leaf
+    - variable is 0 in case the node is terminal/leaf
     - leaf is None in case the node is non-leaf
-    - a box is either long (string identifying the name of the box) or short (None),
-    - targets is a tuple of ABDDNode ObjectIDs (basically pointers), empty () in case of leaf nodes
+    - a box is either long (identified by its code from helpers.utils.box_codes) or short (code 0),
+    - targets is a tuple of ABDDNode uids, empty () in case of leaf nodes
+
+The unique table is split into per-variable subtables (variable -> rest of the tuple -> node),
+which keeps the keys small and allows to quickly inspect/sweep nodes of one level.
 """
+ABDDNodeKey = tuple[
+    Optional[int],  # leaf value - for inner nodes this is None
+    int | str,  # low-edge box code           / 0 in case of short edges or leaf nodes
+    tuple[int, ...],  # low-edge target node uids
+    int | str,  # high-edge box code          / 0 in case of short edges or leaf nodes
+    tuple[int, ...],  # high-edge target node uids
+]
+
 ABDDNodeCache = NewType(
     "ABDDNodeCache",
     dict[
-        tuple[
-            int,  # variable of the node
-            Optional[int],  # leaf value - for inner nodes this is None
-            Optional[str],  # low-edge box              / None in case of leaf nodes
-            tuple[int],  # low-edge target node idx
-            Optional[str],  # high-edge box             / None in case of leaf nodes
-            tuple[int],  # high-edge target node idx
-        ],
-        ABDDNode,
+        int,  # variable of the node
+        dict[ABDDNodeKey, ABDDNode],
     ],
 )
 
 
+def get_node_key(node: ABDDNode) -> ABDDNodeKey:
+    """
+    Compute the unique table key (without the variable) of the node.
+    Box names outside of the standard box set (e.g. 'boxX') are kept as strings.
+    """
+    return (
+        node.leaf_val,
+        box_codes.get(node.low_box, node.low_box),
+        tuple([n.uid for n in node.low]),
+        box_codes.get(node.high_box, node.high_box),
+        tuple([n.uid for n in node.high]),
+    )
+
+
 class ABDDNodeCacheClass:
+    """
+    Unique table of ABDD nodes.
+
+    'subtables' - per-variable dictionaries of nodes, see ABDDNodeCache above.
+
+    'live_roots' - ABDDs registered by 'register_root', that are considered alive during garbage collection.
+    ABDDs are only referenced weakly, so an ABDD which is not used anywhere else stops being a root automatically.
+
+    'call_caches' - computed tables which store node uids and need to be notified when nodes are collected.
+
+    Statistics: 'lookups', 'hits' (both counted by find_node), 'inserts' and 'collected' (nodes removed by GC).
+    """
+
     def __init__(self):
-        self.cache: ABDDNodeCache = {}
+        self.subtables: ABDDNodeCache = {}
         zero = ABDDNode(0)
         one = ABDDNode(1)
         zero.set_as_leaf(0)
         one.set_as_leaf(1)
         self.terminal_0 = zero
         self.terminal_1 = one
-        self.cache[(0, 0, None, (), None, ())] = self.terminal_0
-        self.cache[(0, 1, None, (), None, ())] = self.terminal_1
+        self.subtables[0] = {}
+        self.subtables[0][get_node_key(zero)] = self.terminal_0
+        self.subtables[0][get_node_key(one)] = self.terminal_1
         self.counter = 2
 
+        # id(abdd) -> abdd, entries disappear together with the ABDD objects
+        self.live_roots: weakref.WeakValueDictionary[int, "ABDD"] = weakref.WeakValueDictionary()
+        self.call_caches: weakref.WeakSet = weakref.WeakSet()
+
+        self.lookups: int = 0
+        self.hits: int = 0
+        self.inserts: int = 0
+        self.collected: int = 0
+
     def insert_node(self, node: ABDDNode) -> None:
         """
         Insert a node into the unique table.
         """
-        low_tuple = tuple([id(n) for n in node.low])
-        high_tuple = tuple([id(n) for n in node.high])
-        lookup = tuple([node.var, node.leaf_val, node.low_box, low_tuple, node.high_box, high_tuple])
-        self.cache[lookup] = node
+        if node.var not in self.subtables:
+            self.subtables[node.var] = {}
+        self.subtables[node.var][get_node_key(node)] = node
+        self.inserts += 1
 
     def find_node(self, node: ABDDNode) -> Optional[ABDDNode]:
         """
@@ -60,12 +107,21 @@ class ABDDNodeCacheClass:
         This check is performed anytime a new node is created during Apply
         (either during box-tree traversal, or during materialization).
         """
-        low_tuple = tuple([id(n) for n in node.low])
-        high_tuple = tuple([id(n) for n in node.high])
-        lookup = tuple([node.var, node.leaf_val, node.low_box, low_tuple, node.high_box, high_tuple])
-        if lookup in self.cache:
-            return self.cache[lookup]
-        return None
+        self.lookups += 1
+        subtable = self.subtables.get(node.var)
+        if subtable is None:
+            return None
+        result = subtable.get(get_node_key(node))
+        if result is not None:
+            self.hits += 1
+        return result
+
+    def iterate_nodes(self) -> Iterator[ABDDNode]:
+        """
+        Iterate over all nodes stored in the unique table, level by level (terminals first).
+        """
+        for var in sorted(self.subtables.keys()):
+            yield from self.subtables[var].values()
 
     def refresh_nodes(self):
         """
@@ -73,15 +129,82 @@ class ABDDNodeCacheClass:
         the node indices might get duplicated (bug).
         After each Apply operation, this function reindexes all nodes within the cache
         such that duplications are resolved.
+        Nodes are numbered in the order of their creation.
         """
         counter = 2
-        for tup, i in self.cache.items():
-            if i.is_leaf:
-                continue
+        for i in sorted([n for n in self.iterate_nodes() if not n.is_leaf], key=lambda n: n.uid):
             i.node = counter
             counter += 1
         self.counter = counter
 
+    def register_root(self, abdd: "ABDD") -> None:
+        """
+        Mark the ABDD as alive - its nodes will survive garbage collection as long as the ABDD object exists.
+        """
+        self.live_roots[id(abdd)] = abdd
+
+    def unregister_root(self, abdd: "ABDD") -> None:
+        self.live_roots.pop(id(abdd), None)
+
+    def register_call_cache(self, call_cache) -> None:
+        """
+        Computed tables (call caches) registered here are invalidated each time some nodes are collected.
+        """
+        self.call_caches.add(call_cache)
+
+    def collect_garbage(self, roots: Iterable["ABDD"] = ()) -> int:
+        """
+        Mark-and-sweep garbage collection of the unique table.
+
+        Nodes reachable from the registered live roots, from the ABDDs in 'roots' or terminal nodes are kept,
+        all other nodes are removed from the subtables (and freed, unless referenced from elsewhere).
+        NOTE: Do not call this during Apply, the partial results are not reachable from any root yet.
+
+        Returns the number of removed nodes.
+        """
+        marked: set[int] = {self.terminal_0.uid, self.terminal_1.uid}
+        stack: list[ABDDNode] = []
+        for abdd in list(self.live_roots.values()) + list(roots):
+            stack.extend(abdd.roots)
+        while stack != []:
+            node = stack.pop()
+            if node.uid in marked:
+                continue
+            marked.add(node.uid)
+            stack.extend(node.low)
+            stack.extend(node.high)
+
+        dead: set[int] = set()
+        for var in list(self.subtables.keys()):
+            subtable = self.subtables[var]
+            dead_keys = [key for key, node in subtable.items() if node.uid not in marked]
+            for key in dead_keys:
+                dead.add(subtable.pop(key).uid)
+            if var != 0 and subtable == {}:
+                self.subtables.pop(var)
+
+        self.collected += len(dead)
+        if dead != set():
+            for call_cache in self.call_caches:
+                call_cache.invalidate(dead)
+        return len(dead)
+
+    def size(self) -> int:
+        return sum(len(subtable) for subtable in self.subtables.values())
+
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups != 0 else 0.0
+
+    def get_stats(self) -> dict[str, int | float]:
+        return {
+            "size": self.size(),
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": self.hit_rate(),
+            "inserts": self.inserts,
+            "collected": self.collected,
+        }
+
     def __repr__(self) -> str:
         result = "%-*s %-*s %-*s %-*s %-*s %-*s -> %-*s %-*s\n" % (
             4,
@@ -97,31 +220,32 @@ class ABDDNodeCacheClass:
             20,
             "Hnodes",
             8,
-            "NodePtr",
+            "NodeUID",
             8,
             "NodeID",
         )
         result += "-" * 84 + "\n"
-        for tup, node in self.cache.items():
-            var, leaf, lbox, lnodes, hbox, hnodes = tup
+        for node in self.iterate_nodes():
             result += "%-*s %-*s %-*s %-*s %-*s %-*s -> %-*s %-*s\n" % (
                 4,
-                var,
+                node.var,
                 4,
-                "-" if leaf is None else leaf,
+                "-" if node.leaf_val is None else node.leaf_val,
                 5,
-                "-" if lbox is None else lbox,
+                "-" if node.low_box is None else node.low_box,
                 20,
-                "[" + ",".join([str(hex(l))[6:] for l in lnodes]) + "]",
+                "[" + ",".join([str(n.uid) for n in node.low]) + "]",
                 5,
-                "-" if hbox is None else hbox,
+                "-" if node.high_box is None else node.high_box,
                 20,
-                "[" + ",".join([str(hex(l))[6:] for l in hnodes]) + "]",
+                "[" + ",".join([str(n.uid) for n in node.high]) + "]",
                 8,
-                hex(id(node))[6:],
+                node.uid,
                 8,
                 f"<{node.leaf_val}>" if node.is_leaf else f"{node.node}({node.var})",
             )
+        result += "-" * 84 + "\n"
+        result += ", ".join([f"{key}={round(value, 3)}" for key, value in self.get_stats().items()]) + "\n"
         return result
 
 
@@ -0,0 +1,107 @@
+"""
+[file] abdd_reordering.py
+[author] Jany26  (Jan Matufka)  <xmatuf00@stud.fit.vutbr.cz>
+[description] Variable reordering of ABDDs (sifting, window permutation) with the box-aware cost
+(number of nodes of the canonical ABDD reduced by a box order, see abdd_canonization.py).
+"""
+
+from typing import Optional
+
+from apply.abdd import ABDD
+from apply.abdd_canonization import ABDDCanonizationHelper
+from apply.abdd_node_cache import ABDDNodeCacheClass
+from bdd.bdd_manager import BDDManagerClass
+from helpers.utils import box_orders
+
+"""
+The ABDD is decoded into a reduced BDD (see abdd_canonization.py) and hashed into a BDD manager,
+where level 'i' initially holds the variable 'i'. The manager reorders the variables by swapping adjacent levels,
+the levels stay 1..n, only the variables on them change. The cost of the current order is the number of nodes
+of the canonical ABDD with the variable on level 'i' as its variable 'i', reduced by the boxes of the given
+box order - e.g. the full box order may prefer a different order than the plain BDD node count, since long chains
+of L0/H1/LPort... nodes are folded into one edge. Each evaluation of the cost (i.e. after each swap) encodes
+the whole live BDD, so it is meant for moderate sizes and small windows.
+
+Note: the cost is the node count of abdd_canonize() (see abdd_canonization.py), not the node count after
+ubda_folding() - that one needs the whole TTreeAut pipeline (unfolding, normalization, folding) for every order
+tried, which takes seconds per evaluation. The two counts only agree for the BDD box order. For box orders
+with don't-care ranges they can differ a lot (e.g. for zbdd, one clause of a CNF canonizes into 15 nodes,
+while folding gives 6 states, see test_folding_node_counts()), so the reordering minimizes the canonized node count,
+and the order found can be far from the best one after folding.
+"""
+
+
+def import_abdd(abdd: ABDD, manager: BDDManagerClass) -> int:
+    """
+    ID of the function of the ABDD in the manager, the manager level 'i' is used for the ABDD variable 'i'.
+    """
+    helper = ABDDCanonizationHelper(abdd.variable_count, box_orders["full"], ABDDNodeCacheClass())
+    root = helper.decode(abdd)
+    # children always have lower IDs than their parents in the helper
+    ids: list[int] = [0, 1]
+    for fn in range(2, root + 1):
+        ids.append(manager.make_node(helper.var[fn], ids[helper.low[fn]], ids[helper.high[fn]]))
+    return ids[root]
+
+
+def export_abdd(
+    manager: BDDManagerClass,
+    fn: int,
+    variable_count: int,
+    boxes: list[str],
+    ncache: Optional[ABDDNodeCacheClass] = None,
+    name: str = "ABDD",
+) -> ABDD:
+    """
+    Canonical ABDD of the function 'fn' of the manager (manager levels 1..variable_count are the ABDD variables).
+    """
+    ncache = ncache if ncache is not None else ABDDNodeCacheClass()
+    helper = ABDDCanonizationHelper(variable_count, boxes, ncache)
+    ids: dict[int, int] = {0: 0, 1: 1}
+    stack: list[int] = [fn]
+    while stack != []:
+        current = stack[-1]
+        if current in ids:
+            stack.pop()
+            continue
+        low, high = manager.low[current], manager.high[current]
+        missing = [child for child in (low, high) if child not in ids]
+        if missing != []:
+            stack.extend(missing)
+            continue
+        stack.pop()
+        ids[current] = helper.make_node(manager.var[current], ids[low], ids[high])
+    rule, ports = helper.get_edge_plan(ids[fn], 1)
+    result = ABDD(name, variable_count, [helper.get_node(port, level) for port, level in ports], rule)
+    result.terminal_0 = ncache.terminal_0
+    result.terminal_1 = ncache.terminal_1
+    result.node_count = result.count_nodes()
+    return result
+
+
+def abdd_reorder(
+    abdd: ABDD, boxes: Optional[list[str]] = None, method: str = "sifting", ncache: Optional[ABDDNodeCacheClass] = None
+) -> tuple[ABDD, list[int]]:
+    """
+    Find a variable order with a small ABDD reduced by the 'boxes' (the full box order by default),
+    using the reordering 'method' of the BDD manager (see bdd_reordering_methods).
+    The cost of an order is the node count of the canonical ABDD (abdd_canonize()), not of ubda_folding(),
+    the two can differ a lot for box orders with don't-care ranges (e.g. zbdd).
+
+    Returns the canonical ABDD in the new order (created in 'ncache') and the order itself:
+    the variable 'i' of the result is the variable 'order[i - 1]' of the input ABDD.
+    """
+    boxes = boxes if boxes is not None else box_orders["full"]
+    count = abdd.variable_count
+    manager = BDDManagerClass(list(range(1, count + 1)))
+    root = manager.get_bdd(import_abdd(abdd, manager))
+
+    def cost(root_ids: list[int]) -> int:
+        return export_abdd(manager, root_ids[0], count, boxes).node_count
+
+    manager.reorder([root.root], method, cost)
+    result = export_abdd(manager, manager.get_id(root.root), count, boxes, ncache, abdd.name)
+    return result, manager.get_order()
+
+
+# End of file abdd_reordering.py
@@ -0,0 +1,152 @@
+"""
+[file] batch_evaluation.py
+[author] Jany26  (Jan Matufka)  <xmatuf00@stud.fit.vutbr.cz>
+[description] Vectorized (NumPy) evaluation of ABDDs over many assignments at once.
+"""
+
+import numpy as np
+
+from typing import Optional, TYPE_CHECKING
+
+from apply.abdd_node import ABDDNode
+from apply.box_compilation import CompiledBox, get_compiled_box
+
+if TYPE_CHECKING:
+    from apply.abdd import ABDD
+
+# number of assignments evaluated at once during brute-force equivalence checking
+DEFAULT_BATCH_SIZE = 2**16
+
+
+class CompiledABDD:
+    """
+    ABDD flattened into NumPy arrays indexed by node indices (order of ABDD.iterate_bfs_nodes()):
+
+    'var' - variable of the node (variable_count + 1 for leaves),
+    'leaf' - 0/1 for leaves, -1 for inner nodes,
+    'box[node, dir]' - index into 'boxes' of the low (dir=0)/high (dir=1) edge, -1 for short edges,
+    'targets[node, dir, port]' - target node indices (padded with -1),
+    'target_var[node, dir]' - maximal variable of the edge targets.
+
+    The root edge (root rule and root nodes) is stored separately in 'root_box', 'root_targets', 'root_target_var'.
+    """
+
+    def __init__(self, abdd: "ABDD"):
+        self.variable_count = abdd.variable_count
+        nodes: list[ABDDNode] = list(abdd.iterate_bfs_nodes())
+        node_idx: dict[int, int] = {id(n): i for i, n in enumerate(nodes)}
+        self.boxes: list[CompiledBox] = []
+        box_idx: dict[str, int] = {}
+
+        def get_box_idx(rule: Optional[str]) -> int:
+            if rule is None:
+                return -1
+            if rule not in box_idx:
+                box_idx[rule] = len(self.boxes)
+                self.boxes.append(get_compiled_box(rule))
+            return box_idx[rule]
+
+        def get_var(node: ABDDNode) -> int:
+            return self.variable_count + 1 if node.is_leaf else node.var
+
+        arity = max([len(tgt) for n in nodes for tgt in [n.low, n.high]] + [len(abdd.roots)])
+        self.var = np.array([get_var(n) for n in nodes], dtype=np.intp)
+        self.leaf = np.array([int(n.leaf_val) if n.is_leaf else -1 for n in nodes], dtype=np.int8)
+        self.box = np.full((len(nodes), 2), -1, dtype=np.intp)
+        self.targets = np.full((len(nodes), 2, arity), -1, dtype=np.intp)
+        self.target_var = np.zeros((len(nodes), 2), dtype=np.intp)
+        for i, node in enumerate(nodes):
+            if node.is_leaf:
+                continue
+            for dir, (rule, tgt) in enumerate([(node.low_box, node.low), (node.high_box, node.high)]):
+                self.box[i, dir] = get_box_idx(rule)
+                self.targets[i, dir, : len(tgt)] = [node_idx[id(t)] for t in tgt]
+                self.target_var[i, dir] = max([get_var(t) for t in tgt])
+
+        self.root_box = get_box_idx(abdd.root_rule)
+        self.root_targets = np.full(arity, -1, dtype=np.intp)
+        self.root_targets[: len(abdd.roots)] = [node_idx[id(r)] for r in abdd.roots]
+        self.root_target_var = max([get_var(r) for r in abdd.roots])
+
+    def follow_edges(
+        self,
+        assignments: np.ndarray,
+        prefix: np.ndarray,
+        rows: np.ndarray,
+        box: np.ndarray,
+        targets: np.ndarray,
+        start: np.ndarray,
+        end: np.ndarray,
+        result: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Follow one edge for each of the assignments 'rows'. Edges spanning over variables (column indices)
+        'start' ... 'end - 1' are evaluated by the compiled boxes ('prefix' - prefix sums of the assignment rows).
+        Assignments ending in a terminal through a box have their 'result' set.
+        Returns the indices of the reached nodes (-1 if a terminal was reached through a box).
+        """
+        reached = targets[:, 0].copy()
+        for b in np.unique(box[box >= 0]):
+            sel = np.flatnonzero(box == b)
+            compiled = self.boxes[b]
+            terminal, port = compiled.evaluate_batch(assignments, prefix, rows[sel], start[sel], end[sel] - start[sel])
+            done = terminal >= 0
+            result[rows[sel[done]]] = terminal[done]
+            reached[sel[done]] = -1
+            reached[sel[~done]] = targets[sel[~done], port[~done]]
+        return reached
+
+    def evaluate(self, assignments: np.ndarray) -> np.ndarray:
+        """
+        Evaluate the compiled ABDD for every row of the 2D 'assignments' matrix (column i = variable i+1).
+        All assignments are pushed through the diagram together, level by level.
+        """
+        count = assignments.shape[0]
+        result = np.full(count, -1, dtype=np.int8)
+        rows = np.arange(count, dtype=np.intp)
+        prefix = np.zeros((count, assignments.shape[1] + 1), dtype=np.intp)
+        np.cumsum(assignments, axis=1, out=prefix[:, 1:])
+        current = self.follow_edges(
+            assignments,
+            prefix,
+            rows,
+            np.full(count, self.root_box, dtype=np.intp),
+            np.broadcast_to(self.root_targets, (count, len(self.root_targets))),
+            np.zeros(count, dtype=np.intp),
+            np.full(count, self.root_target_var - 1, dtype=np.intp),
+            result,
+        )
+        while True:
+            rows = np.flatnonzero(current >= 0)
+            if len(rows) == 0:
+                break
+            nodes = current[rows]
+            leaf = self.leaf[nodes] >= 0
+            result[rows[leaf]] = self.leaf[nodes[leaf]]
+            current[rows[leaf]] = -1
+            rows, nodes = rows[~leaf], nodes[~leaf]
+            bit = assignments[rows, self.var[nodes] - 1]
+            current[rows] = self.follow_edges(
+                assignments,
+                prefix,
+                rows,
+                self.box[nodes, bit],
+                self.targets[nodes, bit],
+                self.var[nodes],
+                self.target_var[nodes, bit] - 1,
+                result,
+            )
+        return result
+
+
+def generate_assignments(variable_count: int, start: int, stop: int) -> np.ndarray:
+    """
+    Assignments number 'start' ... 'stop - 1' in the order of itertools.product([False, True], repeat=variable_count),
+    i.e. bits of the assignment number with the first variable being the most significant bit.
+    """
+    numbers = np.arange(start, stop, dtype=np.uint64)
+    shifts = np.arange(variable_count - 1, -1, -1, dtype=np.uint64)
+    return ((numbers[:, None] >> shifts) & np.uint64(1)).astype(np.intp)
+
+
+# End of file batch_evaluation.py
@@ -78,6 +78,7 @@ def apply_intersectoid_add_output_transitions(
 
         result.transitions[state][f"k{key_idx}"] = TTransition(state, TEdge(portname, [], ""), [])
         key_idx += 1
+    result.invalidate()
     return portmap
 
 
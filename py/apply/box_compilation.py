@@ -0,0 +1,192 @@
+"""
+[file] box_compilation.py
+[author] Jany26  (Jan Matufka)  <xmatuf00@stud.fit.vutbr.cz>
+[description] Compilation of boxes (reduction rules) into closed-form evaluators or flat transition tables.
+"""
+
+import numpy as np
+
+from typing import Callable, Sequence
+
+from helpers.utils import box_catalogue
+from tree_automata.automaton import TTreeAut
+
+"""
+A box evaluated on a (non-empty) part of the assignment ends either in a terminal or in a port.
+Results are represented as a pair (terminal, port), where:
+    - terminal is 0/1 if the box run ends in a terminal, -1 otherwise,
+    - port is the index of the port (in the order of TTreeAut.get_port_order()), -1 otherwise.
+
+All boxes from helpers/utils.py only depend on the number of ones within the spanned variables,
+so their closed-form evaluators take ('ones', 'length') - number of ones and number of spanned variables.
+They only distinguish 'ones' being 0, 'length', or something in between.
+They work on both integers and NumPy arrays (evaluating many assignments at once).
+"""
+BoxResult = tuple[int | np.ndarray, int | np.ndarray]
+BoxEvaluator = Callable[[int | np.ndarray, int | np.ndarray], BoxResult]
+
+
+def select(condition, result_true: tuple[int, int], result_false: tuple[int, int]) -> BoxResult:
+    if not isinstance(condition, np.ndarray):
+        return result_true if condition else result_false
+    return (
+        np.where(condition, result_true[0], result_false[0]),
+        np.where(condition, result_true[1], result_false[1]),
+    )
+
+
+def evaluate_x(ones, length) -> BoxResult:
+    return select(ones >= 0, (-1, 0), (-1, 0))
+
+
+def evaluate_l0(ones, length) -> BoxResult:
+    return select(ones == length, (-1, 0), (0, -1))
+
+
+def evaluate_l1(ones, length) -> BoxResult:
+    return select(ones == length, (-1, 0), (1, -1))
+
+
+def evaluate_h0(ones, length) -> BoxResult:
+    return select(ones == 0, (-1, 0), (0, -1))
+
+
+def evaluate_h1(ones, length) -> BoxResult:
+    return select(ones == 0, (-1, 0), (1, -1))
+
+
+def evaluate_lport(ones, length) -> BoxResult:
+    return select(ones == length, (-1, 1), (-1, 0))
+
+
+def evaluate_hport(ones, length) -> BoxResult:
+    return select(ones > 0, (-1, 1), (-1, 0))
+
+
+# box name -> closed-form evaluator
+closed_form_boxes: dict[str, BoxEvaluator] = {
+    "X": evaluate_x,
+    "L0": evaluate_l0,
+    "L1": evaluate_l1,
+    "H0": evaluate_h0,
+    "H1": evaluate_h1,
+    "LPort": evaluate_lport,
+    "HPort": evaluate_hport,
+}
+
+
+class CompiledBox:
+    """
+    Box (reduction rule) compiled for fast evaluation. Boxes with a closed-form evaluator (see 'closed_form_boxes')
+    are evaluated using it, other boxes (e.g. user-defined ones) using the flat transition tables:
+
+    'step[state, bit, last]' - index of the state reached from 'state' after reading a variable with value 'bit',
+    'last' is 1 in case it is the last variable spanned by the box (then a non-self-looping transition is taken).
+    If no transition can be taken, the run stays in the same state (same as in ABDD.evaluate_for()).
+
+    'terminal[state]', 'port[state]' - result (see BoxResult above) of a run ending in 'state', or (-1, -1).
+
+    The run starts in state 0 (the root state of the box).
+    """
+
+    def __init__(self, box: TTreeAut):
+        self.box = box
+        self.name = box.name
+        self.closed_form = closed_form_boxes.get(box.name)
+        self.states: list[str] = [box.roots[0]] + [s for s in box.get_states() if s != box.roots[0]]
+        state_idx = {s: i for i, s in enumerate(self.states)}
+        port_idx = {port: i for i, (port, _) in enumerate(box.get_port_order())}
+        outputs = box.get_output_edges(inverse=True)
+
+        self.step = np.empty((len(self.states), 2, 2), dtype=np.intp)
+        self.terminal = np.full(len(self.states), -1, dtype=np.int8)
+        self.port = np.full(len(self.states), -1, dtype=np.intp)
+        for i, state in enumerate(self.states):
+            for bit in [0, 1]:
+                for last in [0, 1]:
+                    self.step[i, bit, last] = i
+                    for t in box.transitions.get(state, {}).values():
+                        if t.is_self_loop() == (not last) and len(t.children) > bit:
+                            self.step[i, bit, last] = state_idx[t.children[bit]]
+                            break
+            if state not in outputs:
+                continue
+            label = outputs[state][0]
+            if label in ["0", "1"]:
+                self.terminal[i] = int(label)
+            else:
+                self.port[i] = port_idx[label]
+
+    def check_result(self, terminal: np.ndarray, port: np.ndarray) -> None:
+        if np.any((terminal < 0) & (port < 0)):
+            raise ValueError(f"CompiledBox: box {self.name} didn't reach an output state")
+
+    def evaluate(self, assignment: Sequence[bool | int]) -> tuple[int, int]:
+        """
+        Evaluate the box on a part of the assignment (values of the variables spanned by the box).
+        """
+        if self.closed_form is not None:
+            if len(assignment) == 0:
+                raise ValueError(f"CompiledBox: box {self.name} spans no variables")
+            terminal, port = self.closed_form(sum([int(val) for val in assignment]), len(assignment))
+            return int(terminal), int(port)
+        state = 0
+        for i, val in enumerate(assignment):
+            state = self.step[state, int(val), int(i == len(assignment) - 1)]
+        self.check_result(self.terminal[state], self.port[state])
+        return int(self.terminal[state]), int(self.port[state])
+
+    def reachable_results(self, length: int) -> set[tuple[int, int]]:
+        """
+        Results (see BoxResult above) of all runs of the box over 'length' variables (for some assignment).
+        """
+        if length <= 0:
+            raise ValueError(f"CompiledBox: box {self.name} spans no variables")
+        if self.closed_form is not None:
+            results = [self.closed_form(ones, length) for ones in sorted({0, 1, length - 1, length})]
+            return set((int(terminal), int(port)) for terminal, port in results)
+        states = {0}
+        for i in range(length):
+            states = set(int(self.step[state, bit, int(i == length - 1)]) for state in states for bit in [0, 1])
+        results = set((int(self.terminal[state]), int(self.port[state])) for state in states)
+        self.check_result(np.array([r[0] for r in results]), np.array([r[1] for r in results]))
+        return results
+
+    def evaluate_batch(
+        self, assignments: np.ndarray, prefix: np.ndarray, rows: np.ndarray, start: np.ndarray, length: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Evaluate the box on the assignments 'rows', each one spanning variables (column indices)
+        'start' ... 'start + length - 1'. 'prefix' holds prefix sums of the assignment rows
+        (prefix[row, i] = number of ones in the first i columns), used by the closed-form evaluators.
+        """
+        if np.any(length <= 0):
+            raise ValueError(f"CompiledBox: box {self.name} spans no variables")
+        if self.closed_form is not None:
+            ones = prefix[rows, start + length] - prefix[rows, start]
+            return self.closed_form(ones, length)
+        state = np.zeros(len(rows), dtype=np.intp)
+        for j in range(int(length.max())):
+            live = np.flatnonzero(j < length)
+            bit = assignments[rows[live], start[live] + j]
+            last = (length[live] - 1 == j).astype(np.intp)
+            state[live] = self.step[state[live], bit, last]
+        terminal, port = self.terminal[state], self.port[state]
+        self.check_result(terminal, port)
+        return terminal, port
+
+
+compiled_boxes: dict[str, CompiledBox] = {}
+
+
+def get_compiled_box(name: str) -> CompiledBox:
+    """
+    Boxes from 'box_catalogue' are compiled lazily, only once per box
+    (unless the catalogue entry is replaced, e.g. by a user-defined box of the same name).
+    """
+    if name not in compiled_boxes or compiled_boxes[name].box is not box_catalogue[name]:
+        compiled_boxes[name] = CompiledBox(box_catalogue[name])
+    return compiled_boxes[name]
+
+
+# End of file box_compilation.py
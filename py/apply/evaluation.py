@@ -5,10 +5,21 @@
 """
 
 import itertools
+import multiprocessing
+import time
+import numpy as np
+
+from typing import Optional
 from apply.abdd import ABDD
+from apply.batch_evaluation import CompiledABDD, generate_assignments
 from apply.box_algebra.apply_tables import BooleanOperation
 from tree_automata.automaton import TTreeAut, iterate_edges_from_state
 
+# number of assignments in one task of the parallel equivalence check (for ABDDs, which are evaluated in batches)
+PARALLEL_CHUNK_SIZE = 2**16
+# number of assignments in one task of the parallel equivalence check, if some input is a UBDA
+PARALLEL_CHUNK_SIZE_UBDA = 2**10
+
 
 def evaluate_for_treeaut_backtrack(ta: TTreeAut, assignment: list[int], debug=False) -> int:
     """
@@ -78,15 +89,26 @@ def evaluate_for_treeaut_backtrack(ta: TTreeAut, assignment: list[int], debug=Fa
     return result
 
 
-def compare_abdds_tas(input1: ABDD | TTreeAut, input2: ABDD | TTreeAut, debug=False) -> bool:
+def get_variable_count(input: ABDD | TTreeAut) -> int:
+    return input.variable_count if isinstance(input, ABDD) else (input.get_var_max() - 1)
+
+
+def compare_abdds_tas(input1: ABDD | TTreeAut, input2: ABDD | TTreeAut, debug=False, processes: int = 1) -> bool:
     """
     Given two input ABDDs/UBDAs (without boxes), compare their semantics by checking results of all assignments.
+    With 'processes' > 1, the assignments are checked in parallel (see check_equivalence_parallel()).
     """
-    varcount1 = input1.variable_count if isinstance(input1, ABDD) else (input1.get_var_max() - 1)
-    varcount2 = input2.variable_count if isinstance(input2, ABDD) else (input2.get_var_max() - 1)
+    varcount1 = get_variable_count(input1)
+    varcount2 = get_variable_count(input2)
     if varcount1 != varcount2:
         raise ValueError("cannot compare abdds with unequal number of vars")
 
+    if processes > 1:
+        report = check_equivalence_parallel(input1, input2, processes)
+        if not report.equal:
+            print(f"{input1.name}, {input2.name}: {report}")
+        return report.equal
+
     equal = True
     for assign_tuple in itertools.product([0, 1], repeat=varcount1):
         assignment = list(assign_tuple)
@@ -165,6 +187,105 @@ def compare_op_abdd(input1: ABDD, input2: ABDD, op: BooleanOperation, output: AB
     return equal
 
 
+class EquivalenceCheckResult:
+    """
+    Result of the parallel brute-force equivalence check.
+
+    'checked' - number of assignments evaluated (less than 2^n if a counterexample was found),
+    'counterexample', 'results' - some assignment for which the inputs differ and the results of both inputs.
+    """
+
+    def __init__(self, equal: bool = True, checked: int = 0, seconds: float = 0.0):
+        self.equal = equal
+        self.checked = checked
+        self.seconds = seconds
+        self.counterexample: Optional[list[int]] = None
+        self.results: Optional[tuple[int, int]] = None
+
+    def throughput(self) -> float:
+        """
+        Number of checked assignments per second.
+        """
+        return self.checked / self.seconds if self.seconds > 0 else 0.0
+
+    def __repr__(self) -> str:
+        result = "equal" if self.equal else f"not equal for {self.counterexample} -> results: {self.results}"
+        return f"{result} ({self.checked} assignments, {self.seconds:.3f} s, {self.throughput():.0f} assignments/s)"
+
+
+# inputs of the worker processes of check_equivalence_parallel(), sent only once (by the pool initializer)
+worker_inputs: list[CompiledABDD | TTreeAut] = []
+worker_variable_count: int = 0
+worker_stop = None
+
+
+def init_equivalence_worker(inputs: list[CompiledABDD | TTreeAut], variable_count: int, stop) -> None:
+    global worker_inputs, worker_variable_count, worker_stop
+    worker_inputs = inputs
+    worker_variable_count = variable_count
+    worker_stop = stop
+
+
+def check_equivalence_chunk(task: tuple[int, int]) -> tuple[int, Optional[list[int]], Optional[tuple[int, int]]]:
+    """
+    Worker task - evaluate both inputs for assignments number 'start' ... 'stop - 1'.
+    Returns the number of checked assignments and a counterexample with results (if found).
+    """
+    start, stop = task
+    if worker_stop.is_set():
+        return 0, None, None
+    assignments = generate_assignments(worker_variable_count, start, stop)
+    results = []
+    for input in worker_inputs:
+        if isinstance(input, CompiledABDD):
+            results.append(input.evaluate(assignments))
+        else:
+            results.append(np.array([evaluate_for_treeaut_backtrack(input, a) for a in assignments.tolist()]))
+    mismatch = np.flatnonzero(results[0] != results[1])
+    if len(mismatch) == 0:
+        return stop - start, None, None
+    worker_stop.set()
+    i = mismatch[0]
+    return i + 1, assignments[i].tolist(), (int(results[0][i]), int(results[1][i]))
+
+
+def check_equivalence_parallel(
+    input1: ABDD | TTreeAut, input2: ABDD | TTreeAut, processes: Optional[int] = None, chunk_size: Optional[int] = None
+) -> EquivalenceCheckResult:
+    """
+    Brute-force equivalence check of two ABDDs/UBDAs (without boxes) using a pool of 'processes' workers
+    (by default, one per CPU). The assignment space is split into chunks of 'chunk_size' assignments.
+
+    Each worker receives the inputs only once (ABDDs are sent compiled into flat arrays, see 'batch_evaluation.py').
+    When some worker finds a counterexample, all workers stop and the remaining chunks are skipped,
+    so the reported counterexample is not necessarily the smallest one.
+    """
+    variable_count = get_variable_count(input1)
+    if variable_count != get_variable_count(input2):
+        raise ValueError("cannot compare abdds with unequal number of vars")
+    inputs = [CompiledABDD(i) if isinstance(i, ABDD) else i for i in [input1, input2]]
+    if chunk_size is None:
+        ubda = any(isinstance(i, TTreeAut) for i in inputs)
+        chunk_size = PARALLEL_CHUNK_SIZE_UBDA if ubda else PARALLEL_CHUNK_SIZE
+    total = 2**variable_count
+    tasks = [(start, min(start + chunk_size, total)) for start in range(0, total, chunk_size)]
+
+    result = EquivalenceCheckResult()
+    context = multiprocessing.get_context()
+    stop = context.Event()
+    start_time = time.perf_counter()
+    with context.Pool(processes, initializer=init_equivalence_worker, initargs=(inputs, variable_count, stop)) as pool:
+        for checked, counterexample, results in pool.imap_unordered(check_equivalence_chunk, tasks):
+            result.checked += checked
+            if counterexample is not None:
+                result.equal = False
+                result.counterexample = counterexample
+                result.results = results
+                break
+    result.seconds = time.perf_counter() - start_time
+    return result
+
+
 # NOTE: cannot work on edges with multiple self-loops, since it does not know how to backtrack
 def evaluate_for_treeaut(ta: TTreeAut, assignment: list[int], outvars: dict[str, int]) -> int:
     """
@@ -120,6 +120,7 @@ def abdd_subsection_create(
     # return the original port transitions to the automaton
     for k, e in port_trs:
         working_aut.transitions[e.src][k] = e
+    working_aut.invalidate()
     # arbitrary ports should probably be removed (even though in boxes from ABDD,
     # there is no way that they can interfere with box searching initiated from targets of the materialized edges)
     remove_irrelevant_ports(working_aut, arbitrary=True)
@@ -0,0 +1,372 @@
+"""
+[file] model_counting.py
+[author] Jany26  (Jan Matufka)  <xmatuf00@stud.fit.vutbr.cz>
+[description] Model counting, enumeration and uniform sampling of satisfying assignments of ABDDs.
+"""
+
+import itertools
+import random
+
+from typing import Generator, Optional, TYPE_CHECKING
+
+from apply.abdd_node import ABDDNode
+from apply.box_compilation import CompiledBox, get_compiled_box
+
+if TYPE_CHECKING:
+    from apply.abdd import ABDD
+
+"""
+Counting works directly on the boxed representation, no unfolding is needed.
+The closed-form boxes (see 'box_compilation.py') only distinguish whether the spanned variables are all zeros,
+all ones, or something in between (mixed), so the models passing through a box edge are counted per such class:
+
+    mixed = any - all zeros - all ones
+
+where each class contributes 2^(free variables) (any), or 1 (all zeros/all ones) for every spanned variable
+(so e.g. X just multiplies the count of its target by 2^length, L0 adds the all-ones part only, and so on).
+
+Ports of one edge can lead to nodes on different levels. Such a target node re-reads some of the spanned variables
+(same as in ABDD.evaluate_for()), in that case the all zeros/all ones class has to be passed to the target node
+as a constraint on the re-read variables. A constraint is a pair (value, end) - variables from the current node
+up to 'end - 1' are fixed to 'value'. Counts are memoized for pairs (node, constraint).
+
+Models are counted with (arbitrarily big) Python integers. Variables 1 ... len(prefix) can be fixed to the values
+from 'prefix'. The count of a pair (node, constraint) only covers the variables from the node down, so for nodes
+below the prefix it does not depend on the prefix - those counts are kept when the prefix changes (see set_prefix()).
+
+The count of a pair is a sum of terms: sign * (number of assignments of some regions of variables) * count(child).
+The regions are kept unevaluated, so the terms stay valid when more variables are fixed. Enumerating and sampling
+walk the diagram top-down, variable by variable, with a frontier of terms whose children are below the prefix
+(see advance()): fixing the next variable only expands the terms of the children on that variable and re-evaluates
+the regions, the counts of the children come from the memoized counts. So each prefix costs the size of the frontier,
+not the size of the whole ABDD.
+"""
+
+ANY = -1
+ZEROS = 0
+ONES = 1
+
+Constraint = Optional[tuple[int, int]]
+CountKey = tuple[int, Constraint]
+# (start, end, kind, constraint, box) - variables 'start' ... 'end - 1' of the class 'kind' (ANY/ZEROS/ONES),
+# or for boxes without a closed form, assignments leading to the state 'kind' of the flat transition table of 'box'
+Region = tuple[int, int, int, Constraint, Optional[CompiledBox]]
+# (factor, sign, regions, child) - the term is factor * count(child) (or just factor if child is None),
+# where factor = sign * (product of the region counts) under the current prefix
+Term = tuple[int, int, list[Region], Optional[CountKey]]
+
+
+class ModelCountingHelper:
+    def __init__(self, abdd: "ABDD", prefix: Optional[list[int]] = None):
+        self.abdd = abdd
+        self.variable_count = abdd.variable_count
+        self.nodes: dict[int, ABDDNode] = {}
+        # counts of the pairs with nodes below the prefix (independent of it) and of the other pairs
+        self.counts: dict[CountKey, int] = {}
+        self.prefix_counts: dict[CountKey, int] = {}
+        self.set_prefix(prefix if prefix is not None else [])
+
+    def set_prefix(self, prefix: list[int]) -> None:
+        """
+        Fix the variables 1 ... len(prefix) to the values from 'prefix', the counts independent of it are kept.
+        """
+        if len(prefix) > self.variable_count:
+            raise ValueError("ModelCountingHelper: prefix longer than the number of variables")
+        self.prefix: list[int] = [int(val) for val in prefix]
+        # prefix_ones[i] = number of ones within the first i fixed variables
+        self.prefix_ones: list[int] = list(itertools.accumulate(self.prefix, initial=0))
+        self.prefix_counts = {}
+
+    def get_memo(self, key: CountKey) -> dict[CountKey, int]:
+        return self.counts if self.get_var(self.nodes[key[0]]) > len(self.prefix) else self.prefix_counts
+
+    def get_var(self, node: ABDDNode) -> int:
+        if node.is_leaf:
+            return self.variable_count + 1
+        if node.var < 1:
+            raise ValueError(f"ModelCountingHelper: node {node.node} has variable {node.var} (expected >= 1)")
+        return node.var
+
+    def get_key(self, node: ABDDNode, constraint: Constraint) -> CountKey:
+        self.nodes[node.uid] = node
+        var = self.get_var(node)
+        # constraints only matter for the variables the target node (or its successors) reads
+        return node.uid, constraint if constraint is not None and constraint[1] > var else None
+
+    def count_region(self, start: int, end: int, kind: int, constraint: Constraint) -> int:
+        """
+        Number of assignments of variables 'start' ... 'end - 1', which are all zeros/all ones/anything ('kind'),
+        respect the fixed prefix and the 'constraint' (which always starts at or before 'start').
+        """
+        if start >= end:
+            return 1
+        fixed = len(self.prefix)
+        fixed_end = min(end, fixed + 1)
+        if start < fixed_end:
+            ones = self.prefix_ones[fixed_end - 1] - self.prefix_ones[start - 1]
+            if (kind == ONES and ones != fixed_end - start) or (kind == ZEROS and ones != 0):
+                return 0
+            if constraint is not None and min(fixed_end, constraint[1]) > start:
+                constrained_end = min(fixed_end, constraint[1])
+                ones = self.prefix_ones[constrained_end - 1] - self.prefix_ones[start - 1]
+                if ones != (constrained_end - start if constraint[0] == ONES else 0):
+                    return 0
+        start = max(start, fixed + 1)
+        if start >= end:
+            return 1
+        if constraint is not None and constraint[1] > start:
+            if kind != ANY and kind != constraint[0]:
+                return 0
+            start = min(end, constraint[1])
+        return 2 ** (end - start) if kind == ANY else 1
+
+    def allowed_values(self, var: int, constraint: Constraint) -> list[int]:
+        allowed = [0, 1]
+        if var <= len(self.prefix):
+            allowed = [self.prefix[var - 1]]
+        if constraint is not None and constraint[1] > var:
+            allowed = [val for val in allowed if val == constraint[0]]
+        return allowed
+
+    def count_table_region(self, start: int, end: int, state: int, constraint: Constraint, box: CompiledBox) -> int:
+        """
+        Number of assignments of variables 'start' ... 'end - 1' (respecting the prefix and the 'constraint'),
+        for which the flat transition table of the 'box' ends in the 'state'.
+        """
+        states: dict[int, int] = {0: 1}
+        for i in range(start, end):
+            last = int(i == end - 1)
+            reached: dict[int, int] = {}
+            for current, count in states.items():
+                for val in self.allowed_values(i, constraint):
+                    next = int(box.step[current, val, last])
+                    reached[next] = reached.get(next, 0) + count
+            states = reached
+        return states.get(state, 0)
+
+    def get_region_count(self, region: Region) -> int:
+        start, end, kind, constraint, box = region
+        if box is not None:
+            return self.count_table_region(start, end, kind, constraint, box)
+        return self.count_region(start, end, kind, constraint)
+
+    def make_term(self, sign: int, regions: list[Region], child: Optional[CountKey]) -> list[Term]:
+        """
+        The term as a list, empty if there are no models (under the current prefix).
+        """
+        factor = sign
+        for region in regions:
+            factor *= self.get_region_count(region)
+            if factor == 0:
+                return []
+        return [(factor, sign, regions, child)]
+
+    def get_terms(self, key: CountKey) -> list[Term]:
+        """
+        The count of 'key' is the sum of factor * count(child) (or just factor if child is None) over the terms.
+        """
+        node = self.nodes[key[0]]
+        if node.is_leaf:
+            return self.make_term(int(node.leaf_val), [], None)
+        result: list[Term] = []
+        edges = [(node.low_box, node.low), (node.high_box, node.high)]
+        for val in self.allowed_values(node.var, key[1]):
+            rule, targets = edges[val]
+            result.extend(self.get_edge_terms(node.var, rule, targets, key[1]))
+        return result
+
+    def get_edge_terms(
+        self, var: int, rule: Optional[str], targets: list[ABDDNode], constraint: Constraint
+    ) -> list[Term]:
+        """
+        Terms for an edge from a node with variable 'var' (0 for the root edge), spanning 'var + 1' ... 'target - 1'.
+        Terms without any models (under the current prefix) are left out.
+        """
+        if rule is None:
+            target = targets[0]
+            region = (var + 1, self.get_var(target), ANY, constraint, None)
+            return self.make_term(1, [region], self.get_key(target, constraint))
+
+        end = max([self.get_var(t) for t in targets])
+        length = end - var - 1
+        if length <= 0:
+            raise ValueError(f"ModelCountingHelper: box {rule} spans no variables")
+        compiled = get_compiled_box(rule)
+        if compiled.closed_form is None:
+            return self.get_table_terms(compiled, var, end, targets, constraint)
+
+        def class_terms(kind: int, result: tuple[int, int], sign: int) -> list[Term]:
+            terminal, port = int(result[0]), int(result[1])
+            if terminal != -1:
+                if terminal == 0:
+                    return []
+                tail = (end, self.variable_count + 1, ANY, constraint, None)
+                return self.make_term(sign, [(var + 1, end, kind, constraint, None), tail], None)
+            target = targets[port]
+            if kind == ANY:
+                region = (var + 1, self.get_var(target), ANY, constraint, None)
+                return self.make_term(sign, [region], self.get_key(target, constraint))
+            # the target re-reads variables 'target_var' ... 'end - 1', those have to respect the class
+            constraint_end = end if constraint is None else max(end, constraint[1])
+            child = self.get_key(target, (kind, constraint_end))
+            return self.make_term(sign, [(var + 1, end, kind, constraint, None)], child)
+
+        terms = class_terms(ZEROS, compiled.closed_form(0, length), 1)
+        terms += class_terms(ONES, compiled.closed_form(length, length), 1)
+        if length >= 2:
+            mixed = compiled.closed_form(1, length)
+            terms += class_terms(ANY, mixed, 1) + class_terms(ZEROS, mixed, -1) + class_terms(ONES, mixed, -1)
+        return terms
+
+    def get_table_terms(
+        self, compiled: CompiledBox, var: int, end: int, targets: list[ABDDNode], constraint: Constraint
+    ) -> list[Term]:
+        """
+        Boxes without a closed form are counted by running the flat transition tables over the spanned variables
+        (counting the assignments leading to each state). Their ports have to lead to the same level.
+        """
+        states: set[int] = {0}
+        for i in range(var + 1, end):
+            last = int(i == end - 1)
+            states = {int(compiled.step[state, val, last]) for state in states for val in [0, 1]}
+        result: list[Term] = []
+        for state in sorted(states):
+            terminal, port = int(compiled.terminal[state]), int(compiled.port[state])
+            compiled.check_result(compiled.terminal[state : state + 1], compiled.port[state : state + 1])
+            region = (var + 1, end, state, constraint, compiled)
+            if terminal == 1:
+                result += self.make_term(1, [region, (end, self.variable_count + 1, ANY, constraint, None)], None)
+            elif port != -1:
+                if self.get_var(targets[port]) != end:
+                    raise ValueError(f"ModelCountingHelper: box {compiled.name} has ports leading to different levels")
+                result += self.make_term(1, [region], self.get_key(targets[port], constraint))
+        return result
+
+    def count(self, key: CountKey) -> int:
+        """
+        Memoized evaluation of the terms, iterative (deep ABDDs would exceed the recursion limit).
+        """
+        terms: dict[CountKey, list[Term]] = {}
+        stack = [key]
+        while stack != []:
+            current = stack[-1]
+            memo = self.get_memo(current)
+            if current in memo:
+                stack.pop()
+                continue
+            if current not in terms:
+                terms[current] = self.get_terms(current)
+            missing = [c for _, _, _, c in terms[current] if c is not None and c not in self.get_memo(c)]
+            if missing != []:
+                stack.extend(missing)
+                continue
+            memo[current] = sum([f * (self.get_memo(c)[c] if c is not None else 1) for f, _, _, c in terms[current]])
+            stack.pop()
+        return self.get_memo(key)[key]
+
+    def get_root_terms(self) -> list[Term]:
+        return self.get_edge_terms(0, self.abdd.root_rule, self.abdd.roots, None)
+
+    def get_total(self, terms: list[Term]) -> int:
+        """
+        Sum of the terms (under the current prefix), the children are counted (once) by count().
+        """
+        return sum([factor * (self.count(child) if child is not None else 1) for factor, _, _, child in terms])
+
+    def count_models(self) -> int:
+        return self.get_total(self.get_root_terms())
+
+    def advance(self, frontier: list[Term]) -> list[Term]:
+        """
+        One step of the top-down walk: 'frontier' are terms with children below all variables of the prefix
+        except the last one, summing up to the number of models with the prefix. Returns such terms for the whole
+        prefix - the terms of the children on the last variable are expanded (with the fixed value), regions
+        covered by the prefix are evaluated into the signs and terms without any models are left out.
+        """
+        level = len(self.prefix)
+        result: list[Term] = []
+        stack: list[Term] = list(frontier)
+        while stack != []:
+            _, sign, regions, child = stack.pop()
+            factor = sign
+            open_regions: list[Region] = []
+            for region in regions:
+                count = self.get_region_count(region)
+                factor *= count
+                if count == 0:
+                    break
+                if region[1] <= level + 1:
+                    sign *= count  # all variables of the region are fixed
+                else:
+                    open_regions.append(region)
+            if factor == 0:
+                continue
+            if child is not None and self.get_var(self.nodes[child[0]]) <= level:
+                stack.extend([(factor * f, sign * s, open_regions + r, c) for f, s, r, c in self.get_terms(child)])
+                continue
+            result.append((factor, sign, open_regions, child))
+        return result
+
+
+def count_models(abdd: "ABDD", prefix: Optional[list[int]] = None) -> int:
+    """
+    Number of assignments (of all variables) for which the ABDD evaluates to 1,
+    optionally only those starting with the values from 'prefix'.
+    """
+    return ModelCountingHelper(abdd, prefix).count_models()
+
+
+def iterate_models(abdd: "ABDD") -> Generator[list[bool], None, None]:
+    """
+    Lazily yield all models in the order of itertools.product([False, True], repeat=variable_count).
+    Prefixes without any models are pruned using the model counts, once all assignments with some prefix are models,
+    they are generated without counting. The diagram is walked top-down (see ModelCountingHelper.advance()).
+    """
+    helper = ModelCountingHelper(abdd)
+    stack: list[tuple[list[int], list[Term]]] = [([], helper.get_root_terms())]
+    while stack != []:
+        prefix, frontier = stack.pop()
+        helper.set_prefix(prefix)
+        frontier = helper.advance(frontier)
+        count = helper.get_total(frontier)
+        free = abdd.variable_count - len(prefix)
+        if count == 0:
+            continue
+        if count == 2**free:
+            for suffix in itertools.product([False, True], repeat=free):
+                yield [bool(val) for val in prefix] + list(suffix)
+            continue
+        stack.append((prefix + [1], frontier))
+        stack.append((prefix + [0], frontier))
+
+
+def sample_model(abdd: "ABDD", rng: Optional[random.Random] = None) -> Optional[list[bool]]:
+    """
+    Uniformly random model of the ABDD (None if there is none). Variables are fixed one by one,
+    each value is chosen with probability proportional to the number of models with the chosen prefix
+    (the diagram is walked top-down, see ModelCountingHelper.advance()).
+    """
+    rng = rng if rng is not None else random.Random()
+    helper = ModelCountingHelper(abdd)
+    frontier = helper.get_root_terms()
+    total = helper.get_total(frontier)
+    if total == 0:
+        return None
+    prefix: list[int] = []
+    for _ in range(abdd.variable_count):
+        helper.set_prefix(prefix + [0])
+        zeros_frontier = helper.advance(frontier)
+        zeros = helper.get_total(zeros_frontier)
+        if rng.randrange(total) < zeros:
+            prefix.append(0)
+            frontier = zeros_frontier
+            total = zeros
+        else:
+            prefix.append(1)
+            helper.set_prefix(prefix)
+            frontier = helper.advance(frontier)
+            total -= zeros
+    return [bool(val) for val in prefix]
+
+
+# End of file model_counting.py
@@ -8,7 +8,6 @@ from apply.abdd import ABDD
 from apply.abdd_node import ABDDNode
 from apply.abdd_apply_helper import ABDDApplyHelper
 
-
 # This cache can be computed in a similar way to box op-product, however,
 # only one box is needed and the op_table would actually be just a mapping {0: 1, 1: 0, P: !P}
 # Since box-box negated equivalents are evident, they have been inserted into this cache.
@@ -28,6 +27,9 @@ def negate_subtree(abdd: ABDD, node: ABDDNode, helper: ABDDApplyHelper) -> ABDDN
     """
     Negation can sometimes be used even during ABDD Apply (with binary Boolean operator), especially
     when a boxtree contains nodes with 'negated' ports (see process_box_tree()).
+
+    The subtree is traversed iteratively (post-order, low children first), so the depth of the ABDD is not limited
+    by the recursion limit.
     """
     cache_hit = helper.find_negated_node(node)
     if cache_hit is not None:
@@ -36,28 +38,35 @@ def negate_subtree(abdd: ABDD, node: ABDDNode, helper: ABDDApplyHelper) -> ABDDN
     # since terminal nodes are in the cache from the start, we don't have to explicitly
     # check leaf nodes for early return, it would happen in the initial cache check
 
-    neg_low = [negate_subtree(abdd, child, helper) for child in node.low]
-    neg_high = [negate_subtree(abdd, child, helper) for child in node.high]
-    low_box = negate_box_label[node.low_box]
-    high_box = negate_box_label[node.high_box]
-
-    newnode = ABDDNode(helper.counter)
-    newnode.var = node.var
-    newnode.low = neg_low
-    newnode.low_box = low_box
-    newnode.high = neg_high
-    newnode.high_box = high_box
-    newnode.is_leaf = node.is_leaf
-
-    cache_hit = helper.node_cache.find_node(newnode)
-    if cache_hit is None:
-        helper.counter += 1
-        helper.node_cache.insert_node(newnode)
-    else:
-        del newnode
-        newnode = cache_hit
-    helper.insert_negated_node(node, newnode)
-    return newnode
+    # (node, children_done) - when children_done is True, all children of the node are already negated
+    stack: list[tuple[ABDDNode, bool]] = [(node, False)]
+    while stack != []:
+        current, children_done = stack.pop()
+        if helper.find_negated_node(current) is not None:
+            continue
+        if not children_done:
+            stack.append((current, True))
+            stack.extend([(child, False) for child in reversed(current.high)])
+            stack.extend([(child, False) for child in reversed(current.low)])
+            continue
+
+        newnode = ABDDNode(helper.counter)
+        newnode.var = current.var
+        newnode.low = [helper.find_negated_node(child) for child in current.low]
+        newnode.low_box = negate_box_label[current.low_box]
+        newnode.high = [helper.find_negated_node(child) for child in current.high]
+        newnode.high_box = negate_box_label[current.high_box]
+        newnode.is_leaf = current.is_leaf
+
+        cache_hit = helper.node_cache.find_node(newnode)
+        if cache_hit is None:
+            helper.counter += 1
+            helper.node_cache.insert_node(newnode)
+        else:
+            del newnode
+            newnode = cache_hit
+        helper.insert_negated_node(current, newnode)
+    return helper.find_negated_node(node)
 
 
 # End of file negation.py
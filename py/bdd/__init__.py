@@ -1,4 +1,5 @@
 from bdd.bdd_apply import apply_function
 from bdd.bdd_class import BDD, compare_bdds
+from bdd.bdd_manager import BDDManagerClass
 from bdd.bdd_node import BDDnode
 from bdd.bdd_to_treeaut import add_dont_care_boxes, create_tree_aut_from_bdd
@@ -6,11 +6,13 @@
 for further testing/experimenting with tree automata.
 """
 
-from typing import Set, List, Dict, Tuple, Union
+from typing import Set, List, Dict, Tuple, Union, Optional
 
 from bdd.bdd_class import BDD
+from bdd.bdd_manager import BDDManagerClass
 from bdd.bdd_node import BDDnode
 
+from helpers.conjunction_scheduling import ConjunctionScheduleStats, schedule_conjunction
 from helpers.string_manipulation import state_name_sort
 
 
@@ -31,162 +33,73 @@ def create_var_order_for_apply(variables: list[str], terminals: List[str | int])
     return result
 
 
-class ApplyHelper:
+def apply_function(func: str, bdd1: BDD, bdd2: BDD, var_order=None, manager: Optional[BDDManagerClass] = None) -> BDD:
     """
-    This class is for saving and accessing data important for apply function across recursive calls.
-    Since there is more information needed, a structured data type (this class) is used for lookup and caching.
-    - `count` = node counter, for unique node names
-    - `cache` = cache allows us to lookup nodes based on the data about them,
-    it makes sure that there are no two same nodes in the BDD, thus satisfying the BDD reduction rule
-    - `terminals` = list of terminal symbols (most likely obsolete), maybe usable in case of MTBDDs ???
-    - `vars` = variable lookup table = each variable is indexed,
-    the indices then create a variable order based on the initial boolean function
-    - `spacing` = for pretty printing (debug purposes), not a functionally necessary attribute
-    """
-
-    def __init__(self, bdd1: BDD, bdd2: BDD, vars):
-        self.count: int = 0
-        self.cache: Dict[str, BDDnode] = {}
-        _temp: List[int | str] = bdd1.get_terminal_symbols_list()
-        _temp.extend(bdd2.get_terminal_symbols_list())
-        self.terminals: List[int | str] = list(set(_temp))
-        self.vars: Dict[str | int, int] = vars
-        self.spacing: int = 0
-        if vars is None or type(vars) == list:
-            if vars is None:
-                _temp2 = bdd1.get_variable_list()
-                _temp2.extend(bdd2.get_variable_list())
-            self.vars = create_var_order_for_apply(_temp2, self.terminals)
-
-    # for debugging purposes
-    def __repr__(self):
-        repr: str = "Apply Helper info:\n"
-        repr += f"count = {self.count}\n"
-        repr += f"terminals = {self.terminals}\n"
-        repr += f"variables = {self.vars}\n"
-        repr += f"cache = {self.cache}"
-        return repr
-
-
-def apply_function(func: str, bdd1: BDD, bdd2: BDD, var_order=None) -> BDD:
-    """
-    Creates a new BDD by applying (recursively) some logic function `func` on two BDDs.
+    Creates a new BDD by applying some logic function `func` on two BDDs.
 
     Example: If the function is logical 'and', the resulting BDD should
     evaluate to true iff both inputs are evaluated to true.
-    """
-
-    class ApplyCase:
-        """
-        Case a): both BDD nodes are leaves
-        Case b): BDD node 1 is leaf, BDD node 2 is inner
-        Case c): BDD node 1 is inner, BDD node 2 is leaf
-        Case d): both BDD nodes are inner nodes
-        """
-
-        a: bool = False
-        b: bool = False
-        c: bool = False
-        d: bool = False
-
-        def __init__(self, case):
-            self.__setattr__(case, True)
-
-    def decide_case(node1: BDDnode, node2: BDDnode, data: ApplyHelper) -> ApplyCase:
-        """
-        Decides which "apply" case should be recursively happening from a certain point
-        based on node1 and node2 properties.
-        """
-        if node1.is_leaf() and node2.is_leaf():
-            return ApplyCase("a")
-        if not node1.is_leaf() and node2.is_leaf():
-            return ApplyCase("c")
-        if node1.is_leaf() and not node2.is_leaf():
-            return ApplyCase("b")
-        if data.vars[str(node1.value)] > data.vars[str(node2.value)]:
-            return ApplyCase("b")
-        if data.vars[str(node1.value)] < data.vars[str(node2.value)]:
-            return ApplyCase("c")
-        return ApplyCase("d")
-
-    def apply_from(func: str, node1: BDDnode, node2: BDDnode, data: ApplyHelper) -> BDDnode:
-        """
-        Recursive apply function on two BDD structures.
-        Uses memoization (caching) to unify nodes representing the same Boolean functions.
-        """
-        current_case: ApplyCase = decide_case(node1, node2, data)
-        data.spacing += 2
-        name: str
-
-        # scenario A - both are leaves
-        if current_case.a:
-            terminal: int = leaf_apply_op(func, node1, node2)
-            name = f"t{terminal}"
-            if name in data.cache:
-                data.spacing -= 2
-                return data.cache[name]
-            result = BDDnode(name, terminal)
-            data.cache[name] = result
-            data.spacing -= 2
-            return result
-
-        # otherwise (at least one is not leaf) ...
-        node1val = f"[{node1.value}]" if node1.is_leaf() else f"v{node1.value}"
-        node2val = f"[{node2.value}]" if node2.is_leaf() else f"v{node2.value}"
-        low: BDDnode = None
-        high: BDDnode = None
-        value = None
-
-        # scenario B - node1 lower than node2
-        if current_case.b:
-            low = apply_from(func, node1, node2.low, data)
-            high = apply_from(func, node1, node2.high, data)
-            value = node2.value
-
-        # scenario C - node1 higher than node2
-        if current_case.c:
-            low = apply_from(func, node1.low, node2, data)
-            high = apply_from(func, node1.high, node2, data)
-            value = node1.value
-
-        # scenario D - node1 same level as node2 (but non-leaves)
-        if current_case.d:
-            low = apply_from(func, node1.low, node2.low, data)
-            high = apply_from(func, node1.high, node2.high, data)
-            value = node1.value
-
-        lookup = f"{value},{low.name},{high.name}"
-        # in case both subtrees are isomorphic...
-        if low.name == high.name and low.value == high.value:
-            name = low.name
-            data.cache[lookup] = low
-            data.spacing -= 2
-            return low
-
-        if lookup in data.cache:
-            data.spacing -= 2
-            return data.cache[lookup]
-
-        name = f"n{data.count}"
-        data.count += 1
-        result = BDDnode(name, value)
-        result.attach(low, high)
-        data.cache[lookup] = result
-        data.spacing -= 2
-        return result
-
-    # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
 
+    The Apply itself is done by a BDD manager (see bdd_manager.py). When building a BDD by many Apply calls
+    (e.g. clause by clause), pass the same `manager` to all of them, the unique table and the computed table
+    are then shared, and the result of one call is used in the next one without being traversed again.
+    Without a manager, a new one is created with `var_order` (or the order of the variables of both BDDs).
+    """
     if bdd1.root is None and bdd2.root is None:
         return BDD(None, None)
     if bdd1.root is None:
         return BDD(None, bdd2.root)
     if bdd2.root is None:
         return BDD(None, bdd1.root)
-    data = ApplyHelper(bdd1, bdd2, var_order)
-    new_root = apply_from(func, bdd1.root, bdd2.root, data)
+    if manager is None:
+        if var_order is None:
+            variables: List[str | int] = bdd1.get_variable_list()
+            variables.extend(bdd2.get_variable_list())
+            var_order = create_var_order_for_apply(variables, [])
+        manager = BDDManagerClass(var_order)
+    return manager.apply(func, bdd1, bdd2)
+
+
+def apply_function_many(
+    func: str,
+    bdds: List[BDD],
+    strategy: str = "balanced",
+    manager: Optional[BDDManagerClass] = None,
+    collect_garbage: bool = False,
+    stats: Optional[ConjunctionScheduleStats] = None,
+) -> BDD:
+    """
+    Combines all `bdds` with the (associative and commutative) function `func`, the order of Apply calls
+    is given by the `strategy` (see conjunction_scheduling.py). BDDs without a root are skipped.
 
-    return BDD("BDD", new_root)
+    All Apply calls use one `manager` (a new one with the order of the variables of all BDDs by default).
+    With `collect_garbage`, intermediate results which are no longer needed are removed from the manager,
+    so it should only be used if the manager does not hold other BDDs.
+    """
+    bdds = [bdd for bdd in bdds if bdd.root is not None]
+    if bdds == []:
+        return BDD(None, None)
+    if manager is None:
+        variables: List[str | int] = []
+        for bdd in bdds:
+            variables.extend(bdd.get_variable_list())
+        manager = BDDManagerClass(create_var_order_for_apply(variables, []))
+
+    def support(bdd: BDD) -> Set[int]:
+        return set([manager.get_level(var) for var in bdd.get_variable_list()])
+
+    def collect(live: List[BDD]) -> None:
+        manager.check_garbage([bdd.root for bdd in live])
+
+    return schedule_conjunction(
+        bdds,
+        lambda bdd1, bdd2: manager.apply(func, bdd1, bdd2),
+        BDD.count_nodes,
+        strategy,
+        support,
+        collect if collect_garbage else None,
+        stats,
+    )
 
 
 def leaf_apply_op(operator: str, bdd1: BDDnode, bdd2: BDDnode) -> int:
@@ -5,6 +5,7 @@
 [note] Needed in order to parse DIMACS format (read as DNF* for simplification).
 """
 
+from collections import deque
 from typing import Optional, Union, List, Set, Dict, Tuple, Generator, Any
 from bdd.bdd_node import BDDnode
 
@@ -14,11 +15,17 @@ class BDD:
     Binary decision diagram. Sometimes referred to as ROBDD (reduced ordered BDD).
 
     Note: open for expansion (more attributes etc.)
+
+    All traversals are iterative and mark the visited nodes by their id(), so BDDs with long paths
+    (e.g. from large BLIF files) do not hit the recursion limit and shared nodes are visited once.
+    'parent_index' - id(node) -> parents, built by the first get_parents() call
+    (call clear_parent_index() after changing the structure of the BDD).
     """
 
     def __init__(self, name: str, root: BDDnode):
         self.name: str = name
         self.root: BDDnode = root
+        self.parent_index: Optional[Dict[int, List[BDDnode]]] = None
 
     def __repr__(self):
         """
@@ -97,17 +104,17 @@ class BDD:
         if self.root is None:
             return
 
-        visited: Set[BDDnode] = set()
-        queue: List[BDDnode] = [self.root]
+        visited: Set[int] = set()
+        queue: deque[BDDnode] = deque([self.root])
 
         while len(queue) > 0:
-            node: BDDnode = queue.pop(0)
+            node: BDDnode = queue.popleft()
             if node is None:
                 continue
             if not allow_repeats:
-                if node in visited:
+                if id(node) in visited:
                     continue
-                visited.add(node)
+                visited.add(id(node))
 
             yield node
             queue.append(node.low)
@@ -115,33 +122,17 @@ class BDD:
 
     def iterate_dfs_recursive(self, allow_repeats=False) -> Generator[Any, Any, BDDnode]:
         """
-        Depth first traversal of BDD nodes (node generator).
+        Depth first traversal of BDD nodes (node generator), in the preorder of the recursive DFS.
         See iterate_bfs() for explanation of allow_repeats.
+        NOTE: kept for compatibility, the traversal uses an explicit stack (same as iterate_dfs()).
         """
-
-        def DFS(node: BDDnode, visited: Set[BDDnode], allow_repeats: bool) -> Generator[Any, Any, BDDnode]:
-            if not allow_repeats:
-                if node in visited:
-                    return
-                visited.add(node)
-
-            yield node
-
-            if node.low is not None:
-                yield from DFS(node.low, visited, allow_repeats)
-
-            if node.high is not None:
-                yield from DFS(node.high, visited, allow_repeats)
-
-        # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
-        visited: Set[BDDnode] = set()
-        return DFS(self.root, visited, allow_repeats)
+        return self.iterate_dfs(allow_repeats)
 
     def iterate_dfs(self, allow_repeats=False) -> Generator[Any, Any, BDDnode]:
         if self.root is None:
             return
 
-        visited: Set[BDDnode] = set()
+        visited: Set[int] = set()
         stack: List[BDDnode] = [self.root]
 
         while len(stack) > 0:
@@ -150,85 +141,67 @@ class BDD:
                 continue
 
             if not allow_repeats:
-                if node in visited:
+                if id(node) in visited:
                     continue
-                visited.add(node)
+                visited.add(id(node))
 
             yield node
             stack.append(node.high)
             stack.append(node.low)
 
     def get_variable_list(self) -> List[int | str]:
-        def get_var(node: BDDnode, result: set) -> None:
-            if node.is_leaf():
-                return
-            result.add(node.value)
-            if node.low is not None:
-                get_var(node.low, result)
-            if node.high is not None:
-                get_var(node.high, result)
-
-        # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
-        result: Set[BDDnode] = set()
-        get_var(self.root, result)
-        result: List[BDDnode] = list(result)
+        result: Set[int | str] = set([node.value for node in self.iterate_dfs() if not node.is_leaf()])
+        result: List[int | str] = list(result)
         result.sort()  # NOTE: might need to be done wrt. a specified variable order
         return result
 
     def get_terminal_nodes_list(self) -> List[BDDnode]:
-        def accumulate_terminal_nodes(node: Optional[BDDnode], result: List[BDDnode]) -> None:
-            if node is None:
-                return
-            if node.is_leaf():
-                result.append(node)
-            accumulate_terminal_nodes(node.low, result)
-            accumulate_terminal_nodes(node.high, result)
-
-        # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
-        node_accumulator = []
-        accumulate_terminal_nodes(self.root, node_accumulator)
-        return list(set(node_accumulator))
+        return [node for node in self.iterate_dfs() if node.is_leaf()]
 
     def get_terminal_symbols_list(self) -> List[int | str]:
-        def accumulate_terminal_symbols(node: BDDnode, result: set) -> None:
-            if node is None:
-                return
-            if node.is_leaf():
-                result.add(node.value)
-            else:
-                accumulate_terminal_symbols(node.low, result)
-                accumulate_terminal_symbols(node.high, result)
+        return list(set([node.value for node in self.iterate_dfs() if node.is_leaf()]))
 
-        # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
-        node_accumulator: Set[BDDnode] = set()
-        accumulate_terminal_symbols(self.root, node_accumulator)
-        return list(node_accumulator)
+    def get_parents(self, node: BDDnode) -> List[BDDnode]:
+        """
+        Parents of the 'node' within this BDD (a parent is listed twice if both its children are the 'node').
+        The parent index is built on the first call.
+        """
+        if self.parent_index is None:
+            self.parent_index = {}
+            for parent in self.iterate_dfs():
+                for child in (parent.low, parent.high):
+                    if child is not None:
+                        self.parent_index.setdefault(id(child), []).append(parent)
+        return self.parent_index.get(id(node), [])
+
+    def clear_parent_index(self) -> None:
+        self.parent_index = None
 
     def count_branches_iter(self, symbol: int | str) -> int:
         """
-        DFS counting the number of paths leading to a specific symbol - usually
+        Count the number of paths leading to a specific symbol - usually
         a leaf. Used to count how many dimacs clausules is the BDD made of.
+        The counts are computed bottom-up, so each shared node is processed once.
         """
-        counter: int = 0
-
         if self.root is None:
             return
 
-        # visited = set()
+        paths: Dict[int, int] = {}  # id(node) -> number of paths from the node to the symbol
         stack: List[BDDnode] = [self.root]
-
         while len(stack) > 0:
-            node: BDDnode = stack.pop()
-            if node is None:
+            node: BDDnode = stack[-1]
+            if id(node) in paths:
+                stack.pop()
                 continue
-
-            if node.value == symbol:
-                counter += 1
-
-            stack.append(node.high)
-            stack.append(node.low)
-
-        return counter
+            children = [child for child in (node.low, node.high) if child is not None]
+            missing = [child for child in children if id(child) not in paths]
+            if missing != []:
+                stack.extend(missing)
+                continue
+            stack.pop()
+            own = 1 if node.value == symbol else 0
+            paths[id(node)] = own + sum([paths[id(child)] for child in children])
+        return paths[id(self.root)]
 
     def count_nodes(self) -> int:
         counter: int = 0
@@ -244,20 +217,20 @@ class BDD:
         if self.root is None:
             return
         counter: int = 0
-        visited: Set[BDDnode] = set()
-        queue: List[BDDnode] = [self.root]
+        visited: Set[int] = set()
+        queue: deque[BDDnode] = deque([self.root])
 
         while len(queue) > 0:
-            node: BDDnode = queue.pop(0)
+            node: BDDnode = queue.popleft()
             if node is None:
                 continue
-            if node in visited:
+            if id(node) in visited:
                 continue
 
             node.rename_node(f"{prefix}{counter}")
             counter += 1
 
-            visited.add(node)
+            visited.add(id(node))
             if node.low is not None:
                 queue.append(node.low)
             if node.high is not None:
@@ -280,16 +253,16 @@ class BDD:
         if self.root is None:
             return
 
-        visited: Set[BDDnode] = set()
+        visited: Set[int] = set()
         stack: List[BDDnode] = [self.root]
 
         while len(stack) > 0:
             node: BDDnode = stack.pop()
             if node is None:
                 continue
-            if node in visited:
+            if id(node) in visited:
                 continue
-            visited.add(node)
+            visited.add(id(node))
 
             if node.high is not None and not node.high.is_leaf() and var_check(node.high.value, node.value):
                 print("INVALID", node, node.high)
@@ -304,31 +277,29 @@ class BDD:
 
 def compare_bdds(bdd1: BDD, bdd2: BDD) -> bool:
     """
-    Deep recursive check if two BDD structures are equal.
+    Deep check if two BDD structures are equal.
     Does not check names of the nodes, only values and overall structure.
+    Each pair of nodes is compared once (pairs are marked by the ids of the nodes).
 
     Note:
     This function does not account for BDDs that are isomorphic,
     but do not share the variable/node value ordering.
     """
-
-    def compare_nodes(node1: Optional[BDDnode], node2: Optional[BDDnode]) -> bool:
+    visited: Set[Tuple[int, int]] = set()
+    stack: List[Tuple[Optional[BDDnode], Optional[BDDnode]]] = [(bdd1.root, bdd2.root)]
+    while len(stack) > 0:
+        node1, node2 = stack.pop()
         if (node1 is None) != (node2 is None):
             return False
-        if node1 is None and node2 is None:
-            return True
-        if (
-            # node1.name != node2.name  # node names do not have to match
-            node1.value != node2.value
-            or compare_nodes(node1.low, node2.low) is False
-            or compare_nodes(node1.high, node2.high) is False
-        ):
+        if node1 is None or (id(node1), id(node2)) in visited:
+            continue
+        visited.add((id(node1), id(node2)))
+        # node1.name != node2.name  # node names do not have to match
+        if node1.value != node2.value:
             return False
-        return True
-
-    # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
-
-    return compare_nodes(bdd1.root, bdd2.root)
+        stack.append((node1.high, node2.high))
+        stack.append((node1.low, node2.low))
+    return True
 
 
 # End of file bdd_class.py
@@ -0,0 +1,618 @@
+"""
+[file] bdd_manager.py
+[author] Jany26  (Jan Matufka)  <xmatuf00@stud.fit.vutbr.cz>
+[description] BDD manager with a persistent unique table and computed table shared across Apply calls.
+[note] Used when building BDDs from DIMACS/BLIF files clause by clause (gate by gate).
+"""
+
+import re
+import sys
+
+from typing import Callable, Optional
+
+from bdd.bdd_class import BDD
+from bdd.bdd_node import BDDnode
+from helpers.string_manipulation import state_name_sort
+
+"""
+The manager identifies nodes by integer IDs (0 and 1 are the terminals), each node is stored as
+(level, low ID, high ID) in the unique table, where the level is the index of its variable in the variable order.
+The unique table is split into per-level subtables (same as ABDDNodeCacheClass), so that the nodes of one level
+can be found quickly when two adjacent levels are swapped during reordering (see below).
+For every ID there is exactly one BDDnode, so the BDDs returned by the manager share their nodes and
+the result of one Apply call can be passed into the next one without any traversal.
+
+BDDs created outside of the manager are hashed into the unique table on their first use (see get_id()),
+the nodes of the manager are recognized by their id() (the manager keeps them alive, so id() is not reused).
+
+The computed table is a lossy cache (same as ABDDCallCacheClass) with a fixed number of slots,
+each call (op, ID, ID) is hashed into one slot and overwrites its previous content.
+It survives across Apply calls, so building a BDD from many clauses only pays for the new parts of each Apply.
+
+Dynamic variable reordering (Rudell's sifting, window permutation) is built on swap_levels(), which exchanges
+the variables of two adjacent levels in place: the IDs (and BDDnode objects) keep representing the same functions,
+so the BDDs held by the caller stay valid, only their nodes get new variables/children. During reordering,
+the manager keeps reference counts and removes dead nodes immediately, so the number of nodes in the unique table
+is the size of the live BDDs. The cost of an order is this size by default, any other cost function can be used
+(e.g. the number of ABDD nodes after folding with some box order, see abdd_reordering.py).
+Reordering is started explicitly by reorder(), or automatically by check_garbage() once the number of nodes
+reaches 'reorder_limit' (if set) - this is the point where all live BDDs are known.
+"""
+
+# integer codes of the supported operations (all of them are commutative)
+bdd_operation_codes: dict[str, int] = {"and": 0, "or": 1, "xor": 2, "nand": 3, "nor": 4}
+
+# terminal results of the operations, indexed by (value1 << 1) | value2
+bdd_operation_tables: dict[int, tuple[int, int, int, int]] = {
+    0: (0, 0, 0, 1),
+    1: (0, 1, 1, 1),
+    2: (0, 1, 1, 0),
+    3: (1, 1, 1, 0),
+    4: (1, 0, 0, 0),
+}
+
+# level of the terminal nodes (below all variables)
+TERMINAL_LEVEL = sys.maxsize
+
+# default number of slots of the computed table
+DEFAULT_BDD_CACHE_SIZE = 2**18
+
+# number of nodes, after which the garbage is collected for the first time (see check_garbage())
+DEFAULT_BDD_GC_LIMIT = 2**16
+
+# sifting of one variable stops in one direction once the cost grows over this factor of the best cost so far
+DEFAULT_MAX_GROWTH = 1.2
+
+bdd_reordering_methods: list[str] = ["sifting", "window"]
+
+
+class BDDManagerStats:
+    """
+    Statistics of the unique table and the computed table of one BDD manager.
+    """
+
+    def __init__(self):
+        self.apply_calls: int = 0
+        self.imported_nodes: int = 0
+        self.created_nodes: int = 0
+        self.unique_hits: int = 0
+        self.cache_hits: int = 0
+        self.cache_misses: int = 0
+        self.cache_evictions: int = 0
+        self.collected_nodes: int = 0
+        self.reorderings: int = 0
+        self.swaps: int = 0
+
+    def hit_rate(self) -> float:
+        total = self.cache_hits + self.cache_misses
+        return self.cache_hits / total if total > 0 else 0.0
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(apply_calls={self.apply_calls}, imported_nodes={self.imported_nodes}, "
+            f"created_nodes={self.created_nodes}, unique_hits={self.unique_hits}, cache_hits={self.cache_hits}, "
+            f"cache_misses={self.cache_misses}, cache_evictions={self.cache_evictions}, "
+            f"collected_nodes={self.collected_nodes}, reorderings={self.reorderings}, swaps={self.swaps})"
+        )
+
+
+class BDDManagerClass:
+    """
+    Owner of all nodes of the BDDs it creates.
+
+    'levels' - variable -> level (index in the variable order), 'variables' - level -> variable,
+    without an explicit 'var_order' (a list of variables from the top, or a dictionary variable -> index),
+    the level is the number in the variable name (e.g. 'x12' or '12' -> 12), same as in state_name_sort(),
+    'var', 'low', 'high' - level and children of each node ID, 'nodes' - the BDDnode of each ID,
+    'unique' - unique table, level -> (low ID, high ID) -> ID,
+    'ids' - id(BDDnode) -> ID for the nodes of the manager,
+    'cache' - computed table, slots with ((op, ID, ID), result ID) or None,
+    'gc_limit' - number of nodes which triggers garbage collection in check_garbage(),
+    'reorder_limit' - number of nodes which triggers reordering in check_garbage() (None = never),
+    'reorder_method' - method used by the automatic reordering (see bdd_reordering_methods),
+    'refs' - reference counts of the nodes during reordering (None otherwise).
+    """
+
+    def __init__(self, var_order: Optional[list | dict] = None, cache_size: int = DEFAULT_BDD_CACHE_SIZE):
+        if cache_size < 1:
+            raise ValueError(f"BDDManagerClass(): invalid cache size {cache_size}")
+        self.fixed_order: bool = var_order is not None
+        self.levels: dict[str, int] = {}
+        self.variables: dict[int, int | str] = {}
+        if isinstance(var_order, dict):
+            for var, level in var_order.items():
+                self.add_variable(var, level)
+        elif var_order is not None:
+            for level, var in enumerate(var_order, start=1):
+                self.add_variable(var, level)
+
+        self.terminal_0: BDDnode = BDDnode("t0", 0)
+        self.terminal_1: BDDnode = BDDnode("t1", 1)
+        self.nodes: list[BDDnode] = [self.terminal_0, self.terminal_1]
+        self.var: list[int] = [TERMINAL_LEVEL, TERMINAL_LEVEL]
+        self.low: list[int] = [-1, -1]
+        self.high: list[int] = [-1, -1]
+        self.unique: dict[int, dict[tuple[int, int], int]] = {}
+        self.ids: dict[int, int] = {id(self.terminal_0): 0, id(self.terminal_1): 1}
+
+        self.cache_size: int = 1 << (cache_size - 1).bit_length()
+        self.mask: int = self.cache_size - 1
+        self.cache: list[Optional[tuple[tuple[int, int, int], int]]] = [None] * self.cache_size
+        self.gc_limit: int = DEFAULT_BDD_GC_LIMIT
+        self.reorder_limit: Optional[int] = None
+        self.reorder_method: str = "sifting"
+        self.refs: Optional[list[int]] = None
+        self.stats = BDDManagerStats()
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def add_variable(self, var: int | str, level: int) -> None:
+        if self.levels.get(str(var), level) != level or self.variables.get(level, var) != var:
+            raise ValueError(f"BDDManagerClass(): variable {var} conflicts with the variable order")
+        self.levels[str(var)] = level
+        self.variables[level] = var
+
+    def get_level(self, var: int | str) -> int:
+        """
+        Level of the variable 'var', new variables get their level from the number in their name.
+        """
+        level = self.levels.get(str(var))
+        if level is not None:
+            return level
+        number = re.search(r"\d+$", str(var))
+        if self.fixed_order or number is None:
+            raise ValueError(f"BDDManagerClass(): variable {var} is not in the variable order")
+        self.add_variable(var, int(number.group(0)))
+        return self.levels[str(var)]
+
+    def make_node(self, level: int, low: int, high: int) -> int:
+        """
+        ID of the node (level, low, high), the node is created if it is not in the unique table yet.
+        """
+        if low == high:
+            return low
+        subtable = self.unique.get(level)
+        if subtable is None:
+            subtable = self.unique[level] = {}
+        result = subtable.get((low, high))
+        if result is not None:
+            self.stats.unique_hits += 1
+            return result
+        result = len(self.nodes)
+        node = BDDnode(f"n{result}", self.variables[level], self.nodes[low], self.nodes[high])
+        self.nodes.append(node)
+        self.var.append(level)
+        self.low.append(low)
+        self.high.append(high)
+        subtable[(low, high)] = result
+        self.ids[id(node)] = result
+        self.stats.created_nodes += 1
+        if self.refs is not None:
+            self.refs.append(0)
+            self.refs[low] += 1
+            self.refs[high] += 1
+        return result
+
+    def make_ite(self, level: int, low: int, high: int) -> int:
+        """
+        ID of the function 'if (variable of the level) then high else low', also if 'low' or 'high'
+        depend on the variables above the 'level' (e.g. BDDs created in a different variable order).
+        """
+        if self.var[low] > level and self.var[high] > level:
+            return self.make_node(level, low, high)
+        positive = self.apply_ids("and", self.make_node(level, 0, 1), high)
+        negative = self.apply_ids("and", self.make_node(level, 1, 0), low)
+        return self.apply_ids("or", positive, negative)
+
+    def get_id(self, root: BDDnode) -> int:
+        """
+        ID of the function represented by 'root'. Nodes which do not belong to the manager are hashed
+        into the unique table bottom-up, BDDs in a different variable order are rebuilt by Apply (see make_ite()).
+        """
+        ids: dict[int, int] = {}  # id(BDDnode) -> ID for the nodes of this BDD
+        stack: list[tuple[BDDnode, bool]] = [(root, False)]
+        while stack != []:
+            node, expanded = stack.pop()
+            if id(node) in ids:
+                continue
+            known = self.ids.get(id(node))
+            if known is not None:
+                ids[id(node)] = known
+                continue
+            if node.is_leaf():
+                if node.value not in (0, 1):
+                    raise ValueError(f"BDDManagerClass.get_id(): unsupported terminal {node.value}")
+                ids[id(node)] = int(node.value)
+                continue
+            if not expanded:
+                stack.append((node, True))
+                stack.extend([(child, False) for child in (node.high, node.low) if id(child) not in ids])
+                continue
+            level = self.get_level(node.value)
+            ids[id(node)] = self.make_ite(level, ids[id(node.low)], ids[id(node.high)])
+            self.stats.imported_nodes += 1
+        return ids[id(root)]
+
+    def get_bdd(self, fn: int, name: str = "BDD") -> BDD:
+        return BDD(name, self.nodes[fn])
+
+    def get_terminal_case(self, code: int, a: int, b: int) -> Optional[int]:
+        """
+        Result of the operation, if it is known without recursion (terminals and trivial cases), otherwise None.
+        """
+        if a < 2 and b < 2:
+            return bdd_operation_tables[code][(a << 1) | b]
+        if code == 0:  # and
+            if a == 0 or b == 0:
+                return 0
+            if a == 1 or a == b:
+                return b
+            if b == 1:
+                return a
+        elif code == 1:  # or
+            if a == 1 or b == 1:
+                return 1
+            if a == 0 or a == b:
+                return b
+            if b == 0:
+                return a
+        elif code == 2:  # xor
+            if a == b:
+                return 0
+            if a == 0:
+                return b
+            if b == 0:
+                return a
+        return None
+
+    def apply_ids(self, op: str, a: int, b: int) -> int:
+        """
+        Apply the operation 'op' on the functions with IDs 'a' and 'b', returns the ID of the result.
+        The recursion of Apply is simulated with an explicit stack, so the depth is not limited by the number
+        of variables. Results of this call are kept in 'done', the computed table is shared with other calls.
+        """
+        if op not in bdd_operation_codes:
+            raise ValueError(f"BDDManagerClass.apply_ids(): unsupported operation '{op}'")
+        code = bdd_operation_codes[op]
+        self.stats.apply_calls += 1
+        done: dict[tuple[int, int], int] = {}
+        expanded: set[tuple[int, int]] = set()
+        stack: list[tuple[int, int]] = [(a, b) if a <= b else (b, a)]
+        while stack != []:
+            pair = stack[-1]
+            if pair in done:
+                stack.pop()
+                continue
+            x, y = pair
+            if pair not in expanded:
+                result = self.get_terminal_case(code, x, y)
+                if result is None:
+                    result = self.find_call(code, x, y)
+                if result is not None:
+                    done[pair] = result
+                    stack.pop()
+                    continue
+                expanded.add(pair)
+            level = min(self.var[x], self.var[y])
+            x_low, x_high = (self.low[x], self.high[x]) if self.var[x] == level else (x, x)
+            y_low, y_high = (self.low[y], self.high[y]) if self.var[y] == level else (y, y)
+            low_pair = (x_low, y_low) if x_low <= y_low else (y_low, x_low)
+            high_pair = (x_high, y_high) if x_high <= y_high else (y_high, x_high)
+            missing = [p for p in (high_pair, low_pair) if p not in done]
+            if missing != []:
+                stack.extend(missing)
+                continue
+            stack.pop()
+            result = self.make_node(level, done[low_pair], done[high_pair])
+            self.insert_call(code, x, y, result)
+            done[pair] = result
+        return done[(a, b) if a <= b else (b, a)]
+
+    def find_call(self, code: int, a: int, b: int) -> Optional[int]:
+        key = (code, a, b)
+        entry = self.cache[hash(key) & self.mask]
+        if entry is not None and entry[0] == key:
+            self.stats.cache_hits += 1
+            return entry[1]
+        self.stats.cache_misses += 1
+        return None
+
+    def insert_call(self, code: int, a: int, b: int, result: int) -> None:
+        key = (code, a, b)
+        slot = hash(key) & self.mask
+        if self.cache[slot] is not None and self.cache[slot][0] != key:
+            self.stats.cache_evictions += 1
+        self.cache[slot] = (key, result)
+
+    def apply(self, op: str, bdd1: BDD, bdd2: BDD) -> BDD:
+        """
+        Same as apply_function(), the result consists of the nodes of the manager.
+        """
+        return self.get_bdd(self.apply_ids(op, self.get_id(bdd1.root), self.get_id(bdd2.root)))
+
+    def clear_cache(self) -> None:
+        self.cache = [None] * self.cache_size
+
+    def collect_garbage(self, roots: list[BDDnode]) -> int:
+        """
+        Remove the nodes which are not reachable from the 'roots' or terminals,
+        the remaining nodes get new (consecutive) IDs and the computed table is cleared.
+        NOTE: BDDs with removed nodes must not be used with the manager anymore.
+
+        Returns the number of removed nodes.
+        """
+        marked: set[int] = {0, 1}
+        stack: list[int] = [self.get_id(root) for root in roots if root is not None]
+        while stack != []:
+            fn = stack.pop()
+            if fn in marked:
+                continue
+            marked.add(fn)
+            stack.extend([self.low[fn], self.high[fn]])
+        removed = len(self.nodes) - len(marked)
+        if removed == 0:
+            return 0
+
+        # the order of the IDs is kept (nodes rewritten by reordering can have children with higher IDs)
+        new_ids: dict[int, int] = {-1: -1}
+        for fn in sorted(marked):
+            new_ids[fn] = len(new_ids) - 1
+        self.nodes = [self.nodes[fn] for fn in sorted(marked)]
+        self.var = [self.var[fn] for fn in sorted(marked)]
+        self.low = [new_ids[self.low[fn]] for fn in sorted(marked)]
+        self.high = [new_ids[self.high[fn]] for fn in sorted(marked)]
+        self.unique = {}
+        for fn in range(2, len(self.nodes)):
+            self.unique.setdefault(self.var[fn], {})[(self.low[fn], self.high[fn])] = fn
+        self.ids = {id(node): fn for fn, node in enumerate(self.nodes)}
+        self.clear_cache()
+        self.stats.collected_nodes += removed
+        return removed
+
+    def check_garbage(self, roots: list[BDDnode]) -> int:
+        """
+        Collect garbage once the number of nodes reaches 'gc_limit', the limit is then set to twice
+        the number of the remaining nodes (at least DEFAULT_BDD_GC_LIMIT), so the collection time is amortized.
+        If the remaining nodes still reach 'reorder_limit', the variables are reordered (by 'reorder_method')
+        and the limit is set to twice the number of nodes after reordering.
+        """
+        if len(self.nodes) < self.gc_limit and (self.reorder_limit is None or len(self.nodes) < self.reorder_limit):
+            return 0
+        removed = self.collect_garbage(roots)
+        if self.reorder_limit is not None and len(self.nodes) >= self.reorder_limit:
+            self.reorder(roots, self.reorder_method)
+            self.reorder_limit = max(self.reorder_limit, 2 * len(self.nodes))
+        self.gc_limit = max(DEFAULT_BDD_GC_LIMIT, 2 * len(self.nodes))
+        return removed
+
+    # dynamic variable reordering
+
+    def get_order(self) -> list[int | str]:
+        """
+        Variables from the top level down.
+        """
+        return [self.variables[level] for level in sorted(self.variables)]
+
+    def count_live_nodes(self) -> int:
+        return sum(len(subtable) for subtable in self.unique.values())
+
+    def start_reordering(self, roots: list[BDDnode]) -> list[int]:
+        """
+        Remove the garbage and compute the reference counts (each root holds one reference).
+        Returns the IDs of the roots, which stay the same until finish_reordering().
+        """
+        self.collect_garbage(roots)
+        self.clear_cache()
+        self.refs = [0] * len(self.nodes)
+        for fn in range(2, len(self.nodes)):
+            self.refs[self.low[fn]] += 1
+            self.refs[self.high[fn]] += 1
+        root_ids = [self.get_id(root) for root in roots if root is not None]
+        for fn in root_ids:
+            self.refs[fn] += 1
+        return root_ids
+
+    def finish_reordering(self, roots: list[BDDnode]) -> None:
+        """
+        Remove the nodes which died during reordering (they get new IDs), stop counting references.
+        """
+        self.refs = None
+        self.collect_garbage(roots)
+        self.clear_cache()
+
+    def dereference(self, fn: int) -> None:
+        """
+        Drop one reference to the node 'fn', dead nodes are removed from the unique table (with their children).
+        """
+        stack: list[int] = [fn]
+        while stack != []:
+            fn = stack.pop()
+            self.refs[fn] -= 1
+            if fn < 2 or self.refs[fn] > 0:
+                continue
+            del self.unique[self.var[fn]][(self.low[fn], self.high[fn])]
+            stack.extend([self.low[fn], self.high[fn]])
+
+    def swap_levels(self, upper: int, lower: int) -> None:
+        """
+        Exchange the variables of two adjacent levels ('upper' < 'lower', no variable between them),
+        the IDs keep their functions. Only valid between start_reordering() and finish_reordering().
+
+        Nodes of the lower variable and the nodes of the upper variable which do not depend on the lower one
+        only change their level, the other nodes of the upper variable f = (x ? (y ? f11 : f10) : (y ? f01 : f00))
+        are rewritten in place to f = (y ? (x ? f11 : f01) : (x ? f10 : f00)).
+        """
+        if self.refs is None:
+            raise ValueError("BDDManagerClass.swap_levels(): reordering was not started")
+        x, y = self.variables[upper], self.variables[lower]
+        old_upper = self.unique.pop(upper, {})
+        old_lower = self.unique.pop(lower, {})
+        new_upper: dict[tuple[int, int], int] = {}
+        new_lower: dict[tuple[int, int], int] = {}
+        dependent: list[tuple[int, int, int, int, int]] = []
+        for key, fn in old_upper.items():
+            low, high = key
+            if self.var[low] != lower and self.var[high] != lower:
+                new_lower[key] = fn
+                self.var[fn] = lower
+                continue
+            f00, f01 = (self.low[low], self.high[low]) if self.var[low] == lower else (low, low)
+            f10, f11 = (self.low[high], self.high[high]) if self.var[high] == lower else (high, high)
+            dependent.append((fn, f00, f01, f10, f11))
+        for key, fn in old_lower.items():
+            new_upper[key] = fn
+            self.var[fn] = upper
+            self.nodes[fn].value = y
+        for fn in new_lower.values():
+            self.nodes[fn].value = x
+        self.unique[upper] = new_upper
+        self.unique[lower] = new_lower
+        self.variables[upper], self.variables[lower] = y, x
+        self.levels[str(y)], self.levels[str(x)] = upper, lower
+
+        for fn, f00, f01, f10, f11 in dependent:
+            low = self.make_node(lower, f00, f10)
+            high = self.make_node(lower, f01, f11)
+            self.refs[low] += 1
+            self.refs[high] += 1
+            old_low, old_high = self.low[fn], self.high[fn]
+            self.low[fn], self.high[fn] = low, high
+            new_upper[(low, high)] = fn
+            node = self.nodes[fn]
+            node.value, node.low, node.high = y, self.nodes[low], self.nodes[high]
+            self.dereference(old_low)
+            self.dereference(old_high)
+        self.stats.swaps += 1
+
+    def sift(
+        self,
+        root_ids: list[int],
+        cost: Optional[Callable[[list[int]], int]] = None,
+        max_growth: float = DEFAULT_MAX_GROWTH,
+    ) -> int:
+        """
+        Rudell's sifting: each variable (from the one with the most nodes) is moved through all levels by swaps of adjacent
+        levels (first towards the closer end of the order, then back to its level and towards the other end)
+        and left on the level with the lowest cost.
+        A direction is abandoned once the cost grows over 'max_growth' times the best cost.
+        Returns the final cost.
+        """
+        cost = cost if cost is not None else lambda ids: self.count_live_nodes()
+        order = sorted(self.variables)
+        current = cost(root_ids)
+        sizes = {self.variables[level]: len(self.unique.get(level, {})) for level in order}
+
+        def move(position: int, target: int) -> int:
+            while position != target:
+                direction = 1 if target > position else -1
+                self.swap_levels(*sorted([order[position], order[position + direction]]))
+                position += direction
+            return position
+
+        for var in sorted(sizes, key=lambda v: -sizes[v]):
+            start = position = order.index(self.levels[str(var)])
+            initial = best = current
+            best_position = position
+            directions = [1, -1] if position >= len(order) // 2 else [-1, 1]
+            for direction in directions:
+                position = move(position, start)
+                current = initial
+                while 0 <= position + direction < len(order) and current <= max_growth * best:
+                    self.swap_levels(*sorted([order[position], order[position + direction]]))
+                    position += direction
+                    current = cost(root_ids)
+                    if current < best:
+                        best, best_position = current, position
+            move(position, best_position)
+            current = best
+        return current
+
+    def window_permutation(
+        self, root_ids: list[int], size: int = 3, cost: Optional[Callable[[list[int]], int]] = None
+    ) -> int:
+        """
+        All permutations of each window of 'size' adjacent levels are tried (by adjacent swaps, see
+        get_adjacent_transpositions()) and the best one is kept. Repeated until no window improves the cost.
+        Returns the final cost.
+        """
+        cost = cost if cost is not None else lambda ids: self.count_live_nodes()
+        order = sorted(self.variables)
+        size = min(size, len(order))
+        swaps = get_adjacent_transpositions(size)
+        current = cost(root_ids)
+        improved = size > 1
+        while improved:
+            improved = False
+            for start in range(len(order) - size + 1):
+                initial = best = current
+                best_step = 0
+                for step, offset in enumerate(swaps, start=1):
+                    self.swap_levels(order[start + offset], order[start + offset + 1])
+                    current = cost(root_ids)
+                    if current < best:
+                        best, best_step = current, step
+                for offset in reversed(swaps[best_step:]):
+                    self.swap_levels(order[start + offset], order[start + offset + 1])
+                improved = improved or best < initial
+                current = best
+        return current
+
+    def reorder(
+        self,
+        roots: list[BDDnode],
+        method: str = "sifting",
+        cost: Optional[Callable[[list[int]], int]] = None,
+    ) -> int:
+        """
+        Reorder the variables to reduce the 'cost' of the BDDs of the 'roots' (the number of their nodes
+        by default, otherwise a function of the root IDs). The roots keep representing the same functions,
+        nodes not reachable from the roots are removed (see collect_garbage()). Returns the final cost.
+        """
+        if method not in bdd_reordering_methods:
+            raise ValueError(f"BDDManagerClass.reorder(): unknown method '{method}'")
+        root_ids = self.start_reordering(roots)
+        if method == "sifting":
+            result = self.sift(root_ids, cost)
+        else:
+            result = self.window_permutation(root_ids, cost=cost)
+        self.finish_reordering(roots)
+        self.stats.reorderings += 1
+        return result
+
+
+def get_adjacent_transpositions(size: int) -> list[int]:
+    """
+    Steinhaus-Johnson-Trotter sequence: swapping the positions (i, i + 1) for each returned i in turn
+    goes through all permutations of 'size' elements (size! - 1 swaps).
+    """
+    permutation = list(range(size))
+    direction = [-1] * size  # direction of each value
+    result: list[int] = []
+    while True:
+        mobile = None
+        for i, value in enumerate(permutation):
+            j = i + direction[value]
+            if 0 <= j < size and permutation[j] < value and (mobile is None or value > permutation[mobile]):
+                mobile = i
+        if mobile is None:
+            return result
+        value = permutation[mobile]
+        j = mobile + direction[value]
+        permutation[mobile], permutation[j] = permutation[j], permutation[mobile]
+        result.append(min(mobile, j))
+        for other in range(value + 1, size):
+            direction[other] = -direction[other]
+
+
+def reorder_bdd(bdd: BDD, method: str = "sifting") -> BDD:
+    """
+    Copy of the BDD with a variable order found by the reordering 'method' (see bdd_reordering_methods).
+    """
+    manager = BDDManagerClass(state_name_sort(bdd.get_variable_list()))
+    root = manager.get_bdd(manager.get_id(bdd.root), bdd.name)
+    manager.reorder([root.root], method)
+    return root
+
+
+# End of file bdd_manager.py
@@ -73,6 +73,7 @@ def add_dont_care_boxes(ta: TTreeAut, vars: int) -> TTreeAut:
             result.transitions[new_state] = {}
         if new_key not in result.transitions[new_state]:
             result.transitions[new_state][new_key] = new_edge
+    result.invalidate()
 
     return result
 
@@ -120,6 +121,7 @@ def fill_dont_care_boxes(ta: TTreeAut, max_var: int) -> None:
                     edge.info.box_array[box_idx] = "X"
                 elif src_var >= child_var:
                     ValueError(f"fill_dont_care_boxes(): variable is skipped on edge {edge}")
+    ta.invalidate()
 
 
 # End of bdd_to_treeaut.py
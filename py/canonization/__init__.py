@@ -1,3 +1,5 @@
 from canonization.unfolding import ubda_unfolding, is_unfolded
+from canonization.lazy_unfolding import LazyUnfoldedTreeAut, lazy_unfolding
 from canonization.normalization import ubda_normalize, is_normalized, remove_bad_transitions
 from canonization.folding import ubda_folding
+from canonization.incremental import IncrementalCanonizationHelper
@@ -5,14 +5,15 @@
 """
 
 import re
-import copy
 import os
 from typing import Iterator, List, Dict, Optional, Set, Tuple
 
 from formats.render_dot import export_to_file
-from tree_automata import TTreeAut, TTransition, TEdge, iterate_edges, non_empty_bottom_up, iterate_edges_from_state
+from tree_automata import TTreeAut, TTransition, TEdge, iterate_edges, is_empty_bottom_up, iterate_edges_from_state
+from tree_automata.functions.reachability import StateReachabilityClass
 from tree_automata.functions.trimming import trim
 from canonization.folding_helpers import (
+    BoxFindingStoreClass,
     FoldingHelper,
     get_first_name_from_tuple_str,
     is_already_reduced,
@@ -28,7 +29,6 @@ from canonization.folding_intersectoid import (
 )
 from helpers.utils import box_catalogue, box_arities
 
-
 # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
 # Main Folding algorithm functions:
 # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
@@ -88,7 +88,7 @@ def get_state_witness_relation(intersectoid: TTreeAut, port: str):
     return result
 
 
-def get_mapping(intersectoid: TTreeAut, varvis: Dict[str, int], reach: Dict[str, Set[str]]) -> Dict[str, str]:
+def get_mapping(intersectoid: TTreeAut, varvis: Dict[str, int], reach: StateReachabilityClass) -> Dict[str, str]:
     """
     [description]
     This function finds all different port types in intersectoid and assigns
@@ -105,7 +105,7 @@ def get_mapping(intersectoid: TTreeAut, varvis: Dict[str, int], reach: Dict[str,
     according to the reachability relation, such that the chosen state will
     "cover" the biggest pattern of the folded TA, while not changing semantics
 
-    'reach' - reachability dict - for each state a set of reachable states,
+    'reach' - reachability relation of the states (see StateReachabilityClass),
     reachability comparison is necessary for getting "maximum" mapping wrt. the
     semantics of the original unfolded tree automaton
 
@@ -140,7 +140,7 @@ def get_mapping(intersectoid: TTreeAut, varvis: Dict[str, int], reach: Dict[str,
                     if state == state2:
                         continue
                     s2: str = get_first_name_from_tuple_str(state2)
-                    if s in reach[s2] and not s2 in reach[s]:
+                    if reach.reaches(s2, s) and not reach.reaches(s, s2):
                         continue
                     else:
                         infimum = False
@@ -175,11 +175,52 @@ def box_finding(
       - dictionary which specifies mapping of the output ports of the 'box'
         TA to the states of the initial 'ta' (UBDA)
       - if no mapping is found, empty dictionary {} is returned
+
+    [note]
+    The result only depends on the transitions of the UBDA states within the intersectoid (and 'min_var'),
+    so (unless debugging/exporting) it is memoized in helper.intersectoid_cache, see IntersectoidCacheClass.
+    ubda_folding() invalidates the cached results when it edits the transitions.
+    Results of the previous runs are reused from helper.box_finding_store (if set), see BoxFindingStoreClass.
+    """
+    use_cache: bool = not (helper.verbose or helper.vtf or helper.png)
+    cache_key = (box.name, root, helper.min_var, source is None)
+    if use_cache:
+        cached = helper.intersectoid_cache.get_result(cache_key)
+        if cached is not None:
+            return cached
+    store: Optional[BoxFindingStoreClass] = helper.box_finding_store if use_cache else None
+    if store is not None:
+        stored = store.get_result(ta, cache_key)
+        if stored is not None:
+            cone, mapping = stored
+            helper.intersectoid_cache.add_result(cache_key, cone, mapping)
+            return mapping
+    cone: set[str] = set()
+    mapping = box_finding_uncached(ta, box, root, helper, source, use_cache, cone)
+    if use_cache:
+        helper.intersectoid_cache.add_result(cache_key, cone, mapping)
+    if store is not None:
+        store.add_result(ta, cache_key, cone, mapping)
+    return mapping
+
+
+def box_finding_uncached(
+    ta: TTreeAut,
+    box: TTreeAut,
+    root: str,
+    helper: FoldingHelper,
+    source: Optional[str],
+    use_cache: bool,
+    cone: set[str],
+) -> Dict[str, Tuple[str, int]]:
+    """
+    [description]
+    Computation of box_finding() (without the memoization of the results).
+    'cone' is filled with the UBDA states used in the intersectoid.
     """
-    intersectoid: TTreeAut = create_intersectoid(ta, box, root, helper)
-    intersectoid = trim(intersectoid)  # additional functionality maybe needed?
-    tree, _ = non_empty_bottom_up(intersectoid)
-    if tree is None:
+    intersectoid: TTreeAut = create_intersectoid(ta, box, root, helper, use_cache, cone)
+    intersectoid = trim(intersectoid, in_place=True)  # additional functionality maybe needed?
+    if is_empty_bottom_up(intersectoid):
         return {}
 
     okay = add_variables_top_down(intersectoid, helper, source)
@@ -191,7 +232,7 @@ def box_finding(
     intersectoid.shrink_tree_aut(reach)
     if intersectoid.get_port_arity() > 1:
         reduce_portable_states(intersectoid)
-        intersectoid = trim(intersectoid)
+        intersectoid = trim(intersectoid, in_place=True)
     final_mapping: dict[str, str] = get_mapping(intersectoid, var_visibility, helper.reach)
     if final_mapping == {}:
         return {}
@@ -264,6 +305,7 @@ def ubda_folding(
     export_png: bool = False,
     output: Optional[str] = None,
     export_path: Optional[str] = None,
+    store: Optional[BoxFindingStoreClass] = None,
 ) -> TTreeAut:
     """
     [description]
@@ -274,13 +316,15 @@ def ubda_folding(
     [parameters]
     'ta' - UBDA that we want to apply folding on,
     'boxes' - ordered list of box names, which can be used to reduce the 'ta'
+    'store' - box_finding() results kept across runs (incremental folding, see canonization/incremental.py)
 
     [return]
     (folded) UBDA with applied reductions (same language as the input)
     """
-    result: TTreeAut = copy.deepcopy(ta)
+    result: TTreeAut = ta.copy()
     fill_box_arrays(result)  # in case of [None, None] and [] discrepancies
     helper: FoldingHelper = FoldingHelper(ta, max_var, verbose, export_vtf, export_png, output, export_path)
+    helper.box_finding_store = store
     # print(helper)
     if helper.vtf or helper.png:
         if not os.path.exists(f"{helper.path}/ubdas/"):
@@ -345,8 +389,9 @@ def ubda_folding(
                     continue
 
                 # phase 1: putting the box in the box array
-                edge = result.transitions[srcstate][key]
+                edge = result.own_state(srcstate)[key]
                 edge.info.box_array[1 if chidx > 0 else 0] = box_name
+                helper.intersectoid_cache.invalidate(srcstate)
 
                 # phase 2: choosing the correctly mapped states
                 targets = []
@@ -360,6 +405,7 @@ def ubda_folding(
                         targets.append((newstate, mapped_var))
                         continue
                     result.transitions[newstate] = {}
+                    helper.intersectoid_cache.invalidate(newstate)
                     var_visibility[newstate] = f"{helper.var_prefix}{mapped_var}"
                     selfloop = None
                     for e in result.transitions[s].values():
@@ -373,6 +419,9 @@ def ubda_folding(
                         )
                         result.transitions[newstate][f"temp{helper.counter}"] = newtr
                         helper.counter += 1
+                    helper.reach.add_state(
+                        newstate, [c for e in result.transitions[newstate].values() for c in e.children]
+                    )
                     targets.append((newstate, mapped_var))
 
                 # NOTE: naive version like this
@@ -392,6 +441,9 @@ def ubda_folding(
                     edge.children = [t[0] for t in targets] + edge.children
                 else:
                     edge.children = edge.children + [t[0] for t in targets]
+                for target, _ in targets:
+                    helper.reach.add_edge(srcstate, target)
+                result.invalidate()
                 helper.export_ubda(result, state, edge_part, box)
             # for edge_info
             visited.add(state)
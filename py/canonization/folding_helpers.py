@@ -13,12 +13,178 @@ import copy
 from typing import Tuple, Set, List, Dict, Optional
 
 from tree_automata import TTreeAut, TTransition, iterate_edges, remove_useless_states, reachable_top_down
-from tree_automata.functions.reachability import get_all_state_reachability
+from tree_automata.functions.reachability import StateReachabilityClass
 from formats.render_dot import export_to_file
 from formats.format_vtf import export_treeaut_to_vtf
 from helpers.utils import box_catalogue
 from helpers.string_manipulation import get_first_name_from_tuple_str
 
+# edges of one explored product state (intersectoid key, label, variable, children) and the product states
+# added to the worklist (in the order of the intersectoid construction), also the (ta state, ta key) pairs
+IntersectoidEdges = list[tuple[str, str, str, list[str]]]
+IntersectoidProduct = tuple[IntersectoidEdges, list[tuple[str, str]], list[tuple[str, str]]]
+BoxFindingKey = tuple[str, str, int, bool]
+
+
+class IntersectoidCacheClass:
+    """
+    Cache shared by all box_finding() calls within one ubda_folding() run.
+
+    'products' - explored (ta_state, box_state) product states of the intersectoid construction, indexed by pair IDs,
+    each product state only depends on the transitions of 'ta_state' (and the box), so it can be reused
+    by all intersectoids containing it,
+
+    'results' - results of box_finding() for (box, root, min_var, root folding), which only depend on the transitions
+    of the TA states within the intersectoid (the 'cone' of the result).
+
+    When the transitions of a TA state are edited (a box is applied on its edge), only the product states
+    of the state and the results with the state in their cone are invalidated, everything below the edit is reused.
+    """
+
+    def __init__(self):
+        self.pair_ids: dict[tuple[str, str, str], int] = {}  # (box name, ta state, box state) -> pair ID
+        self.products: dict[int, IntersectoidProduct] = {}
+        self.ta_state_pairs: dict[str, set[int]] = {}  # ta state -> IDs of its (currently cached) product states
+        self.results: dict[BoxFindingKey, dict[str, tuple[str, int]]] = {}
+        self.result_cones: dict[str, set[BoxFindingKey]] = {}  # ta state -> results with the state in the cone
+        self.product_hits: int = 0
+        self.product_misses: int = 0
+        self.result_hits: int = 0
+        self.result_misses: int = 0
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(pairs={len(self.pair_ids)}, products={len(self.products)}, "
+            f"results={len(self.results)}, product hits/misses={self.product_hits}/{self.product_misses}, "
+            f"result hits/misses={self.result_hits}/{self.result_misses})"
+        )
+
+    def get_pair_id(self, box: str, ta_state: str, box_state: str) -> int:
+        key = (box, ta_state, box_state)
+        if key not in self.pair_ids:
+            self.pair_ids[key] = len(self.pair_ids)
+        return self.pair_ids[key]
+
+    def get_product(self, pair_id: int) -> Optional[IntersectoidProduct]:
+        product = self.products.get(pair_id)
+        if product is None:
+            self.product_misses += 1
+        else:
+            self.product_hits += 1
+        return product
+
+    def add_product(self, pair_id: int, ta_state: str, product: IntersectoidProduct) -> None:
+        self.products[pair_id] = product
+        self.ta_state_pairs.setdefault(ta_state, set()).add(pair_id)
+
+    def get_result(self, key: BoxFindingKey) -> Optional[dict[str, tuple[str, int]]]:
+        result = self.results.get(key)
+        if result is None:
+            self.result_misses += 1
+            return None
+        self.result_hits += 1
+        return dict(result)
+
+    def add_result(self, key: BoxFindingKey, cone: set[str], result: dict[str, tuple[str, int]]) -> None:
+        self.results[key] = dict(result)
+        for ta_state in cone:
+            self.result_cones.setdefault(ta_state, set()).add(key)
+
+    def invalidate(self, ta_state: str) -> None:
+        """
+        Transitions of 'ta_state' have changed, drop everything that was computed from them.
+        """
+        for pair_id in self.ta_state_pairs.pop(ta_state, set()):
+            self.products.pop(pair_id, None)
+        for key in self.result_cones.pop(ta_state, set()):
+            self.results.pop(key, None)
+
+
+class BoxFindingStoreClass:
+    """
+    Results of box_finding() kept across ubda_folding() runs (e.g. steps of a progressively built diagram).
+
+    Unlike IntersectoidCacheClass, which is kept consistent by invalidation during one run, each stored result
+    carries a snapshot of the transitions of its cone (taken when it was computed), and it is reused only while
+    the current transitions of the cone states are the same. A state name has to denote the same UBDA structure
+    in all runs (reachability of the states is not part of the snapshot), so the caller either keeps the names
+    of the unchanged states and invalidates the upward cone of the changed ones (see invalidate()),
+    or uses structural (content-based) names, see IncrementalCanonizationHelper.
+
+    Results not used during the last run are dropped by next_run(), so the store does not outgrow the diagram.
+    """
+
+    def __init__(self):
+        self.results: dict[BoxFindingKey, list[tuple[tuple, dict[str, tuple[str, int]]]]] = {}
+        self.state_results: dict[str, set[BoxFindingKey]] = {}  # ta state -> results with the state in the cone
+        self.used: set[BoxFindingKey] = set()
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(results={len(self.results)}, hits/misses={self.hits}/{self.misses})"
+
+    @staticmethod
+    def get_snapshot(ta: TTreeAut, cone: list[str]) -> tuple:
+        """
+        Transitions of the 'cone' states (without keys, in the order of the transition dictionaries).
+        """
+        result = []
+        for state in cone:
+            edges = ta.transitions.get(state)
+            if edges is None:
+                result.append(None)
+                continue
+            result.append(
+                tuple(
+                    (e.info.label, e.info.variable, tuple(e.children), tuple(e.info.box_array)) for e in edges.values()
+                )
+            )
+        return tuple(result)
+
+    def get_result(self, ta: TTreeAut, key: BoxFindingKey) -> Optional[tuple[set[str], dict[str, tuple[str, int]]]]:
+        """
+        Returns the cone and the mapping of a stored result still valid for the current transitions of 'ta'.
+        """
+        for snapshot, mapping in self.results.get(key, []):
+            cone: list[str] = snapshot[0]
+            if self.get_snapshot(ta, cone) == snapshot[1]:
+                self.hits += 1
+                self.used.add(key)
+                return set(cone), dict(mapping)
+        self.misses += 1
+        return None
+
+    def add_result(self, ta: TTreeAut, key: BoxFindingKey, cone: set[str], mapping: dict[str, tuple[str, int]]):
+        states: list[str] = sorted(cone)
+        variants = self.results.setdefault(key, [])
+        variants.append(((states, self.get_snapshot(ta, states)), dict(mapping)))
+        if len(variants) > 4:
+            variants.pop(0)
+        for state in states:
+            self.state_results.setdefault(state, set()).add(key)
+        self.used.add(key)
+
+    def invalidate(self, states: set[str]) -> None:
+        """
+        The structure below 'states' has changed (the states are the upward cone of the change),
+        drop all results computed from them.
+        """
+        for state in states:
+            for key in self.state_results.pop(state, set()):
+                self.results.pop(key, None)
+
+    def next_run(self) -> None:
+        """
+        Drops the results not used (computed or reused) since the last call.
+        """
+        self.results = {key: variants for key, variants in self.results.items() if key in self.used}
+        self.state_results = {
+            state: set(key for key in keys if key in self.results) for state, keys in self.state_results.items()
+        }
+        self.state_results = {state: keys for state, keys in self.state_results.items() if keys != set()}
+        self.used = set()
+
 
 class FoldingHelper:
     def __init__(
@@ -59,10 +225,13 @@ class FoldingHelper:
 
         self.counter: int = 0
         self.counter2: int = 0  # obsolete currently
-        self.reach: Dict[str, Set[str]] = get_all_state_reachability(ta, reflexive=False)
+        # states added during folding (see ubda_folding()) are added to the relation as they are created
+        self.reach: StateReachabilityClass = StateReachabilityClass(ta)
 
         # export/debug options
         self.intersectoids: List[TTreeAut] = []  # potentially memory intensive
+        self.intersectoid_cache = IntersectoidCacheClass()
+        self.box_finding_store: Optional[BoxFindingStoreClass] = None  # results kept from the previous runs
         self.verbose: bool = verbose
         self.png: bool = export_png
         self.vtf: bool = export_vtf
@@ -207,17 +376,25 @@ def fill_box_arrays(ta: TTreeAut) -> None:
     Normalizes the box arrays within the tree automaton, so that reducibility checks are consistent.
     In essence, each box array on a non-output edge will look like this:
     [ #1, #2 ], where #1, #2 are of type: None | str
+    Only the states with edges that need to be changed are copied (if 'ta' is a copy, see TTreeAut.copy()).
     """
     arities: Dict[str, int] = ta.get_symbol_arity_dict()
-    for edge in iterate_edges(ta):
-        if edge.info.label != "LH":
+    for state, edges in ta.transitions.items():
+        keys = [
+            key
+            for key, edge in edges.items()
+            if edge.info.label == "LH" and len(edge.info.box_array) != arities[edge.info.label]
+        ]
+        if keys == []:
             continue
-        if edge.info.box_array == []:
-            edge.info.box_array = [None] * len(edge.children)
-        else:
-            boxlen = len(edge.info.box_array)
-            symlen = arities[edge.info.label]
-            if boxlen != symlen:
+        edges = ta.own_state(state)
+        for key in keys:
+            edge = edges[key]
+            if edge.info.box_array == []:
+                edge.info.box_array = [None] * len(edge.children)
+            else:
+                boxlen = len(edge.info.box_array)
+                symlen = arities[edge.info.label]
                 edge.info.box_array.extend([None] * (symlen - boxlen))
 
 
@@ -324,6 +501,7 @@ def add_variables_bottomup_folding(ta: TTreeAut, min_var: int) -> None:
                 continue
             var_vis[child] = f"{var_prefix}{var_lookup[var_vis[edge.src]] + 1}"
 
+    ta.own_all_states()
     for edge in iterate_edges(ta):
         if edge.info.variable != "":
             continue
@@ -332,6 +510,7 @@ def add_variables_bottomup_folding(ta: TTreeAut, min_var: int) -> None:
         if edge.src in var_vis:
             edge.info.variable = f"{var_vis[edge.src]}"
         pass  # do_sth()
+    ta.invalidate()
 
 
 def lexicographical_order(ta: TTreeAut) -> list[str]:
@@ -510,7 +689,7 @@ def remove_flagged_edges_fix(ta: TTreeAut, helper: FoldingHelper):
                 key_dict[state].add(key)
     for state, key_set in key_dict.items():
         for key in key_set:
-            ta.transitions[state].pop(key)
+            ta.remove_transition(state, key)
 
 
 def remove_flagged_edges(ta: TTreeAut, helper: FoldingHelper):
@@ -527,7 +706,7 @@ def remove_flagged_edges(ta: TTreeAut, helper: FoldingHelper):
                     only_boxed = False
             if children_stayed and not only_boxed:
                 key_list.append(key)
-                ta.transitions[state].pop(key)
+                ta.remove_transition(state, key)
 
 
 # End of file folding_helpers.py
@@ -6,6 +6,7 @@
 
 import copy
 import itertools
+from collections import deque
 from typing import Dict, List, Optional, Set, Tuple, Generator
 
 from tree_automata import (
@@ -18,7 +19,7 @@ from tree_automata import (
     reachable_bottom_up,
     non_empty_top_down,
 )
-from canonization.folding_helpers import FoldingHelper
+from canonization.folding_helpers import FoldingHelper, IntersectoidCacheClass, IntersectoidProduct
 from helpers.string_manipulation import tuple_name, get_first_name_from_tuple_str
 from tree_automata.automaton import iterate_edges_from_state, iterate_states_bfs
 
@@ -45,7 +46,14 @@ def intersectoid_edge_key(e1: TTransition, e2: TTransition) -> str:
     return key
 
 
-def create_intersectoid(ta: TTreeAut, box: TTreeAut, root: str, helper: FoldingHelper) -> TTreeAut:
+def create_intersectoid(
+    ta: TTreeAut,
+    box: TTreeAut,
+    root: str,
+    helper: FoldingHelper,
+    use_cache: bool = False,
+    cone: Optional[set[str]] = None,
+) -> TTreeAut:
     """
     [description]
     Function produces an intersectoid from the 'ta' UBDA and 'box' TA.
@@ -72,6 +80,9 @@ def create_intersectoid(ta: TTreeAut, box: TTreeAut, root: str, helper: FoldingH
     'root' - state from the UBDA ('ta') where the intersectoid is created from
     'helper' - FoldingHelper instance with additional information used during
     intersectoid creation
+    'use_cache' - reuse the product states explored by previous calls (helper.intersectoid_cache),
+    the caller has to invalidate the states of 'ta' that changed since then
+    'cone' - if set, the TA states used in the intersectoid are added to it
 
     [return]
     Tree automaton/UBDA representing the intersectoid (contains additional
@@ -79,53 +90,34 @@ def create_intersectoid(ta: TTreeAut, box: TTreeAut, root: str, helper: FoldingH
     for finding the correct port-state mapping for applying folding reductions.
     """
     helper.key_counter = 0
-    edges: dict[str, dict[str, TTransition]] = {}
-    visited = set()
-    worklist: list[tuple[str, str]] = [(root, b) for b in box.roots]
     helper.temp = []
-    while worklist != []:
-        current_tuple: tuple[str, str] = worklist.pop(0)
-        state: str = tuple_name(current_tuple)
-        if state not in edges:
-            edges[state] = {}
-        if state in visited:
+    edges: dict[str, dict[str, TTransition]] = {}
+    # product states are tracked as (ta state, box state) pairs, the state name is only created once per pair
+    visited: set[tuple[str, str]] = set()
+    worklist: deque[tuple[str, str]] = deque([(root, b) for b in box.roots])
+    cache: Optional[IntersectoidCacheClass] = helper.intersectoid_cache if use_cache else None
+    while len(worklist) != 0:
+        current_tuple: tuple[str, str] = worklist.popleft()
+        if current_tuple in visited:
             continue
-        for key, ta_edge in ta.transitions[current_tuple[0]].items():  # ta edges
-            # skipping edges with already applied reductions
-            skip: bool = False
-            for b in ta_edge.info.box_array:
-                if b is not None:
-                    # skipping when trying to reach through a reduced edge, BUT
-                    # NOT when the source state can create a port transition
-                    skip = True
-            for box_edge in box.transitions[current_tuple[1]].values():  # box edges
-                # skipping differently labeled (e.g. LH and 0) edges
-                if ta_edge.info.label != box_edge.info.label and not box_edge.info.label.startswith("Port"):
-                    continue
-                if len(ta_edge.children) == 2 and len(box_edge.children) == 2:
-                    if ta_edge.children[0] != ta_edge.children[1] and box_edge.children[0] == box_edge.children[1]:
-                        continue
-                # ports are exceptions to the different labeled exclusion
-                # if one of the mismatched labels is a port label,
-                # than that "overrules" any other label
-                if box_edge.info.label.startswith("Port"):
-                    edge_obj: TEdge = TEdge(box_edge.info.label, [], "")
-                    edge: TTransition = TTransition(state, edge_obj, [])
-                    edges[state][intersectoid_edge_key(ta_edge, box_edge)] = edge
-                elif not skip:
-                    children: list[str] = []
-                    for i in range(len(ta_edge.children)):
-                        child: tuple[str, str] = (ta_edge.children[i], box_edge.children[i])
-                        children.append(tuple_name(child))
-                        worklist.append(child)
-                    edge_obj = TEdge(box_edge.info.label, [], f"{ta_edge.info.variable}")
-                    if len(children) != 0:
-                        helper.temp.append((get_first_name_from_tuple_str(state), key))
-                    edge = TTransition(state, edge_obj, children)
-                    edges[state][intersectoid_edge_key(ta_edge, box_edge)] = edge
-            # for box edge
-        # for tree automaton edge
-        visited.add(state)
+        visited.add(current_tuple)
+        state: str = tuple_name(current_tuple)
+        edges[state] = {}
+        product: Optional[IntersectoidProduct] = None
+        if cache is not None:
+            pair_id: int = cache.get_pair_id(box.name, current_tuple[0], current_tuple[1])
+            product = cache.get_product(pair_id)
+        if product is None:
+            product = explore_intersectoid_state(ta, box, current_tuple, state)
+            if cache is not None:
+                cache.add_product(pair_id, current_tuple[0], product)
+        product_edges, successors, temp = product
+        for key, label, variable, children in product_edges:
+            edges[state][key] = TTransition(state, TEdge(label, [], variable), list(children))
+        worklist.extend(successors)
+        helper.temp.extend(temp)
+        if cone is not None:
+            cone.add(current_tuple[0])
     # end while loop
     roots: list[str] = [f"({root},{b})" for b in box.roots]
     name: str = f"intersectoid({box.name}, {root})"
@@ -133,6 +125,58 @@ def create_intersectoid(ta: TTreeAut, box: TTreeAut, root: str, helper: FoldingH
     return result
 
 
+def explore_intersectoid_state(
+    ta: TTreeAut, box: TTreeAut, current_tuple: tuple[str, str], state: str
+) -> IntersectoidProduct:
+    """
+    [description]
+    Creates the intersectoid transitions from one product state (see create_intersectoid() for the cases).
+    The result only depends on the transitions of the TA state (and the box state), so it can be cached.
+
+    [return]
+    - list of the transitions (key, label, variable, children) in the order of insertion,
+    - product states to be processed next (in the order of the worklist),
+    - (ta state, ta key) pairs of the used (non-output) TA transitions
+    """
+    edges: dict[str, tuple[str, str, str, list[str]]] = {}
+    successors: list[tuple[str, str]] = []
+    temp: list[tuple[str, str]] = []
+    for key, ta_edge in ta.transitions[current_tuple[0]].items():  # ta edges
+        # skipping edges with already applied reductions
+        skip: bool = False
+        for b in ta_edge.info.box_array:
+            if b is not None:
+                # skipping when trying to reach through a reduced edge, BUT
+                # NOT when the source state can create a port transition
+                skip = True
+        for box_edge in box.transitions[current_tuple[1]].values():  # box edges
+            # skipping differently labeled (e.g. LH and 0) edges
+            if ta_edge.info.label != box_edge.info.label and not box_edge.info.label.startswith("Port"):
+                continue
+            if len(ta_edge.children) == 2 and len(box_edge.children) == 2:
+                if ta_edge.children[0] != ta_edge.children[1] and box_edge.children[0] == box_edge.children[1]:
+                    continue
+            # ports are exceptions to the different labeled exclusion
+            # if one of the mismatched labels is a port label,
+            # than that "overrules" any other label
+            if box_edge.info.label.startswith("Port"):
+                edge_key: str = intersectoid_edge_key(ta_edge, box_edge)
+                edges[edge_key] = (edge_key, box_edge.info.label, "", [])
+            elif not skip:
+                children: list[str] = []
+                for i in range(len(ta_edge.children)):
+                    child: tuple[str, str] = (ta_edge.children[i], box_edge.children[i])
+                    children.append(tuple_name(child))
+                    successors.append(child)
+                if len(children) != 0:
+                    temp.append((current_tuple[0], key))
+                edge_key = intersectoid_edge_key(ta_edge, box_edge)
+                edges[edge_key] = (edge_key, box_edge.info.label, f"{ta_edge.info.variable}", children)
+        # for box edge
+    # for tree automaton edge
+    return list(edges.values()), successors, temp
+
+
 def create_intersectoid_new(ta: TTreeAut, box: TTreeAut, root: str, helper: FoldingHelper):
     edges: set[TTransition] = set()
     visited: set[str] = set()
@@ -257,9 +301,9 @@ def intersectoid_reachability(ta: TTreeAut, var_visibility: dict[str, int]) -> l
                 edges_to_pop.append((edge.src, key))
 
     for src, key in edges_to_pop:
-        copyta.transitions[src].pop(key)
+        copyta.remove_transition(src, key)
 
-    copyta: TTreeAut = remove_useless_states(copyta)
+    copyta: TTreeAut = remove_useless_states(copyta, in_place=True)
     result: list[str] = reachable_bottom_up(copyta)
     return result
 
@@ -291,7 +335,8 @@ def add_variables_top_down(treeaut: TTreeAut, helper: FoldingHelper, source: str
         for edge in ta.transitions[state].values():
             if edge.src in edge.children:
                 return
-        for edge in ta.transitions[state].values():
+        # the variables are written into the edges directly, 'ta' can share the state with its copies
+        for edge in ta.own_state(state).values():
             if edge.info.variable != "":
                 edge_var = int(edge.info.variable[len(helper.var_prefix) :])
                 if edge_var != var:
@@ -347,6 +392,7 @@ def add_variables_top_down(treeaut: TTreeAut, helper: FoldingHelper, source: str
         var = int(edge.info.variable[len(helper.var_prefix) :])
         for child in edge.children:
             add_variables(treeaut, var + 1, child, helper)
+    treeaut.invalidate()
 
     selfloop = False
     min_outvar: Optional[int] = None
@@ -389,7 +435,7 @@ def get_port_edge_lookup(intersectoid: TTreeAut) -> Tuple[Dict[str, List[Tuple[s
 
 
 def iterate_port_edge_paths(
-    inp: Dict[str, List[Tuple[str, str]]]
+    inp: Dict[str, List[Tuple[str, str]]],
 ):  # -> Generator[None, None, dict[str, tuple[str, str]]]:
     return (dict(zip(inp.keys(), values)) for values in itertools.product(*inp.values()))
     # return dict(zip(inp.keys(), itertools.product(*inp.values())))
@@ -409,7 +455,7 @@ def reduce_intersectoid_edges(
                    identical structure as TTreeAut transition dictionary
     """
     for port, path_list in port_edges.items():
-        (state_to_stay, key_to_stay) = port_mapping[port]
+        state_to_stay, key_to_stay = port_mapping[port]
         for state, key in path_list:
             if state == state_to_stay and key == key_to_stay:
                 continue
@@ -417,6 +463,7 @@ def reduce_intersectoid_edges(
                 edge_storage[state] = {}
             if key not in edge_storage[state]:
                 edge_storage[state][key] = intersectoid.transitions[state].pop(key)
+    intersectoid.invalidate()
     # for port1, state, key in port_mapping.items():
 
 
@@ -424,6 +471,7 @@ def return_reduced_edges(intersectoid: TTreeAut, edge_storage: dict):
     for state, edges in edge_storage.items():
         for key, edge in edges.items():
             intersectoid.transitions[state][key] = edge
+    intersectoid.invalidate()
 
 
 def reduce_portable_states(intersectoid: TTreeAut):
@@ -457,7 +505,7 @@ def reduce_portable_states(intersectoid: TTreeAut):
         edge_storage = {}
     for state, key_set in edge_popper.items():
         for key in key_set:
-            intersectoid.transitions[state].pop(key)
+            intersectoid.remove_transition(state, key)
 
 
 # End of file folding_intersectoid.py
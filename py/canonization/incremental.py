@@ -0,0 +1,186 @@
+"""
+[file] incremental.py
+[author] Jany26  (Jan Matufka)  <xmatuf00@stud.fit.vutbr.cz>
+[description] Incremental canonization of progressively built diagrams (e.g. CNF clause by clause),
+reusing the folding results of the previous step everywhere outside the upward cone of the change.
+"""
+
+from typing import Optional
+
+from canonization.folding import ubda_folding
+from canonization.folding_helpers import BoxFindingStoreClass
+from canonization.normalization import ubda_normalize
+from canonization.unfolding import ubda_unfolding
+from helpers.string_manipulation import create_var_order_list
+from tree_automata import TTreeAut
+from tree_automata.functions.trimming import shrink_to_top_down_reachable_2
+from tree_automata.indexed import get_indexed
+
+"""
+Folding cost is dominated by box_finding() (intersectoid construction, emptiness check, mapping).
+A box_finding() result only depends on the structure below its root state, so after a local change
+(a clause/gate applied), only the results with a changed state in the intersectoid (i.e. within the upward cone
+of the changed states) have to be computed again, see BoxFindingStoreClass.
+
+The state names of the UBDA have to be stable between the steps. Since unfolding and normalization name
+the states differently in each step, IncrementalCanonizationHelper renames the normalized UBDA structurally:
+the name of a state is given by its transitions and the names of its children (bottom-up), so the unchanged
+parts of the diagram get the same names as in the previous step and the changed states get new names.
+Alternatively, the caller can keep the names and pass the set of changed states explicitly.
+
+Note: unfolding and normalization are still done on the whole diagram (both are cheap compared to folding).
+"""
+
+
+def get_upward_cone(ta: TTreeAut, states: set[str]) -> set[str]:
+    """
+    States from which some of the 'states' are (top-down) reachable, including the 'states' themselves.
+    """
+    index = get_indexed(ta)
+    worklist: list[int] = [index.state_index[s] for s in states if s in index.state_index]
+    found: set[int] = set(worklist)
+    while worklist != []:
+        state = worklist.pop()
+        for edge in index.get_parent_edges(state):
+            src = index.edge_src[edge]
+            if src not in found:
+                found.add(src)
+                worklist.append(src)
+    return set(index.get_state_names(list(found))) | states
+
+
+class IncrementalCanonizationHelper:
+    """
+    Keeps the folded (canonical) form of the previous step and the box_finding() results it was computed from.
+
+    'boxes' - box order used for folding (e.g. box_orders["full"]),
+    'max_var' - number of variables (+ 1, same as in ubda_folding()),
+    'folded' - folded UBDA of the last step,
+    'changed' - number of changed/new states of the normalized UBDA in the last step,
+    'cone' - size of the upward cone of the changed states (with structural names, each state of the cone is new).
+    """
+
+    def __init__(self, boxes: list[str], max_var: int, prefix: str = "q"):
+        self.boxes: list[str] = boxes
+        self.max_var: int = max_var
+        self.prefix: str = prefix
+        self.store = BoxFindingStoreClass()
+        self.folded: Optional[TTreeAut] = None
+        self.steps: int = 0
+        self.changed: int = 0
+        self.cone: int = 0
+        self.signatures: dict[tuple, int] = {}  # structural signature -> state ID (only the last step is kept)
+        self.counter: int = 0
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(steps={self.steps}, changed={self.changed}, cone={self.cone}, "
+            f"box_finding hits/misses={self.store.hits}/{self.store.misses})"
+        )
+
+    def get_signature(self, ta: TTreeAut, state: str, names: dict[str, str]) -> tuple:
+        return tuple(
+            (
+                edge.info.label,
+                edge.info.variable,
+                tuple(["" if child == state else names[child] for child in edge.children]),
+                tuple(edge.info.box_array),
+            )
+            for edge in ta.transitions[state].values()
+        )
+
+    def rename_structurally(self, ta: TTreeAut) -> set[str]:
+        """
+        Renames the states of 'ta' (in place) by their structure (bottom-up), returns the new names that were
+        not used in the previous step (changed and new states).
+
+        Structurally identical states within one UBDA are not merged, they get a suffix.
+        States on a cycle (other than a self-loop) cannot be named by their structure,
+        they (and the states above them) get a name unique to this step.
+        """
+        names: dict[str, str] = {}
+        signatures: dict[tuple, int] = {}
+        duplicates: dict[int, int] = {}
+        changed: set[str] = set()
+        open_states: set[str] = set()
+        for start in list(ta.transitions.keys()):
+            if start in names:
+                continue
+            stack: list[tuple[str, bool]] = [(start, False)]
+            while stack != []:
+                state, expanded = stack.pop()
+                if state in names:
+                    continue
+                if not expanded:
+                    open_states.add(state)
+                    stack.append((state, True))
+                    for edge in ta.transitions[state].values():
+                        for child in edge.children:
+                            if child not in names and child not in open_states:
+                                stack.append((child, False))
+                    continue
+                open_states.discard(state)
+                children = [c for e in ta.transitions[state].values() for c in e.children if c != state]
+                if any([child not in names for child in children]):
+                    # cycle through 'state', its name is unique to this step
+                    signature: tuple = (self.steps, state)
+                else:
+                    signature = self.get_signature(ta, state, names)
+                if signature not in signatures:
+                    if signature in self.signatures:
+                        signatures[signature] = self.signatures[signature]
+                    else:
+                        signatures[signature] = self.counter
+                        self.counter += 1
+                        changed.add(f"{self.prefix}{signatures[signature]}")
+                idx = signatures[signature]
+                count = duplicates.get(idx, 0)
+                duplicates[idx] = count + 1
+                names[state] = f"{self.prefix}{idx}" if count == 0 else f"{self.prefix}{idx}_{count}"
+                if count != 0:
+                    changed.add(names[state])
+        self.signatures = signatures
+
+        ta.own_all_states()
+        ta.roots = [names[root] for root in ta.roots]
+        ta.transitions = {names[state]: edges for state, edges in ta.transitions.items()}
+        for edges in ta.transitions.values():
+            for edge in edges.values():
+                edge.src = names[edge.src]
+                edge.children = [names[child] for child in edge.children]
+        return changed
+
+    def fold(self, ta: TTreeAut, changed: Optional[set[str]] = None) -> TTreeAut:
+        """
+        Folds the normalized UBDA 'ta' of the next step, reusing the box_finding() results of the previous steps.
+
+        If 'changed' is None, the states of 'ta' are renamed structurally (in place, see rename_structurally()).
+        Otherwise, 'changed' are the states of 'ta' that are new or have different transitions than
+        in the previous step, all other states are expected to keep their names and transitions.
+        """
+        if changed is None:
+            changed = self.rename_structurally(ta)
+            cone = changed
+        else:
+            cone = get_upward_cone(ta, changed)
+            self.store.invalidate(cone)
+        self.folded = ubda_folding(ta, self.boxes, self.max_var, store=self.store)
+        self.store.next_run()
+        self.steps += 1
+        self.changed = len(changed)
+        self.cone = len(cone)
+        return self.folded
+
+    def canonize(self, initial: TTreeAut) -> TTreeAut:
+        """
+        Unfolds and normalizes the next step 'initial' (e.g. BDA imported from the .dd file exported after
+        applying the next clause), then folds it incrementally.
+        """
+        unfolded = ubda_unfolding(initial, self.max_var)
+        var_order = create_var_order_list("", self.max_var)
+        normalized = shrink_to_top_down_reachable_2(ubda_normalize(unfolded, var_order))
+        normalized.reformat_keys()
+        return self.fold(normalized)
+
+
+# End of file incremental.py
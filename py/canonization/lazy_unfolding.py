@@ -0,0 +1,269 @@
+"""
+[file] lazy_unfolding.py
+[author] Jany26  (Jan Matufka)  <xmatuf00@stud.fit.vutbr.cz>
+[description] Lazy (on-demand) unfolding view of a folded UBDA/BDA.
+"""
+
+import copy
+
+from collections.abc import Mapping
+from typing import Iterator
+
+from canonization.unfolding import find_port_states
+from helpers.utils import box_catalogue
+from tree_automata import TTreeAut, TTransition, TEdge
+from tree_automata.var_manipulation import saturate_box_edges_with_variables
+
+"""
+LazyUnfoldedTreeAut has the same read interface as the result of ubda_unfolding() (roots, transitions of a state,
+output edges, ...), but the box states and their transitions are only created when the transitions of some state
+are accessed for the first time (and then memoized). A top-down traversal (e.g. evaluation of an assignment)
+thus only creates the states on the visited paths, and nothing is ever deep-copied or reformatted as a whole.
+
+The unfolding itself follows ubda_unfolding() (same box instances, variable saturation and port substitution).
+The states of the folded UBDA keep their names, the box states get new names with the same prefix and numbers
+following the highest number used in the folded UBDA (in the order in which they are synthesized),
+since normalization expects state names of the form <prefix><number> (see state_name_sort()).
+The materialize() method creates the whole (reachable part of the) unfolded UBDA as a TTreeAut.
+
+Transition keys are prefixed with the name of their source state to be unique. The view is read-only, the edges returned by it must not be modified (they are shared with the memo).
+Algorithms that process the whole automaton (e.g. normalization) can still use the view directly,
+they just synthesize all reachable states once.
+"""
+
+
+def get_unique_keys(state: str, edges: dict[str, TTransition]) -> dict[str, TTransition]:
+    """
+    Transition keys have to be unique within the whole UBDA (e.g. normalization relies on that),
+    but the keys of the box transitions repeat in each box instance.
+    """
+    return {f"{state}-{key}": edge for key, edge in edges.items()}
+
+
+class LazyTransitionsClass(Mapping):
+    """
+    Read-only mapping state -> transition dictionary (same as TTreeAut.transitions) of the lazy view.
+    Iteration goes over the states reachable from the roots (top-down).
+    """
+
+    def __init__(self, view: "LazyUnfoldedTreeAut"):
+        self.view = view
+
+    def __getitem__(self, state: str) -> dict[str, TTransition]:
+        return self.view.get_transitions(state)
+
+    def __contains__(self, state: object) -> bool:
+        return state in self.view.memo or state in self.view.ports or state in self.view.folded.transitions
+
+    def __iter__(self) -> Iterator[str]:
+        return self.view.iterate_states()
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.view.iterate_states())
+
+
+class LazyUnfoldedTreeAut(TTreeAut):
+    """
+    Unfolded view of the folded UBDA 'folded' (which is not modified).
+
+    'memo' - synthesized (unfolded) states and their transitions,
+    'ports' - box states with a port transition, which are not synthesized yet -> (target folded state, box edges),
+    'root_edges' - box transitions added to the roots by unfolding the root rule (if any),
+    'unfolded_edges' - number of unfolded box edges so far (statistics).
+    """
+
+    def __init__(self, folded: TTreeAut, max_var: int, saturate: bool = True):
+        self.folded: TTreeAut = folded
+        self.max_var: int = max_var
+        self.saturate: bool = saturate
+        self.prefix: str = folded.get_var_prefix()
+        self.output_states: set[str] = folded.get_output_states()
+        self.memo: dict[str, dict[str, TTransition]] = {}
+        self.ports: dict[str, tuple[str, dict[str, TTransition]]] = {}
+        self.root_edges: dict[str, dict[str, TTransition]] = {}
+        self.unfolded_edges: int = 0
+        self.state_prefix: str = "q"
+        self.state_counter: int = 0
+        names = folded.get_states()
+        prefixes = set([name.rstrip("0123456789") for name in names])
+        if len(prefixes) == 1:
+            self.state_prefix = prefixes.pop()
+            numbers = [int(name[len(self.state_prefix) :]) for name in names if name != self.state_prefix]
+            self.state_counter = max(numbers, default=-1) + 1
+        super().__init__([r for r in folded.roots], LazyTransitionsClass(self), f"unfolded({folded.name})")
+        if folded.rootbox is not None:
+            self.unfold_root_rule()
+
+    def get_port_arity(self) -> int:
+        return self.folded.port_arity
+
+    def get_var_prefix(self) -> str:
+        return self.prefix
+
+    def get_derived_stamp(self) -> tuple:
+        # the unfolded automaton does not change by synthesizing states (the size of the mapping is not used,
+        # since it would synthesize all states)
+        return (self.version, id(self.folded))
+
+    def get_variable(self, state: str) -> int:
+        """
+        Variable of the edges from the folded 'state' (output edges are saturated with 'max_var').
+        """
+        if self.saturate and state in self.output_states:
+            return self.max_var
+        for edge in self.folded.transitions[state].values():
+            if edge.info.variable != "":
+                return int(edge.info.variable[len(self.prefix) :])
+        raise ValueError(f"LazyUnfoldedTreeAut: no variable information for state {state}")
+
+    def get_new_state(self) -> str:
+        name = f"{self.state_prefix}{self.state_counter}"
+        while name in self.folded.transitions:
+            self.state_counter += 1
+            name = f"{self.state_prefix}{self.state_counter}"
+        self.state_counter += 1
+        return name
+
+    def create_box(self, box_name: str, start_var: int, out_vars: list[int]) -> TTreeAut:
+        """
+        Copy of the box with saturated variables and new state names.
+        """
+        box = copy.deepcopy(box_catalogue[box_name])
+        if self.saturate:
+            saturate_box_edges_with_variables(box, self.prefix, start_var, out_vars, self.max_var)
+        for state in box.get_states():
+            box.rename_state(state, self.get_new_state())
+        return box
+
+    def add_box(self, box: TTreeAut, targets: list[str]) -> None:
+        """
+        Store the states of the unfolded box, the port states are synthesized later (see get_transitions()).
+        """
+        port_states = find_port_states(box)
+        for state, edges in box.transitions.items():
+            if state in port_states:
+                self.ports[state] = (targets[port_states.index(state)], get_unique_keys(state, edges))
+            else:
+                self.memo[state] = get_unique_keys(state, edges)
+
+    def unfold_root_rule(self) -> None:
+        """
+        Same as unfold_root_rule() from unfolding.py - the port states of the root box are the roots of 'folded',
+        the other transitions of the port states are added to the roots.
+        """
+        roots = self.folded.roots
+        box = copy.deepcopy(box_catalogue[self.folded.rootbox])
+        if box.port_arity != len(roots):
+            raise ValueError("LazyUnfoldedTreeAut: number of roots != port arity of root reduction box")
+        port_states = [state for _, state in box.get_port_order()]
+        if self.saturate:
+            out_vars = [self.get_variable(root) for root in roots]
+            saturate_box_edges_with_variables(box, self.prefix, 1, out_vars, self.max_var)
+        for state in box.get_states():
+            new_name = roots[port_states.index(state)] if state in port_states else self.get_new_state()
+            if state in box.roots:
+                self.roots = [new_name]
+            box.rename_state(state, new_name)
+        for state, edges in box.transitions.items():
+            if state not in roots:
+                self.memo[state] = get_unique_keys(state, edges)
+                continue
+            self.root_edges[state] = {
+                key: edge for key, edge in edges.items() if not edge.info.label.startswith("Port")
+            }
+
+    def unfold_edge(self, folded_edge: TTransition) -> TTransition:
+        """
+        Same as unfold_edge() from unfolding.py, but the boxes are stored in the view (see add_box()).
+        """
+        src = folded_edge.src
+        new_edge = TTransition(src, TEdge(folded_edge.info.label, [], folded_edge.info.variable), [])
+        children = folded_edge.children
+        out_vars: list[int] = []
+        start_var = 0
+        if self.saturate:
+            start_var = int(folded_edge.info.variable[len(self.prefix) :]) + 1
+            out_vars = [self.get_variable(child) for child in children]
+        for box_name in folded_edge.info.box_array:
+            if box_name is None:
+                new_edge.children.append(children[0])
+                children = children[1:]
+                out_vars = out_vars[1:]
+                continue
+            arity = box_catalogue[box_name].port_arity
+            box = self.create_box(box_name, start_var, out_vars)
+            self.add_box(box, children[:arity])
+            new_edge.children.extend(box.roots)
+            children = children[arity:]
+            out_vars = out_vars[arity:]
+        self.unfolded_edges += 1
+        return new_edge
+
+    def get_transitions(self, state: str) -> dict[str, TTransition]:
+        """
+        Transitions of the 'state' in the unfolded UBDA (synthesized on the first access).
+        """
+        if state in self.memo:
+            return self.memo[state]
+        if state in self.ports:
+            # the port transition of the box state is replaced by the transitions of the folded state
+            target, box_edges = self.ports.pop(state)
+            result = {key: edge for key, edge in box_edges.items() if not edge.info.label.startswith("Port")}
+            for edge in self.get_transitions(target).values():
+                new_edge = TTransition(state, edge.info, [c for c in edge.children])
+                result[f"{state}-{edge.info.label}-{new_edge.children}"] = new_edge
+        elif state in self.folded.transitions:
+            result = {key: edge for key, edge in self.root_edges.get(state, {}).items()}
+            for key, edge in self.folded.transitions[state].items():
+                if edge.info.check_edge_for_boxes():
+                    result[key] = self.unfold_edge(edge)
+                    continue
+                variable = edge.info.variable
+                if self.saturate and state in self.output_states:
+                    variable = f"{self.prefix}{self.max_var}"
+                info = TEdge(edge.info.label, [b for b in edge.info.box_array], variable)
+                result[key] = TTransition(state, info, [c for c in edge.children])
+            result = get_unique_keys(state, result)
+        else:
+            raise KeyError(state)
+        self.memo[state] = result
+        return result
+
+    def iterate_states(self) -> Iterator[str]:
+        """
+        States reachable from the roots (top-down, BFS order), synthesized on the way.
+        """
+        visited: set[str] = set(self.roots)
+        queue: list[str] = [r for r in self.roots]
+        index = 0
+        while index < len(queue):
+            state = queue[index]
+            index += 1
+            yield state
+            for edge in self.get_transitions(state).values():
+                for child in edge.children:
+                    if child not in visited:
+                        visited.add(child)
+                        queue.append(child)
+
+    def materialize(self, reformat: bool = True) -> TTreeAut:
+        """
+        Create the reachable part of the unfolded UBDA as a normal TTreeAut (equivalent to ubda_unfolding()).
+        """
+        transitions = copy.deepcopy({state: self.get_transitions(state) for state in self.iterate_states()})
+        result = TTreeAut([r for r in self.roots], transitions, self.name, self.folded.port_arity)
+        if reformat:
+            result.reformat_states()
+            result.reformat_keys()
+        return result
+
+
+def lazy_unfolding(ta: TTreeAut, max_var: int, saturate: bool = True) -> LazyUnfoldedTreeAut:
+    """
+    Lazy counterpart of ubda_unfolding() - returns a view of the unfolded UBDA, which unfolds the boxes
+    only when the transitions of their states are accessed.
+    """
+    return LazyUnfoldedTreeAut(ta, max_var, saturate)
+
+
+# End of file lazy_unfolding.py
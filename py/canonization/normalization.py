@@ -6,52 +6,80 @@ Removes equivalent states (i.e. states with equivalent languages
 if they were considered roots)
 [note] Bottom-up determinization that takes variables into account (they
 are considered a part of the edge-symbol).
+Works on the interned view of the UBDA (see 'indexed.py'): macrostates are tuples of state IDs,
+their string names are only created for the resulting TTreeAut.
 """
 
 from io import TextIOWrapper
 import itertools
 import sys
 import os
+import time
 from typing import Any, Optional
 
-from tree_automata import TTreeAut, TTransition, TEdge, iterate_edges
+from tree_automata import TTreeAut, TTransition, TEdge, iterate_edges, get_indexed
 from tree_automata.automaton import state_name_sort
 from helpers.string_manipulation import create_string_from_name_set
 
+# set of states of the UBDA (IDs of the interned view), ordered same as the state names by state_name_sort()
+Macrostate = tuple[int, ...]
+
+
+class NormalizationStats:
+    """
+    Statistics of a normalization run, used for comparing the number of processed child tuples with the number
+    of macrostate tuples and child state lists the full enumeration (itertools.product over the worklist
+    and over the states of the macrostates) would visit.
+    """
+
+    def __init__(self):
+        self.levels: int = 0
+        self.max_worklist: int = 0
+        self.product_tuples: int = 0
+        self.product_children: int = 0
+        self.processed_tuples: int = 0
+        self.seconds: float = 0.0
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(levels={self.levels}, max_worklist={self.max_worklist}, "
+            f"product_tuples={self.product_tuples}, product_children={self.product_children}, "
+            f"processed_tuples={self.processed_tuples}, seconds={self.seconds:.4f})"
+        )
+
 
 class NormalizationHelper:
     def __init__(self, treeaut: TTreeAut, variables: list[str], verbose: bool, output: Optional[str], fix: bool):
         self.treeaut: TTreeAut = treeaut  # copy of the initial TA (un-normalized)
-        self.roots: dict[str, list[str]] = {}
+        self.index = get_indexed(treeaut)
+        self.root_ids: set[int] = set([self.index.state_index[root] for root in treeaut.roots])
+        self.roots: dict[Macrostate, Macrostate] = {}
 
         # transition => (src_macrostate, symbol, variable, list of child macrostates)
         # these transitions after normalization are correct, and will be in the final TA/UBDA
-        self.transitions: list[tuple[list[str], str, str, list[list[str]]]] = []
-        self.worklist: list[list[str]] = []  # currently considered (macro)states
-        self.next_worklist: list[list[str]] = []  # which states are considered in next iteration
+        self.transitions: list[tuple[Macrostate, str, str, list[Macrostate]]] = []
+        self.worklist: list[Macrostate] = []  # currently considered (macro)states
+        self.next_worklist: list[Macrostate] = []  # which states are considered in next iteration
         self.symbols: dict[str, int] = {}
         self.var_worklist: "dict[str, list]" = {var: [] for var in variables}
         for symbol, arity in treeaut.get_symbol_arity_dict().items():
             if arity > 0:
                 self.symbols[symbol] = arity
-        self.lookup: dict[str, list[tuple[str, TTransition]]] = {}  #
+        # (arity, variable) -> (source, children) of the transitions with the arity and variable, used for finding
+        # the child tuples (only transitions with some children, output transitions are handled at the start)
+        self.edge_index: dict[tuple[int, str], list[tuple[int, list[int]]]] = {}
 
         # NOTE: norm.edge_lookup is redundant
         # since it basically just mirrors self.treeaut.transitions
         # except the lowest level is not a dict key->transition, but a set of keys.
         self.edge_lookup: dict[str, set[str]] = self.edges_to_process_cache_init()
-        for edge_dict in treeaut.transitions.values():
-            for key, edge in edge_dict.items():
-                if str(edge.children) not in self.lookup:
-                    self.lookup[str(edge.children)] = []
-                self.lookup[str(edge.children)].append((key, edge))
-        self.processed_edges: set[str] = set()
-
-        # norm.keys = all keys of the initial tree automaton, mostly debugging, now redundant
-        self.keys: set[str] = set()
-        for edge_dict in treeaut.transitions.values():
-            for k in edge_dict.keys():
-                self.keys.add(k)
+        index = self.index
+        for e in range(index.count_edges()):
+            if index.get_arity(e) != 0:
+                key = (index.get_arity(e), index.variable_names[index.edge_variable[e]])
+                self.edge_index.setdefault(key, []).append((index.edge_src[e], index.get_children(e)))
+        self.processed_edges: set[tuple] = set()
+        self.next_worklist_keys: set[Macrostate] = set()
         self.variables: list[str] = variables[::-1]
         self.verbose: bool = verbose
         if output is not None:
@@ -63,10 +91,16 @@ class NormalizationHelper:
         # use fix that does not allow creating transitions with reversed or repeated variable order => utilizing var_cache
         self.normalization_fix = fix
 
-        # child macrostate str -> variable
+        # child macrostate (sorted, see get_sorted()) -> variable
         # this is used for checking, if the currently considered transition is viable
         # if source state variable is greater than any child variable, the considered edge is not added to the result
-        self.var_cache: dict[str, int] = {}
+        self.var_cache: dict[Macrostate, str] = {}
+
+        # state ID -> position of its name in the state_name_sort() order, if all state names are <prefix><number>
+        # (otherwise state_name_sort() is called on the names of each new macrostate)
+        self.state_order: Optional[list[int]] = self.get_state_order()
+        self.sorted: dict[Macrostate, Macrostate] = {}  # unsorted macrostates (of the output states) -> sorted
+        self.names: dict[Macrostate, str] = {}
 
     def __repr__(self):
         result = ""
@@ -81,6 +115,47 @@ class NormalizationHelper:
             result += f"--> {i[3]}\n"
         return result
 
+    def get_state_order(self) -> Optional[list[int]]:
+        """
+        Positions of the states in the state_name_sort() order, if state_name_sort() of any subset of the state names
+        is the numeric order of the names (all names are <prefix><number> with the same prefix), otherwise None.
+        """
+        names = self.index.state_names
+        numbers: list[int] = []
+        prefix: Optional[str] = None
+        for name in names:
+            # same prefix as in state_name_sort()
+            name_prefix = name[: len([i for i in range(len(name)) if not name[i:].isnumeric()])]
+            prefix = name_prefix if prefix is None else prefix
+            if name_prefix != prefix or not name.lstrip(prefix).isdecimal():
+                return None
+            numbers.append(int(name.lstrip(prefix)))
+            if f"{prefix}{numbers[-1]}" != name:
+                return None
+        result = [0] * len(names)
+        for position, state in enumerate(sorted(range(len(names)), key=numbers.__getitem__)):
+            result[state] = position
+        return result
+
+    def get_sorted(self, states: list[int]) -> Macrostate:
+        """
+        Macrostate of the 'states' (ordered as the state names by state_name_sort()).
+        """
+        if self.state_order is not None:
+            return tuple(sorted(states, key=self.state_order.__getitem__))
+        index = self.index
+        return tuple([index.state_index[name] for name in state_name_sort(index.get_state_names(states))])
+
+    def get_name(self, macrostate: Macrostate) -> str:
+        """
+        State name of the macrostate in the result (e.g. '{q1,q5}').
+        """
+        name = self.names.get(macrostate)
+        if name is None:
+            name = create_string_from_name_set(self.index.get_state_names(list(macrostate)))
+            self.names[macrostate] = name
+        return name
+
     def debug_print(self, out: Any) -> None:
         if self.verbose:
             if self.output is None:
@@ -112,7 +187,7 @@ class NormalizationHelper:
         for macrostate in self.worklist:
             # NOTE: check subset, (to not create redundant "single" states that can be represented by )
             is_fully_processed: bool = True
-            for state in macrostate:
+            for state in self.index.get_state_names(list(macrostate)):
                 if len(self.edge_lookup[state]) != 0:
                     for k in self.edge_lookup[state]:
                         temp.append(k)
@@ -125,7 +200,7 @@ class NormalizationHelper:
         delete_list = []
         for ms in self.next_worklist:
             keep = False
-            for s in ms:
+            for s in self.index.get_state_names(list(ms)):
                 if s not in self.edge_lookup:
                     continue
                 if len(self.edge_lookup[s]) != 0:
@@ -158,91 +233,108 @@ class NormalizationHelper:
         worklist_str = f"var: {var}"
         for i in self.worklist:
             key_set = set()
-            for j in i:
+            for j in self.index.get_state_names(list(i)):
                 if j not in self.edge_lookup:
                     continue
                 for key in self.edge_lookup[j]:
                     key_set.add(key)
             key_list = list(key_set)
-            worklist_str += f" | {create_string_from_name_set(i)}"
+            worklist_str += f" | {self.get_name(i)}"
         print(worklist_str)
 
 
+def get_child_tuples(norm: NormalizationHelper, current_var: str, arity: int) -> dict[tuple[int, ...], set[int]]:
+    """
+    Find all tuples of (indices of) macrostates from the worklist, for which some transition
+    (with 'current_var' or no variable) leads to children from the respective macrostates.
+    Transitions are matched only by their children (regardless of the symbol), same tuples are used for all
+    symbols with the same arity.
+    Returns the tuples (in the order of itertools.product(norm.worklist, repeat=arity)) and the source states
+    of all such transitions (i.e. the new macrostate).
+
+    Only the existing transitions are considered, each state is mapped to the macrostates containing it,
+    so the tuples without any transition are never enumerated.
+    """
+    containing: dict[int, list[int]] = {}
+    for i, macrostate in enumerate(norm.worklist):
+        for state in dict.fromkeys(macrostate):
+            containing.setdefault(state, []).append(i)
+
+    result: dict[tuple[int, ...], set[int]] = {}
+    edges = norm.edge_index.get((arity, ""), [])
+    if current_var != "":
+        edges = edges + norm.edge_index.get((arity, current_var), [])
+    for src, children in edges:
+        child_indices = [containing.get(child, []) for child in children]
+        for indices in itertools.product(*child_indices):
+            result.setdefault(indices, set()).add(src)
+    return {indices: result[indices] for indices in sorted(result)}
+
+
 def process_possible_edges(
-    children_macrostates: list[list[str]], norm: NormalizationHelper, current_var: str, symbol: str
+    children_macrostates: list[Macrostate],
+    sources: set[int],
+    norm: NormalizationHelper,
+    current_var: str,
+    symbol: str,
 ) -> None:
-    children_lists = [list(i) for i in itertools.product(*children_macrostates)]
-    new_macrostate = set()
-    force_var = False
-    keys_to_process = []
-    for c in children_lists:
-        if str(c) not in norm.lookup:
-            continue
-        possible_edges = norm.lookup[str(c)]
-        for key, edge in possible_edges:
-            norm.debug_print(f"      > EDGE = {edge}")
-            if edge.info.variable not in ["", current_var]:
-                continue
-            new_macrostate.add(edge.src)
-            for child in edge.children:
-                # norm.edge_lookup checking is redundant (tests pass even without this)
-                # if key not in norm.edge_lookup[child]:
-                #     continue
-                # norm.edge_lookup[child].remove(key)
-                if key not in norm.keys:
-                    continue
-                norm.keys.remove(key)
-                keys_to_process.append(key)
-
-    if len(new_macrostate) == 0:
+    """
+    Add the transition from the macrostate of 'sources' (source states of all transitions leading to
+    the 'children_macrostates', see get_child_tuples()) over 'symbol' to the result.
+    """
+    if len(sources) == 0:
         return
-    new_macrostate = state_name_sort(list(new_macrostate))
-    if new_macrostate not in norm.next_worklist:
+    new_macrostate: Macrostate = norm.get_sorted(list(sources))
+    if new_macrostate not in norm.next_worklist_keys:
+        norm.next_worklist_keys.add(new_macrostate)
         norm.next_worklist.append(new_macrostate)
 
     # if self-loop (even partial), then no variable on edge
     # variable appears only if that was the case in the original UBDA
     added_var = "" if new_macrostate in children_macrostates else current_var
 
-    # debug print info
-    source: str = macrostring(new_macrostate)
-    low: str = macrostring(children_macrostates[0])
-    high: str = macrostring(children_macrostates[1])
-    source_var: Optional[str] = norm.var_cache[source] if source in norm.var_cache else None
-    low_var: str = norm.var_cache[low]
-    high_var: str = norm.var_cache[high]
-
     # checking for edge relevancy => if failed, edge would disrupt semantics, so it won't be added
     if norm.normalization_fix:
-        if source in norm.var_cache:
-            src_var = norm.var_cache[source]
+        if new_macrostate in norm.var_cache:
+            src_var = norm.var_cache[new_macrostate]
             for child in children_macrostates:
-                child_var = norm.var_cache[macrostring(child)]
+                child_var = norm.var_cache[norm.sorted.get(child, child)]
                 if src_var > child_var:
-                    if norm.verbose:
-                        pass
                     return
     # however, cache is only updated at the end of the iteration
-    lookup_str = str([new_macrostate, symbol, added_var, children_macrostates])
-    if lookup_str in norm.processed_edges:
-        norm.debug_print(f"{lookup_str}: already in the result")
+    lookup_key = (new_macrostate, symbol, added_var, tuple(children_macrostates))
+    if lookup_key in norm.processed_edges:
+        if norm.verbose:
+            children = [norm.get_name(child) for child in children_macrostates]
+            norm.debug_print(f"{[norm.get_name(new_macrostate), symbol, added_var, children]}: already in the result")
         return
 
-    norm.debug_print(f"[var check OK]: -> {source} : {source_var} -> [ {low} : {low_var} , {high} : {high_var} ]")
-    norm.processed_edges.add(lookup_str)
+    if norm.verbose:
+        source_var: Optional[str] = norm.var_cache.get(new_macrostate)
+        children_info = [
+            f"{norm.get_name(child)} : {norm.var_cache[norm.sorted.get(child, child)]}"
+            for child in children_macrostates
+        ]
+        norm.debug_print(
+            f"[var check OK]: -> {norm.get_name(new_macrostate)} : {source_var} -> [ {' , '.join(children_info)} ]"
+        )
+    norm.processed_edges.add(lookup_key)
     norm.transitions.append(tuple([new_macrostate, symbol, added_var, children_macrostates]))
-    norm.debug_print(f"[!] edge = {new_macrostate, symbol, added_var, children_macrostates}")
-    for root in norm.treeaut.roots:
-        if root in new_macrostate:
-            norm.roots[str(new_macrostate)] = new_macrostate
-
-
-def macrostring(macrostate: list[str]) -> str:
-    return create_string_from_name_set(state_name_sort(macrostate))
+    if norm.verbose:
+        children = [norm.get_name(child) for child in children_macrostates]
+        norm.debug_print(f"[!] edge = {norm.get_name(new_macrostate), symbol, added_var, children}")
+    if not norm.root_ids.isdisjoint(sources):
+        norm.roots[new_macrostate] = new_macrostate
 
 
 def ubda_normalize(
-    ta: TTreeAut, vars: list, verbose: bool = False, output: Optional[str] = None, fix: bool = False, old: bool = False
+    ta: TTreeAut,
+    vars: list,
+    verbose: bool = False,
+    output: Optional[str] = None,
+    fix: bool = False,
+    old: bool = False,
+    stats: Optional[NormalizationStats] = None,
 ) -> TTreeAut:
     """
     Another approach to normalization. This approach also goes bottom-up,
@@ -251,8 +343,10 @@ def ubda_normalize(
     This approach mostly does not create unnecessary transitions.
 
     Normalization is similar to determinization, thus works with sets of states
-    (represented as lists ordered using state_name_sort()).
+    (represented as tuples of state IDs ordered as their names by state_name_sort()).
+    Only the tuples of macrostates, to which some transition leads, are processed (see get_child_tuples()).
     """
+    start = time.perf_counter()
     norm = NormalizationHelper(ta, vars, verbose, output, fix)
 
     # NOTE: discrepancy about variables on output edges
@@ -260,27 +354,45 @@ def ubda_normalize(
     # then output edges will have variable x(n+1)
     var: str = norm.variables.pop(0)
     for symbol, state_list in ta.get_output_edges().items():
-        norm.transitions.append(tuple([state_list, symbol, var, []]))
-        norm.worklist.append(state_list)
-        norm.var_cache[macrostring(state_list)] = var
-    norm.debug_print(f"var: {var} | {[create_string_from_name_set(i) for i in norm.worklist]}")
+        # output macrostates keep the order of the output states (only their names and variables use the sorted order)
+        macrostate: Macrostate = tuple([norm.index.state_index[state] for state in state_list])
+        norm.sorted[macrostate] = norm.get_sorted(list(macrostate))
+        norm.transitions.append(tuple([macrostate, symbol, var, []]))
+        norm.worklist.append(macrostate)
+        norm.var_cache[norm.sorted[macrostate]] = var
+    if norm.verbose:
+        norm.debug_print(f"var: {var} | {[norm.get_name(i) for i in norm.worklist]}")
     while norm.variables != []:
         var: str = norm.variables.pop(0)
-        norm.debug_print(f"var: {var} | {[create_string_from_name_set(i) for i in norm.worklist]}")
+        if norm.verbose:
+            norm.debug_print(f"var: {var} | {[norm.get_name(i) for i in norm.worklist]}")
+        if stats is not None:
+            stats.levels += 1
+            stats.max_worklist = max(stats.max_worklist, len(norm.worklist))
+        tuple_cache: dict[int, dict[tuple[int, ...], set[int]]] = {}
         for sym in norm.symbols:
-            tuples: list[list[list[str]]] = []
-            for i in itertools.product(norm.worklist, repeat=norm.symbols[sym]):
-                tuples.append(list(i))
-            for t in tuples:
-                norm.debug_print(f"   > tuple = {t}")
-                process_possible_edges(t, norm, var, sym)
+            if norm.symbols[sym] not in tuple_cache:
+                tuple_cache[norm.symbols[sym]] = get_child_tuples(norm, var, norm.symbols[sym])
+            tuples = tuple_cache[norm.symbols[sym]]
+            if stats is not None:
+                stats.product_tuples += len(norm.worklist) ** norm.symbols[sym]
+                stats.product_children += sum([len(i) for i in norm.worklist]) ** norm.symbols[sym]
+                stats.processed_tuples += len(tuples)
+            for indices, sources in tuples.items():
+                t: list[Macrostate] = [norm.worklist[i] for i in indices]
+                if norm.verbose:
+                    norm.debug_print(f"   > tuple = {[norm.get_name(i) for i in t]}")
+                process_possible_edges(t, sources, norm, var, sym)
         norm.worklist = norm.next_worklist
         norm.next_worklist = []
+        norm.next_worklist_keys = set()
         for macrostate in norm.worklist:
-            norm.var_cache[macrostring(macrostate)] = var
+            norm.var_cache[macrostate] = var
     ta = create_treeaut_from_helper(norm)
     if not old:
         remove_bad_transitions(ta, vars)
+    if stats is not None:
+        stats.seconds += time.perf_counter() - start
     return ta
 
 
@@ -311,23 +423,23 @@ def remove_bad_transitions(ta: TTreeAut, vars: list[str]) -> None:
                     flagged_edges.add((edge.src, key))
 
     for src, key in flagged_edges:
-        ta.transitions[src].pop(key)
+        ta.remove_transition(src, key)
 
 
 def create_treeaut_from_helper(norm: NormalizationHelper) -> TTreeAut:
     """
     Build the result using the stored data in the normalization helper.
-    Mainly turn the macrostates (lists of states) into state "strings".
+    Mainly turn the macrostates (tuples of state IDs) into state "strings".
     """
     name: str = f"normalized({norm.treeaut.name})"
-    roots: list[str] = [create_string_from_name_set(i) for i in norm.roots.values()]
+    roots: list[str] = [norm.get_name(i) for i in norm.roots.values()]
     roots.sort()
     counter: int = 1
     transition_dict: dict[str, dict[str, TTransition]] = {}
     for edge in norm.transitions:
-        src_state: str = create_string_from_name_set(edge[0])
+        src_state: str = norm.get_name(edge[0])
         edge_info = TEdge(edge[1], [], edge[2])
-        children: list[str] = [create_string_from_name_set(i) for i in edge[3]]
+        children: list[str] = [norm.get_name(i) for i in edge[3]]
         transition = TTransition(src_state, edge_info, children)
         if src_state not in transition_dict:
             transition_dict[src_state] = {}
@@ -83,7 +83,7 @@ def unfold_edge(helper: UnfoldingHelper, folded_edge: TTransition) -> tuple[int,
     """
     new_edge_info = TEdge(folded_edge.info.label, [], folded_edge.info.variable)
     new_edge = TTransition(folded_edge.src, new_edge_info, [])
-    edge: TTransition = copy.deepcopy(folded_edge)
+    edge: TTransition = folded_edge.copy()
     unfolded_count: int = 0
 
     if helper.variable_saturation:
@@ -175,9 +175,9 @@ def ubda_unfolding(ta: TTreeAut, max_var: int, reformat=True, saturate=True) ->
     helper = UnfoldingHelper(ta, max_var, reformat, saturate)
 
     if helper.variable_saturation:
-        # Variable saturation of output edges:
+        # Variable saturation of output edges (in the input, so the shared states are owned first):
         for state in ta.get_output_states():
-            for edge in ta.transitions[state].values():
+            for edge in ta.own_state(state).values():
                 edge.info.variable = f"{helper.prefix}{helper.max_var}"
 
     # unfold root box
@@ -191,7 +191,7 @@ def ubda_unfolding(ta: TTreeAut, max_var: int, reformat=True, saturate=True) ->
 
             # no boxes on transition (all short edges)
             if not edge.info.check_edge_for_boxes():
-                helper.output.transitions[edge.src][key] = copy.deepcopy(edge)
+                helper.output.transitions[edge.src][key] = edge.copy()
                 continue
 
             boxes_count, new_edge = unfold_edge(helper, edge)
@@ -209,7 +209,7 @@ def ubda_unfolding(ta: TTreeAut, max_var: int, reformat=True, saturate=True) ->
         # add original edges to new state with assigned port
         # this cycle 'should' only be performed once (since we assume each node of an ABDD has 'one' transition)
         for edge in helper.output.transitions[state_from_initial_ubda].values():
-            new_edge: TTransition = copy.deepcopy(edge)
+            new_edge: TTransition = edge.copy()
             new_edge.src = box_state_with_port_tr
             new_key = f"{new_edge.src}-{new_edge.info.label}-{new_edge.children}"
             new_dict[new_key] = new_edge
@@ -0,0 +1,102 @@
+"""
+[file] box_evaluation_benchmark.py
+[author] Jany26  (Jan Matufka)  <xmatuf00@stud.fit.vutbr.cz>
+[description] Benchmark comparing box evaluation by traversing the box automata with the compiled box evaluators.
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+from apply.abdd import ABDD, convert_ta_to_abdd
+from apply.abdd_node_cache import ABDDNodeCacheClass
+from bdd.bdd_to_treeaut import add_dont_care_boxes
+from canonization.folding import ubda_folding
+from canonization.normalization import ubda_normalize
+from canonization.unfolding import ubda_unfolding
+from formats.format_abdd import import_treeaut_from_abdd
+from helpers.string_manipulation import create_var_order_list
+from helpers.utils import box_orders, eprint
+from tree_automata import remove_useless_states
+from tree_automata.var_manipulation import add_variables_bottom_up
+
+
+def fold_processed_benchmark(path: str, order: str = "full") -> ABDD:
+    """
+    Import a (BDD) benchmark, canonize it using the boxes from 'order' and convert it into an ABDD.
+    """
+    initial = import_treeaut_from_abdd(path)
+    vars = int(initial.get_var_order()[-1])
+    unfolded = ubda_unfolding(add_dont_care_boxes(initial, vars), vars + 1)
+    add_variables_bottom_up(unfolded, vars)
+    normalized = ubda_normalize(unfolded, create_var_order_list("", vars + 2, start=0))
+    normalized.reformat_keys()
+    normalized.reformat_states()
+    add_variables_bottom_up(normalized, vars + 2)
+    folded = remove_useless_states(ubda_folding(normalized, box_orders[order], vars + 1))
+    # ABDDs do not represent the self-loops (variables skipped by boxes)
+    for edges in folded.transitions.values():
+        for key in [key for key, edge in edges.items() if edge.is_full_self_loop()]:
+            edges.pop(key)
+    return convert_ta_to_abdd(folded, ABDDNodeCacheClass(), var_count=vars + 1)
+
+
+def time_evaluation(abdd: ABDD, assignments: np.ndarray) -> tuple[float, float, float]:
+    """
+    Returns the time (in seconds) needed to evaluate all 'assignments' by traversing the box automata,
+    by the compiled box evaluators (one assignment at a time) and by the batch evaluation.
+    """
+    assignment_lists = [[bool(val) for val in assignment] for assignment in assignments]
+    start = time.perf_counter()
+    reference = [abdd.evaluate_for(assignment, compiled=False) for assignment in assignment_lists]
+    traversal = time.perf_counter() - start
+
+    start = time.perf_counter()
+    compiled = [abdd.evaluate_for(assignment) for assignment in assignment_lists]
+    closed_form = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = abdd.evaluate_batch(assignments)
+    vectorized = time.perf_counter() - start
+
+    if compiled != reference or list(batch) != reference:
+        raise ValueError(f"time_evaluation(): {abdd.name}: results of the compiled evaluation differ")
+    return traversal, closed_form, vectorized
+
+
+def run_box_evaluation_benchmark(
+    directory: str = "../benchmark/cnf-20var-processed", count: int = 20, samples: int = 1000, seed: int = 0
+):
+    rng = np.random.default_rng(seed)
+    files = sorted(os.listdir(directory), key=lambda f: int(f.split("-")[-1].split(".")[0][1:]))[:count]
+    print(
+        f"{'benchmark' :<20} {'nodes' :>6} {'traversal' :>10} {'compiled' :>10} {'batch' :>10} {'speedup' :>10} {'(batch)' :>10}"
+    )
+    total = [0.0, 0.0, 0.0]
+    for file in files:
+        try:
+            abdd = fold_processed_benchmark(f"{directory}/{file}")
+            assignments = rng.integers(0, 2, (samples, abdd.variable_count))
+            times = time_evaluation(abdd, assignments)
+        except (ValueError, IndexError, KeyError) as error:
+            eprint(f"{file}: skipped ({error})")
+            continue
+        total = [t + new for t, new in zip(total, times)]
+        print(
+            f"{file :<20} {abdd.count_nodes() :>6} {times[0] :>10.4f} {times[1] :>10.4f} {times[2] :>10.4f} "
+            f"{times[0] / times[1] :>9.1f}x {times[0] / times[2] :>9.1f}x"
+        )
+    if total[1] > 0:
+        print(
+            f"{'total' :<20} {'' :>6} {total[0] :>10.4f} {total[1] :>10.4f} {total[2] :>10.4f} "
+            f"{total[0] / total[1] :>9.1f}x {total[0] / total[2] :>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    run_box_evaluation_benchmark(count=int(sys.argv[1]) if len(sys.argv) > 1 else 20)
+
+
+# End of file box_evaluation_benchmark.py
@@ -0,0 +1,84 @@
+"""
+[file] conjunction_benchmark.py
+[author] Jany26  (Jan Matufka)  <xmatuf00@stud.fit.vutbr.cz>
+[description] Peak intermediate node counts and wall time of the conjunction schedules
+(see conjunction_scheduling.py) when building BDDs/ABDDs from DIMACS and BLIF benchmarks.
+"""
+
+import os
+import sys
+
+from apply.abdd_dimacs import DimacsCompileStats, dimacs_to_abdd
+from formats.format_blif import BlifParser
+from formats.format_dimacs import dimacs_read
+from helpers.conjunction_scheduling import ConjunctionScheduleStats, conjunction_strategies
+from helpers.utils import eprint
+
+
+def print_row(benchmark: str, kind: str, strategy: str, nodes: int, stats: ConjunctionScheduleStats) -> None:
+    print(
+        f"{benchmark :<32} {kind :>5} {strategy :>9} {nodes :>7} {stats.steps :>6} {stats.peak_size :>9} "
+        f"{stats.seconds :>9.3f}"
+    )
+
+
+def get_files(directory: str, suffix: str, count: int) -> list[str]:
+    """
+    The 'count' smallest files with the 'suffix' from the 'directory' (and its subdirectories).
+    """
+    files = []
+    for root, _, names in os.walk(directory):
+        files.extend([f"{root}/{name}" for name in names if name.endswith(suffix)])
+    return sorted(files, key=lambda f: (os.path.getsize(f), f))[:count]
+
+
+def run_dimacs_abdd(path: str, strategy: str, stats: ConjunctionScheduleStats) -> int:
+    """
+    ABDD of the CNF built with the 'strategy' (all clauses in one batch).
+    """
+    compile_stats = DimacsCompileStats()
+    compile_stats.schedule = stats
+    return dimacs_to_abdd(path, strategy, batch_size=sys.maxsize, stats=compile_stats).count_nodes()
+
+
+def run_conjunction_benchmark(
+    dimacs: str = "../benchmark/dimacs/uf20", blif: str = "../benchmark/blif", count: int = 5, abdd: bool = True
+):
+    print(
+        f"{'benchmark' :<32} {'type' :>5} {'strategy' :>9} {'nodes' :>7} {'steps' :>6} {'peak' :>9} " f"{'seconds' :>9}"
+    )
+    for path in get_files(dimacs, ".cnf", count):
+        name = os.path.basename(path)
+        for strategy in conjunction_strategies:
+            stats = ConjunctionScheduleStats()
+            bdd = dimacs_read(path, schedule=strategy, stats=stats)
+            print_row(name, "bdd", strategy, bdd.count_nodes(), stats)
+        if not abdd:
+            continue
+        for strategy in conjunction_strategies:
+            stats = ConjunctionScheduleStats()
+            try:
+                nodes = run_dimacs_abdd(path, strategy, stats)
+            except (ValueError, KeyError) as error:
+                eprint(f"{name}: abdd skipped ({error})")
+                break
+            print_row(name, "abdd", strategy, nodes, stats)
+    for path in get_files(blif, ".blif", count):
+        name = os.path.basename(path)
+        for strategy in conjunction_strategies:
+            stats = ConjunctionScheduleStats()
+            parser = BlifParser(strategy, stats)
+            try:
+                parser.parse(path)
+            except (ValueError, KeyError) as error:
+                # the parser needs numeric signal names (e.g. the ISCAS benchmarks)
+                eprint(f"{name}: skipped ({error})")
+                break
+            print_row(name, "blif", strategy, parser.result.count_nodes(), stats)
+
+
+if __name__ == "__main__":
+    run_conjunction_benchmark(*sys.argv[1:3], *[int(arg) for arg in sys.argv[3:4]])
+
+
+# End of file conjunction_benchmark.py
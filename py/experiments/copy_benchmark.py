@@ -0,0 +1,71 @@
+"""
+[file] copy_benchmark.py
+[author] Jany26  (Jan Matufka)  <xmatuf00@stud.fit.vutbr.cz>
+[description] Time and memory of copy.deepcopy() compared to the copy-on-write TTreeAut.copy() on unfolded UBDAs.
+"""
+
+import copy
+import os
+import sys
+import time
+import tracemalloc
+
+from bdd.bdd_to_treeaut import add_dont_care_boxes
+from canonization.unfolding import ubda_unfolding
+from formats.format_abdd import import_treeaut_from_abdd
+from helpers.utils import eprint
+from tree_automata import TTreeAut
+
+
+def measure_copy(ta: TTreeAut, function) -> tuple[float, int, float]:
+    """
+    Seconds and allocated bytes (peak) of one copy, and the seconds of the first removal
+    of a transition from the copy (which has to copy the state with copy-on-write).
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    result: TTreeAut = function(ta)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    state = result.roots[0]
+    start = time.perf_counter()
+    result.remove_transition(state, next(iter(result.transitions[state])))
+    write_seconds = time.perf_counter() - start
+    return seconds, peak, write_seconds
+
+
+def run_copy_benchmark(directory: str = "../benchmark/blif-processed/C432", count: int = 10):
+    """
+    Copy the unfolded UBDAs of the 'count' largest ABDDs from 'directory' using both approaches.
+    """
+    files = sorted(
+        [f for f in os.listdir(directory) if f.endswith((".dd", ".abdd"))],
+        key=lambda f: os.path.getsize(f"{directory}/{f}"),
+        reverse=True,
+    )
+    print(
+        f"{'benchmark' :<30} {'states' :>7} {'edges' :>7} {'deepcopy[s]' :>11} {'deepcopy[KiB]' :>13} "
+        f"{'copy[s]' :>9} {'copy[KiB]' :>9} {'write[s]' :>9}"
+    )
+    for file in files[:count]:
+        try:
+            initial = import_treeaut_from_abdd(f"{directory}/{file}")
+            vars = int(initial.get_var_order()[-1])
+            ta = ubda_unfolding(add_dont_care_boxes(initial, vars), vars + 1)
+        except (ValueError, IndexError, KeyError) as error:
+            eprint(f"{file}: skipped ({error})")
+            continue
+        deep_seconds, deep_peak, _ = measure_copy(ta, copy.deepcopy)
+        cow_seconds, cow_peak, write_seconds = measure_copy(ta, TTreeAut.copy)
+        print(
+            f"{file :<30} {len(ta.get_states()) :>7} {ta.count_edges() :>7} {deep_seconds :>11.4f} "
+            f"{deep_peak / 1024 :>13.1f} {cow_seconds :>9.5f} {cow_peak / 1024 :>9.1f} {write_seconds :>9.6f}"
+        )
+
+
+if __name__ == "__main__":
+    run_copy_benchmark(*sys.argv[1:2], *[int(arg) for arg in sys.argv[2:3]])
+
+
+# End of file copy_benchmark.py
@@ -0,0 +1,41 @@
+"""
+[file] dd_import_benchmark.py
+[author] Jany26  (Jan Matufka)  <xmatuf00@stud.fit.vutbr.cz>
+[description] Throughput (lines per second) of the streaming .dd/.abdd importers on a benchmark directory.
+"""
+
+import os
+import sys
+
+from apply.abdd import import_abdd_from_abdd_file
+from formats.dd_reader import DDReaderStats
+from formats.format_abdd import import_treeaut_from_abdd
+from helpers.utils import eprint
+
+
+def run_dd_import_benchmark(directory: str = "../benchmark/blif-processed", use_mmap: bool = False):
+    print(f"{'directory' :<20} {'files' :>6} {'importer' :>8} {'lines' :>10} {'seconds' :>8} {'lines/s' :>10}")
+    for subdir in sorted(os.listdir(directory)):
+        path = f"{directory}/{subdir}"
+        if not os.path.isdir(path):
+            continue
+        files = sorted([f"{path}/{file}" for file in os.listdir(path) if file.endswith((".dd", ".abdd"))])
+        for importer, function in [("treeaut", import_treeaut_from_abdd), ("abdd", import_abdd_from_abdd_file)]:
+            stats = DDReaderStats()
+            for file in files:
+                try:
+                    function(file, use_mmap=use_mmap, stats=stats)
+                except ValueError as error:
+                    eprint(f"{file}: skipped ({error})")
+            print(
+                f"{subdir :<20} {len(files) :>6} {importer :>8} {stats.lines :>10} {stats.seconds :>8.3f} "
+                f"{stats.lines_per_second() :>10.0f}"
+            )
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if arg != "--mmap"]
+    run_dd_import_benchmark(*args[:1], use_mmap="--mmap" in sys.argv)
+
+
+# End of file dd_import_benchmark.py
@@ -0,0 +1,74 @@
+"""
+[file] dimacs_compile.py
+[author] Jany26  (Jan Matufka)  <xmatuf00@stud.fit.vutbr.cz>
+[description] Compilation of the DIMACS benchmarks (../benchmark/dimacs) into ABDDs (see abdd_dimacs.py).
+"""
+
+import os
+import sys
+
+from typing import Optional
+
+from apply.abdd_dimacs import DEFAULT_CLAUSE_BATCH_SIZE, DimacsCompileStats, dimacs_to_abdd
+from helpers.utils import box_orders, eprint
+
+
+def get_dimacs_files(paths: list[str]) -> list[str]:
+    """
+    DIMACS files given directly or found in the given directories (recursively), ordered by their size.
+    """
+    files = []
+    for path in paths:
+        if os.path.isfile(path):
+            files.append(path)
+            continue
+        for root, _, names in os.walk(path):
+            files.extend([os.path.join(root, name) for name in names if name.endswith(".cnf")])
+    return sorted(files, key=lambda f: (os.path.getsize(f), f))
+
+
+def compile_dimacs_benchmarks(
+    paths: list[str],
+    schedule: str = "cluster",
+    batch_size: int = DEFAULT_CLAUSE_BATCH_SIZE,
+    count: int = 0,
+    export_dir: Optional[str] = None,
+    export_every: int = 0,
+    canonize: Optional[str] = None,
+) -> None:
+    """
+    Compile the DIMACS files (or all .cnf files in the directories) in 'paths', smallest first
+    (only the first 'count' files, if set), and print the statistics of each compilation.
+    Results are exported into 'export_dir' (if set) and canonized by the box order 'canonize' (if set).
+    """
+    print(f"{'benchmark' :<32} {'vars' :>5} {'clauses' :>7} {'nodes' :>7} {'steps' :>6} {'peak' :>8} {'seconds' :>9}")
+    files = get_dimacs_files(paths)
+    for path in files[:count] if count > 0 else files:
+        stats = DimacsCompileStats()
+        try:
+            result = dimacs_to_abdd(
+                path,
+                schedule,
+                batch_size,
+                export_dir=export_dir,
+                export_every=export_every,
+                canonize=box_orders[canonize] if canonize is not None else None,
+                stats=stats,
+            )
+        except ValueError as error:
+            eprint(f"{path}: {error}")
+            continue
+        print(
+            f"{os.path.basename(path) :<32} {stats.variables :>5} {stats.clauses :>7} {result.count_nodes() :>7} "
+            f"{stats.schedule.steps :>6} {stats.schedule.peak_size :>8} {stats.seconds :>9.3f}",
+            flush=True,
+        )
+
+
+if __name__ == "__main__":
+    # dimacs_compile.py [path [schedule [batch size [count]]]]
+    paths = sys.argv[1:2] if len(sys.argv) > 1 else ["../benchmark/dimacs"]
+    compile_dimacs_benchmarks(paths, *sys.argv[2:3], *[int(arg) for arg in sys.argv[3:5]])
+
+
+# End of file dimacs_compile.py
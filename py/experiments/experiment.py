@@ -6,15 +6,13 @@
 
 from io import TextIOWrapper
 import os
+import sys
 import time
 
 from typing import Optional
 from apply.abdd import ABDD
-from apply.abdd_apply_main import abdd_apply
-from apply.abdd_node import ABDDNode
-from apply.abdd_node_cache import ABDDNodeCacheClass
-from apply.box_algebra.apply_tables import BooleanOperation
-from canonization.folding import ubda_folding
+from apply.abdd_dimacs import dimacs_to_abdd
+from canonization.incremental import IncrementalCanonizationHelper
 from canonization.normalization import ubda_normalize
 from canonization.unfolding import ubda_unfolding
 from formats.format_abdd import export_treeaut_to_abdd, import_treeaut_from_abdd
@@ -25,79 +23,16 @@ from tree_automata.functions.trimming import shrink_to_top_down_reachable_2
 from helpers.utils import box_orders
 
 
-MAX_VAR = 20
-
-
-def create_dimacs(
-    path: str,
-    outpath: str,
-):
-    def create_node(var: int, neg: bool, ncache: ABDDNodeCacheClass) -> ABDDNode:
-        node = ABDDNode(ncache.counter)
-        node.var = var
-        node.is_leaf = False
-        node.low_box = "X" if var != MAX_VAR else None
-        node.high_box = "X" if var != MAX_VAR else None
-        node.low = [ncache.terminal_1 if neg else ncache.terminal_0]
-        node.high = [ncache.terminal_0 if neg else ncache.terminal_1]
-        cache_hit = ncache.find_node(node)
-        if cache_hit is not None:
-            return cache_hit
-        ncache.counter += 1
-        ncache.insert_node(node)
-        return node
-
-    def analyze_literal(lit: str) -> tuple[int, bool]:
-        var = int(lit)
-        return abs(var), var < 0
-
-    name = path.split("/")[-1].split(".")[0]
-    f = open(path, "r")
-    var_count: int
-    clause_count: int
-    processed_clauses: int = 0
-    ncache = ABDDNodeCacheClass()
-    result = ABDD(name, MAX_VAR, [ncache.terminal_1])
-    result.root_rule = "X"
-    for line in f:
-        ncache.refresh_nodes()
-        if line.startswith("c"):
-            continue
-        if line.startswith("p"):
-            words = line.strip().split()
-            var_count = int(words[2])
-            clause_count = int(words[3])
-            continue
-        words = line.strip().split()
-        if len(words) <= 1:
-            continue
-        var1, neg1 = analyze_literal(words[0])
-        var2, neg2 = analyze_literal(words[1])
-        var3, neg3 = analyze_literal(words[2])
-
-        node1 = create_node(var1, neg1, ncache)
-        abdd1 = ABDD(f"{processed_clauses + 1}-1", MAX_VAR, [node1])
-        abdd1.root_rule = "X" if var1 != 1 else None
-
-        node2 = create_node(var2, neg2, ncache)
-        abdd2 = ABDD(f"{processed_clauses + 1}-2", MAX_VAR, [node2])
-        abdd2.root_rule = "X" if var2 != 1 else None
-
-        node3 = create_node(var3, neg3, ncache)
-        abdd3 = ABDD(f"{processed_clauses + 1}-3", MAX_VAR, [node3])
-        abdd3.root_rule = "X" if var3 != 1 else None
-
-        or1 = abdd_apply(BooleanOperation.OR, abdd1, abdd2, cache=ncache, maxvar=MAX_VAR)
-        ncache.refresh_nodes()
-        or2 = abdd_apply(BooleanOperation.OR, or1, abdd3, cache=ncache, maxvar=MAX_VAR)
-        ncache.refresh_nodes()
-        result = abdd_apply(BooleanOperation.AND, result, or2, cache=ncache, maxvar=MAX_VAR)
-        ncache.refresh_nodes()
-        processed_clauses += 1
-        result.name = name + f"-c{processed_clauses}"
-        result.export_to_abdd_file(f"{outpath}/{result.name}.dd")
-        if not check_node_uniq(result):
-            break
+def create_dimacs(path: str, outpath: str, schedule: Optional[str] = None):
+    """
+    Build the ABDD of the CNF in 'path' clause by clause, each intermediate result is exported to 'outpath'
+    (<name>-c<clauses>.dd). With a 'schedule' (see conjunction_scheduling.py), all clauses are combined
+    in that order instead and only the final result is exported.
+    """
+    if schedule is None:
+        dimacs_to_abdd(path, "linear", batch_size=1, export_dir=outpath, export_every=1)
+    else:
+        dimacs_to_abdd(path, schedule, batch_size=sys.maxsize, export_dir=outpath)
 
 
 def check_node_uniq(abdd: ABDD) -> bool:
@@ -123,6 +58,10 @@ def get_progressive_cnf_node_counts(benchmark_path, outdir, report_file: str):
     # the dimacs file has 91 clauses
     report.write(f"benchmark-name;init;norm;bdd;zbdd;tbdd;cbdd;czdd;esr;abdd;elapsed\n")
     print(f"benchmark-name;init;norm;bdd;zbdd;tbdd;cbdd;czdd;esr;abdd;elapsed")
+    incremental = {
+        order: IncrementalCanonizationHelper(box_orders[order], 21)
+        for order in ["bdd", "zbdd", "tbdd", "cbdd", "czdd", "esr", "full"]
+    }
     for i in range(1, 92):
         subbenchmark = f"{dirn}/{base_no_ext}-c{i}.dd"
         ta = import_treeaut_from_abdd(subbenchmark)
@@ -134,13 +73,14 @@ def get_progressive_cnf_node_counts(benchmark_path, outdir, report_file: str):
         norm.reformat_keys()
         norm.reformat_states()
         norm_nc = len(norm.get_states())
-        folded_bdd = ubda_folding(norm, box_orders["bdd"], 21)
-        folded_zbdd = ubda_folding(norm, box_orders["zbdd"], 21)
-        folded_tbdd = ubda_folding(norm, box_orders["tbdd"], 21)
-        folded_cbdd = ubda_folding(norm, box_orders["cbdd"], 21)
-        folded_czdd = ubda_folding(norm, box_orders["czdd"], 21)
-        folded_esr = ubda_folding(norm, box_orders["esr"], 21)
-        folded_abdd = ubda_folding(norm, box_orders["full"], 21)
+        # each iteration only adds one clause, folding reuses the results of the previous iteration
+        folded_bdd = incremental["bdd"].fold(norm)
+        folded_zbdd = incremental["zbdd"].fold(norm)
+        folded_tbdd = incremental["tbdd"].fold(norm)
+        folded_cbdd = incremental["cbdd"].fold(norm)
+        folded_czdd = incremental["czdd"].fold(norm)
+        folded_esr = incremental["esr"].fold(norm)
+        folded_abdd = incremental["full"].fold(norm)
 
         timestamp_stop = time.time()
 
@@ -0,0 +1,48 @@
+"""
+[file] normalization_benchmark.py
+[author] Jany26  (Jan Matufka)  <xmatuf00@stud.fit.vutbr.cz>
+[description] Scaling of the UBDA normalization on the tree automata from a benchmark directory (ARTMC automata).
+"""
+
+import os
+import sys
+
+from canonization.normalization import NormalizationStats, ubda_normalize
+from formats.format_vtf import import_treeaut_from_vtf
+from helpers.string_manipulation import create_var_order_list
+from helpers.utils import eprint
+
+
+def run_normalization_benchmark(directory: str = "../benchmark/nta/vtf", count: int = 20, levels: int = 8):
+    """
+    Normalize the 'count' smallest automata from 'directory' (over 'levels' variable levels, the automata
+    do not use variables) and compare the processed child tuples with the full enumeration of the macrostate
+    tuples ('tuples') and of the child state lists within them ('children').
+    """
+    files = sorted(
+        [f for f in os.listdir(directory) if f.endswith(".vtf")], key=lambda f: os.path.getsize(f"{directory}/{f}")
+    )
+    print(
+        f"{'benchmark' :<12} {'states' :>7} {'edges' :>7} {'worklist' :>9} {'tuples' :>10} {'children' :>12} {'processed' :>10} "
+        f"{'result' :>7} {'seconds' :>8}"
+    )
+    for file in files[:count]:
+        try:
+            ta = import_treeaut_from_vtf(f"{directory}/{file}")
+            stats = NormalizationStats()
+            result = ubda_normalize(ta, create_var_order_list("", levels), old=True, stats=stats)
+        except (ValueError, IndexError, KeyError) as error:
+            eprint(f"{file}: skipped ({error})")
+            continue
+        print(
+            f"{file :<12} {len(ta.get_states()) :>7} {ta.count_edges() :>7} {stats.max_worklist :>9} "
+            f"{stats.product_tuples :>10} {stats.product_children :>12} {stats.processed_tuples :>10} {result.count_edges() :>7} "
+            f"{stats.seconds :>8.3f}"
+        )
+
+
+if __name__ == "__main__":
+    run_normalization_benchmark(count=int(sys.argv[1]) if len(sys.argv) > 1 else 20)
+
+
+# End of file normalization_benchmark.py
@@ -0,0 +1,241 @@
+"""
+[file] parallel_canonization.py
+[author] Jany26  (Jan Matufka)  <xmatuf00@stud.fit.vutbr.cz>
+[description] Parallel unfolding -> normalization -> folding of benchmarks with multiple box orders.
+"""
+
+import csv
+import multiprocessing
+import os
+import sys
+import time
+
+from typing import Optional
+
+from bdd.bdd_to_treeaut import add_dont_care_boxes
+from canonization.folding import ubda_folding
+from canonization.normalization import ubda_normalize
+from canonization.unfolding import ubda_unfolding
+from formats.format_abdd import import_treeaut_from_abdd
+from helpers.string_manipulation import create_var_order_list
+from helpers.utils import box_orders, eprint
+from tree_automata import TTreeAut, reachable_top_down
+from tree_automata.functions.trimming import shrink_to_top_down_reachable
+from tree_automata.var_manipulation import add_variables_bottom_up
+
+"""
+The runner works in two phases, both of them in a process pool:
+
+1) preparation - each output (root) of each benchmark is one job, which unfolds and normalizes the UBDA
+   (same steps as in box_evaluation_benchmark.fold_processed_benchmark()),
+2) folding - each (prepared output, box order) pair is one job, the prepared (normalized) UBDAs are sent
+   to each worker only once (by the pool initializer) and only read by the jobs (ubda_folding() works on a copy).
+
+Multi-root UBDAs (e.g. BLIF circuits with multiple outputs) are split into independent per-output jobs.
+The results are always reported in the order of the jobs (benchmark, root, box order), regardless of the order
+in which the workers finish them, and folding itself is deterministic, so the results do not depend
+on the number of processes (only the timing does).
+"""
+
+CSV_COLUMNS = [
+    "benchmark",
+    "root",
+    "order",
+    "initial",
+    "unfolded",
+    "normalized",
+    "folded",
+    "prepare_seconds",
+    "fold_seconds",
+    "error",
+]
+
+
+class CanonizationJob:
+    """
+    One output (root) of a benchmark and its intermediate (unfolded and normalized) UBDA once prepared.
+    """
+
+    def __init__(self, benchmark: str, root: str, initial: TTreeAut):
+        self.benchmark = benchmark
+        self.root = root
+        self.initial: TTreeAut = initial
+        self.normalized: Optional[TTreeAut] = None
+        self.vars: int = 0
+        self.counts: list[int] = [len(initial.get_states()), 0, 0]  # initial, unfolded, normalized
+        self.seconds: float = 0.0
+        self.error: str = ""
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.benchmark}, root={self.root}, states={self.counts})"
+
+
+class CanonizationResult:
+    """
+    Result of folding one prepared output with one box order (one row of the CSV report).
+    """
+
+    def __init__(self, job: CanonizationJob, order: str):
+        self.benchmark = job.benchmark
+        self.root = job.root
+        self.order = order
+        self.counts: list[int] = job.counts[:]
+        self.folded_count: int = 0
+        self.prepare_seconds: float = job.seconds
+        self.fold_seconds: float = 0.0
+        self.error: str = job.error
+        self.folded: Optional[TTreeAut] = None
+
+    def get_row(self) -> list:
+        return [
+            self.benchmark,
+            self.root,
+            self.order,
+            *self.counts,
+            self.folded_count,
+            f"{self.prepare_seconds:.4f}",
+            f"{self.fold_seconds:.4f}",
+            self.error,
+        ]
+
+    def __repr__(self):
+        result = f"{self.benchmark :<30} {self.root :>8} {self.order :>6}"
+        if self.error != "":
+            return f"{result} error: {self.error}"
+        return f"{result} {self.counts} -> {self.folded_count} ({self.fold_seconds:.3f} s)"
+
+
+def create_jobs(paths: list[str], split_roots: bool = True) -> list[CanonizationJob]:
+    """
+    Import the benchmarks, if 'split_roots' is set, create one job for each root (output)
+    (the UBDA is trimmed to the part reachable from the root), otherwise one job for each UBDA.
+    """
+    jobs: list[CanonizationJob] = []
+    for path in paths:
+        imported = import_treeaut_from_abdd(path)
+        for ta in imported if isinstance(imported, list) else [imported]:
+            # roots of a UBDA with a root box are its ports (one output), those are not split
+            if not split_roots or len(ta.roots) <= 1 or ta.rootbox is not None:
+                jobs.append(CanonizationJob(ta.name, ",".join(ta.roots), ta))
+                continue
+            for root in ta.roots:
+                output = ta.copy()
+                output.roots = [root]
+                jobs.append(CanonizationJob(ta.name, root, shrink_to_top_down_reachable(output)))
+    return jobs
+
+
+def prepare_job(job: CanonizationJob) -> CanonizationJob:
+    """
+    Phase 1 (worker task) - unfolding and normalization of one job.
+    """
+    start = time.perf_counter()
+    try:
+        initial = job.initial
+        vars = int(initial.get_var_order()[-1])
+        unfolded = ubda_unfolding(add_dont_care_boxes(initial, vars), vars + 1)
+        add_variables_bottom_up(unfolded, vars)
+        normalized = ubda_normalize(unfolded, create_var_order_list("", vars + 2, start=0))
+        job.counts[1] = len(unfolded.get_states())
+        normalized.reformat_keys()
+        normalized.reformat_states()
+        add_variables_bottom_up(normalized, vars + 2)
+        job.normalized = normalized
+        job.counts[2] = len(normalized.get_states())
+        job.vars = vars
+    except (ValueError, IndexError, KeyError) as error:
+        job.error = f"preparation failed: {error!r}"
+    job.seconds = time.perf_counter() - start
+    return job
+
+
+# prepared jobs in the worker processes of the folding phase, sent only once (by the pool initializer)
+worker_jobs: list[CanonizationJob] = []
+worker_keep_results: bool = False
+
+
+def init_folding_worker(jobs: list[CanonizationJob], keep_results: bool) -> None:
+    global worker_jobs, worker_keep_results
+    worker_jobs = jobs
+    worker_keep_results = keep_results
+
+
+def fold_job(task: tuple[int, str]) -> CanonizationResult:
+    """
+    Phase 2 (worker task) - folding of the prepared job number 'index' using the box order 'order'.
+    """
+    index, order = task
+    job = worker_jobs[index]
+    result = CanonizationResult(job, order)
+    if job.normalized is None:
+        return result
+    start = time.perf_counter()
+    try:
+        folded = ubda_folding(job.normalized, box_orders[order], job.vars + 1)
+        result.folded_count = len(reachable_top_down(folded))
+        if worker_keep_results:
+            result.folded = folded
+    except (ValueError, IndexError, KeyError) as error:
+        result.error = f"folding failed: {error!r}"
+    result.fold_seconds = time.perf_counter() - start
+    return result
+
+
+def write_csv(results: list[CanonizationResult], path: str) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(CSV_COLUMNS)
+        for result in results:
+            writer.writerow(result.get_row())
+
+
+def run_parallel_canonization(
+    paths: list[str],
+    orders: Optional[list[str]] = None,
+    processes: Optional[int] = None,
+    csv_path: Optional[str] = None,
+    split_roots: bool = True,
+    keep_results: bool = False,
+) -> list[CanonizationResult]:
+    """
+    Canonize (unfold, normalize, fold) all outputs of the benchmarks from 'paths' with each of the box 'orders'
+    (all of them by default) using a pool of 'processes' workers (by default, one per CPU, 1 = no pool).
+    Per-job results and timing are written to 'csv_path' (if set), folded UBDAs are returned with 'keep_results'.
+    """
+    orders = orders if orders is not None else list(box_orders.keys())
+    for order in orders:
+        if order not in box_orders:
+            raise ValueError(f"run_parallel_canonization(): unknown box order '{order}'")
+    jobs = create_jobs(paths, split_roots)
+    tasks = [(index, order) for index in range(len(jobs)) for order in orders]
+    if processes == 1:
+        jobs = [prepare_job(job) for job in jobs]
+        init_folding_worker(jobs, keep_results)
+        results = [fold_job(task) for task in tasks]
+    else:
+        context = multiprocessing.get_context()
+        with context.Pool(processes) as pool:
+            jobs = pool.map(prepare_job, jobs, chunksize=1)
+        for job in jobs:
+            job.initial = None  # not needed by the folding workers
+        with context.Pool(processes, initializer=init_folding_worker, initargs=(jobs, keep_results)) as pool:
+            results = pool.map(fold_job, tasks, chunksize=1)
+    for result in results:
+        if result.error != "":
+            eprint(f"{result.benchmark} (root {result.root}, {result.order}): {result.error}")
+    if csv_path is not None:
+        write_csv(results, csv_path)
+    return results
+
+
+if __name__ == "__main__":
+    directory = sys.argv[1] if len(sys.argv) > 1 else "../benchmark/blif-processed/C432"
+    files = sorted([f"{directory}/{f}" for f in os.listdir(directory) if f.endswith((".abdd", ".dd", ".bdd"))])
+    for result in run_parallel_canonization(files, csv_path=sys.argv[2] if len(sys.argv) > 2 else None):
+        print(result)
+
+
+# End of file parallel_canonization.py
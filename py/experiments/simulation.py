@@ -379,6 +379,7 @@ def leafify(ta: TTreeAut, state: str, value: str | int):
         ta.transitions[state].pop(key)
     new_edge = TTransition(state, TEdge(str(value), [], f"{max_var}"), [])
     ta.transitions[state][keys_to_pop[0]] = new_edge
+    ta.invalidate()
     # new_edge = TTransition(state, TEdge('LH', [], ""), [state, state])
 
 
@@ -7,12 +7,12 @@
 """
 
 import re
-import copy
 import pathlib
 from io import TextIOWrapper
 from typing import Optional
 
 from tree_automata import TTreeAut, TTransition, TEdge, iterate_edges, iterate_states_bfs
+from formats.dd_reader import DDReaderStats, read_dd
 from helpers.utils import box_arities
 
 
@@ -81,7 +81,7 @@ def export_treeaut_to_abdd(ta: TTreeAut, filepath: str, name="", comments=False)
     - DAG as the input is assumed (output states with no transitions)
     - box_array is expected to contain only strings (box names)
     """
-    treeaut_copy: TTreeAut = copy.deepcopy(ta)
+    treeaut_copy: TTreeAut = ta.copy()
     treeaut_copy.reformat_keys()
     treeaut_copy.reformat_states(prefix="", start_from=1)
     treeaut_copy.meta_data.recompute()
@@ -103,121 +103,98 @@ def export_treeaut_to_abdd(ta: TTreeAut, filepath: str, name="", comments=False)
                 file.write("\n")
 
 
-def import_treeaut_from_abdd(source: str) -> TTreeAut | list[TTreeAut]:
+class ABDDImportHelper:
+    """
+    Builds TTreeAut objects from the records of a .dd/.abdd file (see 'dd_reader.py').
+    One file can contain multiple ABDDs, each one starts with a preamble ('@ABDD' or '@BDD').
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.results: list[TTreeAut] = []
+        self.ta: Optional[TTreeAut] = None
+        # insertion-ordered set of leaf states ('<0>', '<1>')
+        self.leaves: dict[str, None] = {}
+        self.key_counter: int = 0
+        self.max_var: Optional[int] = None
+        self.mvar: int = 0
+
+    def on_header(self, line: str) -> None:
+        if line != "@ABDD" and line != "@BDD":
+            raise ValueError(f"import_treeaut_from_abdd(): unexpected header: {line}")
+        self.finish()
+        self.ta = TTreeAut([], {}, self.name)
+        self.leaves = {}
+        self.key_counter = 0
+        self.max_var = None
+        self.mvar = 0
+
+    def on_meta(self, attribute: str, value: str) -> None:
+        if attribute not in ["Name", "Vars", "Root", "Rootrule"]:
+            raise ValueError(f"import_treeaut_from_abdd(): unexpected metadata: %{attribute}")
+        if self.ta is None:
+            return
+        data = value.split()
+        if attribute == "Rootrule":
+            if data[0] not in box_arities:
+                raise ValueError(f"import_treeaut_from_abdd(): unexpected root rule '{data[0]}'")
+            self.ta.rootbox = data[0]
+        if attribute == "Name":
+            self.ta.name = data[0]
+        if attribute == "Vars":
+            self.max_var = int(data[0])
+        if attribute == "Root":
+            self.ta.roots.append(data[0])
+
+    def on_node(self, match: re.Match, linenum: int) -> None:
+        if self.ta is None:
+            return
+        src, var, low, low_box, high, high_box = match.groups()
+        src = src.decode()
+        var = int(var)
+        self.mvar = max(var, self.mvar)
+        children = [low.decode()] if low[0] != 40 else [c.strip() for c in low[1:-1].decode().split(",")]  # '('
+        children += [high.decode()] if high[0] != 40 else [c.strip() for c in high[1:-1].decode().split(",")]
+        boxes = [box.decode() if box is not None else None for box in [low_box, high_box]]
+        if src not in self.ta.transitions:
+            self.ta.transitions[src] = {}
+        self.ta.transitions[src][f"k{self.key_counter}"] = TTransition(src, TEdge("LH", boxes, f"{var}"), children)
+        self.key_counter += 1
+        for state in children:
+            if state.startswith("<"):
+                self.leaves[state] = None
+
+    def finish(self) -> None:
+        """
+        Add the leaf transitions to the currently built TTreeAut (if there is one).
+        """
+        if self.ta is None:
+            return
+        leaf_var = f"{self.max_var + 1}" if self.max_var is not None else f"{self.mvar + 2}"
+        for leaf in self.leaves.keys():
+            self.ta.transitions[leaf] = {f"k{self.key_counter}": TTransition(leaf, TEdge(leaf[1:-1], [], leaf_var), [])}
+            self.key_counter += 1
+        self.results.append(self.ta)
+        self.ta = None
+
+
+def import_treeaut_from_abdd(
+    source: str, use_mmap: bool = False, stats: Optional[DDReaderStats] = None
+) -> TTreeAut | list[TTreeAut]:
     """
     One .abdd file can contain multiple instances of ABDDs.
     They can be somehow semantically connected, that is why the result can be
     one TTreeAut object (ABDD) or multiple.
+
+    The file is streamed in one pass (see 'dd_reader.py'), a new TTreeAut is started on each preamble.
+    'use_mmap' = True -> the file is memory-mapped, 'stats' (if given) collects the number of lines and the time.
     """
-    file = open(source, "r")
-    name = pathlib.Path(source).stem
-    results: list[TTreeAut] = []
-    positions: list[int] = []
-    i = 0
-    # NOTE: Trying one read-through for some unknown reason couldn't seem to work, that is
-    # the .abdd file is processed in two reads.
-
-    # On the first read-through, we store all preamble positions (line indices).
-    for l in file:
-        if l.startswith("@BDD") or l.startswith("@ABDD"):
-            positions.append(i)
-        i += len(l)
-    # On the second read-through, we jump to those positions and process an ABDD structure,
-    # terminated either by a preamble, or an EOF.
-    for pos in positions:
-        file.seek(pos)
-        results.append(create_treeaut_from_abdd(file, name))
-    if len(results) == 1:
-        return results[0]
-    return results
-
-
-def create_treeaut_from_abdd(file, name) -> TTreeAut:
-    ta = TTreeAut([], {}, name)
-    leaves: set[str] = set()
-    key_counter: int = 0
-    preamble: bool = False
-    max_var: Optional[int] = None
-    mvar = 0
-    root_rule: Optional[str] = None
-    for l in file:
-        line: str = l.split("#")[0]  # strip comments
-        line = line.strip()  # strip leading and trailing whitespaces
-        if line == "":
-            continue
-        data: list[str] = line.split()
-        if line.startswith("@"):
-            if line != "@ABDD" and line != "@BDD":
-                raise Exception(f"import_treeaut_from_abdd(): unexpected header: {line}")
-            if preamble:
-                break
-            else:
-                preamble = True
-                continue
-        if line.startswith("%"):
-            if data[0] not in ["%Name", "%Vars", "%Root", "%Rootrule"]:
-                raise Exception(f"import_treeaut_from_abdd(): unexpected metadata: {data[0]}")
-            if data[0] == "%Rootrule":
-                rule = line.split()[1]
-                if rule not in box_arities:
-                    raise Exception(f"import_treeaut_from_vtf(): unexpected root rule '{root_rule}'")
-                root_rule = rule
-            if data[0] == "%Name":
-                ta.name = data[1]
-            if data[0] == "%Vars":
-                max_var = int(data[1])
-            if data[0] == "%Root":
-                ta.roots.append(data[1])
-            continue
-        if line == "":
-            continue
-        src_regex: str = "(\d+)"
-        var_regex: str = "\[(\d+|)\]"
-        child_regex: str = "(\(\d+(?:\s*,\s*\d+)*\)|<\d+>|\d+)"
-        box_regex: str = "(\[\w+\]|)"
-        # "(\d+)\[(\d+)\]\s*(\(\d+(?:\s*,\s*\d+)*\)|<\d+>|\d+)(\[\w+\]|)\s*(\(\d+(?:\s*,\s*\d+)*\)|<\d+>|\d+)(\[\w+\]|)"
-        full_regex = f"{src_regex}{var_regex}\s*{child_regex}{box_regex}\s*{child_regex}{box_regex}"
-        groups = re.match(full_regex, line)
-
-        src: str = groups.group(1)
-        var: int = int(groups.group(2))
-        mvar = max(var, mvar)
-
-        tgt1: str = groups.group(3)
-        box1: Optional[str] = groups.group(4)
-
-        tgt2: str = groups.group(5)
-        box2: Optional[str] = groups.group(6)
-
-        box1 = box1.lstrip("[").rstrip("]")
-        box2 = box2.lstrip("[").rstrip("]")
-        box1 = None if box1 == "" else box1
-        box2 = None if box2 == "" else box2
-
-        children: list[str] = []
-        for j in [i.strip() for i in tgt1.lstrip("(").rstrip(")").split(",")]:
-            children.append(j)
-        for j in [i.strip() for i in tgt2.lstrip("(").rstrip(")").split(",")]:
-            children.append(j)
-        edge = TTransition(src, TEdge("LH", [box1, box2], f"{var}"), children)
-        if src not in ta.transitions:
-            ta.transitions[src] = {}
-        ta.transitions[src][f"k{key_counter}"] = edge
-        key_counter += 1
-        if src.startswith("<") and src.endswith(">"):
-            leaves.add(src)
-        for state in children:
-            if state.startswith("<") and state.endswith(">"):
-                leaves.add(state)
-    for leaf in leaves:
-        symbol: str = leaf.lstrip("<").rstrip(">")
-        edge = TTransition(leaf, TEdge(symbol, [], f"{max_var + 1}" if max_var is not None else f"{mvar+2}"), [])
-        ta.transitions[leaf] = {}
-        ta.transitions[leaf][f"k{key_counter}"] = edge
-        key_counter += 1
-
-    ta.rootbox = root_rule
-    return ta
+    helper = ABDDImportHelper(pathlib.Path(source).stem)
+    read_dd(source, helper.on_header, helper.on_meta, helper.on_node, use_mmap, stats)
+    helper.finish()
+    if len(helper.results) == 1:
+        return helper.results[0]
+    return helper.results
 
 
 # End of file format_abdd.py
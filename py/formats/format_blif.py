@@ -10,10 +10,11 @@ from io import TextIOWrapper
 import re
 from typing import Optional
 
-from bdd.bdd_apply import apply_function
+from bdd.bdd_apply import apply_function, apply_function_many
 from bdd.bdd_class import BDD
+from bdd.bdd_manager import BDDManagerClass
 from bdd.bdd_node import BDDnode
-
+from helpers.conjunction_scheduling import ConjunctionScheduleStats
 
 # Usage example:
 # blif = BlifParser()
@@ -25,9 +26,15 @@ from bdd.bdd_node import BDDnode
 
 
 class BlifParser:
-    def __init__(self):
+    def __init__(
+        self,
+        schedule: str = "linear",
+        stats: Optional[ConjunctionScheduleStats] = None,
+        reorder_limit: Optional[int] = None,
+    ):
         self.name: str = ""  # name of the benchmark = resulting BDD name
         self.tokens: list[str] = []
+        self.position: int = 0  # index of the next token
         self.token: Optional[str] = None  # current token
         self.inputs: list[str] = []  # contents of the .inputs list
         self.outputs: list[str] = []  # contents of the .outputs list
@@ -43,8 +50,19 @@ class BlifParser:
         self.result: BDD = BDD(self.name, None)
         self.bdd: BDD = BDD(self.name, None)
 
-        self.t0: BDDnode = BDDnode("t0", 0)
-        self.t1: BDDnode = BDDnode("t1", 1)
+        # BDDs of the .names constructs, combined by 'and' in the order given by 'schedule'
+        # (see conjunction_scheduling.py) after the whole file is processed, 'stats' are filled if given
+        self.blocks: list[BDD] = []
+        self.schedule: str = schedule
+        self.stats: Optional[ConjunctionScheduleStats] = stats
+
+        # all Apply calls share the unique table and the computed table of the manager,
+        # the variables are reordered (sifting) once the manager reaches 'reorder_limit' nodes (None = never)
+        # while the constructs are combined (see BDDManagerClass.check_garbage())
+        self.manager: BDDManagerClass = BDDManagerClass()
+        self.manager.reorder_limit = reorder_limit
+        self.t0: BDDnode = self.manager.terminal_0
+        self.t1: BDDnode = self.manager.terminal_1
 
     def __repr__(self):
         return "TODO"
@@ -95,21 +113,27 @@ class BlifParser:
                 self.var_map[i] = int(i)
 
     def syntax_analysis(self):
+        """
+        Recursive descent over the tokens, the repetitions (lists of constructs, signals and lines)
+        are loops, so the depth does not grow with the size of the file.
+        """
         self.keywords = [".model", ".inputs", ".outputs", ".names", ".end"]
+        self.position = 0
 
         def get_token() -> str:
-            self.token = self.tokens.pop(0)
+            self.token = self.tokens[self.position]
+            self.position += 1
             return self.token
 
         def construct_list():
-            get_token()
-            if self.token not in self.keywords:
-                raise Exception(f"blif_parser: unsupported construct: {self.token}")
-            if self.token == ".end":
+            while True:
                 get_token()
-                return
-            construct()
-            construct_list()
+                if self.token not in self.keywords:
+                    raise Exception(f"blif_parser: unsupported construct: {self.token}")
+                if self.token == ".end":
+                    get_token()
+                    return
+                construct()
 
         def construct():
             if self.token == ".model":
@@ -122,7 +146,7 @@ class BlifParser:
                 self.names = []
                 names_list()
                 names_content()
-                self.result = apply_function("and", self.bdd, self.result)
+                self.blocks.append(self.bdd)
                 self.bdd = BDD(self.name, None)
                 self.constructs_counter += 1
                 # print(f"{self.constructs_counter}/{self.constructs}", end='\r')
@@ -132,27 +156,25 @@ class BlifParser:
             get_token()  # '\n'
 
         def input_list():
-            get_token()
-            if self.token == "\n":
-                return
-            self.inputs.append(self.token)
-            input_list()
+            while get_token() != "\n":
+                self.inputs.append(self.token)
 
         def output_list():
-            get_token()
-            if self.token == "\n":
-                return
-            self.outputs.append(self.token)
-            output_list()
+            while get_token() != "\n":
+                self.outputs.append(self.token)
 
         def names_list():
-            get_token()
-            if self.token == "\n":
-                return
-            self.names.append(self.var_map[self.token])
-            names_list()
+            while get_token() != "\n":
+                self.names.append(self.var_map[self.token])
 
         def names_content():
+            while names_line():
+                pass
+
+        def names_line() -> bool:
+            """
+            One line of the .names construct, returns False after the last line of the construct.
+            """
             input_plane: str = get_token()
             output: int = int(get_token())
             get_token()  # '\n'
@@ -174,14 +196,15 @@ class BlifParser:
                 root = new_root
                 self.node_counter += 1
             bdd = BDD(self.names[-1], root)
-            self.bdd = apply_function("or", bdd, self.bdd)
-            while self.tokens[0] == "\n":
+            self.bdd = apply_function("or", bdd, self.bdd, manager=self.manager)
+            while self.tokens[self.position] == "\n":
                 get_token()
-            if self.tokens[0] in [".names", ".end"]:
-                return
-            names_content()
+            return self.tokens[self.position] not in [".names", ".end"]
 
         construct_list()
+        self.result = apply_function_many("and", self.blocks, self.schedule, self.manager, True, self.stats)
+        self.blocks = []
+        self.tokens = []
 
     def check_names(self, tokens: list):
         inputs: list[str] = []
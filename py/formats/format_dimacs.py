@@ -12,7 +12,9 @@ from typing import Optional, Union
 
 from bdd.bdd_class import BDD
 from bdd.bdd_node import BDDnode
-from bdd.bdd_apply import apply_function
+from bdd.bdd_apply import apply_function_many
+from bdd.bdd_manager import BDDManagerClass
+from helpers.conjunction_scheduling import ConjunctionScheduleStats
 
 
 def is_int(str) -> bool:
@@ -35,7 +37,17 @@ class DimacsHelper:
         self.bdd_name: str = os.path.splitext(os.path.basename(source))[0]
 
 
-def dimacs_read(source: str, override=None, verbose=False, horizontal_cut=None, max_clausules=None) -> BDD:
+def dimacs_read(
+    source: str,
+    override=None,
+    verbose=False,
+    horizontal_cut=None,
+    max_clausules=None,
+    manager: Optional[BDDManagerClass] = None,
+    schedule: str = "cluster",
+    stats: Optional[ConjunctionScheduleStats] = None,
+    reorder_limit: Optional[int] = None,
+) -> BDD:
     """
     Reads a file in DIMACS format and stores it into a BDD instance.
     - source            ... path to the file in dimacs format (accepting .dnf and .cnf suffix)
@@ -47,6 +59,15 @@ def dimacs_read(source: str, override=None, verbose=False, horizontal_cut=None,
                             higher value will be skipped, useful for testing purposes
     'max_clausules'     ... None by default => only processes a certain amount of
                             clausules, the rest are skipped (for testing purposes)
+    'manager'           ... BDD manager used for all Apply calls (a new one by default),
+                            the result consists of the nodes of the manager
+    'schedule'          ... order of the Apply calls on the clausules (see conjunction_scheduling.py),
+                            'linear' folds them one by one in the order of the file, the default
+                            'cluster' keeps the intermediate results much smaller on CNF benchmarks
+    'stats'             ... statistics of the Apply calls (ConjunctionScheduleStats), if needed
+    'reorder_limit'     ... number of nodes which triggers the automatic variable reordering (sifting)
+                            during the Apply calls (see BDDManagerClass.check_garbage()), None = never,
+                            only used without an explicit 'manager' (the garbage is not collected then)
     """
 
     # for now, we treat cnf as dnf, as they are more natural to parse as BDDs
@@ -55,9 +76,15 @@ def dimacs_read(source: str, override=None, verbose=False, horizontal_cut=None,
     file = open(source, "r")
     info = DimacsHelper(source)
 
-    result: BDD = BDD(None, None)
-    terminal_0 = BDDnode(f"t0", 0)
-    terminal_1 = BDDnode(f"t1", 1)
+    branches: list[BDD] = []
+    stopped: bool = False  # clausules after 'max_clausules' are skipped
+    # garbage (intermediate results) is only collected in a manager created here
+    collect_garbage: bool = manager is None
+    if manager is None:
+        manager = BDDManagerClass()
+        manager.reorder_limit = reorder_limit
+    terminal_0 = manager.terminal_0
+    terminal_1 = manager.terminal_1
 
     for line_number, line in enumerate(file, start=1):
         words: list[str] = line.strip().split()
@@ -80,9 +107,8 @@ def dimacs_read(source: str, override=None, verbose=False, horizontal_cut=None,
             print(f"processing clausule {info.processed_clausules} = {words}")
 
         if info.processed_clausules > info.clausule_count:
-            result.name = info.bdd_name
-            result.reformat_nodes()
-            return result
+            stopped = True
+            break
 
         if not is_int(words[0]):
             print("dimacs_read():", f"skipping unrecoginzed word at line {line_number}")
@@ -123,20 +149,22 @@ def dimacs_read(source: str, override=None, verbose=False, horizontal_cut=None,
                 else:
                     current.attach(leaf, branch.root)
             branch.root = current
-        # print(branch)
-        func: str = "or" if info.dimacs_type == "dnf" else "and"
         if verbose:
             print(branch)
-            print(f"applying {func}")
             print()
-        result: BDD = apply_function(func, result, branch)
+        branches.append(branch)
         info.processed_clausules += 1
-        if verbose:
-            if result.root != None:
-                print(result)
+    file.close()
 
-    if info.clausule_count != info.branch_count:
+    if not stopped and info.clausule_count != info.branch_count:
         print("dimacs_read(): clausule_count != branch_count")
+
+    func: str = "or" if info.dimacs_type == "dnf" else "and"
+    if verbose:
+        print(f"applying {func} on {len(branches)} branches ({schedule})")
+    result: BDD = apply_function_many(func, branches, schedule, manager, collect_garbage, stats)
+    if verbose and result.root is not None:
+        print(result)
     result.name = info.bdd_name
     result.reformat_nodes()
     return result
@@ -0,0 +1,167 @@
+"""
+[file] conjunction_scheduling.py
+[author] Jany26  (Jan Matufka)  <xmatuf00@stud.fit.vutbr.cz>
+[description] Scheduling of Apply calls when combining many diagrams (clauses, gates) with one operation.
+"""
+
+import heapq
+import time
+
+from typing import Callable, Optional, TypeVar
+
+"""
+When many diagrams are combined with an associative and commutative operation (e.g. the clauses of a CNF),
+the order of the Apply calls does not change the result, but it changes the size of the intermediate results.
+Folding the operands left to right ('linear') makes one growing result, which is often much bigger than
+the final diagram. The other strategies combine smaller diagrams first:
+
+- 'balanced' - binary tree, operands are combined pairwise in rounds (keeps the input order),
+- 'smallest' - the two smallest diagrams (by node count) are combined first (priority queue),
+- 'cluster' - operands are grouped by their topmost variable, each group is combined by a balanced tree
+              and the groups are then combined from the bottom-most one up, so the intermediate results
+              only depend on the variables below the current group.
+
+The scheduler is generic - the diagrams are only accessed through the 'combine', 'size' and 'support' functions,
+so it is used both for BDDs (bdd_apply.apply_function_many()) and ABDDs (abdd_apply_main.abdd_apply_many()).
+"""
+
+conjunction_strategies: list[str] = ["linear", "balanced", "smallest", "cluster"]
+
+Diagram = TypeVar("Diagram")
+
+
+class ConjunctionScheduleStats:
+    """
+    Statistics of one scheduled combination: number of Apply calls, the biggest intermediate result (node count)
+    and the sum of the sizes of all intermediate results. Intermediate results are only measured
+    when the stats are requested.
+    """
+
+    def __init__(self):
+        self.steps: int = 0
+        self.peak_size: int = 0
+        self.total_size: int = 0
+        self.seconds: float = 0.0
+
+    def add_result(self, size: int) -> None:
+        self.peak_size = max(self.peak_size, size)
+        self.total_size += size
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(steps={self.steps}, peak_size={self.peak_size}, "
+            f"total_size={self.total_size}, seconds={self.seconds:.4f})"
+        )
+
+
+def schedule_conjunction(
+    operands: list[Diagram],
+    combine: Callable[[Diagram, Diagram], Diagram],
+    size: Callable[[Diagram], int],
+    strategy: str = "balanced",
+    support: Optional[Callable[[Diagram], set[int]]] = None,
+    collect: Optional[Callable[[list[Diagram]], object]] = None,
+    stats: Optional[ConjunctionScheduleStats] = None,
+) -> Diagram:
+    """
+    Combine all 'operands' into one diagram using 'combine' (one Apply call) in the order given by the 'strategy'.
+    - 'size'    ... node count of a diagram,
+    - 'support' ... variables (levels) the diagram depends on, needed by the 'cluster' strategy,
+    - 'collect' ... called after each Apply call with all diagrams which are still needed (e.g. garbage collection),
+    - 'stats'   ... filled with the statistics of the run.
+    """
+    if strategy not in conjunction_strategies:
+        raise ValueError(f"schedule_conjunction(): unknown strategy '{strategy}'")
+    if operands == []:
+        raise ValueError("schedule_conjunction(): no operands")
+    if strategy == "cluster" and support is None:
+        raise ValueError("schedule_conjunction(): 'cluster' strategy needs the 'support' function")
+    start = time.perf_counter()
+
+    def step(first: Diagram, second: Diagram) -> Diagram:
+        result = combine(first, second)
+        if stats is not None:
+            stats.steps += 1
+            stats.add_result(size(result))
+        return result
+
+    if strategy == "linear":
+        result = operands[0]
+        for i in range(1, len(operands)):
+            result = step(result, operands[i])
+            if collect is not None:
+                collect([result] + operands[i + 1 :])
+    elif strategy == "balanced":
+        result = combine_balanced(operands, step, collect)
+    elif strategy == "smallest":
+        result = combine_smallest(operands, step, size, collect)
+    else:
+        # groups by the topmost variable (constant diagrams without support go last)
+        groups: dict[int, list[Diagram]] = {}
+        for operand in operands:
+            variables = support(operand)
+            top = min(variables) if variables != set() else -1
+            groups.setdefault(top, []).append(operand)
+        order = sorted(groups.keys(), reverse=True)
+        pending: list[Diagram] = [d for top in order for d in groups[top]]
+        result = None
+        for top in order:
+            done = len(groups[top])
+            pending = pending[done:]
+            keep = ([result] if result is not None else []) + pending
+            group = combine_balanced(groups[top], step, lambda live: collect(live + keep) if collect else None)
+            result = group if result is None else step(result, group)
+            if collect is not None:
+                collect([result] + pending)
+
+    if stats is not None:
+        stats.seconds += time.perf_counter() - start
+    return result
+
+
+def combine_balanced(
+    operands: list[Diagram],
+    step: Callable[[Diagram, Diagram], Diagram],
+    collect: Optional[Callable[[list[Diagram]], object]],
+) -> Diagram:
+    """
+    Combine the operands pairwise in rounds (binary tree of Apply calls).
+    """
+    level: list[Diagram] = [d for d in operands]
+    while len(level) > 1:
+        next_level: list[Diagram] = []
+        for i in range(0, len(level) - 1, 2):
+            next_level.append(step(level[i], level[i + 1]))
+            if collect is not None:
+                collect(next_level + level[i + 2 :])
+        if len(level) % 2 == 1:
+            next_level.append(level[-1])
+        level = next_level
+    return level[0]
+
+
+def combine_smallest(
+    operands: list[Diagram],
+    step: Callable[[Diagram, Diagram], Diagram],
+    size: Callable[[Diagram], int],
+    collect: Optional[Callable[[list[Diagram]], object]],
+) -> Diagram:
+    """
+    Combine the two smallest diagrams until one is left. Ties are resolved by the input order
+    (results are ordered after all operands of the same size), so the schedule is deterministic.
+    """
+    heap: list[tuple[int, int, Diagram]] = [(size(d), i, d) for i, d in enumerate(operands)]
+    heapq.heapify(heap)
+    counter = len(operands)
+    while len(heap) > 1:
+        _, _, first = heapq.heappop(heap)
+        _, _, second = heapq.heappop(heap)
+        result = step(first, second)
+        heapq.heappush(heap, (size(result), counter, result))
+        counter += 1
+        if collect is not None:
+            collect([d for _, _, d in heap])
+    return heap[0][2]
+
+
+# End of file conjunction_scheduling.py
@@ -82,6 +82,19 @@ box_arities: dict[Optional[str], int] = {
     "HPort": 2,
 }
 
+# Small integer codes of the reduction rules, used wherever box names would otherwise be hashed
+# repeatedly (e.g. unique table keys). Code 0 is reserved for short edges (no box).
+box_codes: dict[Optional[str], int] = {
+    None: 0,
+    "X": 1,
+    "L0": 2,
+    "L1": 3,
+    "H0": 4,
+    "H1": 5,
+    "LPort": 6,
+    "HPort": 7,
+}
+
 box_catalogue: dict[str, TTreeAut] = {
     "0": box_false,
     "1": box_true,
@@ -0,0 +1,146 @@
+import gc
+import unittest
+
+from apply.abdd import ABDD, construct_node, convert_ta_to_abdd
+from apply.abdd_apply_main import abdd_apply
+from apply.abdd_call_cache import ABDDCallCacheClass
+from apply.abdd_node_cache import ABDDNodeCacheClass
+from apply.box_algebra.apply_tables import BooleanOperation
+from apply.apply_edge import ApplyEdge
+from apply.evaluation import compare_op_abdd
+from formats.format_vtf import import_treeaut_from_vtf
+
+
+class TestABDDNodeCache(unittest.TestCase):
+    def test_unique_table_lookup(self):
+        ncache = ABDDNodeCacheClass()
+        node1 = construct_node(3, "X", [ncache.terminal_0], None, [ncache.terminal_1], ncache)
+        node2 = construct_node(3, "X", [ncache.terminal_0], None, [ncache.terminal_1], ncache)
+        node3 = construct_node(3, "L0", [ncache.terminal_0], None, [ncache.terminal_1], ncache)
+        self.assertIs(node1, node2)
+        self.assertIsNot(node1, node3)
+        self.assertEqual(len(ncache.subtables[3]), 2)
+        self.assertEqual(ncache.size(), 4)
+        self.assertEqual(ncache.lookups, 3)
+        self.assertEqual(ncache.hits, 1)
+        self.assertEqual(ncache.inserts, 2)
+
+    def test_node_uids_are_stable(self):
+        ncache = ABDDNodeCacheClass()
+        node = construct_node(2, None, [ncache.terminal_0], None, [ncache.terminal_1], ncache)
+        uid = node.uid
+        ncache.refresh_nodes()
+        node.node = 100
+        self.assertEqual(node.uid, uid)
+        self.assertIs(ncache.find_node(node), node)
+
+    def test_compact_node(self):
+        ncache = ABDDNodeCacheClass()
+        node = construct_node(2, None, [ncache.terminal_0], None, [ncache.terminal_1], ncache)
+        self.assertFalse(hasattr(node, "__dict__"))
+        with self.assertRaises(AttributeError):
+            node.parents = []
+        node_hash = hash(node)
+        node.node = 42
+        node.low = [ncache.terminal_1]
+        self.assertEqual(hash(node), node_hash)
+        self.assertIn(node, {node})
+
+    def test_garbage_collection(self):
+        ncache = ABDDNodeCacheClass()
+        low = construct_node(3, None, [ncache.terminal_0], None, [ncache.terminal_1], ncache)
+        high = construct_node(3, None, [ncache.terminal_1], None, [ncache.terminal_0], ncache)
+        root = construct_node(2, None, [low], None, [high], ncache)
+        construct_node(1, "X", [ncache.terminal_1], None, [root], ncache)
+        construct_node(4, "H0", [ncache.terminal_1], None, [ncache.terminal_0], ncache)
+
+        abdd = ABDD("test", 4, [root])
+        ncache.register_root(abdd)
+        self.assertEqual(ncache.collect_garbage(), 2)
+        self.assertEqual(ncache.size(), 5)
+        self.assertNotIn(1, ncache.subtables)
+        self.assertIs(ncache.find_node(root), root)
+
+        # registered roots are only referenced weakly
+        del abdd
+        gc.collect()
+        self.assertEqual(ncache.collect_garbage(), 3)
+        self.assertEqual(ncache.size(), 2)
+        self.assertEqual(ncache.collected, 5)
+
+    def test_apply_after_garbage_collection(self):
+        varmax = 10
+        ncache = ABDDNodeCacheClass()
+        ta1 = import_treeaut_from_vtf("../tests/apply/ta-to-abdd-conversion/simple-input-1.vtf")
+        ta2 = import_treeaut_from_vtf("../tests/apply/ta-to-abdd-conversion/simple-input-2.vtf")
+        abdd1 = convert_ta_to_abdd(ta1, ncache, var_count=varmax)
+        abdd2 = convert_ta_to_abdd(ta2, ncache, var_count=varmax)
+        result1 = abdd_apply(BooleanOperation.AND, abdd1, abdd2, ncache, maxvar=varmax)
+        ncache.collect_garbage([abdd1, abdd2])
+        result2 = abdd_apply(BooleanOperation.OR, abdd1, abdd2, ncache, maxvar=varmax)
+        ncache.refresh_nodes()
+        self.assertTrue(compare_op_abdd(abdd1, abdd2, BooleanOperation.AND, result1))
+        self.assertTrue(compare_op_abdd(abdd1, abdd2, BooleanOperation.OR, result2))
+
+
+class TestABDDCallCache(unittest.TestCase):
+    def test_lossy_table(self):
+        ncache = ABDDNodeCacheClass()
+        nodes = [construct_node(2, None, [ncache.terminal_0], "X", [ncache.terminal_1], ncache)]
+        nodes.append(construct_node(2, "L0", [ncache.terminal_0], "X", [ncache.terminal_1], ncache))
+        abdds = [ABDD(f"abdd{i}", 4, [n]) for i, n in enumerate(nodes)]
+        # the two high edges are identical (X to terminal 1)
+        edges = [ApplyEdge(abdds[0], nodes[0], False), ApplyEdge(abdds[0], nodes[0], True)]
+        edges.append(ApplyEdge(abdds[1], nodes[1], False))
+
+        ccache = ABDDCallCacheClass(3)
+        self.assertEqual(ccache.size, 4)
+        for e1 in edges:
+            for e2 in edges:
+                ccache.insert_call(BooleanOperation.AND, 3, e1, e2, "X", [ncache.terminal_0])
+        self.assertLessEqual(ccache.occupied(), 4)
+        self.assertGreaterEqual(ccache.get_stats()["AND"]["evictions"], 9 - ccache.occupied())
+
+        hits = 0
+        for e1 in edges:
+            for e2 in edges:
+                hit = ccache.find_call(BooleanOperation.AND, 3, e1, e2)
+                if hit is not None:
+                    hits += 1
+                    self.assertEqual(hit, ("X", [ncache.terminal_0]))
+        self.assertEqual(hits, ccache.occupied())
+        self.assertEqual(ccache.get_stats()["AND"]["hits"] + ccache.get_stats()["AND"]["misses"], 9)
+        self.assertIsNone(ccache.find_call(BooleanOperation.OR, 3, edges[0], edges[0]))
+
+    def test_invalidation_after_garbage_collection(self):
+        ncache = ABDDNodeCacheClass()
+        node = construct_node(2, None, [ncache.terminal_0], "X", [ncache.terminal_1], ncache)
+        other = construct_node(2, None, [ncache.terminal_1], "X", [ncache.terminal_1], ncache)
+        abdd = ABDD("abdd", 4, [node])
+        ccache = ABDDCallCacheClass()
+        ncache.register_call_cache(ccache)
+        edge = ApplyEdge(abdd, None, None)
+        ccache.insert_call(BooleanOperation.AND, None, edge, edge, None, [node])
+        ccache.insert_call(BooleanOperation.OR, None, edge, edge, None, [other])
+        self.assertEqual(ncache.collect_garbage([abdd]), 1)
+        self.assertIsNotNone(ccache.find_call(BooleanOperation.AND, None, edge, edge))
+        self.assertIsNone(ccache.find_call(BooleanOperation.OR, None, edge, edge))
+
+    def test_apply_with_small_call_cache(self):
+        varmax = 10
+        ncache = ABDDNodeCacheClass()
+        ta1 = import_treeaut_from_vtf("../tests/apply/ta-to-abdd-conversion/simple-input-1.vtf")
+        ta2 = import_treeaut_from_vtf("../tests/apply/ta-to-abdd-conversion/simple-input-2.vtf")
+        abdd1 = convert_ta_to_abdd(ta1, ncache, var_count=varmax)
+        abdd2 = convert_ta_to_abdd(ta2, ncache, var_count=varmax)
+        for op in [BooleanOperation.AND, BooleanOperation.OR, BooleanOperation.XOR]:
+            result = abdd_apply(op, abdd1, abdd2, ncache, maxvar=varmax, call_cache_size=2)
+            self.assertTrue(compare_op_abdd(abdd1, abdd2, op, result))
+
+        shared = ABDDCallCacheClass()
+        result1 = abdd_apply(BooleanOperation.AND, abdd1, abdd2, ncache, maxvar=varmax, call_cache=shared)
+        misses = shared.get_stats()["AND"]["misses"]
+        result2 = abdd_apply(BooleanOperation.AND, abdd1, abdd2, ncache, maxvar=varmax, call_cache=shared)
+        # only the top-level call is not found, the rest is reused from the first Apply call
+        self.assertLessEqual(shared.get_stats()["AND"]["misses"] - misses, 1)
+        self.assertIs(result1.roots[0], result2.roots[0])
@@ -0,0 +1,117 @@
+import os
+import tempfile
+import unittest
+
+from apply.abdd import ABDD, construct_node, convert_ta_to_abdd, import_abdd_from_abdd_file
+from apply.abdd_apply_main import abdd_apply
+from apply.abdd_canonization import abdd_canonize
+from apply.abdd_dimacs import dimacs_to_abdd
+from apply.abdd_node_cache import ABDDNodeCacheClass
+from apply.box_algebra.apply_tables import BooleanOperation
+from apply.evaluation import compare_abdds_tas
+from canonization.folding import ubda_folding
+from canonization.normalization import ubda_normalize
+from canonization.unfolding import ubda_unfolding
+from formats.format_abdd import import_treeaut_from_abdd
+from formats.format_vtf import import_treeaut_from_vtf
+from helpers.string_manipulation import create_var_order_list
+from helpers.utils import box_orders
+from tree_automata import iterate_states_bfs
+from tree_automata.functions.trimming import shrink_to_top_down_reachable_2
+
+
+class TestABDDCanonization(unittest.TestCase):
+    def get_inputs(self, ncache: ABDDNodeCacheClass) -> list:
+        inputs = [
+            convert_ta_to_abdd(import_treeaut_from_vtf(f"../tests/apply/ta-to-abdd-conversion/{name}"), ncache, 10)
+            for name in ["simple-input-1.vtf", "simple-input-2.vtf"]
+        ]
+        for name in ["materialization-lport-10-4.dd", "materialization-hport-10-13.dd"]:
+            inputs.append(import_abdd_from_abdd_file(f"../tests/apply/materialization-inputs/{name}", ncache))
+        return inputs
+
+    def test_equivalence_and_idempotence(self):
+        for abdd in self.get_inputs(ABDDNodeCacheClass()):
+            # ports of the LPort/HPort boxes in the inputs can lead to different levels, which evaluate_for()
+            # does not handle the same way as unfolding, so the results are compared with the unfolded input
+            reference = abdd_canonize(abdd, box_orders["full"])
+            unfolded = ubda_unfolding(abdd.convert_to_treeaut_obj(), abdd.variable_count + 1)
+            self.assertTrue(compare_abdds_tas(reference, unfolded))
+            for order, boxes in box_orders.items():
+                ncache = ABDDNodeCacheClass()
+                result = abdd_canonize(abdd, boxes, ncache)
+                self.assertTrue(reference.check_brute_force_equivalence(result), f"{abdd.name}, {order}")
+                for node in result.iterate_bfs_nodes():
+                    for box in [node.low_box, node.high_box]:
+                        self.assertTrue(box is None or box in boxes)
+                again = abdd_canonize(result, boxes, ncache)
+                self.assertEqual(again.root_rule, result.root_rule)
+                self.assertEqual([r.uid for r in again.roots], [r.uid for r in result.roots])
+
+    def test_bdd_order(self):
+        # without boxes, the result is a quasi-reduced BDD, a node on each level of each path
+        abdd = self.get_inputs(ABDDNodeCacheClass())[0]
+        result = abdd_canonize(abdd, [])
+        self.assertIsNone(result.root_rule)
+        for node in result.iterate_bfs_nodes():
+            for child in node.low + node.high:
+                self.assertEqual(child.var if not child.is_leaf else result.variable_count + 1, node.var + 1)
+        # with the X box (BDD), there are no don't-care nodes
+        result = abdd_canonize(abdd, box_orders["bdd"])
+        for node in result.iterate_bfs_nodes():
+            self.assertTrue(node.is_leaf or node.low != node.high or node.low_box != node.high_box)
+
+    def test_equal_functions(self):
+        ncache = ABDDNodeCacheClass()
+        in1, in2 = self.get_inputs(ncache)[:2]
+        result1 = abdd_apply(BooleanOperation.AND, in1, in2, ncache, maxvar=10, canonize=box_orders["full"])
+        result2 = abdd_apply(BooleanOperation.AND, in2, in1, ncache, maxvar=10)
+        result2 = abdd_canonize(result2, box_orders["full"], ncache)
+        self.assertEqual(result1.root_rule, result2.root_rule)
+        self.assertEqual([r.uid for r in result1.roots], [r.uid for r in result2.roots])
+
+        # x1 and x2 built with different reduction rules
+        ncache = ABDDNodeCacheClass()
+        zero, one = ncache.terminal_0, ncache.terminal_1
+        node2 = construct_node(2, "X", [zero], None, [one], ncache)
+        chain = construct_node(1, None, [zero], None, [node2], ncache)
+        abdd1 = ABDD("chain", 4, [chain])
+        abdd2 = ABDD("box", 4, [construct_node(2, "X", [zero], "X", [one], ncache)], "L0")
+        result1 = abdd_canonize(abdd1, box_orders["esr"], ncache)
+        result2 = abdd_canonize(abdd2, box_orders["esr"], ncache)
+        self.assertEqual(result1.root_rule, "L0")
+        self.assertEqual(result1.roots, result2.roots)
+        self.assertEqual(result1.count_nodes(), 2)
+
+    def test_folding_node_counts(self):
+        # (ubda_folding() states, abdd_canonize() nodes) for each box order after the first 1, 3 and 5 clauses,
+        # the normal forms differ (see abdd_canonization.py), the counts only agree for the BDD box order
+        self.assertEqual(list(box_orders), ["bdd", "zbdd", "tbdd", "cbdd", "czdd", "esr", "cesr", "full"])
+        expected = {
+            1: [(5, 5), (6, 15), (5, 5), (5, 5), (4, 5), (4, 5), (4, 5), (4, 5)],
+            3: [(14, 14), (19, 23), (14, 13), (13, 13), (13, 13), (15, 13), (15, 15), (14, 14)],
+            5: [(34, 34), (39, 42), (34, 33), (28, 28), (33, 33), (33, 32), (32, 34), (27, 28)],
+        }
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "cnf.cnf")
+        with open(path, "w") as file:
+            file.write("p cnf 8 5\n1 -8 5 0\n-1 2 -4 0\n3 -5 7 0\n-2 6 -3 0\n4 8 -7 0\n")
+        for clauses, counts in expected.items():
+            dimacs_to_abdd(path, max_clauses=clauses, export_dir=directory.name)
+            abdd = import_abdd_from_abdd_file(os.path.join(directory.name, "cnf.dd"))
+            initial = import_treeaut_from_abdd(os.path.join(directory.name, "cnf.dd"))
+            initial.reformat_states()
+            unfolded = ubda_unfolding(initial, 9)
+            normalized = shrink_to_top_down_reachable_2(ubda_normalize(unfolded, create_var_order_list("", 9)))
+            normalized.reformat_keys()
+            normalized.reformat_states()
+            for (order, boxes), expected_counts in zip(box_orders.items(), counts):
+                folded = len(list(iterate_states_bfs(ubda_folding(normalized, boxes, 9))))
+                canonized = abdd_canonize(abdd, boxes).count_nodes()
+                self.assertEqual((folded, canonized), expected_counts, f"{clauses} clauses, {order}")
+
+    def test_unsupported_box(self):
+        abdd = self.get_inputs(ABDDNodeCacheClass())[0]
+        with self.assertRaises(ValueError):
+            abdd_canonize(abdd, ["X", "boxX"])
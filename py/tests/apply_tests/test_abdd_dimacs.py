@@ -0,0 +1,70 @@
+import os
+import random
+import tempfile
+import unittest
+
+from apply.abdd_canonization import ABDDCanonizationHelper
+from apply.abdd_dimacs import DimacsCompileStats, create_clause_abdd, dimacs_to_abdd, read_dimacs_clauses
+from apply.abdd_node_cache import ABDDNodeCacheClass
+from helpers.conjunction_scheduling import conjunction_strategies
+from helpers.utils import box_orders
+
+
+def satisfies(clauses: list[list[int]], assignment: list[bool]) -> bool:
+    return all(any(assignment[abs(lit) - 1] == (lit > 0) for lit in clause) for clause in clauses)
+
+
+class TestDimacsToABDD(unittest.TestCase):
+    def write_cnf(self, content: str) -> str:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "test.cnf")
+        with open(path, "w") as file:
+            file.write(content)
+        return path
+
+    def test_read_clauses(self):
+        path = self.write_cnf("c comment\np cnf 30 3\n1 -30\n 2 0 -4 0\n\n5 6 7 8 9 0\n%\n0\n")
+        self.assertEqual(read_dimacs_clauses(path), (30, [[1, -30, 2], [-4], [5, 6, 7, 8, 9]]))
+        self.assertEqual(read_dimacs_clauses(path, 2), (30, [[1, -30, 2], [-4]]))
+        self.assertEqual(read_dimacs_clauses(self.write_cnf("1 -3 0\n2 0\n")), (3, [[1, -3], [2]]))
+        with self.assertRaises(ValueError):
+            read_dimacs_clauses(self.write_cnf("p cnf 2 1\n1 -3 0\n"))
+
+    def test_clause_abdd(self):
+        ncache = ABDDNodeCacheClass()
+        for boxes in [box_orders["bdd"], box_orders["full"]]:
+            helper = ABDDCanonizationHelper(40, boxes, ncache)
+            clause = create_clause_abdd([7, -1, 33, -20, 7], "c", helper)
+            for bits in range(64):
+                assignment = [bool((bits >> (i % 6)) & 1) for i in range(40)]
+                self.assertEqual(clause.evaluate_for(assignment), int(satisfies([[7, -1, 33, -20]], assignment)))
+            self.assertEqual(create_clause_abdd([3, -3], "t", helper).roots, [ncache.terminal_1])
+            self.assertEqual(create_clause_abdd([], "e", helper).roots, [ncache.terminal_0])
+
+    def test_compile(self):
+        rng = random.Random(1)
+        count = 14
+        clauses = [[rng.choice([-1, 1]) * rng.randint(1, count) for _ in range(rng.randint(1, 6))] for _ in range(25)]
+        clauses.append([3, -3, 5])
+        content = f"p cnf {count} {len(clauses)}\n" + "".join([" ".join(map(str, c)) + " 0\n" for c in clauses])
+        path = self.write_cnf(content)
+        models = sum([satisfies(clauses, [bool((b >> i) & 1) for i in range(count)]) for b in range(2**count)])
+        for strategy in conjunction_strategies:
+            for batch_size in [1, 5, 100]:
+                stats = DimacsCompileStats()
+                result = dimacs_to_abdd(path, strategy, batch_size, stats=stats)
+                self.assertEqual(result.count_models(), models, f"{strategy}, {batch_size}")
+                self.assertEqual(stats.clauses + stats.tautologies, len(clauses))
+                self.assertEqual(stats.batches, (len(clauses) + batch_size - 1) // batch_size)
+        canonical = dimacs_to_abdd(path, canonize=box_orders["full"])
+        self.assertEqual(canonical.count_models(), models)
+        self.assertLessEqual(canonical.count_nodes(), result.count_nodes())
+
+    def test_sampled_exports(self):
+        path = self.write_cnf("p cnf 20 8\n1 -20 5 0\n8 -1 2 0\n3 -15 19 0\n-15 6 -13 0\n9 -19 -13 0\n3 20 17 0\n")
+        directory = os.path.dirname(path)
+        stats = DimacsCompileStats()
+        dimacs_to_abdd(path, "linear", 2, export_dir=directory, export_every=2, stats=stats)
+        self.assertEqual(stats.exports, 1)
+        self.assertEqual(sorted([f for f in os.listdir(directory) if f.endswith(".dd")]), ["test-c4.dd", "test.dd"])
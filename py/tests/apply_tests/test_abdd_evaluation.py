@@ -0,0 +1,263 @@
+import copy
+import itertools
+import random
+import unittest
+
+import numpy as np
+
+from apply.abdd import ABDD, construct_node, convert_ta_to_abdd, import_abdd_from_abdd_file
+from apply.abdd_apply_main import abdd_apply
+from apply.abdd_equivalence import abdd_equivalent, abdd_is_false, abdd_is_false_unfolded
+from apply.abdd_node_cache import ABDDNodeCacheClass
+from apply.batch_evaluation import generate_assignments
+from apply.box_algebra.apply_tables import BooleanOperation
+from apply.box_compilation import CompiledBox, closed_form_boxes
+from apply.evaluation import check_equivalence_parallel, compare_abdds_tas
+from canonization.unfolding import ubda_unfolding
+from formats.format_vtf import import_treeaut_from_vtf
+from helpers.utils import box_catalogue
+
+
+class TestABDDBatchEvaluation(unittest.TestCase):
+    def check_against_evaluate_for(self, abdd: ABDD, assignments: np.ndarray):
+        expected = [abdd.evaluate_for([bool(val) for val in assignment], compiled=False) for assignment in assignments]
+        self.assertEqual(list(abdd.evaluate_batch(assignments)), expected)
+
+    def test_generate_assignments(self):
+        assignments = generate_assignments(3, 0, 8)
+        self.assertEqual(assignments.shape, (8, 3))
+        self.assertEqual(list(assignments[1]), [0, 0, 1])
+        self.assertEqual(list(assignments[6]), [1, 1, 0])
+        self.assertEqual(list(generate_assignments(3, 5, 6)[0]), [1, 0, 1])
+
+    def test_batch_abdd_files(self):
+        for file in [
+            "../tests/abdd-format/abdd-format-demo.dd",
+            "../tests/abdd-format/multiroot-example.dd",
+            "../tests/abdd-format/replication_of_normalization_error.dd",
+        ]:
+            abdd = import_abdd_from_abdd_file(file)
+            assignments = generate_assignments(abdd.variable_count, 0, 2**abdd.variable_count)
+            self.check_against_evaluate_for(abdd, assignments)
+
+    def test_batch_converted_tas(self):
+        ncache = ABDDNodeCacheClass()
+        for file in [
+            "../tests/apply/ta-to-abdd-conversion/simple-input-1.vtf",
+            "../tests/apply/ta-to-abdd-conversion/simple-input-2.vtf",
+        ]:
+            ta = import_treeaut_from_vtf(file)
+            abdd = convert_ta_to_abdd(ta, ncache, var_count=10)
+            self.check_against_evaluate_for(abdd, generate_assignments(10, 0, 2**10))
+
+    def test_batch_all_boxes(self):
+        ncache = ABDDNodeCacheClass()
+        zero, one = ncache.terminal_0, ncache.terminal_1
+        inner = construct_node(5, "L1", [zero], "H0", [one], ncache)
+        for box, ports in [("X", [inner]), ("L0", [inner]), ("H1", [inner]), ("LPort", [inner, one])]:
+            root = construct_node(1, box, ports, "HPort", [zero, inner], ncache)
+            abdd = ABDD(f"abdd-{box}", 8, [root])
+            self.check_against_evaluate_for(abdd, generate_assignments(8, 0, 2**8))
+
+    def test_batch_input_validation(self):
+        abdd = import_abdd_from_abdd_file("../tests/abdd-format/abdd-format-demo.dd")
+        with self.assertRaises(ValueError):
+            abdd.evaluate_batch(np.zeros(abdd.variable_count))
+        with self.assertRaises(ValueError):
+            abdd.evaluate_batch(np.zeros((4, abdd.variable_count - 1)))
+        booleans = np.array([[True, False] * (abdd.variable_count // 2 + 1)], dtype=bool)[:, : abdd.variable_count]
+        self.check_against_evaluate_for(abdd, booleans)
+
+    def test_brute_force_equivalence(self):
+        abdd1 = import_abdd_from_abdd_file("../tests/abdd-format/abdd-format-demo.dd")
+        abdd2 = import_abdd_from_abdd_file("../tests/abdd-format/abdd-format-demo.dd")
+        self.assertTrue(abdd1.check_brute_force_equivalence(abdd2, batch_size=100))
+        abdd2.roots[0].high_box = "L1" if abdd2.roots[0].high_box != "L1" else "L0"
+        self.assertFalse(abdd1.check_brute_force_equivalence(abdd2, batch_size=100))
+
+
+class TestBoxCompilation(unittest.TestCase):
+    def test_closed_form_boxes(self):
+        for name in closed_form_boxes.keys():
+            compiled = CompiledBox(box_catalogue[name])
+            self.assertIsNotNone(compiled.closed_form)
+            # the same box compiled into transition tables only
+            box = copy.deepcopy(box_catalogue[name])
+            box.name = f"table-{name}"
+            table = CompiledBox(box)
+            self.assertIsNone(table.closed_form)
+            for length in range(1, 6):
+                for assignment in itertools.product([0, 1], repeat=length):
+                    self.assertEqual(compiled.evaluate(assignment), table.evaluate(assignment))
+                self.assertEqual(compiled.reachable_results(length), table.reachable_results(length))
+            with self.assertRaises(ValueError):
+                compiled.evaluate([])
+            with self.assertRaises(ValueError):
+                table.evaluate([])
+
+    def test_closed_form_batch(self):
+        assignments = generate_assignments(6, 0, 2**6)
+        prefix = np.zeros((len(assignments), 7), dtype=np.intp)
+        np.cumsum(assignments, axis=1, out=prefix[:, 1:])
+        rows = np.arange(len(assignments))
+        start = rows % 3
+        length = 6 - start - rows % 2
+        for name in closed_form_boxes.keys():
+            compiled = CompiledBox(box_catalogue[name])
+            terminal, port = compiled.evaluate_batch(assignments, prefix, rows, start, length)
+            for i in rows:
+                expected = compiled.evaluate(assignments[i, start[i] : start[i] + length[i]])
+                self.assertEqual((terminal[i], port[i]), expected)
+
+    def test_compiled_evaluate_for(self):
+        for file in ["../tests/abdd-format/abdd-format-demo.dd", "../tests/abdd-format/multiroot-example.dd"]:
+            abdd = import_abdd_from_abdd_file(file)
+            for assignment in itertools.product([False, True], repeat=abdd.variable_count):
+                self.assertEqual(
+                    abdd.evaluate_for(list(assignment)), abdd.evaluate_for(list(assignment), compiled=False)
+                )
+
+
+class TestParallelEquivalence(unittest.TestCase):
+    def test_parallel_equivalent(self):
+        ncache = ABDDNodeCacheClass()
+        ta = import_treeaut_from_vtf("../tests/apply/ta-to-abdd-conversion/simple-input-1.vtf")
+        abdd = convert_ta_to_abdd(ta, ncache, var_count=10)
+        unfolded = ubda_unfolding(abdd.convert_to_treeaut_obj(), 11)
+        report = check_equivalence_parallel(abdd, unfolded, processes=2, chunk_size=100)
+        self.assertTrue(report.equal)
+        self.assertEqual(report.checked, 2**10)
+        self.assertGreater(report.throughput(), 0)
+        self.assertTrue(compare_abdds_tas(abdd, unfolded, processes=2))
+
+    def test_parallel_counterexample(self):
+        ncache = ABDDNodeCacheClass()
+        ta1 = import_treeaut_from_vtf("../tests/apply/ta-to-abdd-conversion/simple-input-1.vtf")
+        ta2 = import_treeaut_from_vtf("../tests/apply/ta-to-abdd-conversion/simple-input-2.vtf")
+        abdd1 = convert_ta_to_abdd(ta1, ncache, var_count=10)
+        abdd2 = convert_ta_to_abdd(ta2, ncache, var_count=10)
+        report = check_equivalence_parallel(abdd1, abdd2, processes=2, chunk_size=16)
+        self.assertFalse(report.equal)
+        self.assertLess(report.checked, 2**10)
+        self.assertEqual(
+            report.results, (abdd1.evaluate_for(report.counterexample), abdd2.evaluate_for(report.counterexample))
+        )
+        self.assertNotEqual(report.results[0], report.results[1])
+
+
+class TestABDDEquivalence(unittest.TestCase):
+    def test_symbolic_equivalence(self):
+        ncache = ABDDNodeCacheClass()
+        ta1 = import_treeaut_from_vtf("../tests/apply/ta-to-abdd-conversion/simple-input-1.vtf")
+        ta2 = import_treeaut_from_vtf("../tests/apply/ta-to-abdd-conversion/simple-input-2.vtf")
+        abdd1 = convert_ta_to_abdd(ta1, ncache, var_count=10)
+        abdd2 = convert_ta_to_abdd(ta2, ncache, var_count=10)
+        for unfold in [False, True]:
+            self.assertTrue(abdd_equivalent(abdd1, abdd1, ncache, unfold=unfold))
+            self.assertFalse(abdd_equivalent(abdd1, abdd2, ncache, unfold=unfold))
+        # ABDDs created with different node caches
+        other = convert_ta_to_abdd(ta1, ABDDNodeCacheClass(), var_count=10)
+        self.assertTrue(abdd_equivalent(abdd1, other))
+        self.assertFalse(abdd_equivalent(abdd2, other))
+
+    def test_constant_false(self):
+        ncache = ABDDNodeCacheClass()
+        ta1 = import_treeaut_from_vtf("../tests/apply/ta-to-abdd-conversion/simple-input-1.vtf")
+        ta2 = import_treeaut_from_vtf("../tests/apply/ta-to-abdd-conversion/simple-input-2.vtf")
+        abdd1 = convert_ta_to_abdd(ta1, ncache, var_count=10)
+        abdd2 = convert_ta_to_abdd(ta2, ncache, var_count=10)
+        negated = abdd_apply(BooleanOperation.NOT, abdd1, None, ncache, maxvar=10)
+        contradiction = abdd_apply(BooleanOperation.AND, abdd1, negated, ncache, maxvar=10)
+        self.assertTrue(abdd_is_false(contradiction))
+        self.assertTrue(abdd_is_false_unfolded(contradiction))
+        assignments = generate_assignments(10, 0, 2**10)
+        for op in [BooleanOperation.AND, BooleanOperation.OR, BooleanOperation.XOR, BooleanOperation.IMPLY]:
+            result = abdd_apply(op, abdd1, abdd2, ncache, maxvar=10)
+            expected = not any(result.evaluate_batch(assignments))
+            self.assertEqual(abdd_is_false(result), expected)
+            self.assertEqual(abdd_is_false_unfolded(result), expected)
+
+    def test_deep_equivalence(self):
+        # De Morgan: x1 | ... | xn == !(!x1 & ... & !xn), with more variables than brute force could handle
+        varmax = 1500
+        ncache = ABDDNodeCacheClass()
+        last = construct_node(varmax, None, [ncache.terminal_0], None, [ncache.terminal_1], ncache)
+        last_negated = construct_node(varmax, None, [ncache.terminal_1], None, [ncache.terminal_0], ncache)
+        or_node, and_node, nor_node = last, last, last_negated
+        for var in range(varmax - 1, 0, -1):
+            or_node = construct_node(var, None, [or_node], "X", [ncache.terminal_1], ncache)
+            and_node = construct_node(var, "X", [ncache.terminal_0], None, [and_node], ncache)
+            nor_node = construct_node(var, None, [nor_node], "X", [ncache.terminal_0], ncache)
+        abdd_or = ABDD("or", varmax, [or_node])
+        abdd_and = ABDD("and", varmax, [and_node])
+        abdd_nor = ABDD("nor", varmax, [nor_node])
+        negated = abdd_apply(BooleanOperation.NOT, abdd_nor, None, ncache, maxvar=varmax)
+        self.assertTrue(abdd_equivalent(abdd_or, negated, ncache))
+        self.assertFalse(abdd_equivalent(abdd_or, abdd_and, ncache))
+
+
+class TestModelCounting(unittest.TestCase):
+    def check_models(self, abdd: ABDD):
+        assignments = generate_assignments(abdd.variable_count, 0, 2**abdd.variable_count)
+        results = abdd.evaluate_batch(assignments)
+        models = [[bool(val) for val in assignment] for assignment, res in zip(assignments, results) if res == 1]
+        self.assertEqual(abdd.count_models(), len(models))
+        self.assertEqual(list(abdd.iter_models()), models)
+        sample = abdd.sample_model(random.Random(0))
+        if models == []:
+            self.assertIsNone(sample)
+        else:
+            self.assertIn(sample, models)
+
+    def test_count_abdd_files(self):
+        for file in [
+            "../tests/abdd-format/multiroot-example.dd",
+            "../tests/abdd-format/replication_of_normalization_error.dd",
+            # ports leading to different levels (re-reading some of the spanned variables)
+            "../tests/apply/materialization-inputs/materialization-hport-4-10.dd",
+            "../tests/apply/materialization-inputs/materialization-lport-13-4.dd",
+        ]:
+            self.check_models(import_abdd_from_abdd_file(file))
+
+    def test_count_converted_tas(self):
+        ncache = ABDDNodeCacheClass()
+        for file in [
+            "../tests/apply/ta-to-abdd-conversion/simple-input-1.vtf",
+            "../tests/apply/ta-to-abdd-conversion/simple-input-2.vtf",
+        ]:
+            abdd = convert_ta_to_abdd(import_treeaut_from_vtf(file), ncache, var_count=10)
+            self.check_models(abdd)
+            negated = abdd_apply(BooleanOperation.NOT, abdd, None, ncache, maxvar=10)
+            self.assertEqual(abdd.count_models() + negated.count_models(), 2**10)
+
+    def test_count_all_boxes(self):
+        ncache = ABDDNodeCacheClass()
+        zero, one = ncache.terminal_0, ncache.terminal_1
+        inner = construct_node(5, "L1", [zero], "H0", [one], ncache)
+        for box, ports in [("X", [inner]), ("L0", [inner]), ("H1", [inner]), ("LPort", [inner, one])]:
+            root = construct_node(1, box, ports, "HPort", [zero, inner], ncache)
+            self.check_models(ABDD(f"abdd-{box}", 8, [root]))
+        self.check_models(ABDD("false", 8, [zero]))
+
+    def test_count_deep(self):
+        varmax = 1500
+        ncache = ABDDNodeCacheClass()
+        node = construct_node(varmax, None, [ncache.terminal_0], None, [ncache.terminal_1], ncache)
+        for var in range(varmax - 1, 0, -1):
+            node = construct_node(var, None, [node], "X", [ncache.terminal_1], ncache)
+            if var == 200:
+                # variables 1 ... 199 are not read at all
+                model = ABDD("or-200", varmax, [node]).sample_model(random.Random(0))
+                self.assertEqual(len(model), varmax)
+                self.assertTrue(any(model[199:]))
+        self.assertEqual(ABDD("or", varmax, [node]).count_models(), 2**varmax - 1)
+
+    def test_sample_uniform(self):
+        ncache = ABDDNodeCacheClass()
+        inner = construct_node(4, "L1", [ncache.terminal_0], "H0", [ncache.terminal_1], ncache)
+        root = construct_node(1, "LPort", [inner, ncache.terminal_1], "HPort", [ncache.terminal_0, inner], ncache)
+        abdd = ABDD("sampled", 6, [root])
+        models = [tuple(model) for model in abdd.iter_models()]
+        rng = random.Random(0)
+        samples = [tuple(abdd.sample_model(rng)) for _ in range(20 * len(models))]
+        self.assertEqual(set(samples), set(models))
@@ -1,6 +1,6 @@
 import unittest
 
-from apply.abdd import convert_ta_to_abdd
+from apply.abdd import ABDD, construct_node, convert_ta_to_abdd
 from apply.abdd_apply_main import abdd_apply
 from apply.abdd_node_cache import ABDDNodeCacheClass
 from apply.box_algebra.apply_tables import BooleanOperation
@@ -110,3 +110,22 @@ class TestABDDApply(unittest.TestCase):
         self.assertTrue(compare_abdds_tas(multiroot_abdd, unfolded))
         self.assertTrue(compare_abdds_tas(multiroot_abdd, normalized))
         self.assertTrue(simulate_and_compare(unfolded, normalized, varmax + 1))
+
+    def test_deep_apply(self):
+        # more variables than the default recursion limit, x1 | ... | xn and x1 & ... & xn
+        varmax = 1500
+        ncache = ABDDNodeCacheClass()
+        or_node = construct_node(varmax, None, [ncache.terminal_0], None, [ncache.terminal_1], ncache)
+        and_node = or_node
+        for var in range(varmax - 1, 0, -1):
+            or_node = construct_node(var, None, [or_node], "X", [ncache.terminal_1], ncache)
+            and_node = construct_node(var, "X", [ncache.terminal_0], None, [and_node], ncache)
+        abdd_or = ABDD("or", varmax, [or_node])
+        abdd_and = ABDD("and", varmax, [and_node])
+
+        result = abdd_apply(BooleanOperation.XOR, abdd_or, abdd_and, ncache, maxvar=varmax)
+        negated = abdd_apply(BooleanOperation.NOT, result, None, ncache, maxvar=varmax)
+        for assignment in [[False] * varmax, [True] * varmax, [i == 700 for i in range(varmax)]]:
+            expected = any(assignment) != all(assignment)
+            self.assertEqual(result.evaluate_for(assignment), expected)
+            self.assertEqual(negated.evaluate_for(assignment), not expected)
@@ -1,5 +1,7 @@
 import unittest
-from bdd.bdd_class import compare_bdds
+from bdd.bdd_class import BDD, compare_bdds
+from bdd.bdd_node import BDDnode
+from formats.format_blif import BlifParser
 import tests.bdd_examples as bd
 
 
@@ -15,3 +17,40 @@ class TestBinaryDecisionDiagramBasic(unittest.TestCase):
         self.assertTrue(compare_bdds(bd.bdd_1, bd.bdd_2))
         self.assertTrue(bd.bdd_1.is_valid())
         self.assertTrue(bd.bdd_2.is_valid())
+
+    def test_deep_bdd_traversals(self):
+        # a chain of nodes longer than the recursion limit, all low edges lead to the same terminal
+        terminal_0, terminal_1 = BDDnode("0", 0), BDDnode("1", 1)
+        root = terminal_1
+        for i in range(5000, 0, -1):
+            root = BDDnode(f"n{i}", f"x{i}", terminal_0, root)
+        bdd = BDD("chain", root)
+        self.assertEqual(bdd.count_nodes(), 5002)
+        self.assertEqual(len(bdd.get_variable_list()), 5000)
+        self.assertEqual(len(bdd.get_terminal_nodes_list()), 2)
+        self.assertEqual(sorted(bdd.get_terminal_symbols_list()), [0, 1])
+        self.assertEqual(bdd.count_branches_iter(0), 5000)
+        self.assertEqual(bdd.count_branches_iter(1), 1)
+        self.assertEqual([n.name for n in bdd.iterate_dfs_recursive()][:3], ["n1", "0", "n2"])
+        self.assertTrue(compare_bdds(bdd, bdd))
+        self.assertIs(root.find_node("n4999").high.high, terminal_1)
+        # parents are not stored in the nodes, the index is built on demand
+        self.assertFalse(hasattr(root, "parents"))
+        self.assertEqual(len(bdd.get_parents(terminal_0)), 5000)
+        self.assertEqual(bdd.get_parents(root), [])
+
+    def test_blif_many_constructs(self):
+        # more constructs than the recursion limit
+        count = 2000
+        lines = [".model chain", ".inputs " + " ".join([str(i) for i in range(1, count + 1)]), ".outputs 1"]
+        for i in range(1, count):
+            lines.extend([f".names {i} {i + 1}", "1 1", "0 0"])
+        lines.append(".end")
+        parser = BlifParser("balanced")
+        parser.tokens = []
+        for line in lines:
+            parser.tokens.extend(line.split() + ["\n"])
+        parser.create_vars_cache()
+        parser.syntax_analysis()
+        # all signals are equal, one node per variable on each of the two paths (except the first one)
+        self.assertEqual(parser.result.count_nodes(), 2 * count + 1)
@@ -0,0 +1,84 @@
+import unittest
+
+from bdd.bdd_apply import apply_function
+from bdd.bdd_class import BDD, compare_bdds
+from bdd.bdd_manager import BDDManagerClass
+from bdd.bdd_node import BDDnode
+from formats.format_dimacs import dimacs_read
+import tests.bdd_examples as bd
+
+
+def evaluate(bdd: BDD, assignment: dict[str, int]) -> int:
+    node = bdd.root
+    while not node.is_leaf():
+        node = node.high if assignment[node.value] == 1 else node.low
+    return node.value
+
+
+class TestBDDManager(unittest.TestCase):
+    def test_apply_semantics(self):
+        manager = BDDManagerClass()
+        variables = ["x1", "x2", "x4"]
+        for op, func in [
+            ("and", lambda a, b: a and b),
+            ("or", lambda a, b: a or b),
+            ("xor", lambda a, b: a ^ b),
+            ("nand", lambda a, b: int(not (a and b))),
+            ("nor", lambda a, b: int(not (a or b))),
+        ]:
+            result = manager.apply(op, bd.bdd_3, bd.bdd_4)
+            self.assertTrue(result.is_valid())
+            for bits in range(8):
+                assignment = {var: (bits >> i) & 1 for i, var in enumerate(variables)}
+                expected = func(evaluate(bd.bdd_3, assignment), evaluate(bd.bdd_4, assignment))
+                self.assertEqual(evaluate(result, assignment), expected)
+        # without a manager, apply_function() gives the same result
+        self.assertTrue(compare_bdds(apply_function("or", bd.bdd_3, bd.bdd_4), manager.apply("or", bd.bdd_3, bd.bdd_4)))
+
+    def test_shared_across_calls(self):
+        manager = BDDManagerClass()
+        first = apply_function("and", bd.bdd_3, bd.bdd_4, manager=manager)
+        created = manager.stats.created_nodes
+        hits = manager.stats.cache_hits
+        second = apply_function("and", bd.bdd_4, bd.bdd_3, manager=manager)
+        # the same function is the same node, the second call is answered by the computed table
+        self.assertIs(first.root, second.root)
+        self.assertEqual(manager.stats.created_nodes, created)
+        self.assertEqual(manager.stats.cache_hits, hits + 1)
+        third = apply_function("or", first, bd.bdd_3, manager=manager)
+        self.assertIs(third.root, manager.nodes[manager.get_id(bd.bdd_3.root)])
+
+    def test_variable_order(self):
+        manager = BDDManagerClass(["x4", "x2", "x1"])
+        node = BDDnode("r", "x4", BDDnode("s", "x1", manager.terminal_0, manager.terminal_1), manager.terminal_0)
+        self.assertEqual(manager.apply("or", BDD("a", node), BDD("b", manager.terminal_0)).root.value, "x4")
+        # BDDs in a different variable order are rebuilt in the order of the manager
+        result = manager.apply("and", bd.bdd_3, bd.bdd_4)
+        self.assertEqual(result.root.value, "x4")
+        for bits in range(8):
+            assignment = {var: (bits >> i) & 1 for i, var in enumerate(["x1", "x2", "x4"])}
+            expected = evaluate(bd.bdd_3, assignment) and evaluate(bd.bdd_4, assignment)
+            self.assertEqual(evaluate(result, assignment), expected)
+        # variables outside of an explicit order
+        with self.assertRaises(ValueError):
+            manager.apply("and", bd.bdd_1, bd.bdd_1)
+        # without an explicit order, the variables need a number
+        with self.assertRaises(ValueError):
+            BDDManagerClass().get_level("a")
+
+    def test_dimacs_garbage_collection(self):
+        path = "../benchmark/dimacs/uf20/uf20-01.cnf"
+        reference = dimacs_read(path, max_clausules=40)
+        manager = BDDManagerClass()
+        shared = dimacs_read(path, max_clausules=40, manager=manager)
+        self.assertTrue(compare_bdds(reference, shared))
+        self.assertEqual(reference.count_nodes(), shared.count_nodes())
+        self.assertGreater(len(manager), shared.count_nodes())
+        removed = manager.collect_garbage([shared.root])
+        self.assertEqual(len(manager), shared.count_nodes())
+        self.assertEqual(manager.stats.collected_nodes, removed)
+        # the remaining nodes keep working after renumbering
+        again = manager.apply("and", shared, shared)
+        self.assertIs(again.root, shared.root)
+        for node in shared.iterate_dfs():
+            self.assertIn(id(node), manager.ids)
@@ -0,0 +1,161 @@
+import itertools
+import unittest
+
+from apply.abdd import convert_ta_to_abdd, import_abdd_from_abdd_file
+from apply.abdd_canonization import abdd_canonize
+from apply.abdd_node_cache import ABDDNodeCacheClass
+from apply.abdd_reordering import abdd_reorder
+from bdd.bdd_apply import apply_function_many
+from bdd.bdd_class import BDD
+from bdd.bdd_manager import BDDManagerClass, bdd_reordering_methods, get_adjacent_transpositions, reorder_bdd
+from formats.format_blif import BlifParser
+from formats.format_dimacs import dimacs_read
+from formats.format_vtf import import_treeaut_from_vtf
+from helpers.utils import box_orders
+
+
+def evaluate(bdd: BDD, assignment: dict[str, int]) -> int:
+    node = bdd.root
+    while not node.is_leaf():
+        node = node.high if assignment[node.value] == 1 else node.low
+    return node.value
+
+
+def create_pairs(manager: BDDManagerClass, count: int) -> int:
+    """
+    x1 & x(n+1) | x2 & x(n+2) | ... - exponential in the default order, linear with the pairs next to each other.
+    """
+    result = 0
+    for i in range(1, count + 1):
+        pair = manager.apply_ids("and", manager.make_node(i, 0, 1), manager.make_node(i + count, 0, 1))
+        result = manager.apply_ids("or", result, pair)
+    return result
+
+
+def create_clause(manager: BDDManagerClass, literals: list[str]) -> BDD:
+    result = 0
+    for literal in literals:
+        level = manager.get_level(literal.lstrip("-"))
+        result = manager.apply_ids("or", result, manager.make_node(level, *((1, 0) if literal[0] == "-" else (0, 1))))
+    return manager.get_bdd(result)
+
+
+class TestBDDReordering(unittest.TestCase):
+    def test_adjacent_transpositions(self):
+        for size in range(1, 5):
+            permutation = list(range(size))
+            seen = {tuple(permutation)}
+            for i in get_adjacent_transpositions(size):
+                permutation[i], permutation[i + 1] = permutation[i + 1], permutation[i]
+                seen.add(tuple(permutation))
+            self.assertEqual(len(seen), len(list(itertools.permutations(range(size)))))
+
+    def test_swap_levels(self):
+        manager = BDDManagerClass([f"x{i}" for i in range(1, 7)])
+        bdd = manager.get_bdd(create_pairs(manager, 3))
+        assignments = [{f"x{i + 1}": (bits >> i) & 1 for i in range(6)} for bits in range(64)]
+        expected = [evaluate(bdd, a) for a in assignments]
+        manager.start_reordering([bdd.root])
+        manager.swap_levels(2, 3)
+        manager.swap_levels(3, 4)
+        self.assertEqual(manager.get_order(), ["x1", "x3", "x4", "x2", "x5", "x6"])
+        self.assertEqual(manager.count_live_nodes(), bdd.count_nodes() - 2)
+        manager.finish_reordering([bdd.root])
+        self.assertEqual(len(manager), bdd.count_nodes())
+        self.assertEqual([evaluate(bdd, a) for a in assignments], expected)
+        # BDDs created in the original order are still recognized
+        original = BDDManagerClass([f"x{i}" for i in range(1, 7)])
+        imported = manager.get_id(original.get_bdd(create_pairs(original, 3)).root)
+        self.assertIs(manager.nodes[imported], bdd.root)
+
+    def test_reorder_methods(self):
+        manager = BDDManagerClass([f"x{i}" for i in range(1, 13)])
+        bdd = manager.get_bdd(create_pairs(manager, 6))
+        assignments = [{f"x{i + 1}": (bits >> i) & 1 for i in range(12)} for bits in range(0, 4096, 7)]
+        expected = [evaluate(bdd, a) for a in assignments]
+        for method in bdd_reordering_methods:
+            result = reorder_bdd(bdd, method)
+            self.assertLessEqual(result.count_nodes(), 18)
+            self.assertEqual([evaluate(result, a) for a in assignments], expected)
+        before = bdd.count_nodes()
+        self.assertEqual(manager.reorder([bdd.root]), bdd.count_nodes() - 2)
+        self.assertLess(bdd.count_nodes(), before)
+        self.assertEqual([evaluate(bdd, a) for a in assignments], expected)
+        self.assertEqual(manager.stats.reorderings, 1)
+
+    def test_sifting_both_directions(self):
+        variables = [f"x{i}" for i in range(1, 9)]
+        manager = BDDManagerClass(variables)
+        result = 1
+        for level in range(8, 0, -1):
+            result = manager.make_node(level, 0, result)
+        bdd = manager.get_bdd(result)
+
+        def cost(root_ids: list[int]) -> int:
+            # x5 is best on the top level (explored second), other variables must keep their order
+            others = [manager.levels[var] for var in variables if var != "x5"]
+            inversions = sum(1 for i, j in itertools.combinations(range(len(others)), 2) if others[i] > others[j])
+            return manager.levels["x5"] ** 3 + 1000 * inversions
+
+        self.assertEqual(manager.reorder([bdd.root], "sifting", cost), 1)
+        self.assertEqual(manager.get_order(), ["x5", "x1", "x2", "x3", "x4", "x6", "x7", "x8"])
+        self.assertEqual(bdd.count_nodes(), 10)
+
+    def test_automatic_reordering(self):
+        path = "../benchmark/dimacs/uf20/uf20-01.cnf"
+        reference = dimacs_read(path, max_clausules=60)
+        manager = BDDManagerClass()
+        manager.reorder_limit = 50
+        clauses = []
+        with open(path, "r") as file:
+            for line in file:
+                words = line.strip().split()
+                if len(clauses) < 60 and len(words) == 4 and words[0].lstrip("-").isdigit():
+                    clauses.append(create_clause(manager, words[:3]))
+        result = apply_function_many("and", clauses, "linear", manager, collect_garbage=True)
+        self.assertGreater(manager.stats.reorderings, 0)
+        assignments = [{f"{i + 1}": (bits >> i) & 1 for i in range(20)} for bits in range(0, 2**20, 997)]
+        self.assertEqual([evaluate(result, a) for a in assignments], [evaluate(reference, a) for a in assignments])
+
+    def test_automatic_reordering_parsers(self):
+        path = "../benchmark/dimacs/uf20/uf20-01.cnf"
+        reference = dimacs_read(path, max_clausules=60)
+        result = dimacs_read(path, max_clausules=60, reorder_limit=50)
+        assignments = [{f"{i + 1}": (bits >> i) & 1 for i in range(20)} for bits in range(0, 2**20, 997)]
+        self.assertEqual([evaluate(result, a) for a in assignments], [evaluate(reference, a) for a in assignments])
+        self.assertLess(result.count_nodes(), reference.count_nodes())
+
+        reference = BlifParser()
+        reference.parse("../benchmark/blif/C17.blif")
+        parser = BlifParser(reorder_limit=20)
+        parser.parse("../benchmark/blif/C17.blif")
+        self.assertGreater(parser.manager.stats.reorderings, 0)
+        variables = sorted(set(reference.result.get_variable_list() + parser.result.get_variable_list()))
+        assignments = [{var: (bits >> i) & 1 for i, var in enumerate(variables)} for bits in range(2 ** len(variables))]
+        expected = [evaluate(reference.result, a) for a in assignments]
+        self.assertEqual([evaluate(parser.result, a) for a in assignments], expected)
+
+    def test_abdd_reordering(self):
+        ncache = ABDDNodeCacheClass()
+        inputs = [
+            convert_ta_to_abdd(
+                import_treeaut_from_vtf("../tests/apply/ta-to-abdd-conversion/simple-input-1.vtf"), ncache, 10
+            ),
+            import_abdd_from_abdd_file("../tests/apply/materialization-inputs/materialization-lport-10-4.dd", ncache),
+        ]
+        for abdd in inputs:
+            for boxes in [box_orders["full"], box_orders["bdd"]]:
+                reference = abdd_canonize(abdd, boxes)
+                result, order = abdd_reorder(abdd, boxes)
+                self.assertEqual(sorted(order), list(range(1, abdd.variable_count + 1)))
+                self.assertLessEqual(result.count_nodes(), reference.count_nodes())
+                for bits in range(2**abdd.variable_count):
+                    assignment = [bool((bits >> i) & 1) for i in range(abdd.variable_count)]
+                    permuted = [assignment[var - 1] for var in order]
+                    self.assertEqual(result.evaluate_for(permuted), reference.evaluate_for(assignment))
+        # the box-aware cost finds an order which the BDD node count does not prefer
+        abdd = import_abdd_from_abdd_file(
+            "../tests/apply/materialization-inputs/materialization-hport-10-13.dd", ncache
+        )
+        self.assertLess(abdd_reorder(abdd)[0].count_nodes(), abdd_canonize(abdd).count_nodes())
+        self.assertEqual(abdd_reorder(abdd, box_orders["bdd"])[1], list(range(1, abdd.variable_count + 1)))
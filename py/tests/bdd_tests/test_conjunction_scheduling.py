@@ -0,0 +1,77 @@
+import unittest
+
+from apply.abdd_apply_main import abdd_apply_many, abdd_support
+from apply.abdd_call_cache import ABDDCallCacheClass
+from apply.abdd_canonization import ABDDCanonizationHelper, abdd_canonize
+from apply.abdd_dimacs import create_clause_abdd, read_dimacs_clauses
+from apply.abdd_node_cache import ABDDNodeCacheClass
+from apply.box_algebra.apply_tables import BooleanOperation
+from bdd.bdd_class import compare_bdds
+from formats.format_blif import BlifParser
+from formats.format_dimacs import dimacs_read
+from helpers.conjunction_scheduling import ConjunctionScheduleStats, conjunction_strategies, schedule_conjunction
+from helpers.utils import box_orders
+
+
+def concat(first: str, second: str) -> str:
+    return f"({first}{second})"
+
+
+class TestConjunctionScheduling(unittest.TestCase):
+    def test_schedule_shapes(self):
+        operands = ["a", "b", "c", "d", "e"]
+        self.assertEqual(schedule_conjunction(operands, concat, len, "linear"), "((((ab)c)d)e)")
+        self.assertEqual(schedule_conjunction(operands, concat, len, "balanced"), "(((ab)(cd))e)")
+        sizes = {"a": 5, "b": 1, "c": 4, "d": 2, "e": 3}
+        size = lambda d: sizes.get(d, len(d))
+        self.assertEqual(schedule_conjunction(operands, concat, size, "smallest"), "(a((bd)(ec)))")
+        supports = {"a": {1, 2}, "b": {3}, "c": {1, 3}, "d": {2}, "e": {3, 4}}
+        support = lambda d: supports[d]
+        self.assertEqual(schedule_conjunction(operands, concat, len, "cluster", support), "(((be)d)(ac))")
+        stats = ConjunctionScheduleStats()
+        live: list[list[str]] = []
+        schedule_conjunction(operands, concat, len, "balanced", collect=live.append, stats=stats)
+        self.assertEqual(stats.steps, 4)
+        self.assertEqual(stats.peak_size, len("(((ab)(cd))e)"))
+        self.assertEqual(live[0], ["(ab)", "c", "d", "e"])
+        with self.assertRaises(ValueError):
+            schedule_conjunction(operands, concat, len, "cluster")
+
+    def test_bdd_strategies(self):
+        path = "../benchmark/dimacs/uf20/uf20-01.cnf"
+        reference = dimacs_read(path, max_clausules=50)
+        for strategy in conjunction_strategies:
+            stats = ConjunctionScheduleStats()
+            result = dimacs_read(path, max_clausules=50, schedule=strategy, stats=stats)
+            self.assertTrue(compare_bdds(reference, result))
+            self.assertEqual(stats.steps, 49)
+        reference = BlifParser()
+        reference.parse("../benchmark/blif/C17.blif")
+        for strategy in conjunction_strategies:
+            parser = BlifParser(strategy)
+            parser.parse("../benchmark/blif/C17.blif")
+            self.assertTrue(compare_bdds(reference.result, parser.result))
+
+    def test_abdd_strategies(self):
+        ncache = ABDDNodeCacheClass()
+        ccache = ABDDCallCacheClass()
+        count, literals = read_dimacs_clauses("../benchmark/dimacs/uf20/uf20-01.cnf", 20)
+        helper = ABDDCanonizationHelper(count, box_orders["bdd"], ncache)
+        clauses = [create_clause_abdd(clause, f"{i}", helper) for i, clause in enumerate(literals)]
+        roots = []
+        for strategy in conjunction_strategies:
+            result = abdd_apply_many(BooleanOperation.AND, clauses, strategy, ncache, count, ccache)
+            canonical = abdd_canonize(result, box_orders["full"], ncache)
+            roots.append((canonical.root_rule, canonical.roots))
+        for rule, nodes in roots[1:]:
+            self.assertEqual(rule, roots[0][0])
+            self.assertEqual([n.uid for n in nodes], [n.uid for n in roots[0][1]])
+
+    def test_abdd_support(self):
+        helper = ABDDCanonizationHelper(8, box_orders["full"], ABDDNodeCacheClass())
+        # the root rule covers the levels above the topmost node
+        clause = create_clause_abdd([1, 2, 3, 4, 5], "c", helper)
+        self.assertIsNotNone(clause.root_rule)
+        self.assertEqual(abdd_support(clause), {1, 2, 3, 4, 5})
+        self.assertEqual(abdd_support(create_clause_abdd([-3, -4, 6], "c", helper)), {3, 4, 6})
+        self.assertEqual(abdd_support(create_clause_abdd([2, -2], "c", helper)), set())
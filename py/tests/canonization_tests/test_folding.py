@@ -1,18 +1,29 @@
+import contextlib
+import csv
+import io
+import os
+import tempfile
 import unittest
 
 from apply.abdd_apply_main import abdd_apply
 from apply.abdd import convert_ta_to_abdd, import_abdd_from_abdd_file
 from apply.abdd_node_cache import ABDDNodeCacheClass
 from apply.box_algebra.apply_tables import BooleanOperation
+from formats.format_abdd import import_treeaut_from_abdd
 from formats.format_vtf import import_treeaut_from_vtf
 from apply.evaluation import compare_abdds_tas, compare_op_abdd
 from canonization.folding_new_attempt import new_fold, divide_multivar_states
 from tree_automata import TTreeAut, remove_useless_states
+from tree_automata.functions.trimming import shrink_to_top_down_reachable_2
 from bdd.bdd_to_treeaut import add_dont_care_boxes
 from canonization.unfolding import ubda_unfolding
 from canonization.folding import get_mapping, ubda_folding
-from canonization.folding_helpers import get_maximal_mapping_fixed, port_to_state_mapping
+from canonization.folding_helpers import FoldingHelper, get_maximal_mapping_fixed, port_to_state_mapping
+from canonization.folding_intersectoid import create_intersectoid
+from canonization.incremental import IncrementalCanonizationHelper
 from canonization.normalization import is_normalized, ubda_normalize
+from experiments.experiment import create_dimacs
+from experiments.parallel_canonization import CSV_COLUMNS, create_jobs, run_parallel_canonization
 from experiments.simulation import simulate_and_compare
 from tree_automata.var_manipulation import add_variables_bottom_up, check_variable_overlap
 from helpers.string_manipulation import create_var_order_list
@@ -123,3 +134,119 @@ class TestUBDAFolding(unittest.TestCase):
         new_unfolded1 = ubda_unfolding(folded1, 6)
         add_variables_bottom_up(new_unfolded1, var_count)
         self.assertTrue(simulate_and_compare(unfolded1, new_unfolded1, var_count))
+
+
+class TestIntersectoidCache(unittest.TestCase):
+    def prepare_ubda(self, path: str) -> tuple[TTreeAut, int]:
+        initial = import_treeaut_from_abdd(path)
+        vars = int(initial.get_var_order()[-1])
+        unfolded = ubda_unfolding(add_dont_care_boxes(initial, vars), vars + 1)
+        add_variables_bottom_up(unfolded, vars)
+        normalized = ubda_normalize(unfolded, create_var_order_list("", vars + 2, start=0))
+        normalized.reformat_keys()
+        normalized.reformat_states()
+        add_variables_bottom_up(normalized, vars + 2)
+        return normalized, vars
+
+    def test_cached_intersectoid(self):
+        ubda, vars = self.prepare_ubda("../benchmark/blif-processed/C1908/C1908.iscas.var903.abdd")
+        helper = FoldingHelper(ubda, vars + 1)
+        box = box_catalogue["boxLPort"]
+        for state in ubda.get_states():
+            expected = create_intersectoid(ubda, box, state, helper)
+            cone: set[str] = set()
+            cached = create_intersectoid(ubda, box, state, helper, use_cache=True, cone=cone)
+            self.assertEqual((cached.roots, str(cached.transitions)), (expected.roots, str(expected.transitions)))
+            self.assertIn(state, cone)
+        self.assertTrue(helper.intersectoid_cache.product_hits > 0)
+
+        state = ubda.roots[0]
+        pair_id = helper.intersectoid_cache.get_pair_id(box.name, state, box.roots[0])
+        self.assertIn(pair_id, helper.intersectoid_cache.products)
+        helper.intersectoid_cache.invalidate(state)
+        self.assertNotIn(pair_id, helper.intersectoid_cache.products)
+
+    def test_cached_folding(self):
+        ubda, vars = self.prepare_ubda("../benchmark/blif-processed/C1908/C1908.iscas.var903.abdd")
+        folded = ubda_folding(ubda, box_orders["full"], vars + 1)
+        # verbose folding does not use the cache
+        with contextlib.redirect_stdout(io.StringIO()):
+            reference = ubda_folding(ubda, box_orders["full"], vars + 1, verbose=True, output=io.StringIO())
+        self.assertEqual(folded.roots, reference.roots)
+        self.assertEqual(str(folded.transitions), str(reference.transitions))
+
+
+class TestParallelCanonization(unittest.TestCase):
+    def test_parallel_canonization_deterministic(self):
+        files = [
+            "../benchmark/blif-processed/C1908/C1908.iscas.var903.abdd",
+            "../benchmark/blif-processed/other/c8.var68.abdd",
+        ]
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        csv_path = os.path.join(directory.name, "canonization.csv")
+        serial = run_parallel_canonization(files, ["bdd", "full"], processes=1, keep_results=True)
+        parallel = run_parallel_canonization(files, ["bdd", "full"], processes=2, csv_path=csv_path)
+        self.assertEqual([(r.benchmark, r.order) for r in serial], [(r.benchmark, r.order) for r in parallel])
+        self.assertEqual([r.get_row()[:7] for r in serial], [r.get_row()[:7] for r in parallel])
+        self.assertTrue(all([r.folded is not None and r.folded_count > 0 for r in serial]))
+        with open(csv_path) as file:
+            rows = list(csv.reader(file))
+        self.assertEqual(rows[0], CSV_COLUMNS)
+        self.assertEqual(rows[1:], [[str(item) for item in r.get_row()] for r in parallel])
+
+    def test_split_roots(self):
+        file, path = tempfile.mkstemp(suffix=".dd")
+        with os.fdopen(file, "w") as f:
+            f.write("@BDD\n%Name two\n%Vars 3\n%Root 1\n%Root 2\n1[1] 3 <1>\n2[2] <0> 3\n3[3] <0> <1>\n")
+        self.addCleanup(os.remove, path)
+        jobs = create_jobs([path])
+        self.assertEqual([job.root for job in jobs], ["1", "2"])
+        self.assertEqual([len(job.initial.get_states()) for job in jobs], [4, 4])
+        self.assertEqual(len(create_jobs([path], split_roots=False)), 1)
+        results = run_parallel_canonization([path], ["bdd"], processes=1)
+        self.assertEqual([result.error for result in results], ["", ""])
+
+
+class TestIncrementalCanonization(unittest.TestCase):
+    def create_progressive_cnf(self) -> list[str]:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "progressive.cnf")
+        with open(path, "w") as file:
+            file.write("p cnf 20 8\n1 -20 5 0\n8 -1 2 0\n3 -15 19 0\n-15 6 -13 0\n9 -19 -13 0\n3 20 17 0\n")
+            file.write("-2 -11 8 0\n16 13 -9 0\n")
+        create_dimacs(path, directory.name)
+        return [os.path.join(directory.name, f"progressive-c{i}.dd") for i in range(1, 9)]
+
+    def prepare_step(self, path: str) -> TTreeAut:
+        initial = import_treeaut_from_abdd(path)
+        initial.reformat_states()
+        unfolded = ubda_unfolding(initial, 21)
+        normalized = shrink_to_top_down_reachable_2(ubda_normalize(unfolded, create_var_order_list("", 21)))
+        normalized.reformat_keys()
+        return normalized
+
+    def test_incremental_folding(self):
+        helper = IncrementalCanonizationHelper(box_orders["full"], 21)
+        for path in self.create_progressive_cnf():
+            ubda = self.prepare_step(path)
+            hits = helper.store.hits
+            folded = helper.fold(ubda)  # states of 'ubda' are renamed structurally
+            reference = ubda_folding(ubda, box_orders["full"], 21)
+            self.assertEqual((folded.roots, folded.rootbox), (reference.roots, reference.rootbox))
+            self.assertEqual(str(folded.transitions), str(reference.transitions))
+            if helper.steps > 1:
+                self.assertTrue(helper.store.hits > hits)
+                self.assertTrue(helper.changed < len(ubda.get_states()))
+
+        # nothing changed, everything is reused
+        misses = helper.store.misses
+        self.assertEqual(str(helper.fold(ubda, changed=set()).transitions), str(reference.transitions))
+        self.assertEqual(helper.store.misses, misses)
+
+        # change of one state invalidates its upward cone
+        state = [s for s in ubda.get_states() if s not in ubda.roots][0]
+        self.assertEqual(str(helper.fold(ubda, changed={state}).transitions), str(reference.transitions))
+        self.assertTrue(helper.store.misses > misses)
+        self.assertTrue(helper.changed < helper.cone <= len(ubda.get_states()))
@@ -3,7 +3,7 @@ import unittest
 from bdd.bdd_to_treeaut import fill_dont_care_boxes
 from experiments.simulation import simulate_and_compare
 from formats.format_vtf import import_treeaut_from_vtf
-from canonization.normalization import ubda_normalize, is_normalized
+from canonization.normalization import NormalizationStats, ubda_normalize, is_normalized
 from formats.render_dot import export_to_file
 from tree_automata.functions.trimming import remove_useless_states
 from helpers.string_manipulation import create_var_order_list
@@ -173,3 +173,16 @@ class TestUBDANormalization(unittest.TestCase):
         normalized_bda_6 = ubda_normalize(test_bda_6, create_var_order_list("x", vars))
         self.assertTrue(check_variable_overlap(normalized_bda_6))
         self.assertTrue(simulate_and_compare(test_bda_6, normalized_bda_6, vars))
+
+    def test_normalization_processed_tuples(self):
+        vars: int = 8
+        initial_bda = import_treeaut_from_vtf("../tests/normalization/normalizationTest1.vtf")
+        fill_dont_care_boxes(initial_bda, vars)
+        test_bda = ubda_unfolding(initial_bda, vars)
+        stats = NormalizationStats()
+        normalized_bda = ubda_normalize(test_bda, create_var_order_list("x", vars), stats=stats)
+        self.assertEqual(stats.levels, vars - 1)
+        self.assertLess(stats.processed_tuples, stats.product_tuples)
+        self.assertTrue(stats.max_worklist > 0)
+        self.assertEqual(str(normalized_bda), str(ubda_normalize(test_bda, create_var_order_list("x", vars))))
+        self.assertTrue(simulate_and_compare(test_bda, normalized_bda, vars))
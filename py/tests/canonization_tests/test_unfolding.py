@@ -1,7 +1,13 @@
+import copy
+import itertools
 import unittest
 
 from formats.format_vtf import import_treeaut_from_vtf
+from canonization.lazy_unfolding import lazy_unfolding
+from canonization.normalization import ubda_normalize
 from canonization.unfolding import ubda_unfolding, is_unfolded
+from apply.evaluation import evaluate_for_treeaut_backtrack
+from helpers.string_manipulation import create_var_order_list
 from tree_automata.automaton import TTreeAut
 from apply.abdd import ABDD, import_abdd_from_abdd_file
 from apply.abdd_node_cache import ABDDNodeCacheClass
@@ -49,3 +55,40 @@ class TestUBDARootRuleUnfolding(unittest.TestCase):
         treeaut = abdd_example.convert_to_treeaut_obj()
         unfolded_4 = ubda_unfolding(treeaut, 11)
         self.assertTrue(is_unfolded(unfolded_4))
+
+
+class TestLazyUnfolding(unittest.TestCase):
+    inputs = [
+        ("../tests/unfolding/unfoldingTest2.vtf", 8),
+        ("../tests/unfolding/unfoldingTest3.vtf", 5),
+        ("../tests/apply/ta-to-abdd-conversion/simple-input-1.vtf", 11),
+        ("../tests/apply/ta-to-abdd-conversion/simple-input-2.vtf", 11),  # X root rule
+    ]
+
+    def test_lazy_unfolding_equivalence(self):
+        for path, max_var in self.inputs:
+            folded = import_treeaut_from_vtf(path)
+            unfolded = ubda_unfolding(copy.deepcopy(folded), max_var)
+            view = lazy_unfolding(folded, max_var)
+            for assignment in itertools.product([0, 1], repeat=max_var - 1):
+                self.assertEqual(
+                    evaluate_for_treeaut_backtrack(view, list(assignment)),
+                    evaluate_for_treeaut_backtrack(unfolded, list(assignment)),
+                )
+            materialized = view.materialize()
+            self.assertTrue(is_unfolded(materialized))
+            self.assertEqual(len(materialized.get_states()), len(unfolded.get_states()))
+
+            # normalization can read the view directly
+            var_order = create_var_order_list("", max_var)
+            normalized = ubda_normalize(view, var_order)
+            self.assertEqual(len(normalized.get_states()), len(ubda_normalize(unfolded, var_order).get_states()))
+
+    def test_lazy_unfolding_on_demand(self):
+        path, max_var = self.inputs[0]
+        view = lazy_unfolding(import_treeaut_from_vtf(path), max_var)
+        self.assertEqual(view.memo, {})
+        evaluate_for_treeaut_backtrack(view, [0] * (max_var - 1))
+        visited = len(view.memo)
+        self.assertGreater(visited, 0)
+        self.assertLess(visited, len(view.get_states()))
@@ -0,0 +1,60 @@
+import os
+import tempfile
+import unittest
+
+from apply.abdd import import_abdd_from_abdd_file
+from formats.dd_reader import DDReaderStats
+from formats.format_abdd import import_treeaut_from_abdd
+from tree_automata.automaton import iterate_edges
+
+
+class TestABDDFormatImport(unittest.TestCase):
+    def write_dd(self, content: str) -> str:
+        file, path = tempfile.mkstemp(suffix=".dd")
+        with os.fdopen(file, "w") as f:
+            f.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_import_abdd_forward_references(self):
+        # nodes are referenced before they are defined (placeholders are filled in later)
+        stats = DDReaderStats()
+        abdd = import_abdd_from_abdd_file("../tests/abdd-format/multiroot-example.dd", stats=stats)
+        self.assertEqual(abdd.name, "three_L1_to_zero")
+        self.assertEqual(abdd.variable_count, 10)
+        self.assertEqual(abdd.root_rule, "LPort")
+        self.assertEqual([root.var for root in abdd.roots], [6, 3])
+        self.assertEqual(abdd.roots[1].high[0], abdd.roots[0])
+        self.assertEqual(abdd.count_nodes(), 6)
+        self.assertEqual(stats.lines, 10)
+        self.assertEqual(stats.nodes, 4)
+
+        mapped = import_abdd_from_abdd_file("../tests/abdd-format/multiroot-example.dd", use_mmap=True)
+        for assignment in [[False] * 10, [True] * 10, [True, False] * 5, [False, True] * 5]:
+            self.assertEqual(abdd.evaluate_for(assignment), mapped.evaluate_for(assignment))
+
+    def test_import_abdd_invalid(self):
+        path = self.write_dd("@ABDD\n%Name undefined\n%Vars 4\n%Root 1\n1[1] 2 (3)[X] # comment\n2[2] <0> <1>\n")
+        with self.assertRaises(ValueError):
+            import_abdd_from_abdd_file(path)
+        path = self.write_dd("@ABDD\n%Vars 4\n%Root 1\n1[1] 2 2\n2[2] <0> <1>\n2[3] <0> <1>\n")
+        with self.assertRaises(ValueError):
+            import_abdd_from_abdd_file(path)
+        path = self.write_dd("@ABDD\n%Vars 4\n%Root 1\n1[1] <0> <1>\nnot a node\n")
+        with self.assertRaises(ValueError):
+            import_abdd_from_abdd_file(path)
+
+    def test_import_treeaut_multiple(self):
+        path = self.write_dd(
+            "@ABDD\n%Name first\n%Vars 3\n%Root 1\n1[1] 2[X] (2, 3)[LPort]\n2[2] <0> <1>\n3[3] <1> <0>\n\n"
+            "@BDD\n%Name second\n%Root 1\n1[1] <0> <1>\n"
+        )
+        for use_mmap in [False, True]:
+            first, second = import_treeaut_from_abdd(path, use_mmap=use_mmap)
+            self.assertEqual((first.name, first.roots), ("first", ["1"]))
+            self.assertEqual(len(list(iterate_edges(first))), 5)
+            self.assertEqual(first.transitions["1"]["k0"].children, ["2", "2", "3"])
+            self.assertEqual(first.transitions["1"]["k0"].info.box_array, ["X", "LPort"])
+            self.assertEqual(first.transitions["<0>"]["k3"].info.variable, "4")
+            self.assertEqual(second.name, "second")
+            self.assertEqual(second.transitions["<0>"]["k1"].info.variable, "3")
@@ -0,0 +1,109 @@
+import copy
+import unittest
+
+from bdd.bdd_to_treeaut import add_dont_care_boxes
+from canonization.folding import ubda_folding
+from canonization.folding_helpers import add_variables_bottomup_folding
+from canonization.normalization import ubda_normalize
+from canonization.unfolding import ubda_unfolding
+from formats.format_abdd import import_treeaut_from_abdd
+from formats.format_vtf import import_treeaut_from_vtf
+from helpers.string_manipulation import create_var_order_list
+from helpers.utils import box_orders
+from tree_automata import TTreeAut
+from tree_automata.var_manipulation import add_variables_bottom_up, add_variables_fixpoint
+
+
+def snapshot(ta: TTreeAut) -> tuple[list[str], str]:
+    return [r for r in ta.roots], str(ta.transitions)
+
+
+class TestCopyOnWrite(unittest.TestCase):
+    def get_input(self) -> TTreeAut:
+        return import_treeaut_from_vtf("../tests/apply/ta-to-abdd-conversion/simple-input-1.vtf")
+
+    def test_shared_until_modified(self):
+        ta = self.get_input()
+        result = ta.copy()
+        self.assertEqual(snapshot(result), snapshot(ta))
+        for state in ta.get_states():
+            self.assertIs(result.transitions[state], ta.transitions[state])
+        state = ta.roots[0]
+        key = next(iter(ta.transitions[state]))
+        result.remove_transition(state, key)
+        self.assertIn(key, ta.transitions[state])
+        self.assertNotIn(key, result.transitions[state])
+        for other in ta.get_states():
+            if other != state:
+                self.assertIs(result.transitions[other], ta.transitions[other])
+
+    def test_modifying_methods(self):
+        ta = self.get_input()
+        state = ta.get_states()[-1]
+        calls = [
+            lambda t: t.rename_state(state, "renamed"),
+            lambda t: t.remove_state(state),
+            lambda t: t.remove_self_loops(),
+            lambda t: t.remove_output_transitions(),
+            lambda t: t.reformat_states(prefix="s"),
+            lambda t: t.reformat_keys(),
+            lambda t: t.reformat_vars(),
+            lambda t: t.shrink_tree_aut([s for s in t.get_states() if s != state]),
+            lambda t: ubda_unfolding(t, 11),
+        ]
+        for call in calls:
+            original = snapshot(ta)
+            expected = copy.deepcopy(ta)
+            call(expected)
+            # both the copy and the original can be modified without affecting each other
+            result = ta.copy()
+            call(result)
+            self.assertEqual(snapshot(result), snapshot(expected))
+            self.assertEqual(snapshot(ta), original)
+            other = ta.copy()
+            call(ta)
+            self.assertEqual(snapshot(ta), snapshot(expected))
+            self.assertEqual(snapshot(other), original)
+            ta = other
+
+    def test_folding_input_unchanged(self):
+        initial = import_treeaut_from_abdd("../benchmark/blif-processed/other/c8.var68.abdd")
+        vars = int(initial.get_var_order()[-1])
+        unfolded = ubda_unfolding(add_dont_care_boxes(initial, vars), vars + 1)
+        add_variables_bottom_up(unfolded, vars)
+        normalized = ubda_normalize(unfolded, create_var_order_list("", vars + 2, start=0))
+        normalized.reformat_keys()
+        normalized.reformat_states()
+        add_variables_bottom_up(normalized, vars + 2)
+        original = snapshot(normalized)
+        reference = ubda_folding(copy.deepcopy(normalized), box_orders["full"], vars + 1)
+        folded = ubda_folding(normalized, box_orders["full"], vars + 1)
+        self.assertEqual(snapshot(normalized), original)
+        self.assertEqual(snapshot(folded), snapshot(reference))
+
+    def test_variable_saturation(self):
+        initial = import_treeaut_from_abdd("../benchmark/blif-processed/other/c8.var68.abdd")
+        vars = int(initial.get_var_order()[-1])
+        unfolded = ubda_unfolding(add_dont_care_boxes(initial, vars), vars + 1)
+        # the saturation only fills in the missing variables (bottom-up folding propagates them from the parents)
+        partial = copy.deepcopy(unfolded)
+        for state in partial.get_states()[1::2]:
+            for edge in partial.transitions[state].values():
+                edge.info.variable = ""
+        for edge_dict in unfolded.transitions.values():
+            for edge in edge_dict.values():
+                edge.info.variable = ""
+        calls = [
+            (unfolded, lambda t: add_variables_bottom_up(t, vars)),
+            (unfolded, lambda t: add_variables_fixpoint(t, vars)),
+            (partial, lambda t: add_variables_bottomup_folding(t, 1)),
+        ]
+        for ta, call in calls:
+            original = snapshot(ta)
+            expected = copy.deepcopy(ta)
+            call(expected)
+            self.assertNotEqual(snapshot(expected), original)
+            result = ta.copy()
+            call(result)
+            self.assertEqual(snapshot(result), snapshot(expected))
+            self.assertEqual(snapshot(ta), original)
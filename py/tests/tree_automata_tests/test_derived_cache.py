@@ -0,0 +1,68 @@
+import unittest
+
+from canonization.lazy_unfolding import lazy_unfolding
+from canonization.unfolding import ubda_unfolding
+from formats.format_vtf import import_treeaut_from_vtf
+from tree_automata import TTreeAut, TTransition, TEdge
+
+
+class TestDerivedDataCache(unittest.TestCase):
+    def get_input(self) -> TTreeAut:
+        return import_treeaut_from_vtf("../tests/apply/ta-to-abdd-conversion/simple-input-1.vtf")
+
+    def test_hits_and_copies(self):
+        ta = self.get_input()
+        states = ta.get_states()
+        outputs = ta.get_output_edges(inverse=True)
+        self.assertEqual(ta.cache_stats.hits.get("get_states", 0), 0)
+        self.assertEqual(ta.get_states(), states)
+        self.assertEqual(ta.get_output_edges(inverse=True), outputs)
+        self.assertEqual(ta.cache_stats.hits["get_states"], 1)
+        self.assertEqual(ta.cache_stats.hits["get_output_edges"], 1)
+        self.assertEqual(ta.cache_stats.hit_rate("get_states"), 0.5)
+        # results are copies, changing them does not change the cache
+        states.append("unknown")
+        next(iter(outputs.values())).append("unknown")
+        self.assertNotIn("unknown", ta.get_states())
+        self.assertNotIn("unknown", [s for symbols in ta.get_output_edges(inverse=True).values() for s in symbols])
+
+    def test_invalidation(self):
+        ta = self.get_input()
+        state = ta.get_states()[-1]
+        ta.get_output_states()
+        ta.get_var_order()
+        # modifying methods
+        for key in [k for k in ta.transitions[state]]:
+            ta.remove_transition(state, key)
+        self.assertNotIn(state, ta.get_output_states())
+        # roots are a part of the key of the root-dependent getters
+        ta.roots = ["root"]
+        self.assertIn("root", ta.get_states())
+        # direct changes followed by invalidate()
+        ta.transitions[state]["new"] = TTransition(state, TEdge("1", [], "x100"), [])
+        ta.invalidate()
+        self.assertIn(state, ta.get_output_states())
+        self.assertIn("x100", ta.get_var_order())
+        # adding a state is detected without invalidate()
+        ta.transitions["other"] = {"k": TTransition("other", TEdge("LH", [], ""), [state, state])}
+        self.assertIn("other", ta.get_states())
+        self.assertEqual(ta.get_reachable_states_from("other"), {state})
+
+    def test_unfolding_saturation(self):
+        ta = self.get_input()
+        ta.get_var_order()
+        ta.get_var_visibility()
+        # unfolding writes the variable of the output edges into its input
+        ubda_unfolding(ta, 11)
+        var_order, var_visibility = ta.get_var_order(), ta.get_var_visibility()
+        self.assertIn("11", var_order)
+        ta.invalidate()
+        self.assertEqual(ta.get_var_order(), var_order)
+        self.assertEqual(ta.get_var_visibility(), var_visibility)
+
+    def test_lazy_view_stamp(self):
+        folded = import_treeaut_from_vtf("../tests/apply/ta-to-abdd-conversion/simple-input-1.vtf")
+        view = lazy_unfolding(folded, 10)
+        view.get_cached(("test",), lambda: 0)
+        # the stamp of the lazy view does not synthesize the unfolded states
+        self.assertEqual(view.unfolded_edges, 0)
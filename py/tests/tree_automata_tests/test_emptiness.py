@@ -1,6 +1,6 @@
 import unittest
 
-from tree_automata.functions.emptiness import non_empty_top_down, non_empty_bottom_up
+from tree_automata.functions.emptiness import is_empty_bottom_up, non_empty_top_down, non_empty_bottom_up
 from tree_automata.functions.intersection import tree_aut_intersection
 import tests.tree_automata_examples as ta
 from tree_automata.functions.match_tree import match_tree_top_down, match_tree_bottom_up
@@ -129,6 +129,12 @@ class TestTreeAutomatonNonEmptiness(unittest.TestCase):
         self.assertEqual(int_l1_h1_str, "")
         self.assertEqual(int_h0_h1_str, "")
 
+    def test_is_empty_bottom_up(self):
+        for box in [ta.box_x, ta.box_l0, ta.box_l1, ta.box_h0, ta.box_h1]:
+            self.assertFalse(is_empty_bottom_up(box))
+        for box in [ta.box_l0, ta.box_l1, ta.box_h0, ta.box_h1]:
+            self.assertTrue(is_empty_bottom_up(tree_aut_intersection(ta.box_x, box)))
+
     @unittest.skip  # TODO remove a state or an edge and test language emptiness before/after
     def test_non_emptiness_bottom_up_state_removal(self):
         pass
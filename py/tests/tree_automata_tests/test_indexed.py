@@ -0,0 +1,45 @@
+import unittest
+
+from formats.format_vtf import import_treeaut_from_vtf
+from tree_automata.automaton import iterate_key_edge_tuples
+from tree_automata.functions.emptiness import non_empty_bottom_up
+from tree_automata.functions.reachability import reachable_bottom_up
+from tree_automata.indexed import IndexedTreeAut, get_indexed
+
+import tests.tree_automata_examples as ta
+
+
+class TestIndexedTreeAut(unittest.TestCase):
+    def test_indexed_tables(self):
+        for treeaut in [ta.box_l0, ta.box_hport, ta.box_lport]:
+            indexed = IndexedTreeAut(treeaut)
+            self.assertEqual(indexed.count_states(), len(treeaut.get_states()))
+            self.assertEqual(indexed.get_state_names(indexed.roots), treeaut.roots)
+            for e, (key, edge) in enumerate(iterate_key_edge_tuples(treeaut)):
+                self.assertEqual(indexed.edge_keys[e], key)
+                self.assertEqual(indexed.state_names[indexed.edge_src[e]], edge.src)
+                self.assertEqual(indexed.symbol_names[indexed.edge_symbol[e]], edge.info.label)
+                self.assertEqual(indexed.get_state_names(indexed.get_children(e)), edge.children)
+                self.assertIn(e, indexed.get_out_edges(indexed.state_index[edge.src]))
+                for child in edge.children:
+                    self.assertIn(e, indexed.get_parent_edges(indexed.state_index[child]))
+            outputs = set(indexed.get_state_names(list(indexed.iterate_output_states())))
+            self.assertSetEqual(outputs, set(treeaut.get_output_states()))
+
+    def test_indexed_bottom_up(self):
+        unreachable = import_treeaut_from_vtf("../tests/special_cases/testUnreachable1.vtf")
+        self.assertEqual(IndexedTreeAut(unreachable).count_edges(), len(list(iterate_key_edge_tuples(unreachable))))
+        self.assertSetEqual(set(reachable_bottom_up(unreachable)), set(["q1"]))
+        witness, _ = non_empty_bottom_up(ta.box_l0)
+        self.assertIsNotNone(witness)
+
+    def test_indexed_cache(self):
+        treeaut = import_treeaut_from_vtf("../tests/special_cases/testUnreachable1.vtf")
+        indexed = get_indexed(treeaut)
+        self.assertIs(get_indexed(treeaut), indexed)
+        # modifying the automaton rebuilds the view
+        key, edge = next(iterate_key_edge_tuples(treeaut))
+        treeaut.remove_transition(edge.src, key)
+        self.assertIsNot(get_indexed(treeaut), indexed)
+        self.assertEqual(get_indexed(treeaut).count_edges(), indexed.count_edges() - 1)
+        self.assertNotIn(key, get_indexed(treeaut).edge_keys)
@@ -1,7 +1,8 @@
 import unittest
 
 from formats.format_vtf import import_treeaut_from_vtf
-from tree_automata.functions.reachability import reachable_bottom_up, reachable_top_down
+from tree_automata import TTreeAut, TTransition, TEdge
+from tree_automata.functions.reachability import StateReachabilityClass, reachable_bottom_up, reachable_top_down
 
 import tests.tree_automata_examples as ta
 
@@ -28,3 +29,50 @@ class TestTreeAutomataReachability(unittest.TestCase):
         self.assertSetEqual(set(test_2_result), set(["q0", "q1", "q2", "q3"]))
         self.assertSetEqual(set(test_3_result), set(["q0", "q1", "q2", "q3"]))
         self.assertSetEqual(set(test_l0_result), set(ta.box_l0.get_states()))
+
+    def get_reachability_bfs(self, aut: TTreeAut) -> dict[str, set[str]]:
+        result: dict[str, set[str]] = {}
+        roots = aut.roots
+        for state in aut.get_states():
+            aut.roots = [state]
+            result[state] = set(reachable_top_down(aut, count_itself=False))
+        aut.roots = roots
+        return result
+
+    def test_all_state_reachability(self):
+        for aut in [
+            ta.box_l0,
+            ta.box_lport,
+            ta.box_x,
+            import_treeaut_from_vtf("../tests/special_cases/testUnreachable2.vtf"),
+            import_treeaut_from_vtf("../tests/apply/ta-to-abdd-conversion/simple-input-1.vtf"),
+        ]:
+            reach = StateReachabilityClass(aut)
+            self.assertDictEqual(reach.to_dict(), self.get_reachability_bfs(aut))
+            for state in aut.get_states():
+                self.assertSetEqual(reach.get_reachable(state, reflexive=True), reach.get_reachable(state) | {state})
+
+    def test_reachability_updates(self):
+        def edge(src: str, children: list[str]) -> TTransition:
+            return TTransition(src, TEdge("LH" if children != [] else "1", [], ""), children)
+
+        aut = TTreeAut(["a"], {"a": {"k1": edge("a", ["b", "c"])}, "b": {"k2": edge("b", ["d", "d"])}}, "chain")
+        aut.transitions["c"] = {"k3": edge("c", [])}
+        aut.transitions["d"] = {"k4": edge("d", [])}
+        reach = StateReachabilityClass(aut)
+        # new state (e.g. created by folding) and new edges, including one that closes a cycle
+        updates = [("e", "new", ["d"]), ("b", "k5", ["e", "e"]), ("d", "k6", ["a", "a"]), ("c", "k7", ["c", "c"])]
+        for src, key, children in updates:
+            if src not in aut.transitions:
+                reach.add_state(src, children)
+                aut.transitions[src] = {}
+            else:
+                for child in children:
+                    reach.add_edge(src, child)
+            aut.transitions[src][key] = edge(src, children)
+            self.assertDictEqual(reach.to_dict(), StateReachabilityClass(aut).to_dict())
+            self.assertDictEqual(reach.to_dict(), self.get_reachability_bfs(aut))
+        self.assertTrue(reach.reaches("a", "a"))
+        self.assertFalse(reach.reaches("c", "a"))
+        with self.assertRaises(ValueError):
+            reach.add_state("a")
@@ -9,10 +9,11 @@ from tree_automata.automaton import (
     iterate_states_dfs,
 )
 from tree_automata.tree_node import TTreeNode
+from tree_automata.indexed import IndexedTreeAut, get_indexed
 
 from tree_automata.functions.complement import tree_aut_complement
 from tree_automata.functions.determinization import tree_aut_determinization
-from tree_automata.functions.emptiness import non_empty_bottom_up, non_empty_top_down
+from tree_automata.functions.emptiness import is_empty_bottom_up, non_empty_bottom_up, non_empty_top_down
 from tree_automata.functions.intersection import tree_aut_intersection
 from tree_automata.functions.isomorphism import tree_aut_isomorphic
 from tree_automata.functions.union import tree_aut_union
@@ -5,7 +5,7 @@
 """
 
 import copy
-from typing import Generator, Iterator
+from typing import Any, Callable, Generator, Iterator
 
 from numpy import info
 
@@ -49,6 +49,19 @@ class TTreeAut:
 
     What this means is that sometimes we need to enforce one root state, or
     we utilize a "root rule", etc...
+
+    Copying: copy() is copy-on-write, the copy shares the transition dictionaries
+    (and the transitions) of all states with the original. States in 'shared_states'
+    are shared with some other automaton, the modifying methods call own_state()
+    before they change the transitions of such a state (in both automata).
+    Code that changes transitions directly (outside of the methods) has to do the same.
+
+    Derived data: some getters (states, output edges, symbol arities, port arity/order,
+    variable order/visibility, reachability) cache their results in 'derived'.
+    The cache is valid while the 'version' (bumped by the modifying methods and own_state())
+    and the dictionary of states stay the same. Code that changes the edges or the transition
+    dictionaries directly has to call invalidate() afterwards.
+    'cache_stats' counts the cache hits/misses of each getter.
     """
 
     def __init__(
@@ -59,6 +72,11 @@ class TTreeAut:
         self.transitions: dict[str, dict[str, TTransition]] = transitions
         self.name: str = name
         self.port_arity: int = port_arity
+        self.shared_states: set[str] = set()
+        self.version: int = 0
+        self.derived: dict[tuple, Any] = {}
+        self.derived_stamp: tuple | None = None
+        self.cache_stats: TTreeAutCacheStats = TTreeAutCacheStats()
         if self.port_arity == 0:
             self.port_arity = self.get_port_arity()
         # this parameter is only for formatted printing with edge-keys
@@ -157,6 +175,40 @@ class TTreeAut:
                     result += "  : %-*s" % (self.meta_data.key, k)
         return result
 
+    # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+    # Derived data cache  - - - - - - - - - - - - - - - - - - - - - - - - - - -
+    # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+    def invalidate(self) -> None:
+        """
+        Drop the cached derived data (after the transitions were modified directly).
+        """
+        self.version += 1
+
+    def get_derived_stamp(self) -> tuple:
+        """
+        Cached data are valid as long as the stamp does not change.
+        Replacing the dictionary of states or adding/removing a state is detected without invalidate().
+        """
+        return (self.version, id(self.transitions), len(self.transitions))
+
+    def get_cached(self, key: tuple, compute: Callable[[], Any]) -> Any:
+        """
+        Return the cached result of the getter identified by 'key' (name and arguments), or compute and store it.
+        The results are shared, the getters return copies of mutable results.
+        """
+        stamp = self.get_derived_stamp()
+        if stamp != self.derived_stamp:
+            self.derived = {}
+            self.derived_stamp = stamp
+        if key in self.derived:
+            self.cache_stats.hit(key[0])
+            return self.derived[key]
+        self.cache_stats.miss(key[0])
+        result = compute()
+        self.derived[key] = result
+        return result
+
     # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
     # Informative functions # - - - - - - - - - - - - - - - - - - - - - - - - -
     # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
@@ -165,17 +217,21 @@ class TTreeAut:
         """
         Get a list of all states that are in any way referenced within the TA structure.
         """
-        result: set[str] = set()
-        for state_name in self.roots:
-            result.add(state_name)
-        for state_name, edges in self.transitions.items():
-            result.add(state_name)
-            for data in edges.values():
-                for i in data.children:
-                    result.add(i)
-        result = list(result)
-        # result.sort()
-        return state_name_sort(result)
+
+        def compute() -> list[str]:
+            result: set[str] = set()
+            for state_name in self.roots:
+                result.add(state_name)
+            for state_name, edges in self.transitions.items():
+                result.add(state_name)
+                for data in edges.values():
+                    for i in data.children:
+                        result.add(i)
+            result = list(result)
+            # result.sort()
+            return state_name_sort(result)
+
+        return [state for state in self.get_cached(("get_states", tuple(self.roots)), compute)]
 
     def get_self_looping_states(self) -> set[str]:
         result: set[str] = set()
@@ -198,13 +254,17 @@ class TTreeAut:
         """
         Get a set of all states that have an output transition (i.e. transition with 0 child states).
         """
-        result: set[str] = set()
-        for state_name, edges in self.transitions.items():
-            for data in edges.values():
-                if len(data.children) == 0:
-                    result.add(state_name)
-                    break
-        return result
+
+        def compute() -> set[str]:
+            result: set[str] = set()
+            for state_name, edges in self.transitions.items():
+                for data in edges.values():
+                    if len(data.children) == 0:
+                        result.add(state_name)
+                        break
+            return result
+
+        return set(self.get_cached(("get_output_states",), compute))
 
     def get_output_edges(self, inverse=False) -> dict[str, list[str]]:
         """
@@ -219,21 +279,26 @@ class TTreeAut:
         * inverse=False: `{symbol: list[states]}`
         * inverse=True: `{state: list[symbols]}`
         """
-        result: dict[str, list[str]] = {}
-        for edge in iterate_edges(self):
-            if len(edge.children) != 0:
-                continue
-            if inverse:
-                if edge.src not in result:
-                    result[edge.src] = []
-                result[edge.src].append(edge.info.label)
-            else:
-                if edge.info.label not in result:
-                    result[edge.info.label] = []
-                result[edge.info.label].append(edge.src)
-        for item in result.values():
-            item.sort()
-        return result
+
+        def compute() -> dict[str, list[str]]:
+            result: dict[str, list[str]] = {}
+            for edge in iterate_edges(self):
+                if len(edge.children) != 0:
+                    continue
+                if inverse:
+                    if edge.src not in result:
+                        result[edge.src] = []
+                    result[edge.src].append(edge.info.label)
+                else:
+                    if edge.info.label not in result:
+                        result[edge.info.label] = []
+                    result[edge.info.label].append(edge.src)
+            for item in result.values():
+                item.sort()
+            return result
+
+        cached = self.get_cached(("get_output_edges", inverse), compute)
+        return {key: [value for value in values] for key, values in cached.items()}
 
     def get_terminable_transitions(self) -> set[TTransition]:
         """
@@ -312,13 +377,18 @@ class TTreeAut:
 
         If varinfo=True, include variable information of the port transition in the resulting tuples.
         """
-        path_list = self.get_shortest_state_paths_dict(preorder=preorder)
-        result: list[tuple[str, str]] = []
-        for s, _ in path_list:
-            for edge in self.transitions[s].values():
-                if edge.children == [] and edge.info.label.startswith("Port"):
-                    result.append((edge.info.label, s) if not varinfo else (edge.info.label, s, edge.info.variable))
-        return result
+
+        def compute() -> list[tuple[str, str]] | list[tuple[str, str, str]]:
+            path_list = self.get_shortest_state_paths_dict(preorder=preorder)
+            result: list[tuple[str, str]] = []
+            for s, _ in path_list:
+                for edge in self.transitions[s].values():
+                    if edge.children == [] and edge.info.label.startswith("Port"):
+                        result.append((edge.info.label, s) if not varinfo else (edge.info.label, s, edge.info.variable))
+            return result
+
+        key = ("get_port_order", preorder, varinfo, tuple(self.roots))
+        return [item for item in self.get_cached(key, compute)]
 
     def get_symbol_arity_dict(self) -> dict[str, int]:
         """
@@ -326,26 +396,34 @@ class TTreeAut:
 
         Note: Arity of a symbol = how many child nodes stem from this symbol.
         """
-        result: dict[str, int] = {}
-        for edges in self.transitions.values():
-            for edge in edges.values():
-                if edge.info.label not in result:
-                    if edge.info.box_array == []:
-                        result[edge.info.label] = len(edge.children)
-                    else:
-                        result[edge.info.label] = len(edge.info.box_array)
-        return result
+
+        def compute() -> dict[str, int]:
+            result: dict[str, int] = {}
+            for edges in self.transitions.values():
+                for edge in edges.values():
+                    if edge.info.label not in result:
+                        if edge.info.box_array == []:
+                            result[edge.info.label] = len(edge.children)
+                        else:
+                            result[edge.info.label] = len(edge.info.box_array)
+            return result
+
+        return dict(self.get_cached(("get_symbol_arity_dict",), compute))
 
     def get_port_arity(self) -> int:
         """
         Count all transitions with different port names.
         """
-        port_set: set[str] = set()
-        for edge in iterate_edges(self):
-            sym = edge.info.label
-            if sym.startswith("Port"):
-                port_set.add(sym)
-        return len(port_set)
+
+        def compute() -> int:
+            port_set: set[str] = set()
+            for edge in iterate_edges(self):
+                sym = edge.info.label
+                if sym.startswith("Port"):
+                    port_set.add(sym)
+            return len(port_set)
+
+        return self.get_cached(("get_port_arity",), compute)
 
     def get_statename_prefix(self) -> str:
         res: set[str] = set()
@@ -411,20 +489,24 @@ class TTreeAut:
         tree viability (a.k.a. each branch needs to end with a leaf transition),
         only which states are accessible through any part of the 'hyper-edges'
         """
-        original_rootstates: list[str] = [i for i in self.roots]
-        self.roots = [state]
-        result: set[str] = set()
-        # because by default, the root state (origin) is explored first,
-        # and since we only want it to be considered reachable if there is a non-trivial path from 'state' to itself,
-        # we introduce this flag, so that only if it is reached
-        root: bool = True
-        for state in iterate_states_bfs(self):
-            if root:
-                root = False
-                continue
-            result.add(state)
-        self.roots = original_rootstates
-        return result
+
+        def compute() -> set[str]:
+            original_rootstates: list[str] = [i for i in self.roots]
+            self.roots = [state]
+            result: set[str] = set()
+            # because by default, the root state (origin) is explored first,
+            # and since we only want it to be considered reachable if there is a non-trivial path from 'state' to itself,
+            # we introduce this flag, so that only if it is reached
+            root: bool = True
+            for reached in iterate_states_bfs(self):
+                if root:
+                    root = False
+                    continue
+                result.add(reached)
+            self.roots = original_rootstates
+            return result
+
+        return set(self.get_cached(("get_reachable_states_from", state), compute))
 
     # NOTE: this might sometimes be useful
     # def get_reachable_states_from(self, state: str) -> set:
@@ -561,12 +643,16 @@ class TTreeAut:
         """
         Return a (lexically sorted) list of variables used within the TA (UBDA) structure.
         """
-        vars: set[str] = set()
-        for edge in iterate_edges(self):
-            vars.add(edge.info.variable)
-        if "" in vars:
-            vars.remove("")
-        return state_name_sort(list(vars))
+
+        def compute() -> list[str]:
+            vars: set[str] = set()
+            for edge in iterate_edges(self):
+                vars.add(edge.info.variable)
+            if "" in vars:
+                vars.remove("")
+            return state_name_sort(list(vars))
+
+        return [var for var in self.get_cached(("get_var_order",), compute)]
 
     def get_var_prefix(self) -> str:
         """
@@ -602,16 +688,21 @@ class TTreeAut:
         if reverse==True: the dictionary is referenced by variables, and values
         are lists of states. e.g. {'x1': {'q0'}, 'x2': {'q0'}, 'x5': {'q1'}}
         """
-        result: dict[str, set[str]] = {}
-        for edge in iterate_edges(self):
-            if edge.info.variable == "":
-                continue
-            lookup: str = edge.info.variable if reverse else edge.src
-            value: str = edge.src if reverse else edge.info.variable
-            if lookup not in result:
-                result[lookup] = set()
-            result[lookup].add(value)
-        return result
+
+        def compute() -> dict[str, set[str]]:
+            result: dict[str, set[str]] = {}
+            for edge in iterate_edges(self):
+                if edge.info.variable == "":
+                    continue
+                lookup: str = edge.info.variable if reverse else edge.src
+                value: str = edge.src if reverse else edge.info.variable
+                if lookup not in result:
+                    result[lookup] = set()
+                result[lookup].add(value)
+            return result
+
+        cached = self.get_cached(("get_var_visibility", reverse), compute)
+        return {key: set(values) for key, values in cached.items()}
 
     def get_var_visibility_deterministic(self) -> dict[str, int]:
         """
@@ -691,6 +782,44 @@ class TTreeAut:
     # Modifying functions # - - - - - - - - - - - - - - - - - - - - - - - - - -
     # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
 
+    def copy(self) -> "TTreeAut":
+        """
+        Copy-on-write copy of the tree automaton - only the dictionary of states and the roots are copied,
+        the transition dictionaries of the states are copied when one of the automata modifies them.
+        """
+        result: TTreeAut = copy.copy(self)
+        result.roots = [r for r in self.roots]
+        result.transitions = {state: edges for state, edges in self.transitions.items()}
+        result.meta_data = TTreeAutMetaData(result)
+        result.derived = {}
+        result.derived_stamp = None
+        result.cache_stats = TTreeAutCacheStats()
+        self.shared_states.update(self.transitions)
+        result.shared_states = set(self.shared_states)
+        return result
+
+    def own_state(self, state: str) -> dict[str, TTransition]:
+        """
+        Makes the transition dictionary of the 'state' (and its transitions) private to this automaton,
+        so that it can be modified without affecting the copies. Returns the transition dictionary.
+        """
+        self.version += 1
+        if state in self.shared_states:
+            self.shared_states.discard(state)
+            self.transitions[state] = {key: edge.copy() for key, edge in self.transitions[state].items()}
+        return self.transitions[state]
+
+    def own_all_states(self) -> None:
+        """
+        Calls own_state() on all shared states (before modifying the whole automaton).
+        """
+        self.version += 1
+        for state in self.shared_states:
+            # the state could have been removed from the dictionary directly (without remove_state())
+            if state in self.transitions:
+                self.transitions[state] = {key: edge.copy() for key, edge in self.transitions[state].items()}
+        self.shared_states = set()
+
     def copy_state(self, state: str, name: str) -> dict[str, TTransition]:
         """
         creates a copy of a state dictionary (with isomorphic edges)
@@ -715,16 +844,22 @@ class TTreeAut:
             return
         # supposing only one state with the old_name exists in tree_aut
         # renaming state in the dictionary of states (1st layer)
+        self.own_state(old_name)
         self.transitions[new_name] = self.transitions.pop(old_name)
 
-        # renaming name of the state inside transitions (2nd layer)
-        for edge in iterate_edges(self):
-            if edge.src == old_name:
-                edge.src = str(new_name)
-            # renaming state name inside the children array (3rd layer)
-            for i in range(len(edge.children)):
-                if edge.children[i] == old_name:
-                    edge.children[i] = new_name
+        for state, edges in self.transitions.items():
+            if state in self.shared_states:
+                if not any(old_name in edge.children for edge in edges.values()):
+                    continue
+                edges = self.own_state(state)
+            for edge in edges.values():
+                # renaming name of the state inside transitions (2nd layer)
+                if edge.src == old_name:
+                    edge.src = str(new_name)
+                # renaming state name inside the children array (3rd layer)
+                for i in range(len(edge.children)):
+                    if edge.children[i] == old_name:
+                        edge.children[i] = new_name
 
     def remove_state(self, state: str) -> None:
         if state in self.roots:
@@ -732,12 +867,15 @@ class TTreeAut:
 
         if state in self.transitions:
             self.transitions.pop(state)
+            self.shared_states.discard(state)
 
-        for content in self.transitions.values():
+        for src, content in self.transitions.items():
             keys_to_delete = []
             for key, edge in content.items():
                 if state in edge.children:
                     keys_to_delete.append(key)
+            if keys_to_delete != []:
+                content = self.own_state(src)
             for key in keys_to_delete:
                 content.pop(key)
 
@@ -746,7 +884,7 @@ class TTreeAut:
             return
         if key not in self.transitions[state]:
             return
-        self.transitions[state].pop(key)
+        self.own_state(state).pop(key)
 
     def remove_output_transitions(self) -> None:
         for state in self.get_states():
@@ -768,8 +906,10 @@ class TTreeAut:
             for k, edge in edges.items():
                 if edge.src in edge.children:
                     keys_to_delete.append(k)
+            if keys_to_delete != []:
+                edges = self.own_state(state)
             for k in keys_to_delete:
-                self.transitions[state].pop(k)
+                edges.pop(k)
 
     def reformat_states(self, prefix="q", start_from=0) -> None:
         """
@@ -792,6 +932,7 @@ class TTreeAut:
         #     self.rename_state(f"temporary_name{idx}", f"{prefix}{idx}")
 
         # optimized version:
+        self.own_all_states()
         new_roots: list[str] = []
         for root in self.roots:
             new_roots.append(f"{prefix}{temp[root]}")
@@ -807,6 +948,7 @@ class TTreeAut:
 
     def reformat_keys(self, prefix="k") -> None:  # k as in 'key'
         counter: int = self.count_edges() + 2  # for no collisions
+        self.own_all_states()
         for state in iterate_states_bfs(self):
             swap = [key for key in self.transitions[state].keys()]
             for old_key in swap:
@@ -832,7 +974,7 @@ class TTreeAut:
 
         # we assume max one port transition per state
         for state, _ in paths_list:
-            for edge in self.transitions[state].values():
+            for edge in self.own_state(state).values():
                 if edge.info.label.startswith("Port"):
                     edge.info.label = f"Port_{counter}"
                     counter += 1
@@ -846,6 +988,7 @@ class TTreeAut:
         # when minvar is 3 -> the correction needs to be -2
         # since usually use minvar as 0 in some benchmarks -> the correction is going to be +1
         correction = start - minvar
+        self.own_all_states()
         for edge in iterate_edges(self):
             if edge.info.variable == "":
                 continue
@@ -856,19 +999,37 @@ class TTreeAut:
         """
         Shrinks the tree automaton, such that it only contain the states from list (reachable states).
         """
-        to_delete: list[str] = [x for x in self.roots if x not in reachable]
+        reachable: set[str] = set(reachable)
+        to_delete: set[str] = set([x for x in self.roots if x not in reachable])
         for state_name, content in self.transitions.items():
             if state_name not in reachable:
-                to_delete.append(state_name)
+                to_delete.add(state_name)
             for edge in content.values():
                 if edge.src not in reachable:
-                    to_delete.append(edge.src)
+                    to_delete.add(edge.src)
                 for i in edge.children:
                     if i not in reachable:
-                        to_delete.append(i)
+                        to_delete.add(i)
 
-        for i in set(to_delete):
-            self.remove_state(i)
+        # same as calling remove_state() for each of the states, but in one pass over the transitions
+        # (remove_state() removes only the first occurrence of a root)
+        removed_roots: set[str] = set()
+        roots: list[str] = []
+        for root in self.roots:
+            if root in to_delete and root not in removed_roots:
+                removed_roots.add(root)
+                continue
+            roots.append(root)
+        self.roots = roots
+        for state in to_delete:
+            self.transitions.pop(state, None)
+            self.shared_states.discard(state)
+        for state, content in self.transitions.items():
+            keys = [key for key, edge in content.items() if any([i in to_delete for i in edge.children])]
+            if keys != []:
+                content = self.own_state(state)
+            for key in keys:
+                content.pop(key)
 
     # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
     # Building functions #  - - - - - - - - - - - - - - - - - - - - - - - - - -
@@ -880,14 +1041,15 @@ class TTreeAut:
     # form of folding/unfolding algorithms.
 
     def create_prefix(self, extra_output_edges: list[str]) -> "TTreeAut":
-        result: TTreeAut = copy.deepcopy(self)
+        result: TTreeAut = self.copy()
 
         result.name = f"prefix({self.name}, {extra_output_edges})"
 
-        for state_name, content in result.transitions.items():
+        for state_name in result.get_states():
             temp_dict: dict[str, TTransition] = {}
             if state_name in self.roots:
                 continue
+            content = result.own_state(state_name)
             for symbol in extra_output_edges:
                 temp_str: str = str(state_name) + "-" + str(symbol) + "-()"
                 temp_dict[temp_str] = TTransition(state_name, TEdge(symbol, [], ""), [])
@@ -908,7 +1070,7 @@ class TTreeAut:
         return result
 
     def create_suffix(self) -> "TTreeAut":
-        result: TTreeAut = copy.deepcopy(self)
+        result: TTreeAut = self.copy()
         result.name = f"suffix({result.name})"
         for state_name, edge_dict in result.transitions.items():
             check: bool = True
@@ -922,7 +1084,7 @@ class TTreeAut:
         return result
 
     def create_infix(self, extra_output_edges: dict[str, list[str]]) -> "TTreeAut":
-        result: TTreeAut = copy.deepcopy(self)
+        result: TTreeAut = self.copy()
         ports: list[str] = [
             sym for sym in extra_output_edges if (sym.startswith("Port") and sym not in result.get_output_symbols())
         ]
@@ -937,7 +1099,7 @@ class TTreeAut:
             for i in ports:
                 key: str = f"{state}-{i}->()"
                 edge = TTransition(state, TEdge(i, [], ""), [])
-                result.transitions[state][key] = edge
+                result.own_state(state)[key] = edge
         result.port_arity = result.get_port_arity()
         return result
 
@@ -1028,6 +1190,31 @@ def iterate_states_bfs(ta: TTreeAut) -> Generator[str, None, None]:
                     queue.append(child)
 
 
+class TTreeAutCacheStats:
+    """
+    Hits and misses of the derived data cache of one TTreeAut, per getter.
+    """
+
+    def __init__(self):
+        self.hits: dict[str, int] = {}
+        self.misses: dict[str, int] = {}
+
+    def hit(self, getter: str) -> None:
+        self.hits[getter] = self.hits.get(getter, 0) + 1
+
+    def miss(self, getter: str) -> None:
+        self.misses[getter] = self.misses.get(getter, 0) + 1
+
+    def hit_rate(self, getter: str) -> float:
+        total = self.hits.get(getter, 0) + self.misses.get(getter, 0)
+        return self.hits.get(getter, 0) / total if total > 0 else 0.0
+
+    def __repr__(self):
+        getters = sorted(set(self.hits) | set(self.misses))
+        items = [f"{g}={self.hits.get(g, 0)}/{self.hits.get(g, 0) + self.misses.get(g, 0)}" for g in getters]
+        return f"{self.__class__.__name__}({', '.join(items)})"
+
+
 class TTreeAutMetaData:
     """
     Contains string lengths for tidy formatting (tables, etc.).
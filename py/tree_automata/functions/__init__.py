@@ -7,7 +7,7 @@ from tree_automata.functions.complement import tree_aut_complement
 from tree_automata.functions.determinization import tree_aut_determinization
 
 # - non_emptiness_check(TA) checks whether a language of TA is non-empty
-from tree_automata.functions.emptiness import non_empty_bottom_up, non_empty_top_down
+from tree_automata.functions.emptiness import is_empty_bottom_up, non_empty_bottom_up, non_empty_top_down
 
 # - intersection(TA1, TA2)
 from tree_automata.functions.intersection import tree_aut_intersection
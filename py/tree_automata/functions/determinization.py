@@ -4,7 +4,6 @@
 [description] Bottom-up determinization of a given tree automaton.
 """
 
-import copy
 import itertools
 
 from helpers.string_manipulation import create_string_from_name_set
@@ -149,7 +148,7 @@ def tree_aut_determinization(ta: TTreeAut, alphabet: dict[str, int], verbose=Fal
     # - in the final automaton the macro_states
     # (list/set of states) will be represented by a string
     # - this string is created using make_name_from_set() function
-    work_set = copy.deepcopy(done_set)
+    work_set = [[s for s in macrostate] for macrostate in done_set]
     if verbose:
         print("{:<60} {:<20} {:<60} {:<5} {:<5}".format("current_state", "symbol", "children", "work", "done"))
         print("-" * 160)
@@ -4,10 +4,11 @@
 [description] Check if a language of a given tree automaton is empty.
 """
 
+from collections import deque
 from typing import Optional
 
-from tree_automata import TTreeAut, TTransition, TEdge, TTreeNode, iterate_edges
-from tree_automata.functions.helpers import generate_possible_children
+from tree_automata import TTreeAut, TTransition, TEdge, TTreeNode
+from tree_automata.indexed import get_indexed
 from tree_automata.functions.witness import generate_witness_string, generate_witness_tree
 
 
@@ -164,6 +165,31 @@ def non_empty_bottom_up(ta: TTreeAut, verbose=False) -> tuple[Optional[TTreeNode
     starts the mock tree generation from the leaves
     same signature as top-down version
     * leaves = states with output transitions
+
+    Works on the interned view of the TA (see 'indexed.py'), for each processed state only the transitions
+    with the state among their children are checked (see reachable_bottom_up()).
+    """
+    found = find_witness_edges_bottom_up(ta, verbose)
+    if found is None:
+        return None, ""
+    root, witness_edges = found
+    witness_tree: TTreeNode = generate_witness_tree(witness_edges, root)
+    witness_string: str = generate_witness_string(witness_edges, root)
+    return witness_tree, witness_string
+
+
+def is_empty_bottom_up(ta: TTreeAut) -> bool:
+    """
+    Same check as non_empty_bottom_up(), but without generating the witness tree
+    (the witness tree of a DAG-like automaton can be exponentially larger than the automaton).
+    """
+    return find_witness_edges_bottom_up(ta) is None
+
+
+def find_witness_edges_bottom_up(ta: TTreeAut, verbose=False) -> Optional[tuple[str, dict[str, TTransition]]]:
+    """
+    Bottom-up search of non_empty_bottom_up(), returns the reached root state and the transitions
+    of the witness tree (for each state), or None if the language is empty.
     """
     if verbose:
         print(
@@ -175,55 +201,61 @@ def non_empty_bottom_up(ta: TTreeAut, verbose=False) -> tuple[Optional[TTreeNode
         counter = 0
 
     # initialization phase (finding all output starting points)
-    worklist: list[str] = list(ta.get_output_states())
-    size: int = len(ta.get_states())
-    done: dict[str, TTransition] = {}
-    done_set: list[str] = list(ta.get_output_states())
-    arity_dict: dict[str, int] = ta.get_symbol_arity_dict()
+    index = get_indexed(ta)
+    worklist: deque[int] = deque([index.state_index[state] for state in ta.get_output_states()])
+    size: int = index.count_states()
+    roots: set[int] = set(index.roots)
+    # state -> transition used in the witness (dict order = order in which the states were found)
+    done: dict[int, int] = {}
     for state in worklist:
-        for edge in ta.transitions[state].values():
-            if len(edge.children) == 0:
+        for edge in index.get_out_edges(state):
+            if index.get_arity(edge) == 0:
                 done[state] = edge
+    found: dict[int, int] = {state: i for i, state in enumerate(done.keys())}
+    done_set: set[int] = set(worklist)
+    arities: list[tuple[int, int]] = [
+        (index.symbol_index[sym], arity) for sym, arity in ta.get_symbol_arity_dict().items() if arity != 0
+    ]
 
     # tree automaton bottom-up parsing phase
     while len(worklist) != 0:
-        state: str = worklist.pop(0)
-        if state not in done_set:
-            done_set.append(state)
-        if state in ta.roots:
+        state: int = worklist.popleft()
+        done_set.add(state)
+        if state in roots:
             if verbose:
                 print(f">> {ta.name} has non-empty lang")
-            witness_tree: TTreeNode = generate_witness_tree(done, state)
-            witness_string: str = generate_witness_string(done, state)
-            return witness_tree, witness_string
-        for symbol in arity_dict:
-            arity: int = arity_dict[symbol]
-            if arity == 0:
-                continue
-            # tuples = all possible combinations of children lists with 'state'
-            tuples: list[list[str]] = generate_possible_children(state, list(done), arity)
+            witness_edges: dict[str, TTransition] = {index.state_names[s]: index.edges[e] for s, e in done.items()}
+            return index.state_names[state], witness_edges
+        parents: list[int] = index.get_parent_edges(state)
+        for symbol, arity in arities:
             if verbose:
                 counter += 1
                 print(
                     "{:<60} {:<20} {:<20} {:<20} {:<20} {:<20}".format(
-                        f"{counter}) {state}",
-                        f"{symbol}",
+                        f"{counter}) {index.state_names[state]}",
+                        f"{index.symbol_names[symbol]}",
                         f"{len(worklist)}",
                         f"{len(done_set)}",
                         f"{size}",
                         f"neBU({ta.name})",
                     )
                 )
-            for edge in iterate_edges(ta):
-                if edge.info.label != symbol or edge.children not in tuples:
+            # child tuples only consist of states done before the symbol is processed
+            snapshot: int = len(found)
+            for edge in parents:
+                if index.edge_symbol[edge] != symbol or index.get_arity(edge) != arity:
+                    continue
+                if any([found.get(child, snapshot) >= snapshot for child in index.get_children(edge)]):
                     continue
-                if edge.src not in done:
-                    worklist.append(edge.src)
-                    done[edge.src] = edge
+                src: int = index.edge_src[edge]
+                if src not in done:
+                    worklist.append(src)
+                    done[src] = edge
+                    found[src] = len(found)
 
     if verbose:
         print(f">> {ta.name} has empty lang")
-    return None, ""
+    return None
 
 
 # End of file emptiness.py
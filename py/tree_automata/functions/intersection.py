@@ -1,5 +1,5 @@
 """
-[file] emptiness.py
+[file] intersection.py
 [author] Jany26  (Jan Matufka)  <xmatuf00@stud.fit.vutbr.cz>
 [description] Intersection of two tree automata.
 """
@@ -7,7 +7,7 @@
 import copy
 
 from tree_automata import TTreeAut, TTransition, TEdge
-from tree_automata.automaton import iterate_key_edge_tuples
+from tree_automata.indexed import get_indexed
 
 
 def handle_intersection_edge(
@@ -66,16 +66,30 @@ def tree_aut_intersection(ta1: TTreeAut, ta2: TTreeAut, verbose=False) -> TTreeA
 
     counter: int = 0
     result = TTreeAut([], {}, f"intersection({ta1.name},{ta2.name})")
-    for k1, e1 in iterate_key_edge_tuples(ta1):
-        for k2, e2 in iterate_key_edge_tuples(ta2):
-            if e1.src in ta1.roots and e2.src in ta2.roots:
-                result.roots.append(f"({e1.src},{e2.src})")
-            if len(e1.children) != len(e2.children):  # arity consistency
-                continue
-            if e1.info.label != e2.info.label:  # symbol consistency
-                continue
+    index1 = get_indexed(ta1)
+    index2 = get_indexed(ta2)
+
+    # every pair of transitions from root states adds a root (even if the transitions are not compatible)
+    roots1: set[int] = set(index1.roots)
+    roots2: set[int] = set(index2.roots)
+    root_edges2: list[int] = [e2 for e2 in range(index2.count_edges()) if index2.edge_src[e2] in roots2]
+    for e1 in range(index1.count_edges()):
+        if index1.edge_src[e1] not in roots1:
+            continue
+        for e2 in root_edges2:
+            result.roots.append(f"({index1.edges[e1].src},{index2.edges[e2].src})")
+
+    # only the compatible pairs (same symbol and arity) are combined, transitions of 'ta2' are grouped by them
+    compatible: dict[tuple[str, int], list[int]] = {}
+    for e2 in range(index2.count_edges()):
+        group = (index2.symbol_names[index2.edge_symbol[e2]], index2.get_arity(e2))
+        compatible.setdefault(group, []).append(e2)
+    for e1 in range(index1.count_edges()):
+        group = (index1.symbol_names[index1.edge_symbol[e1]], index1.get_arity(e1))
+        for e2 in compatible.get(group, []):
             counter += 1
-            handle_intersection_edge(k1, e1, k2, e2, result, counter, verbose)
+            k1, k2 = index1.edge_keys[e1], index2.edge_keys[e2]
+            handle_intersection_edge(k1, index1.edges[e1], k2, index2.edges[e2], result, counter, verbose)
 
     result.port_arity = result.get_port_arity()
     result.name = f"intersection({ta1.name},{ta2.name})"
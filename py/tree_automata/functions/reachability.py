@@ -4,8 +4,179 @@
 [description] Obtaining sets of reachable states of a tree automaton.
 """
 
+import sys
+
+from typing import Iterable
+
 from tree_automata import TTreeAut, iterate_edges
-from tree_automata.functions.helpers import generate_possible_children
+from tree_automata.indexed import get_indexed
+
+
+class StateReachabilityClass:
+    """
+    All-pairs top-down reachability (transitive closure) of the states of a tree automaton, stored as bitsets.
+
+    States are interned as integers and condensed into strongly connected components (Tarjan's algorithm),
+    components are numbered in reverse topological order (a component can only reach components with
+    smaller numbers, until edges are added by add_edge()). 'closure[c]' is a Python int with the bit 'd' set
+    iff component 'd' is reachable from component 'c' by a non-empty path, so bit 'c' itself is set only
+    for cyclic components (more states or a self-loop). The closure of a component only has bits below
+    its own number, so the whole relation takes about n^2 / 16 bytes for n components.
+
+    The relation can be extended by new states (add_state()) and edges (add_edge()), e.g. when folding
+    creates states for mapped variables. Removing edges is not supported (the result would only be
+    an over-approximation), the relation has to be recomputed then.
+    """
+
+    def __init__(self, ta: TTreeAut):
+        self.state_index: dict[str, int] = {}
+        self.state_names: list[str] = []
+        self.component: list[int] = []  # state -> component
+        self.closure: list[int] = []  # component -> bitset of components reachable from it
+        self.parents: list[set[int]] = []  # component -> components with an edge into it
+        self.members: list[list[str]] = []  # component -> names of its states
+
+        successors: list[list[int]] = []
+        for state in ta.get_states():
+            self.intern_state(state)
+            successors.append([])
+        for state, edges in ta.transitions.items():
+            src = self.state_index[state]
+            for edge in edges.values():
+                successors[src].extend([self.state_index[child] for child in edge.children])
+        self.condense(successors)
+
+    def intern_state(self, state: str) -> int:
+        if state not in self.state_index:
+            self.state_index[state] = len(self.state_names)
+            self.state_names.append(state)
+        return self.state_index[state]
+
+    def condense(self, successors: list[list[int]]) -> None:
+        """
+        Iterative Tarjan's algorithm, the closures of the components are computed as they are found
+        (all successor components are already finished at that point).
+        """
+        count = len(successors)
+        index: list[int] = [-1] * count
+        lowlink: list[int] = [0] * count
+        on_stack: list[bool] = [False] * count
+        self.component = [-1] * count
+        stack: list[int] = []
+        counter = 0
+        for start in range(count):
+            if index[start] != -1:
+                continue
+            work: list[tuple[int, int]] = [(start, 0)]
+            while work != []:
+                state, position = work.pop()
+                if position == 0:
+                    index[state] = lowlink[state] = counter
+                    counter += 1
+                    stack.append(state)
+                    on_stack[state] = True
+                children = successors[state]
+                while position < len(children):
+                    child = children[position]
+                    position += 1
+                    if index[child] == -1:
+                        work.append((state, position))
+                        work.append((child, 0))
+                        break
+                    if on_stack[child]:
+                        lowlink[state] = min(lowlink[state], index[child])
+                else:
+                    if lowlink[state] == index[state]:
+                        self.add_component(stack, state, on_stack, successors)
+                    if work != []:
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[state])
+
+    def add_component(self, stack: list[int], root: int, on_stack: list[bool], successors: list[list[int]]) -> None:
+        comp = len(self.closure)
+        members: list[int] = []
+        while True:
+            state = stack.pop()
+            on_stack[state] = False
+            self.component[state] = comp
+            members.append(state)
+            if state == root:
+                break
+        closure = 0
+        self.parents.append(set())
+        self.members.append([self.state_names[state] for state in members])
+        for state in members:
+            for child in successors[state]:
+                target = self.component[child]
+                if target == comp:
+                    # a self-loop or a cycle within the component
+                    closure |= 1 << comp
+                    continue
+                closure |= self.closure[target] | (1 << target)
+                self.parents[target].add(comp)
+        self.closure.append(closure)
+
+    def reaches(self, src: str, dst: str) -> bool:
+        """
+        True iff 'dst' is top-down reachable from 'src' (by a non-empty path).
+        """
+        return (self.closure[self.component[self.state_index[src]]] >> self.component[self.state_index[dst]]) & 1 == 1
+
+    def get_reachable(self, state: str, reflexive: bool = False) -> set[str]:
+        """
+        Names of the states reachable from the 'state' (including the 'state' itself, if 'reflexive').
+        """
+        closure = self.closure[self.component[self.state_index[state]]]
+        result: set[str] = set()
+        while closure != 0:
+            lowest = closure & -closure
+            result.update(self.members[lowest.bit_length() - 1])
+            closure ^= lowest
+        if reflexive:
+            result.add(state)
+        return result
+
+    def add_state(self, state: str, children: Iterable[str] = ()) -> None:
+        """
+        Add a new state (without parents) with transitions to the (known) 'children'.
+        """
+        if state in self.state_index:
+            raise ValueError(f"StateReachabilityClass.add_state(): state {state} already exists")
+        comp = len(self.closure)
+        self.component.append(comp)
+        self.intern_state(state)
+        self.closure.append(0)
+        self.parents.append(set())
+        self.members.append([state])
+        for child in children:
+            self.add_edge(state, child)
+
+    def add_edge(self, src: str, child: str) -> None:
+        """
+        Add an edge from 'src' to 'child', the closures of all components that reach 'src' are updated.
+        Components which would be merged by a new cycle stay separate, but reach each other (and themselves).
+        """
+        target = self.component[self.state_index[child]]
+        added = self.closure[target] | (1 << target)
+        comp = self.component[self.state_index[src]]
+        if comp != target:
+            self.parents[target].add(comp)
+        worklist: list[int] = [comp]
+        while worklist != []:
+            current = worklist.pop()
+            if self.closure[current] | added == self.closure[current]:
+                continue
+            self.closure[current] |= added
+            worklist.extend(self.parents[current])
+
+    def to_dict(self, reflexive: bool = False) -> dict[str, set[str]]:
+        return {state: self.get_reachable(state, reflexive) for state in self.state_names}
+
+    def memory_bytes(self) -> int:
+        """
+        Size of the closure bitsets.
+        """
+        return sum([sys.getsizeof(closure) for closure in self.closure])
 
 
 def get_all_state_reachability(ta: TTreeAut, reflexive=False) -> dict[str, set[str]]:
@@ -14,14 +185,9 @@ def get_all_state_reachability(ta: TTreeAut, reflexive=False) -> dict[str, set[s
     get a set of states that are top-down reachable from q.
 
     If reflexive=True, the state 'q' itself is also counted towards reachability.
+    See StateReachabilityClass for the underlying bitset representation (better for membership queries).
     """
-    old_roots: list[str] = [i for i in ta.roots]
-    result: dict[str, set[str]] = {}
-    for i in ta.get_states():
-        ta.roots = [i]
-        result[i] = set(reachable_top_down(ta, count_itself=reflexive))
-    ta.roots = [i for i in old_roots]
-    return result
+    return StateReachabilityClass(ta).to_dict(reflexive)
 
 
 def reachable_top_down(ta: TTreeAut, count_itself=True) -> list[str]:
@@ -30,6 +196,7 @@ def reachable_top_down(ta: TTreeAut, count_itself=True) -> list[str]:
     """
     worklist: list[str] = [i for i in ta.roots]
     result: list[str] = [i for i in ta.roots] if count_itself is True else []
+    found: set[str] = set(result)
 
     while len(worklist) > 0:
         state: str = worklist.pop()
@@ -39,9 +206,10 @@ def reachable_top_down(ta: TTreeAut, count_itself=True) -> list[str]:
 
         for edge in ta.transitions[state].values():
             for i in edge.children:
-                if i not in result:
+                if i not in found:
                     worklist.append(i)
                     result.append(i)
+                    found.add(i)
     return result
 
 
@@ -86,29 +254,33 @@ def reachable_bottom_up(ta: TTreeAut) -> list[str]:
     q0--a-->(q1, q2)  # q0 is bottom-up unreachable
     q1--b-->()        # because even though q2 has an output transition, thus is bottom-up reachable,
     q2--x-->(q2, q2)  # there is no output transition for q2 (only a "self-loop") - tree generation cannot terminate.
+
+    Works on the interned view of the TA (see 'indexed.py'). For each processed state and symbol, only transitions
+    with the state among their children are checked, whether all children were found reachable before
+    (the same transitions in the same order as when enumerating all child tuples of reachable states).
     """
-    worklist: list[str] = list(ta.get_output_states())
+    index = get_indexed(ta)
     result: list[str] = list(ta.get_output_states())
-    arity_dict: dict[str, int] = ta.get_symbol_arity_dict()
-    extended_arity_dict: dict[str, dict[str, list[int]]] = create_state_arity_dict(ta)
+    worklist: list[int] = [index.state_index[state] for state in result]
+    # state -> order in which it was found reachable
+    found: dict[int, int] = {state: i for i, state in enumerate(worklist)}
+    symbols: list[int] = [index.symbol_index[sym] for sym, arity in ta.get_symbol_arity_dict().items() if arity > 0]
     while len(worklist) > 0:
-        state: str = worklist.pop()
-        for symbol, arity in arity_dict.items():
-            if arity <= 0:
-                continue
-
-            # TODO: this can probably be simplified to omit extended_arity_dict
-            arities: list[int] = extended_arity_dict[symbol][state]
-            child_tuple_array: list[list[str]] = []
-            for a in arities:
-                child_tuple_array.extend(generate_possible_children(state, result, a))
-
-            for edge in iterate_edges(ta):
-                if edge.info.label != symbol or edge.children not in child_tuple_array:
+        state: int = worklist.pop()
+        parents: list[int] = index.get_parent_edges(state)
+        for symbol in symbols:
+            # child tuples only consist of states found before the symbol is processed
+            snapshot: int = len(found)
+            for edge in parents:
+                if index.edge_symbol[edge] != symbol:
+                    continue
+                if any([found.get(child, snapshot) >= snapshot for child in index.get_children(edge)]):
                     continue
-                if edge.src not in result:
-                    worklist.append(edge.src)
-                    result.append(edge.src)  # similarly for dictionary
+                src: int = index.edge_src[edge]
+                if src not in found:
+                    found[src] = len(found)
+                    worklist.append(src)
+                    result.append(index.state_names[src])
     return result
 
 
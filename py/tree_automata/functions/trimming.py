@@ -4,21 +4,20 @@
 [description] Making a tree automaton reduced (i.e. all states are accessible).
 """
 
-import copy
-
 from tree_automata import TTreeAut
 from tree_automata.functions.reachability import reachable_bottom_up, reachable_top_down
 
 
-def remove_useless_states(ta: TTreeAut) -> TTreeAut:
+def remove_useless_states(ta: TTreeAut, in_place: bool = False) -> TTreeAut:
     """
     Searches the tree from bottom-up and from top-down,
     removing unreachable states.
+    With 'in_place', 'ta' itself is trimmed (and returned) instead of its copy.
     """
     # TODO: Perhaps remove_useless_states could work as a fixpoint algorithm.
     # Since it is not clear, whether one bottom-up trim followed by one top-down
     # trim is enough.
-    work_ta: TTreeAut = copy.deepcopy(ta)
+    work_ta: TTreeAut = ta if in_place else ta.copy()
     bottom_up_reachable_states: list[str] = reachable_bottom_up(work_ta)
     work_ta.shrink_tree_aut(bottom_up_reachable_states)
     top_down_reachable_states: list[str] = reachable_top_down(work_ta)
@@ -30,7 +29,7 @@ def shrink_to_top_down_reachable(ta: TTreeAut) -> TTreeAut:
     """
     Removes the states from the automaton that are top-down unreachable.
     """
-    work_ta = copy.deepcopy(ta)
+    work_ta = ta.copy()
     top_down_reachable_states: set[str] = set(reachable_top_down(work_ta))
     unreachable_states = set(i for i in work_ta.get_states() if i not in top_down_reachable_states)
     for i in unreachable_states:
@@ -38,11 +37,11 @@ def shrink_to_top_down_reachable(ta: TTreeAut) -> TTreeAut:
     return work_ta
 
 
-def shrink_to_top_down_reachable_2(ta: TTreeAut) -> TTreeAut:
+def shrink_to_top_down_reachable_2(ta: TTreeAut, in_place: bool = False) -> TTreeAut:
     """
     Probably more efficient version of shrink_to_top_down_reachable().
     """
-    work_treeaut: TTreeAut = copy.deepcopy(ta)
+    work_treeaut: TTreeAut = ta if in_place else ta.copy()
     # reachable_states_bottomup = reachable_states_bottomup(work_treeaut)
     # work_treeaut.shrink_tree_aut(reachable_states_bottomup)
     reachable_states_top_down: list[str] = reachable_top_down(work_treeaut)
@@ -50,15 +49,16 @@ def shrink_to_top_down_reachable_2(ta: TTreeAut) -> TTreeAut:
     return work_treeaut
 
 
-def trim(ta: TTreeAut) -> TTreeAut:
+def trim(ta: TTreeAut, in_place: bool = False) -> TTreeAut:
     """
     During folding, intersectoid trimming took too long,
     because the bottom-up reachability is more complicated,
     so this version is used there, which firstly removes top-down unreachable states,
     since created intersectoids contain many such states, increasing the complexity.
+    Intersectoids are created only for the trimming, so they are trimmed 'in_place' (deep copies would dominate).
     """
-    work_treeaut: TTreeAut = shrink_to_top_down_reachable_2(ta)
-    return remove_useless_states(work_treeaut)
+    work_treeaut: TTreeAut = shrink_to_top_down_reachable_2(ta, in_place)
+    return remove_useless_states(work_treeaut, in_place=True)
 
     # TODO: further definition/explanation needed possibly
     # remove transitions over variables which are clearly unnecessary
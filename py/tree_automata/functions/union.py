@@ -4,8 +4,6 @@
 [description] Union of two tree automata.
 """
 
-import copy
-
 from tree_automata import TTreeAut
 
 
@@ -19,7 +17,7 @@ def tree_aut_union(ta1: TTreeAut, ta2: TTreeAut) -> TTreeAut:
     Essentially, just merging transition dictionaries and set of rootstates.
     But before merging, name resolution is needed for states with the same name.
     """
-    result: TTreeAut = copy.deepcopy(ta2)
+    result: TTreeAut = ta2.copy()
     result.name = f"union({ta1.name},{ta2.name})"
 
     # remove name collisions by renaming states in a new automaton
@@ -27,8 +25,10 @@ def tree_aut_union(ta1: TTreeAut, ta2: TTreeAut) -> TTreeAut:
         if state_name in result.transitions:
             result.rename_state(state_name, str(state_name) + "_new")
 
-    # merge the two automata
+    # merge the two automata (transitions of 'ta1' are shared, see TTreeAut.copy())
     result.transitions = {**result.transitions, **ta1.transitions}
+    ta1.shared_states.update(ta1.transitions)
+    result.shared_states.update(ta1.transitions)
     result.roots = result.roots + ta1.roots
     result.port_arity = result.get_port_arity()
     return result
@@ -0,0 +1,143 @@
+"""
+[file] indexed.py
+[author] Jany26  (Jan Matufka)  <xmatuf00@stud.fit.vutbr.cz>
+[description] Integer-indexed (interned) view of a tree automaton used by the bottom-up algorithms.
+"""
+
+from typing import Iterator
+
+from tree_automata.automaton import TTreeAut
+from tree_automata.transition import TTransition
+
+
+class IndexedTreeAut:
+    """
+    Read-only view of a TTreeAut, in which states, edge symbols and variables are interned as small integers
+    and the transitions are stored in flat (CSR-like) integer tables:
+
+    'edge_src[e]', 'edge_symbol[e]', 'edge_variable[e]' - source state, symbol and variable of transition 'e',
+    'children[child_offsets[e] : child_offsets[e + 1]]' - child states of transition 'e',
+    'out_start[s] ... out_end[s] - 1' - transitions stored under state 's' (they are contiguous),
+    'parent_edges[parent_offsets[s] : parent_offsets[s + 1]]' - transitions with 's' among the children
+    (each transition once, in increasing order).
+
+    Transitions are numbered in the order of iterate_key_edge_tuples(), so algorithms iterating over the indices
+    behave the same as the ones iterating over the TTreeAut. String names (and the original TTransition objects
+    in 'edges', their keys in 'edge_keys') are kept only for the results and printing.
+
+    The view does not track changes of the underlying TTreeAut. get_indexed() keeps it in the derived data cache
+    of the automaton, so it is rebuilt only after the automaton was modified (see TTreeAut.get_cached()).
+    """
+
+    def __init__(self, ta: TTreeAut):
+        self.ta = ta
+        self.state_names: list[str] = []
+        self.state_index: dict[str, int] = {}
+        self.symbol_names: list[str] = []
+        self.symbol_index: dict[str, int] = {}
+        self.variable_names: list[str] = []
+        self.variable_index: dict[str, int] = {}
+
+        self.edges: list[TTransition] = []
+        self.edge_keys: list[str] = []
+        self.edge_src: list[int] = []
+        self.edge_symbol: list[int] = []
+        self.edge_variable: list[int] = []
+        self.child_offsets: list[int] = [0]
+        self.children: list[int] = []
+        out_ranges: list[tuple[int, int]] = []
+
+        for state, edges in ta.transitions.items():
+            src = self.intern_state(state)
+            start = len(self.edges)
+            for key, edge in edges.items():
+                self.edges.append(edge)
+                self.edge_keys.append(key)
+                self.edge_src.append(self.intern_state(edge.src))
+                self.edge_symbol.append(self.intern(edge.info.label, self.symbol_names, self.symbol_index))
+                self.edge_variable.append(self.intern(edge.info.variable, self.variable_names, self.variable_index))
+                self.children.extend([self.intern_state(child) for child in edge.children])
+                self.child_offsets.append(len(self.children))
+            out_ranges.append((src, start))
+        self.roots: list[int] = [self.intern_state(root) for root in ta.roots]
+
+        state_count = len(self.state_names)
+        self.out_start: list[int] = [0] * state_count
+        self.out_end: list[int] = [0] * state_count
+        for i, (src, start) in enumerate(out_ranges):
+            self.out_start[src] = start
+            self.out_end[src] = out_ranges[i + 1][1] if i + 1 < len(out_ranges) else len(self.edges)
+
+        # reverse (child -> transitions) index, counting sort by the child state
+        counts = [0] * (state_count + 1)
+        for e in range(len(self.edges)):
+            for child in set(self.get_children(e)):
+                counts[child + 1] += 1
+        for s in range(state_count):
+            counts[s + 1] += counts[s]
+        self.parent_offsets: list[int] = counts[:]
+        self.parent_edges: list[int] = [0] * counts[-1]
+        for e in range(len(self.edges)):
+            for child in set(self.get_children(e)):
+                self.parent_edges[counts[child]] = e
+                counts[child] += 1
+
+    @staticmethod
+    def intern(name: str, names: list[str], index: dict[str, int]) -> int:
+        result = index.get(name)
+        if result is None:
+            result = len(names)
+            index[name] = result
+            names.append(name)
+        return result
+
+    def intern_state(self, name: str) -> int:
+        return self.intern(name, self.state_names, self.state_index)
+
+    def count_states(self) -> int:
+        return len(self.state_names)
+
+    def count_edges(self) -> int:
+        return len(self.edges)
+
+    def get_children(self, edge: int) -> list[int]:
+        return self.children[self.child_offsets[edge] : self.child_offsets[edge + 1]]
+
+    def get_arity(self, edge: int) -> int:
+        return self.child_offsets[edge + 1] - self.child_offsets[edge]
+
+    def get_out_edges(self, state: int) -> range:
+        """
+        Transitions stored under 'state' (in the TTreeAut transition dictionary of the state).
+        """
+        return range(self.out_start[state], self.out_end[state])
+
+    def get_parent_edges(self, state: int) -> list[int]:
+        return self.parent_edges[self.parent_offsets[state] : self.parent_offsets[state + 1]]
+
+    def iterate_output_states(self) -> Iterator[int]:
+        """
+        States with an output transition (transition without children) under them.
+        """
+        for state in range(self.count_states()):
+            if any([self.get_arity(e) == 0 for e in self.get_out_edges(state)]):
+                yield state
+
+    def get_state_names(self, states: list[int]) -> list[str]:
+        return [self.state_names[s] for s in states]
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}({self.ta.name}: {self.count_states()} states, "
+            f"{len(self.symbol_names)} symbols, {self.count_edges()} transitions)"
+        )
+
+
+def get_indexed(ta: TTreeAut) -> IndexedTreeAut:
+    """
+    Interned view of 'ta', cached until 'ta' is modified. The view is shared, it must not be changed.
+    """
+    return ta.get_cached(("get_indexed", tuple(ta.roots)), lambda: IndexedTreeAut(ta))
+
+
+# End of file indexed.py
@@ -47,6 +47,12 @@ class TEdge:
             result += "]"
         return result
 
+    def copy(self) -> "TEdge":
+        """
+        Copy of the edge info with its own box array (box names are shared).
+        """
+        return TEdge(self.label, [b for b in self.box_array], self.variable)
+
     def shorten_edge(self):
         """
         Make the hyper-edge 'short' (all parts of the edge)
@@ -101,6 +107,13 @@ class TTransition:
             ]
         )
 
+    def copy(self) -> "TTransition":
+        """
+        Copy of the transition, which can be modified independently of the original
+        (cheaper alternative to copy.deepcopy()).
+        """
+        return TTransition(self.src, self.info.copy(), [c for c in self.children])
+
     def is_self_loop(self) -> bool:
         if self.src in self.children:
             return True
@@ -61,6 +61,7 @@ def add_variables_bottom_up(ta: TTreeAut, max_var: int):
             true_leaves.add(leaf)
     var_lookup = convert_vars(ta.get_var_order(), var_prefix)
 
+    ta.own_all_states()
     for edge in iterate_edges(ta):
         if edge.info.variable != "" or edge.src in edge.children:
             continue
@@ -72,6 +73,7 @@ def add_variables_bottom_up(ta: TTreeAut, max_var: int):
             if child in true_leaves:
                 edge.info.variable = f"{var_prefix}{max_var}"
     # end for
+    ta.invalidate()
 
 
 def saturate_box_edges_with_variables(
@@ -86,6 +88,7 @@ def saturate_box_edges_with_variables(
     `max_var` is the maximum variable of the whole UBDA.
     """
     variable_map: dict[str, int] = {}
+    box.own_all_states()
     # store state-key pairs of edges that "can" and should be saturated, basically non-self-loops
     work_set: set[TTransition] = set()
     selflooping_states: set[str] = set()
@@ -167,6 +170,7 @@ def saturate_box_edges_with_variables(
 
         if len(used_edges) == 0 or len(work_set) == 0:  # if no progress is done, terminate.
             break
+    box.invalidate()
 
 
 def add_variables_fixpoint(ta: TTreeAut, maxvar: Optional[int] = None):
@@ -183,6 +187,7 @@ def add_variables_fixpoint(ta: TTreeAut, maxvar: Optional[int] = None):
     variable_map: dict[str, int] = {}
     selfloop_states: set[str] = set()
     var_prefix = ta.get_var_prefix()
+    ta.own_all_states()
 
     # initialization phase - find edges  set maxvar, get selfloop states, get state->variable info
     for edge in iterate_edges(ta):
@@ -244,6 +249,7 @@ def add_variables_fixpoint(ta: TTreeAut, maxvar: Optional[int] = None):
 
         if len(used_set) == 0 or len(work_set) == 0:  # if no changes can be made, we stop
             break
+    ta.invalidate()
 
 
 def check_variable_overlap(ta: TTreeAut, max_var: Optional[int] = None) -> bool: